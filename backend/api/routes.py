@@ -1,43 +1,88 @@
 """
 API routes for Gold Trading Agent
 """
+import json
 import logging
 from datetime import datetime
+from typing import AsyncIterator, Literal
 
+import numpy as np
 import pandas as pd
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
 from core.config import settings
 from models.schemas import (
+    BatchAnalysisItem,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
     ChartData,
+    ChartDataPoint,
+    ChartSeries,
     ChatRequest,
     ChatResponse,
     GoldPriceItem,
     GoldPricesResponse,
+    IndicatorCacheStats,
     LLMStats,
     MarketAnalysis,
     MarketDepthResponse,
-    MarketState,
+    MultiTimeframeResponse,
     OrderLevel,
     PriceResponse,
     RefreshRequest,
     RefreshResponse,
+    SnapshotStatus,
+    WebSocketStats,
 )
-from services.data_provider import data_provider
+from services.data_provider import async_data_provider
+from services.indicator_cache import indicator_cache
 from services.indicators import indicator_calculator
 from services.llm_client import llm_client
-from services.strategy import strategy_engine
+from services.market_snapshot import age_seconds, default_interval, market_snapshot
+from utils.fast_json import FastJSONResponse
+from websocket_server import manager as ws_manager
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _chart_columns(chart_df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Parallel chart arrays: epoch-ms timestamps, close and moving averages"""
+    dates = chart_df["date"]
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+
+    def column(name: str) -> np.ndarray:
+        if name not in chart_df.columns:
+            return np.full(len(chart_df), np.nan)
+        return chart_df[name].to_numpy(dtype=np.float64)
+
+    return {
+        "timestamps": dates.to_numpy(dtype="datetime64[ms]").astype(np.int64),
+        "close": column("close"),
+        "ma_short": column(f"SMA_{indicator_calculator.short_ma}"),
+        "ma_mid": column(f"SMA_{indicator_calculator.mid_ma}"),
+    }
+
+
+def _nan_to_none(values: np.ndarray) -> list[float | None]:
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def _set_age(response: Response, updated_at: datetime):
+    """Staleness of snapshot-served data, in whole seconds (HTTP ``Age``)"""
+    response.headers["Age"] = str(int(age_seconds(updated_at)))
+
+
 @router.get("/analysis", response_model=MarketAnalysis)
 async def get_analysis(
+    response: Response,
     period: str = settings.DEFAULT_PERIOD,
     interval: str | None = None,
+    symbol: str = settings.GOLD_SYMBOL,
 ) -> MarketAnalysis:
     """
     Get current market analysis
@@ -49,194 +94,55 @@ async def get_analysis(
     - Position suggestion
         - Educational explanation (rule-based or LLM-enhanced)
         - News items
+
+    Served from the shared market snapshot (refreshed in the background);
+    the ``Age`` header gives the snapshot's staleness in seconds and
+    ``Server-Timing`` the stage durations of the computation that built it.
     """
     try:
-        # Fetch gold price data
-        logger.info("Fetching gold price data...")
-        if interval is None:
-            period_interval_map = {
-                "1d": "1m",    # 分
-                "1mo": "1d",   # 日
-                "1y": "1wk",   # 周
-                "5y": "1mo",   # 月
-                "max": "1mo",  # 年
-            }
-            interval = period_interval_map.get(period, "1d")
-
-        df = data_provider.fetch_price_data(
-            symbol=settings.GOLD_SYMBOL,
-            period=period,
-            interval=interval,
-        )
-
-        if df.empty:
-            raise HTTPException(status_code=404, detail="No data available")
-
-        # Calculate indicators
-        logger.info("Calculating indicators...")
-        df = indicator_calculator.calculate_all(df)
+        view = await market_snapshot.get_analysis(period, interval, symbol)
+        _set_age(response, view.updated_at)
+        response.headers["Server-Timing"] = view.timings
+        return view.analysis
 
-        # Fetch more raw news for LLM filtering (or fewer if LLM is disabled)
-        raw_news_limit = 20 if llm_client.enabled else 10
-        logger.info(f"Fetching news items (limit={raw_news_limit})...")
-        raw_news_items = data_provider.get_news_items(symbol=settings.GOLD_SYMBOL, limit=raw_news_limit)
+    except Exception as e:
+        logger.error(f"Error in analysis: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Initialize LLM enhanced fields
-        llm_explanation = None
-        news_items = raw_news_items  # Default to keyword-filtered news
 
-        # Try to use LLM for intelligent news filtering and analysis
-        if llm_client.enabled and raw_news_items:
-            try:
-                logger.info("Using LLM for intelligent news filtering and analysis...")
-                llm_payload = [
-                    {"headline": item.get("title", ""), "summary": item.get("content", "")}
-                    for item in raw_news_items
-                ]
-                llm_news_result = await llm_client.analyze_news_sentiment(llm_payload)
-
-                if llm_news_result and "items" in llm_news_result:
-                    llm_items = llm_news_result["items"]
-                    if llm_items:
-                        # Rebuild news_items from LLM analysis (only relevant news)
-                        filtered_news = []
-                        for llm_item in llm_items:
-                            # Find original news by index or headline matching
-                            idx = llm_item.get("index", 0) - 1  # LLM uses 1-based index
-                            if 0 <= idx < len(raw_news_items):
-                                original = raw_news_items[idx].copy()
-                            else:
-                                # Fallback: match by headline
-                                headline = llm_item.get("headline", "")
-                                original = next(
-                                    (n.copy() for n in raw_news_items if n.get("title", "") == headline),
-                                    None
-                                )
-                                if not original:
-                                    continue
-
-                            # Update with LLM analysis
-                            original["sentiment"] = llm_item.get("sentiment", "中性")
-                            original["relevance"] = llm_item.get("relevance", "中")
-                            llm_reason = llm_item.get("reason")
-                            if llm_reason and isinstance(llm_reason, str) and llm_reason.strip():
-                                original["reason"] = llm_reason.strip()
-                            filtered_news.append(original)
-
-                        if filtered_news:
-                            news_items = filtered_news[:10]  # Keep top 10 relevant news
-                            logger.info(f"LLM filtered {len(raw_news_items)} → {len(news_items)} relevant news items")
-
-                            # Log key factors if available
-                            key_factors = llm_news_result.get("key_factors", [])
-                            if key_factors:
-                                logger.info(f"Key market factors: {', '.join(key_factors)}")
-            except Exception as e:
-                logger.warning(f"LLM news analysis failed: {e}. Using keyword-based filtering.")
-                news_items = raw_news_items[:10]  # Fallback to keyword-filtered news
-
-        # Fetch DXY (US Dollar Index) data
-        logger.info("Fetching DXY data...")
-        dxy_data = data_provider.fetch_price_data(
-            symbol=settings.DXY_SYMBOL,
-            period="5d",
-            interval="1d",
-        )
-
-        dxy_price = None
-        dxy_change_pct = None
-        if not dxy_data.empty and len(dxy_data) >= 2:
-            dxy_latest = dxy_data.iloc[-1]
-            dxy_previous = dxy_data.iloc[-2]
-            dxy_price = float(dxy_latest["close"])
-            dxy_change = dxy_price - float(dxy_previous["close"])
-            dxy_change_pct = (dxy_change / float(dxy_previous["close"])) * 100
-
-        # Fetch real interest rate data
-        logger.info("Fetching real interest rate data...")
-        real_rate_data = data_provider.get_real_interest_rate()
-        real_rate = real_rate_data.get("real_rate")
-        nominal_rate = real_rate_data.get("nominal_rate")
-        inflation_rate = real_rate_data.get("inflation_rate")
-
-        # Get latest data for LLM context
-        latest = df.iloc[-1]
-        current_price = float(latest["close"])
-        support = latest.get("support_level")
-        resistance = latest.get("resistance_level")
-
-        # Determine market state for LLM context
-        market_state = strategy_engine._determine_market_state(df)
-        state_map = {
-            MarketState.STRONG_BULL: "强势上涨",
-            MarketState.BULL_TREND: "上涨趋势",
-            MarketState.RANGE: "区间震荡",
-            MarketState.BEAR_TREND: "下跌趋势",
-            MarketState.STRONG_BEAR: "强势下跌",
-            MarketState.HIGH_VOLATILITY: "高波动",
-            MarketState.UNCLEAR: "不清晰",
-            MarketState.TREND: "趋势模式",  # 兼容旧代码
-        }
-
-        # Generate trading signal for LLM context (with news for sentiment)
-        sentiment_score = strategy_engine._calculate_sentiment_score(news_items)
-        signal = strategy_engine._generate_signal(
-            df, 
-            market_state, 
-            news_items=news_items,
-            sentiment_score=sentiment_score,
-            dxy_change_pct=dxy_change_pct,
-            real_rate=real_rate,
-        )
+@router.post("/analysis/batch", response_model=BatchAnalysisResponse)
+async def get_batch_analysis(request: BatchAnalysisRequest) -> BatchAnalysisResponse:
+    """
+    Get market analyses for several (symbol, period, interval) targets
 
-        # Try to generate LLM-enhanced explanation if enabled
-        if llm_client.enabled:
-            try:
-                logger.info("Generating LLM-enhanced explanation...")
-                sentiment_payload = [
-                    {"headline": item.get("title", ""), "sentiment": item.get("sentiment", "中性")}
-                    for item in news_items
-                ]
-                llm_explanation = await llm_client.generate_explanation(
-                    market_state=state_map.get(market_state, "未知"),
-                    trend_dir=latest.get("trend_dir", "neutral"),
-                    current_price=current_price,
-                    support=support,
-                    resistance=resistance,
-                    signal=signal.signal_level.value,
-                    signal_reason=signal.signal_reason,
-                    news_sentiment=sentiment_payload,
-                )
-                if llm_explanation:
-                    logger.info("LLM explanation generated successfully")
-                else:
-                    logger.info("LLM explanation generation returned None (using rule-based)")
-            except Exception as e:
-                logger.warning(f"LLM explanation generation failed: {e}. Using rule-based explanation.")
-
-        # Run strategy analysis with news data
-        logger.info("Running strategy analysis...")
-
-        analysis = strategy_engine.analyze(
-            df,
-            settings.GOLD_SYMBOL,
-            news_items=news_items,
-            llm_explanation=llm_explanation,
-            dxy_price=dxy_price,
-            dxy_change_pct=dxy_change_pct,
-            real_rate=real_rate,
-            nominal_rate=nominal_rate,
-            inflation_rate=inflation_rate,
+    E.g. gold, silver, PAXG, the 10-year yield and the dollar index across
+    minute, daily and weekly bars in one call. Targets are analyzed
+    concurrently and share one fetch of the news and macro inputs; a
+    target that fails carries an ``error`` instead of failing the batch.
+    """
+    if len(request.targets) > settings.BATCH_ANALYSIS_MAX_TARGETS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.BATCH_ANALYSIS_MAX_TARGETS} targets per batch",
         )
 
-        # Add indicators to analysis
-        analysis.indicators = indicator_calculator.get_latest_indicators(df)
-
-        return analysis
-
-    except Exception as e:
-        logger.error(f"Error in analysis: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    targets = []
+    for target in request.targets:
+        period = target.period or settings.DEFAULT_PERIOD
+        targets.append((target.symbol or settings.GOLD_SYMBOL, period, target.interval or default_interval(period)))
+
+    results = []
+    for (symbol, period, interval), view in zip(targets, await market_snapshot.get_analyses(targets)):
+        item = BatchAnalysisItem(symbol=symbol, period=period, interval=interval)
+        if isinstance(view, Exception):
+            logger.error(f"Error in batch analysis of {symbol} ({period}/{interval}): {view}")
+            item.error = str(view)
+        else:
+            item.analysis = view.analysis
+            item.updated_at = view.updated_at
+            item.age_seconds = age_seconds(view.updated_at)
+        results.append(item)
+    return BatchAnalysisResponse(results=results)
 
 
 @router.post("/refresh", response_model=RefreshResponse)
@@ -254,7 +160,7 @@ async def refresh_data(request: RefreshRequest) -> RefreshResponse:
         use_cache = not request.force
 
         # Fetch fresh data
-        df = data_provider.fetch_price_data(
+        df = await async_data_provider.fetch_price_data(
             symbol=settings.GOLD_SYMBOL,
             period=settings.DEFAULT_PERIOD,
             use_cache=use_cache,
@@ -266,6 +172,9 @@ async def refresh_data(request: RefreshRequest) -> RefreshResponse:
                 message="Failed to fetch data",
             )
 
+        # Views built from the previous data are rebuilt on the next read
+        market_snapshot.invalidate()
+
         return RefreshResponse(
             success=True,
             message="Data refreshed successfully",
@@ -281,22 +190,23 @@ async def refresh_data(request: RefreshRequest) -> RefreshResponse:
 
 
 @router.get("/price", response_model=PriceResponse)
-async def get_price_only() -> PriceResponse:
+async def get_price_only(response: Response) -> PriceResponse:
     """
-    Get current gold price only (bypass cache for 10s auto-refresh)
+    Get current gold price only
+
+    Read from the market snapshot, whose quote is refreshed every
+    ``SNAPSHOT_PRICE_INTERVAL`` seconds regardless of how many clients poll.
 
     Returns:
-        Current price with change data and refresh timestamp
+        Current price with change data and the time the quote was fetched
     """
     try:
-        import yfinance as yf
-
-        # 使用 yfinance 的 fast_info 获取实时数据
-        ticker = yf.Ticker(settings.GOLD_SYMBOL)
-        info = ticker.fast_info
+        view = await market_snapshot.get_quote()
+        _set_age(response, view.updated_at)
+        quote = view.data
 
-        current_price = float(info.last_price)
-        prev_close = float(info.previous_close) if info.previous_close else current_price
+        current_price = float(quote["last_price"])
+        prev_close = float(quote["previous_close"]) if quote["previous_close"] else current_price
 
         # 基于昨日收盘价计算涨跌（金融行业标准，与伦敦金卡片保持一致）
         price_change = current_price - prev_close
@@ -307,7 +217,7 @@ async def get_price_only() -> PriceResponse:
             current_price=current_price,
             price_change=price_change,
             price_change_pct=price_change_pct,
-            price_refresh_time=datetime.now(),
+            price_refresh_time=view.updated_at,
         )
 
     except Exception as e:
@@ -321,16 +231,21 @@ async def get_price_only() -> PriceResponse:
         )
 
 
-@router.get("/chart", response_model=ChartData)
+@router.get("/chart", response_model=ChartSeries | ChartData)
 async def get_chart_data(
+    response: Response,
     symbol: str = settings.GOLD_SYMBOL,
     period: str = settings.DEFAULT_PERIOD,
     interval: str | None = None,  # 新增interval参数
-) -> ChartData:
+    response_format: Literal["columnar", "points"] = Query("columnar", alias="format"),
+):
     """
     Get chart data for visualization
 
-    Returns price data with indicators for ECharts visualization
+    Returns price data with indicators for ECharts visualization. The
+    default columnar shape holds parallel arrays (timestamps, close,
+    ma_short, ma_mid; NaN -> null); ``format=points`` returns the legacy
+    list of points. Indicator frames come from the market snapshot.
 
     支持的周期映射:
     - 分: period="1d", interval="1m"
@@ -340,97 +255,138 @@ async def get_chart_data(
     - 年: period="max", interval="1mo"
     """
     try:
-        # 根据period自动映射interval(如果未提供)
-        if interval is None:
-            period_interval_map = {
-                "1d": "1m",    # 分
-                "1mo": "1d",   # 日
-                "1y": "1wk",   # 周
-                "5y": "1mo",   # 月
-                "max": "1mo",  # 年
-            }
-            interval = period_interval_map.get(period, "1d")
-
-        # 为了计算 MA60，需要获取更长的历史数据
-        # 映射：用户请求的 period -> 实际获取的 period（确保有足够数据计算均线）
-        fetch_period_map = {
-            "1d": "5d",      # 分钟图：获取5天数据（确保有足够数据）
-            "1mo": "6mo",    # 日线图：获取6个月数据（约120天，够MA60）
-            "1y": "2y",      # 周线图：获取2年数据（约104周，够MA60）
-            "5y": "10y",     # 月线图：获取10年数据（约120月，够MA60）
-            "max": "max",    # 年线图：获取全部数据
-        }
-        fetch_period = fetch_period_map.get(period, period)
-
-        # Fetch data with extended period for MA calculation
-        df = data_provider.fetch_price_data(
-            symbol=symbol,
-            period=fetch_period,
-            interval=interval,
-        )
-
-        if df.empty:
-            raise HTTPException(status_code=404, detail="No data available")
-
-        # Calculate indicators
-        df = indicator_calculator.calculate_all(df)
-
-        # Extract key levels from latest data
-        latest = df.iloc[-1]
-        key_levels = {}
-        if not latest.empty:
-            if "support_level" in latest and not latest.isna()["support_level"]:
-                key_levels["support"] = float(latest["support_level"])
-            if "resistance_level" in latest and not latest.isna()["resistance_level"]:
-                key_levels["resistance"] = float(latest["resistance_level"])
-            if "range_high" in latest and not latest.isna()["range_high"]:
-                key_levels["range_high"] = float(latest["range_high"])
-            if "range_low" in latest and not latest.isna()["range_low"]:
-                key_levels["range_low"] = float(latest["range_low"])
-
-        # Convert to chart data points
-        from models.schemas import ChartDataPoint
-
-        # 根据用户请求的 period 决定显示的数据点数量
-        # 注意：我们获取了更多历史数据用于计算均线，但只显示用户期望的时间范围
-        tail_map = {
-            "1d": 390,    # 分: 展示约一个交易日（6.5小时 * 60分钟）
-            "1mo": 22,    # 日: 展示约1个月（~22个交易日）
-            "1y": 52,     # 周: 展示约1年（52周）
-            "5y": 60,     # 月: 展示约5年（60个月）
-            "max": 300,   # 年: 展示全部（限制最大300个月）
-        }
-        tail_size = tail_map.get(period, 120)
-        chart_df = df.tail(tail_size) if len(df) > tail_size else df
-
-        data_points = []
-        for _, row in chart_df.iterrows():
-            ma_short_value = row.get("SMA_20")
-            ma_mid_value = row.get("SMA_60")
-            point = ChartDataPoint(
-                date=row["date"].to_pydatetime(),
-                price=float(row["close"]),
-                ma_short=float(ma_short_value)
-                if ma_short_value is not None and not pd.isna(ma_short_value)
-                else None,
-                ma_mid=float(ma_mid_value)
-                if ma_mid_value is not None and not pd.isna(ma_mid_value)
-                else None,
+        view = await market_snapshot.get_chart(symbol, period, interval)
+        interval = view.interval
+        chart_df = view.frame
+        key_levels = view.key_levels
+        columns = _chart_columns(chart_df)
+        _set_age(response, view.updated_at)
+
+        if response_format == "points":
+            # Legacy point-list shape
+            return ChartData(
+                symbol=symbol,
+                period=period,
+                data=[
+                    ChartDataPoint(date=date, price=price, ma_short=ma_short, ma_mid=ma_mid)
+                    for date, price, ma_short, ma_mid in zip(
+                        chart_df["date"].dt.to_pydatetime(),
+                        columns["close"].tolist(),
+                        _nan_to_none(columns["ma_short"]),
+                        _nan_to_none(columns["ma_mid"]),
+                    )
+                ],
+                key_levels=key_levels,
+                support_zones=view.support_zones,
+                resistance_zones=view.resistance_zones,
             )
-            data_points.append(point)
 
-        return ChartData(
-            symbol=symbol,
-            period=period,
-            data=data_points,
-            key_levels=key_levels,
-        )
+        return FastJSONResponse({
+            "symbol": symbol,
+            "period": period,
+            "interval": interval,
+            **columns,
+            "key_levels": key_levels,
+            "support_zones": [zone.model_dump(mode="json") for zone in view.support_zones],
+            "resistance_zones": [zone.model_dump(mode="json") for zone in view.resistance_zones],
+        }, headers=dict(response.headers))
 
     except Exception as e:
         logger.error(f"Error getting chart data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/timeframes", response_model=MultiTimeframeResponse)
+async def get_timeframes(
+    response: Response,
+    symbol: str = settings.GOLD_SYMBOL,
+    base_interval: str | None = None,
+) -> MultiTimeframeResponse:
+    """
+    Get the multi-timeframe confluence for a symbol
+
+    The 1h / 4h / 1d / 1wk bars are all resampled from one stored base
+    series (``MTF_BASE_INTERVAL``, hourly bars over ``MTF_BASE_PERIOD`` by
+    default), so a single upstream fetch serves every timeframe. Timeframes
+    with too little history are listed with weight 0.
+    """
+    try:
+        view = await market_snapshot.get_timeframes(symbol, base_interval)
+        _set_age(response, view.updated_at)
+        return MultiTimeframeResponse(
+            symbol=view.symbol,
+            base_interval=view.base_interval,
+            base_bars=view.base_bars,
+            confluence=view.confluence,
+            updated_at=view.updated_at,
+        )
+
+    except Exception as e:
+        logger.error(f"Error getting timeframes: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _rule_based_answer(question_lower: str, analysis: MarketAnalysis) -> str:
+    """Answer the supported question types from the analysis alone"""
+    if "为什么" in question_lower or "信号" in question_lower:
+        answer = f"**当前信号**: {analysis.signal.signal_level.value}\n\n"
+        answer += f"**原因**: {analysis.signal.signal_reason}\n\n"
+        if analysis.signal.risk_warning:
+            answer += f"**风险提示**: {analysis.signal.risk_warning}"
+        return answer
+
+    elif "关键位" in question_lower or "支撑" in question_lower or "阻力" in question_lower:
+        answer = "**关键价位**:\n\n"
+        if analysis.indicators.support_level:
+            answer += f"支撑位: {analysis.indicators.support_level:.2f}\n"
+        if analysis.indicators.resistance_level:
+            answer += f"阻力位: {analysis.indicators.resistance_level:.2f}\n"
+        if analysis.indicators.range_low:
+            answer += f"区间下沿: {analysis.indicators.range_low:.2f}\n"
+        if analysis.indicators.range_high:
+            answer += f"区间上沿: {analysis.indicators.range_high:.2f}\n"
+        return answer
+
+    elif "操作" in question_lower or "建议" in question_lower or "下一步" in question_lower:
+        answer = f"**建议操作**: {analysis.signal.signal_reason}\n\n"
+        if analysis.signal.entry_zone:
+            answer += f"入场区: {analysis.signal.entry_zone:.2f}\n"
+        if analysis.signal.stop_zone:
+            answer += f"止损区: {analysis.signal.stop_zone:.2f}\n"
+        if analysis.signal.target_zone:
+            answer += f"目标区: {analysis.signal.target_zone:.2f}\n"
+        answer += f"\n仓位建议: {analysis.signal.position_level.value}"
+        return answer
+
+    elif "新闻" in question_lower:
+        if not analysis.news_items:
+            return "暂无新闻数据"
+
+        answer = "**近期新闻事件**:\n\n"
+        for news in analysis.news_items[:5]:
+            sentiment_emoji = {"利多": "📈", "利空": "📉", "中性": "➡️"}.get(news.get("sentiment", ""), "")
+            answer += f"{sentiment_emoji} **{news.get('title')}** ({news.get('news_time')})\n"
+            content = news.get("content") or ""
+            if content:
+                answer += f"  - {content}\n"
+            if news.get("source"):
+                answer += f"  - 来源: {news.get('source')}\n"
+            if news.get("url"):
+                answer += f"  - 链接: {news.get('url')}\n"
+            answer += "\n"
+
+        return answer
+
+    else:
+        return (
+            "您可以询问:\n"
+            "- 为什么给出该信号？\n"
+            "- 当前关键位是什么？\n"
+            "- 下一步建议如何操作？\n"
+            "- 近期重要新闻有哪些？"
+        )
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_query(request: ChatRequest) -> ChatResponse:
     """
@@ -442,56 +398,21 @@ async def chat_query(request: ChatRequest) -> ChatResponse:
     - "下一步建议如何操作？"
     - "近期重要新闻有哪些？"
     - And other open-ended questions (if LLM is enabled)
+
+    Answers are based on the daily-bar analysis of ``DEFAULT_PERIOD``.
     """
     try:
         question = request.question.strip()
-        question_lower = question.lower().strip()
-
-        # Get current analysis for context (with macro and news)
-        df = data_provider.fetch_price_data(
-            symbol=settings.GOLD_SYMBOL,
-            period=settings.DEFAULT_PERIOD,
-        )
-        df = indicator_calculator.calculate_all(df)
-
-        # Fetch news items
-        news_items = data_provider.get_news_items(symbol=settings.GOLD_SYMBOL, limit=10)
-
-        analysis = strategy_engine.analyze(
-            df,
-            settings.GOLD_SYMBOL,
-            news_items=news_items,
-        )
-        analysis.indicators = indicator_calculator.get_latest_indicators(df)
+        view = await market_snapshot.get_chat_analysis()
+        analysis, llm_context, news_items = view.analysis, view.llm_context, view.news_items
 
         # Try LLM first if enabled (for all question types)
         if llm_client.enabled:
             try:
-                # Build rich context for LLM (including macro data and news)
-                latest = df.iloc[-1]
-                current_analysis_context = {
-                    "market_state": analysis.market_state.value,
-                    "trend_dir": latest.get("trend_dir", "neutral"),
-                    "current_price": analysis.current_price,
-                    "price_change_pct": analysis.price_change_pct,
-                    "signal": analysis.signal.signal_level.value,
-                    "signal_reason": analysis.signal.signal_reason,
-                    "support": analysis.indicators.support_level,
-                    "resistance": analysis.indicators.resistance_level,
-                    "risk_warning": analysis.signal.risk_warning or "无",
-                    "position_level": analysis.signal.position_level.value,
-                    # Add macro data
-                    "dxy_price": analysis.dxy_price,
-                    "dxy_change_pct": analysis.dxy_change_pct,
-                    "real_rate": analysis.real_rate,
-                    "nominal_rate": analysis.nominal_rate,
-                    "inflation_rate": analysis.inflation_rate,
-                }
-
                 logger.info(f"Using LLM to answer question: {question[:50]}...")
                 llm_answer = await llm_client.answer_chat_question(
                     question=question,
-                    current_analysis=current_analysis_context,
+                    current_analysis=llm_context,
                     news_items=news_items,  # Pass news for richer context
                 )
 
@@ -504,70 +425,70 @@ async def chat_query(request: ChatRequest) -> ChatResponse:
                 logger.warning(f"LLM chat failed: {e}. Falling back to rule-based responses")
 
         # Fallback to rule-based responses
-        # Answer based on question type
-        if "为什么" in question_lower or "信号" in question_lower:
-            answer = f"**当前信号**: {analysis.signal.signal_level.value}\n\n"
-            answer += f"**原因**: {analysis.signal.signal_reason}\n\n"
-            if analysis.signal.risk_warning:
-                answer += f"**风险提示**: {analysis.signal.risk_warning}"
-            return ChatResponse(answer=answer)
-
-        elif "关键位" in question_lower or "支撑" in question_lower or "阻力" in question_lower:
-            answer = "**关键价位**:\n\n"
-            if analysis.indicators.support_level:
-                answer += f"支撑位: {analysis.indicators.support_level:.2f}\n"
-            if analysis.indicators.resistance_level:
-                answer += f"阻力位: {analysis.indicators.resistance_level:.2f}\n"
-            if analysis.indicators.range_low:
-                answer += f"区间下沿: {analysis.indicators.range_low:.2f}\n"
-            if analysis.indicators.range_high:
-                answer += f"区间上沿: {analysis.indicators.range_high:.2f}\n"
-            return ChatResponse(answer=answer)
-
-        elif "操作" in question_lower or "建议" in question_lower or "下一步" in question_lower:
-            answer = f"**建议操作**: {analysis.signal.signal_reason}\n\n"
-            if analysis.signal.entry_zone:
-                answer += f"入场区: {analysis.signal.entry_zone:.2f}\n"
-            if analysis.signal.stop_zone:
-                answer += f"止损区: {analysis.signal.stop_zone:.2f}\n"
-            if analysis.signal.target_zone:
-                answer += f"目标区: {analysis.signal.target_zone:.2f}\n"
-            answer += f"\n仓位建议: {analysis.signal.position_level.value}"
-            return ChatResponse(answer=answer)
-
-        elif "新闻" in question_lower:
-            if not analysis.news_items:
-                return ChatResponse(answer="暂无新闻数据")
-
-            answer = "**近期新闻事件**:\n\n"
-            for news in analysis.news_items[:5]:
-                sentiment_emoji = {"利多": "📈", "利空": "📉", "中性": "➡️"}.get(news.get("sentiment", ""), "")
-                answer += f"{sentiment_emoji} **{news.get('title')}** ({news.get('news_time')})\n"
-                content = news.get("content") or ""
-                if content:
-                    answer += f"  - {content}\n"
-                if news.get("source"):
-                    answer += f"  - 来源: {news.get('source')}\n"
-                if news.get("url"):
-                    answer += f"  - 链接: {news.get('url')}\n"
-                answer += "\n"
-
-            return ChatResponse(answer=answer)
-
-        else:
-            return ChatResponse(
-                answer="您可以询问:\n"
-                "- 为什么给出该信号？\n"
-                "- 当前关键位是什么？\n"
-                "- 下一步建议如何操作？\n"
-                "- 近期重要新闻有哪些？"
-            )
+        return ChatResponse(answer=_rule_based_answer(question.lower(), analysis))
 
     except Exception as e:
         logger.error(f"Error in chat: {e}")
         return ChatResponse(answer=f"抱歉，处理您的问题时出错: {str(e)}")
 
 
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Streaming chat over Server-Sent Events
+
+    Same answers as ``/chat``, delivered as ``token`` events (``{"text": ...}``)
+    as soon as they are available, followed by one ``done`` event
+    (``{"source": "llm" | "rules" | "error"}``). LLM tokens are forwarded as
+    the provider streams them; rule-based answers are sent line by line.
+    """
+    question = request.question.strip()
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            view = await market_snapshot.get_chat_analysis()
+            analysis, llm_context, news_items = view.analysis, view.llm_context, view.news_items
+        except Exception as e:
+            logger.error(f"Error in chat stream: {e}")
+            yield _sse_event("token", {"text": f"抱歉，处理您的问题时出错: {str(e)}"})
+            yield _sse_event("done", {"source": "error"})
+            return
+
+        source = "rules"
+        if llm_client.enabled:
+            try:
+                logger.info(f"Streaming LLM answer to question: {question[:50]}...")
+                async for delta in llm_client.stream_chat_answer(
+                    question=question,
+                    current_analysis=llm_context,
+                    news_items=news_items,
+                ):
+                    source = "llm"
+                    yield _sse_event("token", {"text": delta})
+            except Exception as e:
+                logger.warning(f"LLM chat stream failed: {e}")
+
+            if source == "rules":
+                logger.info("LLM stream produced no answer, falling back to rule-based responses")
+
+        if source == "rules":
+            for line in _rule_based_answer(question.lower(), analysis).splitlines(keepends=True):
+                yield _sse_event("token", {"text": line})
+
+        yield _sse_event("done", {"source": source})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/llm/stats", response_model=LLMStats)
 async def get_llm_stats() -> LLMStats:
     """
@@ -584,6 +505,39 @@ async def get_llm_stats() -> LLMStats:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/indicators/cache-stats", response_model=IndicatorCacheStats)
+async def get_indicator_cache_stats() -> IndicatorCacheStats:
+    """
+    Get indicator cache statistics
+
+    Returns:
+        Hit/miss counters and size of the shared indicator result cache
+    """
+    return IndicatorCacheStats(**indicator_cache.get_stats())
+
+
+@router.get("/snapshot/status", response_model=SnapshotStatus)
+async def get_snapshot_status() -> SnapshotStatus:
+    """
+    Get market snapshot status
+
+    Returns:
+        Update time and age of every snapshot view, refresh cycles and errors
+    """
+    return SnapshotStatus(**market_snapshot.get_status())
+
+
+@router.get("/ws/stats", response_model=WebSocketStats)
+async def get_websocket_stats() -> WebSocketStats:
+    """
+    Get WebSocket fan-out statistics
+
+    Returns:
+        Connection and subscriber counts, send queue depth and drop counters
+    """
+    return WebSocketStats(**ws_manager.get_stats())
+
+
 @router.post("/llm/reset-counters")
 async def reset_llm_counters():
     """
@@ -624,11 +578,11 @@ async def get_market_depth(
         if limit not in valid_limits:
             limit = 10
 
-        depth_data = data_provider.get_market_depth(symbol=symbol, limit=limit)
+        depth_data = await async_data_provider.get_market_depth(symbol=symbol, limit=limit)
 
         # Convert to response model
-        bids = [OrderLevel(price=b["price"], volume=b["volume"]) for b in depth_data["bids"]]
-        asks = [OrderLevel(price=a["price"], volume=a["volume"]) for a in depth_data["asks"]]
+        bids = [OrderLevel(price=b["price"], volume=b["volume"], total=b.get("total")) for b in depth_data["bids"]]
+        asks = [OrderLevel(price=a["price"], volume=a["volume"], total=a.get("total")) for a in depth_data["asks"]]
 
         return MarketDepthResponse(
             bids=bids,
@@ -640,6 +594,7 @@ async def get_market_depth(
             total_bid_volume=depth_data["total_bid_volume"],
             total_ask_volume=depth_data["total_ask_volume"],
             bid_ask_ratio=depth_data["bid_ask_ratio"],
+            imbalance=depth_data.get("imbalance", 0.0),
             data_source=depth_data["data_source"],
             symbol=depth_data["symbol"],
             is_simulated=depth_data.get("is_simulated", False),
@@ -651,7 +606,7 @@ async def get_market_depth(
 
 
 @router.get("/gold-prices", response_model=GoldPricesResponse)
-async def get_gold_prices() -> GoldPricesResponse:
+async def get_gold_prices(response: Response) -> GoldPricesResponse:
     """
     Get gold prices from multiple markets
 
@@ -659,11 +614,13 @@ async def get_gold_prices() -> GoldPricesResponse:
     - London Gold (XAU/USD): International spot gold price (via COMEX futures)
     - AU9999: Shanghai Gold Exchange gold price
 
-    Both prices are fetched in real-time from their respective data sources.
+    Both prices come from the market snapshot, refreshed from their data
+    sources every ``SNAPSHOT_PRICE_INTERVAL`` seconds.
     """
     try:
-        logger.info("Fetching gold prices from multiple markets...")
-        prices_data = data_provider.get_gold_prices()
+        view = await market_snapshot.get_gold_prices()
+        _set_age(response, view.updated_at)
+        prices_data = view.data
 
         london_gold_data = prices_data["london_gold"]
         au9999_data = prices_data["au9999"]
@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks (run from backend/, e.g. ``python -m benchmarks.bench_crosses``)
+"""
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark: backtest via per-bar ``analyze`` vs. the vectorized backtester
+
+Usage (from backend/):
+    python -m benchmarks.bench_backtest
+    python -m benchmarks.bench_backtest --sizes 2520 100000 1000000 --loop-max 300
+
+The per-bar baseline recomputes ``calculate_all`` on every prefix and calls
+``StrategyEngine.analyze`` on it, which is what replaying history through
+the engine required before. It is only timed up to ``--loop-max`` bars and
+extrapolated linearly beyond that (a lower bound: each prefix also gets
+longer). The vectorized time covers indicators, scoring, trade simulation
+and statistics.
+"""
+import argparse
+import logging
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from services.backtest import backtester
+from services.indicators import indicator_calculator
+from services.strategy import strategy_engine
+
+
+def _bars(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "date": pd.date_range("2000-01-01", periods=rows, freq="min"),
+        "open": close * (1 + rng.normal(0, 0.002, rows)),
+        "high": close * (1 + np.abs(rng.normal(0, 0.004, rows))),
+        "low": close * (1 - np.abs(rng.normal(0, 0.004, rows))),
+        "close": close,
+        "volume": 1.0,
+    })
+
+
+def per_bar_signals(df: pd.DataFrame) -> list:
+    """Baseline: full indicator recomputation + analyze for every prefix"""
+    return [
+        strategy_engine.analyze(indicator_calculator.calculate_all(df.iloc[:t + 1].copy())).signal.signal_level
+        for t in range(len(df))
+    ]
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2_520, 100_000, 1_000_000])
+    parser.add_argument("--loop-max", type=int, default=300, help="largest size timed with the per-bar loop")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sentiment", type=float, default=50.0, help="constant news sentiment score")
+    args = parser.parse_args()
+
+    # pandas_ta warns on short prefixes; keep the output readable
+    warnings.simplefilter("ignore")
+    logging.disable(logging.WARNING)
+
+    sample = _bars(args.loop_max)
+    loop_time = _best_of(lambda: per_bar_signals(sample), 1)
+
+    print(f"{'bars':>10} {'per-bar (s)':>13} {'vectorized (s)':>15} {'speedup':>10} {'trades':>7}")
+    for rows in args.sizes:
+        df = _bars(rows)
+        result = backtester.run(df, args.sentiment)
+        vector_time = _best_of(lambda: backtester.run(df, args.sentiment), args.repeat)
+        per_bar_time = loop_time * rows / args.loop_max
+        marker = "*" if rows > args.loop_max else " "
+        print(
+            f"{rows:>10} {per_bar_time:>12.1f}{marker} {vector_time:>15.3f} "
+            f"{per_bar_time / vector_time:>9.0f}x {result.stats['trades']:>7}"
+        )
+    print("* extrapolated linearly from --loop-max bars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark: WebSocket broadcast fan-out, per-client encode + sequential
+sends vs. ``ConnectionManager.broadcast``
+
+Usage (from backend/):
+    python -m benchmarks.bench_broadcast
+    python -m benchmarks.bench_broadcast --clients 1000 5000 --slow 0 10 --messages 20
+
+Clients are simulated in-process: every send yields to the event loop once
+(as a socket write would), and ``--slow`` of them additionally take
+``--slow-delay`` seconds per send. The baseline serializes the message for
+every client and awaits the sends one after another, as the manager used
+to, so each slow client adds its delay to every broadcast. The manager
+times include draining every client's send queue. Half of the clients
+subscribe to the broadcast symbol, so the baseline also pays for scanning
+the other half.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import time
+
+from websocket_server import ConnectionManager
+
+
+class _SimulatedClient:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def _depth_message(levels: int = 20) -> dict:
+    return {
+        "type": "market_depth",
+        "data": {
+            "symbol": "PAXGUSDT",
+            "data": [
+                {"price": 2350.0 + (levels - i) * 0.5, "bidVolume": 0 if i < levels else 3.5, "askVolume": 2.25}
+                for i in range(levels * 2)
+            ],
+            "timestamp": 1_700_000_000_000,
+        },
+        "timestamp": 1_700_000_000_000,
+    }
+
+
+async def legacy_broadcast(clients: list, subscriptions: dict, message: dict, symbol: str):
+    for client in clients:
+        if symbol and symbol not in subscriptions.get(client, set()):
+            continue
+        await client.send_text(json.dumps(message, ensure_ascii=False))
+
+
+async def _run(client_count: int, slow: int, slow_delay: float, messages: int) -> tuple[float, float]:
+    clients = [_SimulatedClient(slow_delay if i < slow else 0.0) for i in range(client_count)]
+    symbols = {client: {"PAXGUSDT" if i % 2 == 0 else "AU9999"} for i, client in enumerate(clients)}
+    message = _depth_message()
+
+    start = time.perf_counter()
+    for _ in range(messages):
+        await legacy_broadcast(clients, symbols, message, "PAXGUSDT")
+    legacy_time = (time.perf_counter() - start) / messages
+
+    manager = ConnectionManager(send_timeout=max(1.0, slow_delay * 10))
+    for client in clients:
+        await manager.connect(client, list(symbols[client]))
+    subscribers = manager.get_stats()["subscribers"]["PAXGUSDT"]
+    start = time.perf_counter()
+    for i in range(messages):
+        await manager.broadcast(message, "PAXGUSDT")
+        # broadcast only enqueues; wait until the writers delivered it everywhere
+        while manager.get_stats()["sent"] < (i + 1) * subscribers:
+            await asyncio.sleep(0)
+    manager_time = (time.perf_counter() - start) / messages
+
+    expected = messages * 2
+    assert all(c.received == expected for c in clients if "PAXGUSDT" in symbols[c]), "missed sends"
+    return legacy_time, manager_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1_000, 5_000])
+    parser.add_argument("--slow", type=int, nargs="+", default=[0, 10])
+    parser.add_argument("--slow-delay", type=float, default=0.01)
+    parser.add_argument("--messages", type=int, default=20)
+    args = parser.parse_args()
+
+    # The manager logs every connection; keep the benchmark output readable
+    rows = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for client_count in args.clients:
+            for slow in args.slow:
+                rows.append((client_count, slow, *asyncio.run(
+                    _run(client_count, slow, args.slow_delay, args.messages)
+                )))
+
+    print(f"{'clients':>8} {'slow':>5} {'legacy (ms/msg)':>16} {'manager (ms/msg)':>17} {'speedup':>8}")
+    for client_count, slow, legacy_time, manager_time in rows:
+        print(
+            f"{client_count:>8} {slow:>5} {legacy_time * 1000:>16.2f} "
+            f"{manager_time * 1000:>17.2f} {legacy_time / manager_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
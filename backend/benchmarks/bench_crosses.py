@@ -0,0 +1,84 @@
+"""
+Micro-benchmark: MACD cross detection, row loop vs. vectorized
+
+Usage (from backend/):
+    python -m benchmarks.bench_crosses
+    python -m benchmarks.bench_crosses --sizes 10000 100000 --loop-max 100000
+
+The row loop is the previous ``_calculate_macd`` implementation (``.iloc``
+reads and writes per bar). It is only timed up to ``--loop-max`` rows and
+extrapolated linearly beyond that, since it takes minutes at 1M rows.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.indicators import cross_labels, detect_crosses
+
+
+def _macd_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    macd = np.cumsum(rng.normal(0, 1, rows))
+    signal = pd.Series(macd).ewm(span=9, adjust=False).mean().to_numpy(copy=True)
+    macd[:33] = np.nan
+    signal[:33] = np.nan
+    return pd.DataFrame({"MACD": macd, "MACD_signal": signal})
+
+
+def loop_crosses(df: pd.DataFrame) -> pd.Series:
+    """Previous per-row implementation"""
+    df = df.copy()
+    df["MACD_cross"] = "none"
+    for i in range(1, len(df)):
+        macd_curr = df["MACD"].iloc[i]
+        macd_prev = df["MACD"].iloc[i - 1]
+        signal_curr = df["MACD_signal"].iloc[i]
+        signal_prev = df["MACD_signal"].iloc[i - 1]
+        if pd.notna(macd_curr) and pd.notna(macd_prev) and pd.notna(signal_curr) and pd.notna(signal_prev):
+            if macd_prev <= signal_prev and macd_curr > signal_curr:
+                df.iloc[i, df.columns.get_loc("MACD_cross")] = "golden"
+            elif macd_prev >= signal_prev and macd_curr < signal_curr:
+                df.iloc[i, df.columns.get_loc("MACD_cross")] = "dead"
+    return df["MACD_cross"]
+
+
+def vectorized_crosses(df: pd.DataFrame) -> np.ndarray:
+    return cross_labels(detect_crosses(df["MACD"].to_numpy(), df["MACD_signal"].to_numpy()))
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--loop-max", type=int, default=100_000, help="largest size timed with the row loop")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'loop (s)':>12} {'vectorized (s)':>15} {'speedup':>10}")
+    for rows in args.sizes:
+        df = _macd_frame(rows)
+        vector_time = _best_of(lambda: vectorized_crosses(df), args.repeat)
+
+        loop_rows = min(rows, args.loop_max)
+        sample = df.iloc[:loop_rows]
+        loop_labels = loop_crosses(sample)
+        assert (loop_labels.to_numpy() == vectorized_crosses(sample)).all(), "implementations disagree"
+        loop_time = _best_of(lambda: loop_crosses(sample), 1) * rows / loop_rows
+        marker = "*" if loop_rows < rows else " "
+
+        print(f"{rows:>10} {loop_time:>11.3f}{marker} {vector_time:>15.5f} {loop_time / vector_time:>9.0f}x")
+    print("* extrapolated from --loop-max rows")
+
+
+if __name__ == "__main__":
+    main()
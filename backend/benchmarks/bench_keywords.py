@@ -0,0 +1,79 @@
+"""
+Micro-benchmark: news keyword scoring, per-keyword ``in`` scans vs. Aho-Corasick
+
+Usage (from backend/):
+    python -m benchmarks.bench_keywords
+    python -m benchmarks.bench_keywords --keywords 100 1000 10000 --items 50 5000
+
+The scan baseline tests every keyword with ``in`` against each text, as
+``get_news_items`` did; cost grows with keywords x text length. The
+compiled matcher makes one pass per text regardless of the keyword count.
+"""
+import argparse
+import random
+import time
+
+from utils.keyword_matcher import KeywordMatcher
+
+_WORDS = [
+    "gold", "fed", "rate", "cut", "hike", "inflation", "dollar", "yield", "war", "oil",
+    "bank", "market", "stocks", "tech", "earnings", "china", "policy", "growth", "jobs", "data",
+]
+
+
+def _keywords(count: int, rng: random.Random) -> list[str]:
+    keywords = set()
+    while len(keywords) < count:
+        words = rng.choices(_WORDS, k=rng.randint(1, 2))
+        keywords.add(" ".join(words) + ("" if len(keywords) < len(_WORDS) else str(len(keywords))))
+    return sorted(keywords)
+
+
+def _texts(count: int, rng: random.Random) -> list[str]:
+    return [" ".join(rng.choices(_WORDS, k=40)) for _ in range(count)]
+
+
+def scan(keywords: list[str], texts: list[str]) -> list[set[str]]:
+    found = []
+    for text in texts:
+        lowered = text.lower()
+        found.append({k for k in keywords if k in lowered})
+    return found
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keywords", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--items", type=int, nargs="+", default=[50, 5_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'keywords':>9} {'items':>7} {'build (s)':>10} {'scan (s)':>10} {'matcher (s)':>12} {'speedup':>8}")
+    for keyword_count in args.keywords:
+        keywords = _keywords(keyword_count, rng)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keywords)
+        build_time = time.perf_counter() - start
+        for item_count in args.items:
+            texts = _texts(item_count, rng)
+            assert scan(keywords, texts) == [matcher.find_all(t) for t in texts], "implementations disagree"
+            scan_time = _best_of(lambda: scan(keywords, texts), args.repeat)
+            matcher_time = _best_of(lambda: [matcher.find_all(t) for t in texts], args.repeat)
+            print(
+                f"{keyword_count:>9} {item_count:>7} {build_time:>10.4f} {scan_time:>10.4f} "
+                f"{matcher_time:>12.4f} {scan_time / matcher_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Micro-benchmark: full-history support/resistance zones
+
+Usage (from backend/):
+    python -m benchmarks.bench_levels
+    python -m benchmarks.bench_levels --sizes 2520 100000 1000000
+
+Times ``zones_for`` (pivot detection, histogram binning and ranking over
+every bar) next to the per-bar ``support_level`` / ``resistance_level``
+columns of ``calculate_all``, which only look at the last
+``SR_RECENT_BARS`` bars, and reports how many pivots fed the zones.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.indicators import indicator_calculator
+from services.levels import find_pivots, zones_for
+
+
+def _bars(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({
+        "date": pd.date_range("2000-01-01", periods=rows, freq="min"),
+        "open": close * (1 + rng.normal(0, 0.002, rows)),
+        "high": close * (1 + np.abs(rng.normal(0, 0.004, rows))),
+        "low": close * (1 - np.abs(rng.normal(0, 0.004, rows))),
+        "close": close,
+        "volume": 1.0,
+    })
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2_520, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'bars':>10} {'pivots':>8} {'zones (s)':>10} {'per-bar S/R (s)':>16} {'support':>10} {'resistance':>11}")
+    for rows in args.sizes:
+        df = _bars(rows)
+        pivots = len(find_pivots(df["high"].to_numpy())) + len(find_pivots(df["low"].to_numpy(), maximum=False))
+        supports, resistances = zones_for(df)
+        zone_time = _best_of(lambda: zones_for(df), args.repeat)
+        column_time = _best_of(lambda: indicator_calculator._calculate_support_resistance(df.copy()), args.repeat)
+        top_support = f"{supports[0].level:.1f}" if supports else "-"
+        top_resistance = f"{resistances[0].level:.1f}" if resistances else "-"
+        print(
+            f"{rows:>10} {pivots:>8} {zone_time:>10.3f} {column_time:>16.3f} "
+            f"{top_support:>10} {top_resistance:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
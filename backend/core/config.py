@@ -4,8 +4,12 @@ Core configuration for Gold Trading Agent
 from pathlib import Path
 from typing import Optional
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Analysis views the snapshot always tracks (default view + daily-bar chat view)
+PINNED_SNAPSHOT_VIEWS = 2
+
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -42,6 +46,45 @@ class Settings(BaseSettings):
 
     # Cache Settings (in seconds)
     PRICE_CACHE_TTL: int = 300  # 5 minutes (shorter cache for more real-time data)
+    INDICATOR_CACHE_SIZE: int = 32  # Max computed indicator frames kept (LRU)
+
+    # Market Snapshot (background refresh shared by all endpoints)
+    SNAPSHOT_ENABLED: bool = True  # Run the refresh loops in the app lifespan (views are still built on demand)
+    SNAPSHOT_PRICE_INTERVAL: float = 10.0  # Seconds between quote / gold price refreshes
+    SNAPSHOT_REFRESH_INTERVAL: float = 60.0  # Seconds between analysis / chart / news / macro refreshes
+    SNAPSHOT_VIEW_IDLE: float = 600.0  # Stop refreshing a non-default view after this long without requests
+    SNAPSHOT_MAX_VIEWS: int = 32  # Max tracked views; must fit a full analysis batch plus the pinned views
+    SNAPSHOT_LLM_INTERVAL: float = 900.0  # LLM news filtering / explanations are reused this long; only requests renew them
+    BATCH_ANALYSIS_MAX_TARGETS: int = 20  # Max (symbol, period, interval) targets per /analysis/batch request
+    MTF_BASE_INTERVAL: str = "1h"  # Base series of the multi-timeframe view; coarser timeframes are resampled from it
+    MTF_BASE_PERIOD: str = "2y"  # Upstream window of the default base series (~104 weekly bars, enough for every timeframe)
+
+    # Concurrency Settings
+    PIPELINE_MAX_WORKERS: int = 8  # Bounded thread pool for blocking pipeline stages (indicators etc.)
+    DATA_PROVIDER_MAX_WORKERS: int = 8  # Dedicated thread pool behind AsyncDataProvider
+    SWEEP_MAX_WORKERS: int = 0  # Processes used by parameter sweeps (0 = one per CPU)
+
+    # Order Book
+    ORDER_BOOK_DEPTH: int = 100  # Levels per side fetched into the local order book
+    ORDER_BOOK_MAX_AGE: float = 1.0  # Seconds a local book is served before a new snapshot is fetched
+    ORDER_BOOK_MAX_SYMBOLS: int = 8  # Local books (or replays) kept per symbol; least recently used are dropped
+    ORDER_BOOK_REPLAY_PATH: Optional[str] = None  # Serve market depth from a recorded Binance depth file (offline)
+
+    # WebSocket Market Feed
+    WS_FEED_ENABLED: bool = True  # Mount /ws and run the market feed in the app lifespan
+    WS_FEED_SOURCE: str = "provider"  # provider | replay | simulated
+    WS_PRICE_POLL_INTERVAL: float = 10.0  # Seconds between upstream price polls (shared by all clients)
+    WS_DEPTH_POLL_INTERVAL: float = 3.0  # Seconds between order book polls
+    WS_DEPTH_SYMBOL: str = "PAXGUSDT"  # Binance order book pushed as orderbook / market_depth
+    WS_DEPTH_LIMIT: int = 20  # Order book levels per side
+    WS_REPLAY_PATH: Optional[str] = None  # JSON-lines event file for WS_FEED_SOURCE=replay
+    WS_REPLAY_SPEED: float = 1.0  # Replay speed multiplier (0 = as fast as possible)
+    WS_REPLAY_LOOP: bool = True  # Restart the replay file when it ends
+    WS_RECORD_PATH: Optional[str] = None  # Also record the live feed to this JSON-lines file
+    WS_SEND_TIMEOUT: float = 5.0  # Seconds a single client send may take before the client is dropped
+    WS_CLIENT_QUEUE_SIZE: int = 256  # Ordered messages (trades, notices) buffered per client; oldest dropped beyond
+    WS_SLOW_CLIENT_TIMEOUT: float = 30.0  # Drop a client whose send queue has not drained for this long
+    WS_PER_MESSAGE_DEFLATE: bool = True  # Negotiate permessage-deflate compression with clients (uvicorn)
 
     # External API Keys
     FINNHUB_API_KEY: Optional[str] = None  # Finnhub API Key
@@ -59,6 +102,26 @@ class Settings(BaseSettings):
     LLM_TIMEOUT: int = 30  # LLM request timeout in seconds
     LLM_MAX_RETRIES: int = 2  # Max retries for LLM requests
     LLM_DAILY_LIMIT: int = 3  # Max manual refresh calls per day (soft limit)
+    LLM_HTTP2: bool = True  # Negotiate HTTP/2 when the h2 package is installed and the provider supports it
+    LLM_MAX_CONNECTIONS: int = 10  # Connection pool size of the shared LLM HTTP client
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 5  # Idle connections kept open for reuse
+    LLM_KEEPALIVE_EXPIRY: float = 60.0  # Seconds an idle pooled connection stays open
+    LLM_MAX_CONCURRENCY: int = 4  # Max concurrent in-flight LLM requests
+    LLM_CACHE_ENABLED: bool = True  # Persistent cache of explanations / news sentiment
+    LLM_CACHE_TTL: int = 21600  # 6 hours
+    LLM_CACHE_MAX_ENTRIES: int = 500  # LRU bound of the SQLite response cache
+    LLM_NEWS_BATCH_SIZE: int = 5  # Unclassified headlines per news sentiment call
+
+    @model_validator(mode="after")
+    def _check_snapshot_capacity(self) -> "Settings":
+        # A full batch must not evict its own views (or the pinned ones) on every call
+        required = self.BATCH_ANALYSIS_MAX_TARGETS + PINNED_SNAPSHOT_VIEWS
+        if self.SNAPSHOT_MAX_VIEWS < required:
+            raise ValueError(
+                f"SNAPSHOT_MAX_VIEWS ({self.SNAPSHOT_MAX_VIEWS}) must be at least "
+                f"BATCH_ANALYSIS_MAX_TARGETS + {PINNED_SNAPSHOT_VIEWS} ({required})"
+            )
+        return self
 
     model_config = SettingsConfigDict(
         # 注意：Cursor 的工具会过滤 `.env*`，因此提供一个可选覆盖文件 `env.runtime`
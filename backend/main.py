@@ -9,7 +9,10 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from api.routes import router as api_router
 from core.config import ensure_directories, settings
+from services.llm_client import llm_client
+from services.market_snapshot import market_snapshot
 from services.scheduler import start_scheduler, stop_scheduler
+from websocket_server import router as ws_router, start_background_tasks, stop_background_tasks
 
 # Configure logging
 logging.basicConfig(
@@ -32,14 +35,28 @@ async def lifespan(app: FastAPI):
     logger.info(f"Data directory: {settings.DATA_DIR}")
     logger.info(f"Logs directory: {settings.LOGS_DIR}")
 
+    # Open the pooled LLM HTTP client
+    if llm_client.enabled:
+        await llm_client.open()
+
+    # Start the background market snapshot refresh
+    if settings.SNAPSHOT_ENABLED:
+        market_snapshot.start()
+
     # Start the scheduler
     start_scheduler()
 
+    # Start the WebSocket market feed
+    ws_tasks = start_background_tasks() if settings.WS_FEED_ENABLED else []
+
     yield
 
     # Shutdown
     logger.info("Shutting down...")
+    await stop_background_tasks(ws_tasks)
     stop_scheduler()
+    await market_snapshot.stop()
+    await llm_client.aclose()
 
 
 # Create FastAPI app
@@ -62,6 +79,10 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix=settings.API_PREFIX)
 
+# WebSocket push (/ws)
+if settings.WS_FEED_ENABLED:
+    app.include_router(ws_router)
+
 
 @app.get("/")
 async def root():
@@ -88,4 +109,5 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         reload=True,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
     )
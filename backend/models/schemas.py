@@ -66,6 +66,17 @@ class PriceData(BaseModel):
 # ==================== Technical Indicators ====================
 
 
+class PriceZone(BaseModel):
+    """Support/resistance zone clustered from swing highs and lows"""
+    level: float  # 区域价位 (按近因加权的均价)
+    low: float  # 区域下沿
+    high: float  # 区域上沿
+    touches: int  # 触及次数 (区域内的枢轴点数)
+    strength: float  # 近因加权的触及次数
+    bars_since_touch: int  # 距最近一次触及的K线数
+    last_touch: Optional[datetime] = None  # 最近一次触及时间
+
+
 class TechnicalIndicators(BaseModel):
     """Technical analysis indicators - 增强版"""
     # 移动平均线
@@ -104,6 +115,8 @@ class TechnicalIndicators(BaseModel):
     range_high: Optional[float] = None  # 区间上沿
     range_low: Optional[float] = None  # 区间下沿
     range_mid: Optional[float] = None  # 区间中轴
+    support_zones: list[PriceZone] = Field(default_factory=list)  # 支撑区 (按强度排序)
+    resistance_zones: list[PriceZone] = Field(default_factory=list)  # 阻力区 (按强度排序)
 
 
 # ==================== Trading Signal ====================
@@ -199,9 +212,68 @@ class MarketAnalysis(BaseModel):
         }
 
 
+# ==================== Multi-timeframe Confluence ====================
+
+
+class TimeframeScore(BaseModel):
+    """Technical reading of one timeframe"""
+    timeframe: str
+    bars: int
+    market_state: MarketState
+    trend_score: float = Field(description="趋势因子 (-1 到 +1)")
+    technical_score: float = Field(description="技术面得分 (-100 到 +100)")
+    direction: str  # bullish / bearish / neutral
+    weight: float = Field(description="Share of the confluence score (0 = too little history)")
+
+
+class ConfluenceScore(BaseModel):
+    """Agreement of the technical picture across timeframes"""
+    score: float = Field(description="Weighted technical score across timeframes (-100 到 +100)")
+    direction: str  # bullish / bearish / neutral
+    agreement: float = Field(description="Weight share of timeframes pointing in ``direction`` (0-1)")
+    timeframes: list[TimeframeScore]
+
+
+class MultiTimeframeResponse(BaseModel):
+    """Confluence of the timeframes derived from one base series"""
+    symbol: str
+    base_interval: str
+    base_bars: int
+    confluence: ConfluenceScore
+    updated_at: datetime
+
+
 # ==================== API Request/Response ====================
 
 
+class AnalysisTarget(BaseModel):
+    """One (symbol, period, interval) of a batch analysis request"""
+    symbol: Optional[str] = Field(default=None, description="Yahoo Finance symbol, e.g. SI=F or DX-Y.NYB (default: gold)")
+    period: Optional[str] = None
+    interval: Optional[str] = Field(default=None, description="Bar interval (default depends on period)")
+
+
+class BatchAnalysisRequest(BaseModel):
+    """Request for several market analyses at once"""
+    targets: list[AnalysisTarget] = Field(min_length=1)
+
+
+class BatchAnalysisItem(BaseModel):
+    """Analysis (or the error that prevented it) for one batch target"""
+    symbol: str
+    period: str
+    interval: str
+    analysis: Optional[MarketAnalysis] = None
+    error: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    age_seconds: Optional[float] = None
+
+
+class BatchAnalysisResponse(BaseModel):
+    """Batch analysis results, in request order"""
+    results: list[BatchAnalysisItem]
+
+
 class RefreshRequest(BaseModel):
     """Request to refresh data"""
     force: bool = False  # Force refresh even if cache is valid
@@ -253,11 +325,59 @@ class ChartData(BaseModel):
     period: str
     data: list[ChartDataPoint]
     key_levels: dict[str, float]  # 支撑/阻力等关键位
+    support_zones: list[PriceZone] = Field(default_factory=list)  # 支撑区 (按强度排序)
+    resistance_zones: list[PriceZone] = Field(default_factory=list)  # 阻力区 (按强度排序)
+
+
+class ChartSeries(BaseModel):
+    """Columnar chart data: parallel arrays, one entry per bar"""
+    symbol: str
+    period: str
+    interval: str
+    timestamps: list[int]  # epoch milliseconds (UTC)
+    close: list[float]
+    ma_short: list[Optional[float]]
+    ma_mid: list[Optional[float]]
+    key_levels: dict[str, float]  # 支撑/阻力等关键位
+    support_zones: list[PriceZone] = Field(default_factory=list)  # 支撑区 (按强度排序)
+    resistance_zones: list[PriceZone] = Field(default_factory=list)  # 阻力区 (按强度排序)
 
 
 # ==================== LLM Stats ====================
 
 
+class LLMPoolStats(BaseModel):
+    """Connection pool metrics of the shared LLM HTTP client"""
+    open: bool
+    http2_enabled: bool
+    max_connections: int
+    max_concurrency: int
+    in_flight: int
+    waiting: int
+    requests: int
+    connections_opened: int
+    connection_reuse_rate: float
+    http_versions: dict[str, int]
+
+
+class LLMCacheTypeStats(BaseModel):
+    """Hit/miss counters of one LLM call type"""
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class LLMCacheStats(BaseModel):
+    """Persistent LLM response cache statistics"""
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_rate: float
+    by_type: dict[str, LLMCacheTypeStats]
+
+
 class LLMStats(BaseModel):
     """LLM usage statistics"""
     enabled: bool
@@ -268,6 +388,49 @@ class LLMStats(BaseModel):
     daily_limit: int
     chat_calls: int
     remaining_calls: int
+    pool: Optional[LLMPoolStats] = None
+    cache: Optional[LLMCacheStats] = None
+
+
+class IndicatorCacheStats(BaseModel):
+    """Indicator result cache statistics"""
+    hits: int
+    misses: int
+    coalesced: int
+    hit_rate: float
+    size: int
+    max_size: int
+
+
+class SnapshotViewStatus(BaseModel):
+    """Freshness of one market snapshot view"""
+    name: str
+    updated_at: datetime
+    age_seconds: float
+
+
+class SnapshotStatus(BaseModel):
+    """Market snapshot service status"""
+    running: bool
+    cycles: int = Field(description="Completed background refresh cycles")
+    last_refresh: Optional[datetime] = None
+    tracked_views: int
+    views: list[SnapshotViewStatus] = Field(default_factory=list)
+    errors: dict[str, str] = Field(default_factory=dict, description="Last refresh error per view")
+
+
+class WebSocketStats(BaseModel):
+    """WebSocket fan-out statistics"""
+    connections: int
+    subscribers: dict[str, int] = Field(description="Connections per subscribed symbol")
+    queued: int = Field(description="Messages waiting in all client send queues")
+    max_queue_depth: int = Field(description="Deepest client send queue")
+    queue_limit: int
+    sent: int
+    conflated: int = Field(description="Updates replaced by a newer value before being sent")
+    dropped: int = Field(description="Ordered messages dropped from full queues")
+    send_failures: int
+    slow_disconnects: int
 
 
 # ==================== Gold Price (Multi-source) ====================
@@ -320,6 +483,7 @@ class OrderLevel(BaseModel):
     """Single order level in order book"""
     price: float
     volume: float
+    total: Optional[float] = Field(default=None, description="累计量 (从最优价起)")
 
 
 class MarketDepthResponse(BaseModel):
@@ -333,6 +497,7 @@ class MarketDepthResponse(BaseModel):
     total_bid_volume: float = Field(description="买单总量")
     total_ask_volume: float = Field(description="卖单总量")
     bid_ask_ratio: float = Field(description="买卖比")
+    imbalance: float = Field(default=0.0, description="买卖失衡度 (买量-卖量)/(买量+卖量), -1 到 1")
     data_source: str = Field(description="数据来源")
     symbol: str = Field(description="交易对")
     is_simulated: bool = Field(default=False, description="是否为模拟数据")
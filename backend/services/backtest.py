@@ -0,0 +1,371 @@
+"""
+Vectorized backtesting over StrategyEngine scoring
+
+``StrategyEngine.analyze`` scores only the last row, so replaying history
+through it means recomputing every indicator for every prefix (O(n^2)).
+The backtester instead computes the indicators as they were known at each
+bar in one pass over the full series:
+
+- the causal indicators (SMA/EMA, ADX, RSI, MACD, Bollinger Bands, ATR)
+  come straight from ``IndicatorCalculator.compute_columns``, masked by
+  ``calculate_all``'s minimum-length gates for the prefix ending at each bar
+- ``vol_state`` compares ATR with its expanding median (``calculate_all``
+  uses the median of the whole frame, which would look ahead)
+- support/resistance only use pivots that were confirmed and recent at
+  that bar, searched in fixed-width sliding windows
+
+``StrategyEngine.score_bars`` then turns the columns into factor scores,
+composite scores, signals and ATR-based entry/stop/target levels. The
+trade simulation walks the signals trade by trade; each exit is located
+with a vectorized search over the bars after the entry, so the cost is
+linear in the number of bars.
+
+Fills: entries at the close of the signal bar; stops and targets are
+checked from the next bar on (stop first when both are touched, gaps fill
+at the open); an opposite signal exits at the close and may reverse.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.schemas import PositionLevel, SignalLevel
+from services.indicators import (
+    SR_LOOKBACK,
+    SR_RECENT_BARS,
+    IndicatorCalculator,
+    indicator_calculator,
+)
+from services.strategy import SIGNAL_CODES, StrategyEngine, strategy_engine
+
+logger = logging.getLogger(__name__)
+
+# Fraction of equity committed per signal strength (仓位建议: 高 70-100%, 中 30-70%)
+POSITION_FRACTIONS = {
+    PositionLevel.HIGH: 1.0,
+    PositionLevel.MEDIUM: 0.5,
+}
+
+# Rows per block when scanning support/resistance windows (bounds memory)
+_PIVOT_CHUNK = 65_536
+# First block size when searching for a trade's exit (doubles until found)
+_EXIT_SEARCH_BLOCK = 64
+
+
+def _pivot_levels(values: np.ndarray, close: np.ndarray, below: bool) -> np.ndarray:
+    """
+    Nearest pivot support (``below``) or resistance per bar, without lookahead
+
+    A pivot at bar ``c`` (extreme of the centered ``2 * SR_LOOKBACK + 1``
+    window) is known from bar ``c + SR_LOOKBACK``; at bar ``t``
+    ``calculate_all`` only searches the last ``SR_RECENT_BARS`` bars, so the
+    candidates are ``c`` in ``[t - SR_RECENT_BARS + 1, t - SR_LOOKBACK]``.
+    """
+    n = len(values)
+    window = 2 * SR_LOOKBACK + 1
+    rolling = pd.Series(values).rolling(window=window, center=True)
+    extreme = (rolling.min() if below else rolling.max()).to_numpy()
+    pivots = np.where(values == extreme, values, np.nan)
+
+    # Row t of the windows view holds pivots[t - SR_RECENT_BARS + 1 .. t - SR_LOOKBACK]
+    span = SR_RECENT_BARS - SR_LOOKBACK
+    padded = np.concatenate([np.full(SR_RECENT_BARS - 1, np.nan), pivots])
+    candidates = sliding_window_view(padded, span)[:n]
+
+    levels = np.empty(n)
+    fill = -np.inf if below else np.inf
+    for start in range(0, n, _PIVOT_CHUNK):
+        block = candidates[start:start + _PIVOT_CHUNK]
+        price = close[start:start + _PIVOT_CHUNK, None]
+        with np.errstate(invalid="ignore"):
+            if below:
+                levels[start:start + len(block)] = np.where(block < price, block, fill).max(axis=1)
+            else:
+                levels[start:start + len(block)] = np.where(block > price, block, fill).min(axis=1)
+    levels[np.isinf(levels)] = np.nan
+    return levels
+
+
+def point_in_time_columns(
+    df: pd.DataFrame, calculator: IndicatorCalculator = indicator_calculator
+) -> dict[str, Any]:
+    """
+    Indicator columns as ``calculate_all`` would have reported them at each bar
+
+    Row ``t`` equals the last row of ``calculate_all(df.iloc[:t + 1])`` for
+    every column the strategy reads; state labels stay kernel codes.
+    """
+    c = calculator
+    columns = c.compute_columns(df)
+    for name, value in columns.items():
+        if isinstance(value, tuple):
+            columns[name] = value[0].copy()
+
+    close = np.ascontiguousarray(df["close"].to_numpy(dtype=np.float64))
+    high = np.ascontiguousarray(df["high"].to_numpy(dtype=np.float64))
+    low = np.ascontiguousarray(df["low"].to_numpy(dtype=np.float64))
+    bars = np.arange(1, len(close) + 1)  # prefix length at each row
+    columns["close"] = close
+
+    # calculate_all's minimum-length gates, applied per prefix
+    gates = {
+        ("ADX", "PLUS_DI", "MINUS_DI"): c.adx_period + 10,
+        ("RSI",): c.rsi_period + 1,
+        ("MACD", "MACD_signal", "MACD_hist"): c.macd_slow + c.macd_signal,
+    }
+    for names, min_bars in gates.items():
+        for name in names:
+            columns[name] = np.where(bars < min_bars, np.nan, columns[name])
+    columns["MACD_cross"][bars < c.macd_slow + c.macd_signal] = 0
+
+    # Volatility state against the median ATR seen so far
+    atr = columns[f"ATR_{c.atr_period}"]
+    median = pd.Series(atr).expanding().median().to_numpy()
+    with np.errstate(invalid="ignore"):
+        vol_state = np.select([atr > median * 1.5, atr > median * 0.8], [2, 1], 0).astype(np.int8)
+    vol_state[np.isnan(median)] = -1
+    columns["vol_state"] = vol_state
+
+    columns["support_level"] = _pivot_levels(low, close, below=True)
+    columns["resistance_level"] = _pivot_levels(high, close, below=False)
+    return columns
+
+
+@dataclass
+class BacktestResult:
+    """Per-bar frame (scores, signals, position, equity), trade list and summary statistics"""
+    frame: pd.DataFrame
+    trades: pd.DataFrame
+    stats: dict[str, Any]
+
+
+class Backtester:
+    """
+    Replays StrategyEngine signals over historical bars
+
+    Example:
+        result = backtester.run(ohlc_df)
+        result.stats["total_return"], result.frame["equity"]
+    """
+
+    def __init__(
+        self,
+        engine: StrategyEngine = strategy_engine,
+        calculator: IndicatorCalculator = indicator_calculator,
+        allow_short: bool = True,
+        fee_rate: float = 0.0,
+        initial_equity: float = 1.0,
+    ):
+        self.engine = engine
+        self.calculator = calculator
+        self.allow_short = allow_short
+        self.fee_rate = fee_rate  # per side, fraction of traded notional
+        self.initial_equity = initial_equity
+
+    def run(
+        self,
+        df: pd.DataFrame,
+        sentiment_score: Any = 0.0,
+        periods_per_year: Optional[float] = None,
+        columns: Optional[dict[str, Any]] = None,
+    ) -> BacktestResult:
+        """
+        Backtest over OHLC bars (oldest first)
+
+        Args:
+            df: DataFrame with open, high, low, close (and optionally date)
+            sentiment_score: News sentiment (-100..100), scalar or per bar
+            periods_per_year: Bars per year for annualized statistics
+                (inferred from ``date`` when omitted, else 252)
+            columns: Precomputed ``point_in_time_columns(df, self.calculator)``
+                (lets parameter sweeps score many engines on one indicator pass)
+
+        Returns:
+            BacktestResult
+        """
+        if df.empty:
+            raise ValueError("No data available for backtest")
+
+        c = self.calculator
+        if columns is None:
+            columns = point_in_time_columns(df, c)
+        scores = self.engine.score_bars(
+            columns,
+            sentiment_score,
+            ma_short=f"SMA_{c.short_ma}",
+            ma_mid=f"SMA_{c.mid_ma}",
+            atr=f"ATR_{c.atr_period}",
+        )
+
+        times = df["date"] if "date" in df.columns else df.index.to_series()
+        open_ = df["open"].to_numpy(dtype=np.float64)
+        high = df["high"].to_numpy(dtype=np.float64)
+        low = df["low"].to_numpy(dtype=np.float64)
+        close = columns["close"]
+
+        equity, position, trades = self._simulate(open_, high, low, close, scores)
+        drawdown = equity / np.maximum.accumulate(equity) - 1
+
+        frame = pd.DataFrame({
+            "date": times.to_numpy(),
+            "close": close,
+            "support_level": columns["support_level"],
+            "resistance_level": columns["resistance_level"],
+            **scores,
+            "position": position,
+            "equity": equity,
+            "drawdown": drawdown,
+        })
+        trades_df = pd.DataFrame(trades, columns=[
+            "entry_index", "exit_index", "side", "signal", "size", "entry_price", "exit_price",
+            "stop", "target", "return", "exit_reason",
+        ])
+        trades_df.insert(0, "entry_time", times.iloc[trades_df["entry_index"].to_numpy(dtype=np.int64)].to_numpy())
+        trades_df.insert(1, "exit_time", times.iloc[trades_df["exit_index"].to_numpy(dtype=np.int64)].to_numpy())
+        trades_df["bars_held"] = trades_df["exit_index"] - trades_df["entry_index"]
+
+        if periods_per_year is None:
+            periods_per_year = self._periods_per_year(times)
+        stats = self._statistics(equity, position, trades_df, periods_per_year)
+        return BacktestResult(frame=frame, trades=trades_df, stats=stats)
+
+    def _simulate(
+        self,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        scores: dict[str, np.ndarray],
+    ) -> tuple[np.ndarray, np.ndarray, list[tuple]]:
+        """Walk the signals trade by trade; returns (equity, position side per bar, trades)"""
+        n = len(close)
+        signal = scores["signal"]
+        entries = np.flatnonzero((signal != 0) if self.allow_short else (signal > 0))
+        entries = entries[entries < n - 1]  # the last bar cannot be held
+        fractions = {
+            SIGNAL_CODES[SignalLevel.STRONG_BUY]: POSITION_FRACTIONS[PositionLevel.HIGH],
+            SIGNAL_CODES[SignalLevel.BUY]: POSITION_FRACTIONS[PositionLevel.MEDIUM],
+        }
+
+        equity = np.empty(n)
+        position = np.zeros(n, dtype=np.int8)
+        trades: list[tuple] = []
+        cash = self.initial_equity
+        flat_from = 0
+        cursor = 0
+        while True:
+            k = np.searchsorted(entries, cursor)
+            if k == len(entries):
+                break
+            i = int(entries[k])
+            side = 1 if signal[i] > 0 else -1
+            size = fractions[abs(int(signal[i]))]
+            entry_price, stop, target = close[i], scores["stop"][i], scores["target"][i]
+
+            equity[flat_from:i] = cash
+            units = side * size * cash / entry_price
+            base = cash - abs(units) * entry_price * self.fee_rate
+            j, exit_price, reason = self._find_exit(i, side, stop, target, open_, high, low, close, signal)
+
+            equity[i:j] = base + units * (close[i:j] - entry_price)
+            position[i:j] = side
+            exit_cash = base + units * (exit_price - entry_price) - abs(units) * exit_price * self.fee_rate
+            trades.append((
+                i, j, side, int(signal[i]), size, entry_price, exit_price, stop, target,
+                exit_cash / cash - 1, reason,
+            ))
+            cash = exit_cash
+            equity[j] = cash
+            flat_from = j + 1
+            # Fills at the exit bar's close come after its intrabar exit, so the
+            # same bar may open the next trade (a reversal on opposite signals)
+            cursor = j
+
+        equity[flat_from:] = cash
+        return equity, position, trades
+
+    @staticmethod
+    def _find_exit(
+        i: int,
+        side: int,
+        stop: float,
+        target: float,
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        signal: np.ndarray,
+    ) -> tuple[int, float, str]:
+        """First bar after ``i`` that stops, reaches target or flips the signal: (index, price, reason)"""
+        n = len(close)
+        start, block = i + 1, _EXIT_SEARCH_BLOCK
+        while start < n:
+            end = min(n, start + block)
+            if side > 0:
+                hit = (low[start:end] <= stop) | (high[start:end] >= target) | (signal[start:end] < 0)
+            else:
+                hit = (high[start:end] >= stop) | (low[start:end] <= target) | (signal[start:end] > 0)
+            if hit.any():
+                j = start + int(np.argmax(hit))
+                if side > 0:
+                    if open_[j] <= stop:
+                        return j, open_[j], "stop"
+                    if open_[j] >= target:
+                        return j, open_[j], "target"
+                    if low[j] <= stop:
+                        return j, stop, "stop"
+                    if high[j] >= target:
+                        return j, target, "target"
+                else:
+                    if open_[j] >= stop:
+                        return j, open_[j], "stop"
+                    if open_[j] <= target:
+                        return j, open_[j], "target"
+                    if high[j] >= stop:
+                        return j, stop, "stop"
+                    if low[j] <= target:
+                        return j, target, "target"
+                return j, close[j], "signal"
+            start, block = end, block * 2
+        return n - 1, close[n - 1], "end"
+
+    @staticmethod
+    def _periods_per_year(times: pd.Series) -> float:
+        if len(times) < 2 or not pd.api.types.is_datetime64_any_dtype(times):
+            return 252.0
+        years = (times.iloc[-1] - times.iloc[0]) / pd.Timedelta(days=365.25)
+        return (len(times) - 1) / years if years > 0 else 252.0
+
+    def _statistics(
+        self, equity: np.ndarray, position: np.ndarray, trades: pd.DataFrame, periods_per_year: float
+    ) -> dict[str, Any]:
+        returns = np.diff(equity) / equity[:-1]
+        volatility = float(returns.std()) if len(returns) > 1 else 0.0
+        years = len(returns) / periods_per_year
+        total_return = float(equity[-1] / self.initial_equity - 1)
+        trade_returns = trades["return"].to_numpy(dtype=np.float64)
+        wins = trade_returns > 0
+        gross_profit = float(trade_returns[wins].sum())
+        gross_loss = -float(trade_returns[~wins].sum())
+        has_trades = len(trade_returns) > 0
+        return {
+            "bars": len(equity),
+            "trades": len(trade_returns),
+            "total_return": total_return,
+            "annual_return": (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else None,
+            "sharpe": float(returns.mean()) / volatility * np.sqrt(periods_per_year) if volatility > 0 else None,
+            "max_drawdown": float(1 - (equity / np.maximum.accumulate(equity)).min()),
+            "win_rate": float(wins.mean()) if has_trades else None,
+            "profit_factor": gross_profit / gross_loss if gross_loss > 0 else None,
+            "avg_trade_return": float(trade_returns.mean()) if has_trades else None,
+            "avg_bars_held": float(trades["bars_held"].mean()) if has_trades else None,
+            "exposure": float((position != 0).mean()),
+            "exit_reasons": trades["exit_reason"].value_counts().to_dict(),
+        }
+
+
+# Singleton instance
+backtester = Backtester()
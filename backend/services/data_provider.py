@@ -3,11 +3,17 @@ Data provider service - fetches market data from various sources
 """
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import akshare as ak
 import pandas as pd
@@ -15,16 +21,64 @@ import requests
 import yfinance as yf
 
 from core.config import settings
+from services.news_keywords import match_news_keywords
+from services.ohlc_store import INTRADAY_LOOKBACK, OHLCStore, slice_period
+from services.order_book import LocalOrderBook, OrderBookReplay, parse_levels
+from utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# SGE 实时行情重试：每次尝试前的等待秒数（0秒, 2秒, 4秒）
+SGE_REALTIME_RETRY_DELAYS: tuple[float, ...] = (0, 2, 4)
+# AU9999 某个数据源失败后，切换到下一个数据源前的等待秒数
+AU9999_FALLBACK_DELAY = 0.5
+# Binance 订单簿快照接口
+BINANCE_DEPTH_URL = "https://api.binance.com/api/v3/depth"
+
+
+def _call_with_retries(func: Callable[[], Any], delays: tuple[float, ...], label: str) -> Any:
+    """Call ``func`` once per entry in ``delays``, sleeping that long before each attempt"""
+    for attempt, delay in enumerate(delays):
+        try:
+            if delay:
+                logger.info(f"{label} retry {attempt + 1}/{len(delays)}, waiting {delay}s...")
+                time.sleep(delay)
+            return func()
+        except Exception as e:
+            logger.warning(f"{label} attempt {attempt + 1} failed: {e}")
+            if attempt == len(delays) - 1:
+                raise
+    raise ValueError(f"{label} fetch failed after retries")
+
+
+async def _acall_with_retries(
+    func: Callable[[], Any],
+    delays: tuple[float, ...],
+    label: str,
+    executor: ThreadPoolExecutor,
+) -> Any:
+    """Async counterpart of ``_call_with_retries``: runs ``func`` on ``executor`` with asyncio backoff"""
+    loop = asyncio.get_running_loop()
+    for attempt, delay in enumerate(delays):
+        try:
+            if delay:
+                logger.info(f"{label} retry {attempt + 1}/{len(delays)}, waiting {delay}s...")
+                await asyncio.sleep(delay)
+            return await loop.run_in_executor(executor, func)
+        except Exception as e:
+            logger.warning(f"{label} attempt {attempt + 1} failed: {e}")
+            if attempt == len(delays) - 1:
+                raise
+    raise ValueError(f"{label} fetch failed after retries")
+
 
 class DataProvider:
     """Provides market data from Yahoo Finance and other sources"""
 
     def __init__(self):
-        self.cache_dir = settings.CACHE_DIR
         self.cache_ttl = settings.PRICE_CACHE_TTL
+        # OHLC 增量存储（每个 symbol/interval 一份历史，按 period 切片）
+        self.ohlc_store = OHLCStore(settings.CACHE_DIR / "ohlc")
         # AU9999 内存缓存（解决 API 不稳定问题）
         self._au9999_cache: dict = {}
         self._au9999_cache_time: datetime | None = None
@@ -35,6 +89,14 @@ class DataProvider:
         self._london_gold_cache_time: datetime | None = None
         self._london_gold_cache_ttl = 30  # 30秒缓存（更实时）
 
+        # 合并并发的相同上游请求（single-flight）
+        self._flight = SingleFlight()
+
+        # 本地订单簿（按 symbol，LRU），由 Binance 快照差分更新；首个快照成功后才登记
+        self._order_books: OrderedDict[str, LocalOrderBook] = OrderedDict()
+        self._depth_replays: OrderedDict[str, OrderBookReplay] = OrderedDict()
+        self._order_books_lock = threading.Lock()
+
     def fetch_price_data(
         self,
         symbol: str,
@@ -54,93 +116,129 @@ class DataProvider:
         Returns:
             DataFrame with OHLCV data
         """
-        # Check cache first
-        if use_cache:
-            cached_data = self._load_from_cache(symbol, period, interval)
-            if cached_data is not None:
+        # Serve from the incremental store while it is fresh
+        if use_cache and self.ohlc_store.is_fresh(symbol, interval, self.cache_ttl):
+            if self.ohlc_store.covers(symbol, interval, period):
                 logger.info(f"Using cached data for {symbol}")
-                return cached_data
-
-        # Fetch from Yahoo Finance
-        try:
-            logger.info(f"Fetching {symbol} data from Yahoo Finance...")
-            ticker = yf.Ticker(symbol)
+                return slice_period(self.ohlc_store.load(symbol, interval), period)
+
+        # Concurrent callers share one upstream refresh: an incremental one brings the whole
+        # (symbol, interval) store up to date, a full download only covers its own period
+        incremental = self._can_refresh_incrementally(symbol, period, interval)
+        history = self._flight.do(
+            ("ohlc", symbol, interval) if incremental else ("ohlc", symbol, interval, period),
+            lambda: self._refresh_price_data(symbol, period, interval, incremental),
+        )
+        return slice_period(history, period)
 
-            # Get historical data
-            df = ticker.history(period=period, interval=interval)
+    def fetch_price_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "5m",
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+        """
+        All stored bars for (symbol, interval), refreshed like ``fetch_price_data``
 
-            if df.empty:
-                raise ValueError(f"No data returned for symbol {symbol}")
+        Stored bars are never dropped, so intraday history keeps accumulating
+        beyond the window upstream still serves for ``period``.
+        """
+        df = self.fetch_price_data(symbol, period, interval, use_cache)
+        stored = self.ohlc_store.load(symbol, interval)
+        if stored is None or len(stored) <= len(df):
+            return df
+        return slice_period(stored, "max")
+
+    def _can_refresh_incrementally(self, symbol: str, period: str, interval: str) -> bool:
+        """Whether downloading the bars after the last stored one is enough to serve ``period``"""
+        last_ts = self.ohlc_store.last_timestamp(symbol, interval)
+        return (
+            last_ts is not None
+            and self.ohlc_store.covers(symbol, interval, period)
+            and self._within_intraday_lookback(last_ts, interval)
+        )
 
-            # Standardize column names
-            df.columns = [col.lower().replace(" ", "_") for col in df.columns]
-            df.index.name = "date"
+    def _refresh_price_data(self, symbol: str, period: str, interval: str, incremental: bool) -> pd.DataFrame:
+        """
+        Bring the stored history up to date and return all of it
 
-            # Reset index to make date a column
-            df = df.reset_index()
+        Only bars after the last stored timestamp are downloaded when the
+        store already covers the period (``incremental``); otherwise the
+        full period is downloaded once and merged.
+        """
+        last_ts = self.ohlc_store.last_timestamp(symbol, interval)
 
-            # Save to cache
-            self._save_to_cache(df, symbol, period, interval)
+        try:
+            if incremental:
+                logger.info(f"Fetching {symbol} {interval} bars since {last_ts} from Yahoo Finance...")
+                new_bars = self._download_price_data(symbol, interval, start=last_ts)
+                return self.ohlc_store.merge(symbol, interval, new_bars)
 
-            return df
+            logger.info(f"Fetching {symbol} data from Yahoo Finance...")
+            new_bars = self._download_price_data(symbol, interval, period=period)
+            if new_bars.empty:
+                raise ValueError(f"No data returned for symbol {symbol}")
+            return self.ohlc_store.merge(symbol, interval, new_bars, covered_period=period)
 
         except Exception as e:
             logger.error(f"Error fetching data for {symbol}: {e}")
             raise
 
+    @staticmethod
+    def _within_intraday_lookback(last_ts: pd.Timestamp, interval: str) -> bool:
+        """Whether an incremental fetch from ``last_ts`` is still served upstream"""
+        lookback = INTRADAY_LOOKBACK.get(interval)
+        if lookback is None:
+            return True
+        now = pd.Timestamp.now(tz=last_ts.tz)
+        return now - last_ts < lookback
+
+    def _download_price_data(
+        self,
+        symbol: str,
+        interval: str,
+        period: str | None = None,
+        start: pd.Timestamp | None = None,
+    ) -> pd.DataFrame:
+        """Download OHLC bars from Yahoo Finance, either a whole period or since ``start``"""
+        ticker = yf.Ticker(symbol)
+
+        # Get historical data
+        if start is not None:
+            df = ticker.history(start=start, interval=interval)
+        else:
+            df = ticker.history(period=period, interval=interval)
+
+        if df is None or df.empty:
+            return pd.DataFrame()
+
+        # Standardize column names
+        df.columns = [col.lower().replace(" ", "_") for col in df.columns]
+        df.index.name = "date"
+
+        # Reset index to make date a column
+        return df.reset_index()
+
     def fetch_multiple_symbols(
         self,
         symbols: list[str],
         period: str = "1y",
         interval: str = "1d",
     ) -> dict[str, pd.DataFrame]:
-        """Fetch data for multiple symbols"""
-        result = {}
-        for symbol in symbols:
+        """Fetch data for multiple symbols (concurrently, one thread per symbol up to the provider pool size)"""
+        if not symbols:
+            return {}
+
+        def fetch_one(symbol: str) -> pd.DataFrame:
             try:
-                result[symbol] = self.fetch_price_data(symbol, period, interval)
+                return self.fetch_price_data(symbol, period, interval)
             except Exception as e:
                 logger.error(f"Failed to fetch {symbol}: {e}")
-                result[symbol] = pd.DataFrame()
-        return result
-
-    def _get_cache_path(self, symbol: str, period: str, interval: str) -> Path:
-        """Get cache file path for given parameters"""
-        filename = f"{symbol}_{period}_{interval}.parquet"
-        return self.cache_dir / filename
-
-    def _load_from_cache(
-        self, symbol: str, period: str, interval: str
-    ) -> pd.DataFrame | None:
-        """Load data from cache if valid"""
-        cache_path = self._get_cache_path(symbol, period, interval)
-
-        if not cache_path.exists():
-            return None
-
-        # Check if cache is still valid
-        cache_age = datetime.now().timestamp() - cache_path.stat().st_mtime
-        if cache_age > self.cache_ttl:
-            logger.info(f"Cache expired for {symbol}")
-            return None
+                return pd.DataFrame()
 
-        try:
-            df = pd.read_parquet(cache_path)
-            return df
-        except Exception as e:
-            logger.error(f"Error reading cache: {e}")
-            return None
-
-    def _save_to_cache(
-        self, df: pd.DataFrame, symbol: str, period: str, interval: str
-    ):
-        """Save data to cache"""
-        cache_path = self._get_cache_path(symbol, period, interval)
-        try:
-            df.to_parquet(cache_path, index=False)
-            logger.info(f"Cached data for {symbol}")
-        except Exception as e:
-            logger.error(f"Error saving cache: {e}")
+        with ThreadPoolExecutor(max_workers=min(len(symbols), settings.DATA_PROVIDER_MAX_WORKERS)) as executor:
+            return dict(zip(symbols, executor.map(fetch_one, symbols)))
 
     def get_latest_price(self, symbol: str) -> float:
         """Get the latest price for a symbol"""
@@ -333,97 +431,6 @@ class DataProvider:
             - sentiment: str (利多/利空/中性)
             - relevance: str (高/中/低)
         """
-        # Keywords for gold relevance filtering (with relevance scores)
-        gold_relevant_keywords = {
-            # 直接相关 (高相关性)
-            "gold": 10, "黄金": 10, "precious metal": 10, "贵金属": 10,
-            "bullion": 10, "xau": 10, "comex": 10,
-            # 美联储和利率 (高相关性)
-            "fed": 8, "federal reserve": 8, "美联储": 8, "fomc": 8,
-            "interest rate": 8, "利率": 8, "rate cut": 9, "降息": 9,
-            "rate hike": 9, "加息": 9, "monetary policy": 8, "货币政策": 8,
-            "powell": 7, "鲍威尔": 7,
-            # 通胀和经济数据 (高相关性)
-            "inflation": 8, "通胀": 8, "cpi": 8, "pce": 8,
-            "treasury": 7, "国债": 7, "yield": 7, "收益率": 7,
-            "recession": 7, "衰退": 7, "employment": 6, "就业": 6,
-            "nonfarm": 7, "非农": 7, "gdp": 6,
-            # 美元 (高相关性)
-            "dollar": 7, "美元": 7, "dxy": 7, "usd": 6,
-            "currency": 5, "forex": 5,
-            # 地缘政治 (高相关性)
-            "geopolit": 8, "地缘": 8, "war": 8, "战争": 8,
-            "conflict": 7, "冲突": 7, "sanction": 7, "制裁": 7,
-            "iran": 7, "伊朗": 7, "russia": 7, "俄罗斯": 7,
-            "ukraine": 7, "乌克兰": 7, "middle east": 7, "中东": 7,
-            "israel": 7, "以色列": 7, "tension": 6, "紧张": 6,
-            "crisis": 7, "危机": 7,
-            # 央行和储备 (高相关性)
-            "central bank": 8, "央行": 8, "reserve": 6, "储备": 6,
-            "pboc": 7, "ecb": 6, "boj": 6,
-            # 避险情绪 (中等相关性)
-            "safe haven": 7, "避险": 7, "risk-off": 7, "risk off": 7,
-            "uncertainty": 5, "不确定性": 5, "volatility": 5, "波动": 5,
-            # 商品市场 (中等相关性)
-            "commodity": 5, "大宗商品": 5, "silver": 5, "白银": 5,
-            "oil": 4, "原油": 4, "copper": 4, "铜": 4,
-        }
-
-        # Sentiment keywords with detailed reasons
-        keywords_bullish = {
-            "rate cut": "降息预期利好黄金，降低持有黄金的机会成本",
-            "降息": "降息预期利好黄金，降低持有黄金的机会成本",
-            "inflation rise": "通胀上升增加黄金作为抗通胀资产的吸引力",
-            "inflation surge": "通胀飙升推动黄金避险需求大增",
-            "通胀上升": "通胀上升增加黄金作为抗通胀资产的吸引力",
-            "risk-off": "避险情绪升温，资金从风险资产流入黄金",
-            "risk off": "避险情绪升温，资金从风险资产流入黄金",
-            "避险": "避险需求增加，推动黄金价格上涨",
-            "safe haven": "黄金作为避风港资产受到追捧",
-            "gold rise": "黄金价格上涨趋势延续",
-            "gold surge": "黄金价格大幅上涨",
-            "黄金上涨": "市场看涨黄金，买盘活跃",
-            "金价上涨": "金价走高，多头占优",
-            "央行购金": "央行增持黄金储备，提振长期需求",
-            "central bank buy": "央行购金增加实物需求，支撑金价",
-            "地缘政治": "地缘政治风险上升，黄金避险价值凸显",
-            "geopolitical risk": "地缘政治风险推升避险情绪，利好黄金",
-            "war": "战争风险推动避险资金涌入黄金",
-            "战争": "战争风险推动避险资金涌入黄金",
-            "conflict": "冲突升级增加市场不确定性，利好黄金",
-            "冲突": "冲突升级增加市场不确定性，利好黄金",
-            "dollar weak": "美元走弱提升黄金吸引力",
-            "美元下跌": "美元走弱使黄金对国际买家更具吸引力",
-            "recession": "经济衰退担忧推动避险需求",
-            "衰退": "经济衰退担忧推动避险需求",
-            "crisis": "危机环境下黄金避险属性凸显",
-            "危机": "危机环境下黄金避险属性凸显",
-            "treasury buy": "美联储购买国债增加流动性，可能导致利率下降，利好黄金",
-            "quantitative": "量化宽松政策利好黄金",
-            "stimulus": "经济刺激政策可能引发通胀，利好黄金",
-        }
-
-        keywords_bearish = {
-            "rate hike": "加息预期利空黄金，提高持有黄金的机会成本",
-            "加息": "加息预期利空黄金，提高持有黄金的机会成本",
-            "strong dollar": "美元走强对以美元计价的黄金形成压力",
-            "dollar rise": "美元上涨削弱黄金吸引力",
-            "美元上涨": "美元走强对黄金形成下行压力",
-            "美元走强": "美元走强对黄金形成下行压力",
-            "gold fall": "黄金价格下跌趋势延续",
-            "gold drop": "黄金价格下跌",
-            "黄金下跌": "市场看跌黄金，卖压较重",
-            "金价下跌": "金价走低，空头占优",
-            "hawkish": "美联储鹰派立场利空黄金",
-            "鹰派": "美联储鹰派立场利空黄金",
-            "yield rise": "债券收益率上升增加持有黄金的机会成本",
-            "收益率上升": "债券收益率上升增加持有黄金的机会成本",
-            "risk-on": "风险偏好上升，资金流出黄金",
-            "risk on": "风险偏好上升，资金流出黄金",
-            "inflation cool": "通胀降温削弱黄金抗通胀价值",
-            "通胀下降": "通胀降温削弱黄金抗通胀价值",
-        }
-
         if settings.FINNHUB_API_KEY and settings.FINNHUB_API_KEY != "your_finnhub_api_key_here":
             try:
                 url = "https://finnhub.io/api/v1/news"
@@ -444,16 +451,11 @@ class DataProvider:
                         summary = item.get("summary", "")
                         news_url = item.get("url", "")
                         source = item.get("source", "")
-                        combined_text = f"{headline} {summary}".lower()
 
-                        # Calculate relevance score
-                        relevance_score = 0
-                        matched_topics = []
-                        for keyword, score in gold_relevant_keywords.items():
-                            if keyword.lower() in combined_text:
-                                relevance_score += score
-                                if score >= 6:
-                                    matched_topics.append(keyword)
+                        # Relevance score, topics and sentiment from one keyword pass
+                        keyword_match = match_news_keywords(f"{headline} {summary}")
+                        relevance_score = keyword_match.relevance_score
+                        matched_topics = keyword_match.matched_topics
 
                         # Skip news with low relevance (higher threshold for quality)
                         if relevance_score < 6:
@@ -467,24 +469,9 @@ class DataProvider:
                         else:
                             relevance = "低"
 
-                        # Determine sentiment and reason
-                        sentiment = "中性"
-                        reason = ""
-
-                        # Check bullish keywords
-                        for keyword, keyword_reason in keywords_bullish.items():
-                            if keyword.lower() in combined_text:
-                                sentiment = "利多"
-                                reason = keyword_reason
-                                break
-
-                        # Check bearish keywords
-                        if sentiment == "中性":
-                            for keyword, keyword_reason in keywords_bearish.items():
-                                if keyword.lower() in combined_text:
-                                    sentiment = "利空"
-                                    reason = keyword_reason
-                                    break
+                        # Sentiment and reason (bullish keywords take precedence)
+                        sentiment = keyword_match.sentiment
+                        reason = keyword_match.reason
 
                         # Generate reason based on matched topics if no specific reason
                         if not reason and matched_topics:
@@ -503,6 +490,7 @@ class DataProvider:
                         news_datetime = datetime.fromtimestamp(item.get("datetime", 0))
 
                         scored_news.append({
+                            "id": item.get("id"),  # Finnhub id, identifies the item for sentiment caching
                             "news_time": news_datetime.strftime("%Y-%m-%d %H:%M"),
                             "title": headline,
                             "content": summary,
@@ -653,66 +641,46 @@ class DataProvider:
         PAXG is a gold-backed cryptocurrency where 1 PAXG = 1 troy ounce of gold.
         This provides free real-time order book data that closely correlates with gold prices.
 
+        Levels are kept in a per-symbol ``LocalOrderBook``: each Binance
+        snapshot is diffed into the book, and a book younger than
+        ``ORDER_BOOK_MAX_AGE`` is served without another request. With
+        ``ORDER_BOOK_REPLAY_PATH`` set, every call advances a recorded depth
+        file instead (offline).
+
         Args:
             symbol: Trading pair symbol (default: PAXGUSDT)
-            limit: Number of price levels to fetch (5, 10, 20, 50, 100, 500, 1000, 5000)
+            limit: Number of price levels to return (5, 10, 20, 50, 100, 500, 1000, 5000)
 
         Returns:
             Dict with:
-            - bids: List of buy orders [{price, volume}, ...]
-            - asks: List of sell orders [{price, volume}, ...]
+            - bids: List of buy orders [{price, volume, total}, ...] (total = cumulative volume)
+            - asks: List of sell orders [{price, volume, total}, ...]
             - current_price: Current market price
             - best_bid: Best bid price
             - best_ask: Best ask price
             - spread: Bid-ask spread
+            - total_bid_volume / total_ask_volume / bid_ask_ratio / imbalance over the returned levels
+            - last_update_id: Binance update id of the book
             - data_source: Data source identifier
         """
         try:
-            # Binance API endpoint for order book
-            url = "https://api.binance.com/api/v3/depth"
-            params = {"symbol": symbol, "limit": limit}
-
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
-            # Parse bids (buy orders) - sorted by price descending
-            bids = [
-                {"price": float(item[0]), "volume": float(item[1])}
-                for item in data.get("bids", [])
-            ]
-
-            # Parse asks (sell orders) - sorted by price ascending
-            asks = [
-                {"price": float(item[0]), "volume": float(item[1])}
-                for item in data.get("asks", [])
-            ]
-
-            # Calculate best prices and current price
-            best_bid = bids[0]["price"] if bids else 0
-            best_ask = asks[0]["price"] if asks else 0
-            current_price = (best_bid + best_ask) / 2 if best_bid and best_ask else 0
-            spread = best_ask - best_bid if best_bid and best_ask else 0
-
-            # Calculate total volumes
-            total_bid_volume = sum(b["volume"] for b in bids)
-            total_ask_volume = sum(a["volume"] for a in asks)
-            bid_ask_ratio = total_bid_volume / total_ask_volume if total_ask_volume > 0 else 0
-
-            logger.info(f"Fetched market depth for {symbol}: {len(bids)} bids, {len(asks)} asks")
+            if settings.ORDER_BOOK_REPLAY_PATH:
+                book = self._replay_order_book(symbol)
+                data_source = f"Replay ({Path(settings.ORDER_BOOK_REPLAY_PATH).name})"
+            else:
+                book = self._order_book(symbol)
+                depth = max(limit, settings.ORDER_BOOK_DEPTH)
+                if book.age() > settings.ORDER_BOOK_MAX_AGE or limit > settings.ORDER_BOOK_DEPTH:
+                    # Concurrent callers share one snapshot request
+                    self._flight.do(("depth", symbol, depth), lambda: self._refresh_order_book(book, depth))
+                    # A new symbol's book is registered by whichever caller's snapshot ran
+                    with self._order_books_lock:
+                        book = self._order_books.get(symbol, book)
+                data_source = "Binance (PAXG)"
 
             return {
-                "bids": bids,
-                "asks": asks,
-                "current_price": round(current_price, 2),
-                "best_bid": best_bid,
-                "best_ask": best_ask,
-                "spread": round(spread, 2),
-                "total_bid_volume": round(total_bid_volume, 4),
-                "total_ask_volume": round(total_ask_volume, 4),
-                "bid_ask_ratio": round(bid_ask_ratio, 4),
-                "data_source": "Binance (PAXG)",
-                "symbol": symbol,
+                **book.to_market_depth(limit),
+                "data_source": data_source,
                 "is_simulated": False,
             }
 
@@ -729,12 +697,56 @@ class DataProvider:
                 "total_bid_volume": 0,
                 "total_ask_volume": 0,
                 "bid_ask_ratio": 0,
+                "imbalance": 0.0,
                 "data_source": "Binance (PAXG)",
                 "symbol": symbol,
                 "is_simulated": True,
                 "error": str(e),
             }
 
+    @staticmethod
+    def _remember(books: OrderedDict, symbol: str, value):
+        """Insert / touch ``symbol`` in an LRU dict bounded by ORDER_BOOK_MAX_SYMBOLS (caller holds the lock)"""
+        books[symbol] = value
+        books.move_to_end(symbol)
+        while len(books) > settings.ORDER_BOOK_MAX_SYMBOLS:
+            books.popitem(last=False)
+
+    def _order_book(self, symbol: str) -> LocalOrderBook:
+        """Registered book for ``symbol``, or a new unregistered one until its first snapshot succeeds"""
+        with self._order_books_lock:
+            book = self._order_books.get(symbol)
+            if book is None:
+                return LocalOrderBook(symbol)
+            self._order_books.move_to_end(symbol)
+            return book
+
+    def _refresh_order_book(self, book: LocalOrderBook, limit: int):
+        """Fetch a Binance depth snapshot and diff it into the local book"""
+        response = requests.get(
+            BINANCE_DEPTH_URL, params={"symbol": book.symbol, "limit": limit}, timeout=10
+        )
+        response.raise_for_status()
+        data = response.json()
+        bid_changes, ask_changes = book.apply_snapshot(
+            parse_levels(data.get("bids", [])),
+            parse_levels(data.get("asks", [])),
+            data.get("lastUpdateId"),
+        )
+        with self._order_books_lock:
+            self._remember(self._order_books, book.symbol, self._order_books.get(book.symbol, book))
+        logger.info(
+            f"Refreshed {book.symbol} order book: {len(book.bids)} bids, {len(book.asks)} asks, "
+            f"{len(bid_changes) + len(ask_changes)} levels changed"
+        )
+
+    def _replay_order_book(self, symbol: str) -> LocalOrderBook:
+        """Advance the recorded depth file for ``symbol`` by one record"""
+        with self._order_books_lock:
+            replay = self._depth_replays.get(symbol) or OrderBookReplay(settings.ORDER_BOOK_REPLAY_PATH, symbol)
+            self._remember(self._depth_replays, symbol, replay)
+            replay.step()
+            return replay.book
 
     def get_au9999_price(self) -> dict:
         """
@@ -754,39 +766,68 @@ class DataProvider:
             - data_source: Data source identifier
             - is_available: Whether data is available
         """
-        import time
-
         # 检查缓存是否有效（1分钟内）
-        if (self._au9999_cache
-            and self._au9999_cache_time
-            and (datetime.now() - self._au9999_cache_time).total_seconds() < self._au9999_cache_ttl):
-            logger.debug("Using cached AU9999 price")
-            return self._au9999_cache
-
-        # 数据获取方法列表
-        fetch_methods = [
-            ("spot_quotations_sge", self._fetch_au9999_from_sge_realtime),
-            ("spot_hist_sge", self._fetch_au9999_from_sge_hist),
-            ("futures_spot_price", self._fetch_au9999_from_futures),
-        ]
+        cached = self._get_fresh_au9999_cache()
+        if cached is not None:
+            return cached
 
         last_error = None
 
-        for method_name, fetch_func in fetch_methods:
+        for method_name, fetch_func, retry_delays in self._au9999_fetch_plan():
             try:
                 logger.info(f"Trying AU9999 fetch via {method_name}...")
-                result = fetch_func()
+                result = _call_with_retries(fetch_func, retry_delays, method_name)
                 if result and result.get("is_available"):
                     # 更新缓存
-                    self._au9999_cache = result
-                    self._au9999_cache_time = datetime.now()
+                    self._store_au9999_cache(result)
                     return result
             except Exception as e:
                 last_error = e
                 logger.warning(f"AU9999 fetch via {method_name} failed: {e}")
-                time.sleep(0.5)  # 短暂等待后尝试下一个方法
+                time.sleep(AU9999_FALLBACK_DELAY)  # 短暂等待后尝试下一个方法
                 continue
 
+        return self._au9999_unavailable(last_error)
+
+    def _au9999_fetch_plan(self) -> list[tuple[str, Callable[[], dict], tuple[float, ...]]]:
+        """AU9999 数据获取方法列表: (名称, 单次获取函数, 每次尝试前的等待秒数)
+
+        每个数据源的请求按来源合并，并发调用方共享同一次上游请求。
+        """
+        plan = [
+            ("spot_quotations_sge", self._fetch_au9999_from_sge_realtime, SGE_REALTIME_RETRY_DELAYS),
+            ("spot_hist_sge", self._fetch_au9999_from_sge_hist, (0,)),
+            ("futures_spot_price", self._fetch_au9999_from_futures, (0,)),
+        ]
+        return [
+            (name, self._coalesced(("au9999", name), func), delays)
+            for name, func, delays in plan
+        ]
+
+    def _coalesced(self, key: tuple, func: Callable[[], dict]) -> Callable[[], dict]:
+        """Wrap a zero-argument fetch so concurrent calls with the same key share one request"""
+        return lambda: self._flight.do(key, func)
+
+    def get_coalescing_stats(self) -> dict[str, int]:
+        """Upstream request coalescing counters"""
+        return self._flight.get_stats()
+
+    def _get_fresh_au9999_cache(self) -> dict | None:
+        """Return cached AU9999 data if still within TTL"""
+        if (self._au9999_cache
+            and self._au9999_cache_time
+            and (datetime.now() - self._au9999_cache_time).total_seconds() < self._au9999_cache_ttl):
+            logger.debug("Using cached AU9999 price")
+            return self._au9999_cache
+        return None
+
+    def _store_au9999_cache(self, result: dict):
+        """Update AU9999 cache"""
+        self._au9999_cache = result
+        self._au9999_cache_time = datetime.now()
+
+    def _au9999_unavailable(self, last_error: Exception | None) -> dict:
+        """Result when all AU9999 sources failed: stale cache or unavailable marker"""
         # 所有方法都失败了
         logger.error(f"Failed to fetch AU9999 price from all sources: {last_error}")
 
@@ -809,63 +850,46 @@ class DataProvider:
         }
 
     def _fetch_au9999_from_sge_realtime(self) -> dict:
-        """从上海黄金交易所实时行情获取 AU9999"""
-        import time as time_module
-        
-        # 增强重试机制：最多 3 次，每次间隔递增
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                if attempt > 0:
-                    wait_time = attempt * 2  # 2秒, 4秒
-                    logger.info(f"SGE realtime retry {attempt + 1}/{max_retries}, waiting {wait_time}s...")
-                    time_module.sleep(wait_time)
-                
-                df = ak.spot_quotations_sge()
-
-                if df is None or df.empty:
-                    raise ValueError("No data returned from SGE realtime (empty response)")
-
-                # Filter for Au99.99 (AU9999)
-                au9999_df = df[df['品种'] == 'Au99.99']
-
-                if au9999_df.empty:
-                    # 尝试其他品种名称
-                    au9999_df = df[df['品种'].str.contains('Au99.99|AU9999|au9999', case=False, na=False)]
-                
-                if au9999_df.empty:
-                    # 打印可用品种帮助调试
-                    available = df['品种'].unique().tolist()[:5]
-                    raise ValueError(f"AU9999 not found. Available: {available}")
-
-                # 获取最新的一条记录（最后一行）
-                latest_row = au9999_df.iloc[-1]
-                price = float(latest_row['现价'])
-                update_time = latest_row['更新时间']
-
-                if price <= 0:
-                    raise ValueError(f"Invalid price: {price}")
-
-                # 计算涨跌
-                change, change_pct = self._calculate_au9999_change(price)
-
-                logger.info(f"AU9999 price (realtime): {price} CNY/g, updated: {update_time}")
-
-                return {
-                    "price": round(price, 2),
-                    "change": change,
-                    "change_pct": change_pct,
-                    "update_time": str(update_time),
-                    "data_source": "上海黄金交易所 (实时)",
-                    "is_available": True,
-                    "unit": "元/克",
-                }
-            except Exception as e:
-                logger.warning(f"SGE realtime attempt {attempt + 1} failed: {e}")
-                if attempt == max_retries - 1:
-                    raise
-        
-        raise ValueError("SGE realtime fetch failed after retries")
+        """从上海黄金交易所实时行情获取 AU9999（单次尝试，重试由调用方负责）"""
+        df = ak.spot_quotations_sge()
+
+        if df is None or df.empty:
+            raise ValueError("No data returned from SGE realtime (empty response)")
+
+        # Filter for Au99.99 (AU9999)
+        au9999_df = df[df['品种'] == 'Au99.99']
+
+        if au9999_df.empty:
+            # 尝试其他品种名称
+            au9999_df = df[df['品种'].str.contains('Au99.99|AU9999|au9999', case=False, na=False)]
+
+        if au9999_df.empty:
+            # 打印可用品种帮助调试
+            available = df['品种'].unique().tolist()[:5]
+            raise ValueError(f"AU9999 not found. Available: {available}")
+
+        # 获取最新的一条记录（最后一行）
+        latest_row = au9999_df.iloc[-1]
+        price = float(latest_row['现价'])
+        update_time = latest_row['更新时间']
+
+        if price <= 0:
+            raise ValueError(f"Invalid price: {price}")
+
+        # 计算涨跌
+        change, change_pct = self._calculate_au9999_change(price)
+
+        logger.info(f"AU9999 price (realtime): {price} CNY/g, updated: {update_time}")
+
+        return {
+            "price": round(price, 2),
+            "change": change,
+            "change_pct": change_pct,
+            "update_time": str(update_time),
+            "data_source": "上海黄金交易所 (实时)",
+            "is_available": True,
+            "unit": "元/克",
+        }
 
     def _fetch_au9999_from_sge_hist(self) -> dict:
         """从上海黄金交易所历史数据获取 AU9999（备用方案）"""
@@ -996,7 +1020,7 @@ class DataProvider:
         for method_name, fetch_func in fetch_methods:
             try:
                 logger.info(f"Trying London Gold fetch via {method_name}...")
-                result = fetch_func()
+                result = self._flight.do(("london_gold", method_name), fetch_func)
                 if result and result.get("is_available"):
                     # 更新缓存
                     self._london_gold_cache = result
@@ -1131,6 +1155,23 @@ class DataProvider:
             "unit": "美元/盎司",
         }
 
+    def get_quote(self, symbol: str) -> dict:
+        """
+        Get latest price and previous close via yfinance fast_info
+
+        Args:
+            symbol: Yahoo Finance symbol
+
+        Returns:
+            Dict with last_price and previous_close (may be None)
+        """
+        info = yf.Ticker(symbol).fast_info
+        # fast_info 属性是惰性加载的，在此处（工作线程内）完成网络请求
+        return {
+            "last_price": info.last_price,
+            "previous_close": info.previous_close,
+        }
+
     def get_gold_prices(self) -> dict:
         """
         Get both London Gold and AU9999 prices
@@ -1146,5 +1187,128 @@ class DataProvider:
         }
 
 
-# Singleton instance
+class AsyncDataProvider:
+    """
+    Non-blocking facade over DataProvider for async handlers
+
+    Every blocking upstream call (yfinance, akshare, requests) runs on a
+    dedicated thread pool so one slow source never stalls the event loop.
+    Retry backoff between attempts uses ``asyncio.sleep`` instead of
+    ``time.sleep``.
+    """
+
+    def __init__(self, provider: DataProvider, max_workers: int = 8):
+        self.provider = provider
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="data-provider",
+        )
+
+    async def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking provider call on the dedicated executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def fetch_price_data(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+        """Async version of ``DataProvider.fetch_price_data``"""
+        return await self._run(self.provider.fetch_price_data, symbol, period, interval, use_cache)
+
+    async def fetch_price_history(
+        self,
+        symbol: str,
+        period: str = "1mo",
+        interval: str = "5m",
+        use_cache: bool = True,
+    ) -> pd.DataFrame:
+        """Async version of ``DataProvider.fetch_price_history``"""
+        return await self._run(self.provider.fetch_price_history, symbol, period, interval, use_cache)
+
+    async def fetch_multiple_symbols(
+        self,
+        symbols: list[str],
+        period: str = "1y",
+        interval: str = "1d",
+    ) -> dict[str, pd.DataFrame]:
+        """Fetch several symbols concurrently"""
+
+        async def fetch_one(symbol: str) -> pd.DataFrame:
+            try:
+                return await self.fetch_price_data(symbol, period, interval)
+            except Exception as e:
+                logger.error(f"Failed to fetch {symbol}: {e}")
+                return pd.DataFrame()
+
+        frames = await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
+        return dict(zip(symbols, frames))
+
+    async def get_news_items(self, symbol: str = "GC=F", limit: int = 10) -> list[dict]:
+        """Async version of ``DataProvider.get_news_items``"""
+        return await self._run(self.provider.get_news_items, symbol, limit)
+
+    async def get_real_interest_rate(self) -> dict[str, float]:
+        """Async version of ``DataProvider.get_real_interest_rate``"""
+        return await self._run(self.provider.get_real_interest_rate)
+
+    async def get_market_depth(self, symbol: str = "PAXGUSDT", limit: int = 10) -> dict:
+        """Async version of ``DataProvider.get_market_depth``"""
+        return await self._run(self.provider.get_market_depth, symbol, limit)
+
+    async def get_quote(self, symbol: str) -> dict:
+        """Async version of ``DataProvider.get_quote``"""
+        return await self._run(self.provider.get_quote, symbol)
+
+    async def get_london_gold_price(self) -> dict:
+        """Async version of ``DataProvider.get_london_gold_price``"""
+        return await self._run(self.provider.get_london_gold_price)
+
+    async def get_au9999_price(self) -> dict:
+        """
+        Async version of ``DataProvider.get_au9999_price``
+
+        Walks the same source fallback chain, but each attempt runs on the
+        executor and the waits between retries/sources are asyncio sleeps.
+        """
+        provider = self.provider
+
+        cached = provider._get_fresh_au9999_cache()
+        if cached is not None:
+            return cached
+
+        last_error = None
+
+        for method_name, fetch_func, retry_delays in provider._au9999_fetch_plan():
+            try:
+                logger.info(f"Trying AU9999 fetch via {method_name}...")
+                result = await _acall_with_retries(fetch_func, retry_delays, method_name, self._executor)
+                if result and result.get("is_available"):
+                    provider._store_au9999_cache(result)
+                    return result
+            except Exception as e:
+                last_error = e
+                logger.warning(f"AU9999 fetch via {method_name} failed: {e}")
+                await asyncio.sleep(AU9999_FALLBACK_DELAY)
+                continue
+
+        return provider._au9999_unavailable(last_error)
+
+    async def get_gold_prices(self) -> dict:
+        """Fetch London Gold and AU9999 prices concurrently"""
+        london_gold, au9999 = await asyncio.gather(
+            self.get_london_gold_price(),
+            self.get_au9999_price(),
+        )
+        return {
+            "london_gold": london_gold,
+            "au9999": au9999,
+        }
+
+
+# Singleton instances
 data_provider = DataProvider()
+async_data_provider = AsyncDataProvider(data_provider, max_workers=settings.DATA_PROVIDER_MAX_WORKERS)
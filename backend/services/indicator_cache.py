@@ -0,0 +1,104 @@
+"""
+Shared cache of computed indicator frames
+
+``/analysis``, ``/chart``, ``/chat`` and the scheduler often run
+``calculate_all`` on identical frames served from the OHLC store. Results
+are kept in a bounded LRU keyed by a cheap fingerprint of the input
+(symbol, interval, first/last timestamp, row count, last bar values) plus
+the calculator parameters, so repeated calls skip the computation.
+Concurrent misses for the same fingerprint share one computation.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+import pandas as pd
+
+from core.config import settings
+from services.indicators import IndicatorCalculator, indicator_calculator
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorCache:
+    """
+    Bounded LRU of ``calculate_all`` results (thread-safe)
+
+    Cached frames are shared between callers, so callers must treat them
+    as read-only.
+    """
+
+    def __init__(self, calculator: IndicatorCalculator, max_entries: int = 32):
+        self.calculator = calculator
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, pd.DataFrame] = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._hits = 0
+        self._misses = 0
+
+    def fingerprint(self, df: pd.DataFrame, symbol: str, interval: str, categorical: bool) -> tuple:
+        """Cache key for a frame; O(1) regardless of frame size"""
+        last = df.iloc[-1]
+        first_ts = df["date"].iloc[0] if "date" in df.columns else df.index[0]
+        last_ts = df["date"].iloc[-1] if "date" in df.columns else df.index[-1]
+        last_bar_hash = hash(tuple(float(last[col]) for col in ("high", "low", "close")))
+        return (
+            symbol, interval, first_ts, last_ts, len(df), last_bar_hash,
+            self.calculator.parameters(), categorical,
+        )
+
+    def calculate(
+        self,
+        df: pd.DataFrame,
+        symbol: str,
+        interval: str,
+        categorical: bool = False,
+    ) -> pd.DataFrame:
+        """``calculate_all`` with caching; same arguments plus the data identity"""
+        if df.empty:
+            return self.calculator.calculate_all(df, categorical=categorical)
+
+        key = self.fingerprint(df, symbol, interval, categorical)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+
+        def compute() -> pd.DataFrame:
+            result = self.calculator.calculate_all(df, categorical=categorical)
+            with self._lock:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return result
+
+        return self._flight.do(key, compute)
+
+    def clear(self):
+        """Drop all cached frames (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._flight.get_stats()["coalesced_calls"],
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+            }
+
+
+# Singleton instance
+indicator_cache = IndicatorCache(indicator_calculator, max_entries=settings.INDICATOR_CACHE_SIZE)
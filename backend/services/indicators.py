@@ -7,16 +7,88 @@ Technical indicators calculation service - 增强版
 - SentimentGPT: 多因子融合
 """
 import logging
-from typing import Optional
+from typing import Any, Optional
 
 import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
-from models.schemas import TechnicalIndicators
+from models.schemas import PriceZone, TechnicalIndicators
+from services.levels import zones_for
 
 logger = logging.getLogger(__name__)
 
+# Support/resistance: half-width of the centered extrema window and the
+# number of recent bars searched for levels
+SR_LOOKBACK = 20
+SR_RECENT_BARS = 60
+# Range detection window (~3 months of daily bars)
+RANGE_LOOKBACK = 60
+
+# Cross codes returned by detect_crosses
+CROSS_NONE = 0
+CROSS_UP = 1
+CROSS_DOWN = -1
+
+# State label categories; kernel codes index into these tuples
+TREND_DIR_LABELS = ("neutral", "up", "down")
+TREND_STRENGTH_LABELS = ("weak", "medium", "strong")
+RSI_STATE_LABELS = ("neutral", "oversold", "overbought")
+MACD_CROSS_LABELS = ("none", "golden", "dead")
+BB_POSITION_LABELS = ("middle", "above", "upper", "lower", "below")
+VOL_STATE_LABELS = ("low", "medium", "high")
+
+
+def _nan_array(n: int) -> np.ndarray:
+    return np.full(n, np.nan)
+
+
+def _decode_labels(codes: np.ndarray, labels: tuple[str, ...], categorical: bool):
+    """State codes -> categorical (codes kept as-is) or object strings (-1 -> NaN)"""
+    if categorical:
+        return pd.Categorical.from_codes(codes, categories=list(labels))
+    if (codes < 0).all():
+        return _nan_array(len(codes))
+    decoded = np.array(labels + (np.nan,), dtype=object)
+    return decoded[codes]
+
+
+def detect_crosses(a, b) -> np.ndarray:
+    """
+    Vectorized crossover detection between two series
+
+    Compares each bar with the previous one using shifted arrays:
+    ``CROSS_UP`` where ``a`` moves from ``<= b`` to ``> b``, ``CROSS_DOWN``
+    where it moves from ``>= b`` to ``< b``, ``CROSS_NONE`` otherwise or
+    when any of the four values is NaN. ``b`` may be a scalar level.
+
+    Usable for any pair: MACD/signal, SMA20/SMA60, close/BB_upper, ...
+
+    Returns:
+        int8 array with one code per bar (the first bar is always CROSS_NONE)
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.broadcast_to(np.asarray(b, dtype=np.float64), a.shape)
+    codes = np.zeros(a.shape, dtype=np.int8)
+    if a.size < 2:
+        return codes
+
+    curr_a, curr_b = a[1:], b[1:]
+    prev_a, prev_b = a[:-1], b[:-1]
+    with np.errstate(invalid="ignore"):
+        valid = ~(np.isnan(curr_a) | np.isnan(curr_b) | np.isnan(prev_a) | np.isnan(prev_b))
+        up = valid & (prev_a <= prev_b) & (curr_a > curr_b)
+        down = valid & (prev_a >= prev_b) & (curr_a < curr_b)
+
+    codes[1:][up] = CROSS_UP
+    codes[1:][down] = CROSS_DOWN
+    return codes
+
+
+def cross_labels(codes: np.ndarray, up: str = "golden", down: str = "dead", none: str = "none") -> np.ndarray:
+    """Map cross codes to string labels"""
+    return np.where(codes == CROSS_UP, up, np.where(codes == CROSS_DOWN, down, none)).astype(object)
+
 
 class IndicatorCalculator:
     """Calculates technical analysis indicators - 增强版"""
@@ -43,12 +115,26 @@ class IndicatorCalculator:
         self.macd_slow = macd_slow
         self.macd_signal = macd_signal
 
-    def calculate_all(self, df: pd.DataFrame) -> pd.DataFrame:
+    def parameters(self) -> tuple[int, ...]:
+        """Indicator periods (part of cache keys for computed frames)"""
+        return (
+            self.short_ma, self.mid_ma, self.atr_period, self.rsi_period, self.adx_period,
+            self.bb_period, self.macd_fast, self.macd_slow, self.macd_signal,
+        )
+
+    def calculate_all(self, df: pd.DataFrame, categorical: bool = False) -> pd.DataFrame:
         """
         Calculate all technical indicators and append to DataFrame
 
+        Indicators are computed by a columnar kernel on contiguous float64
+        arrays; state labels (trend_dir, RSI_state, ...) come out of it as
+        small-int codes.
+
         Args:
             df: DataFrame with OHLCV data (columns: date, open, high, low, close, volume)
+            categorical: Keep state labels as pandas categoricals (int8 codes)
+                instead of object string columns. Values read back as the
+                same strings, so row access and comparisons are unchanged.
 
         Returns:
             DataFrame with indicators appended
@@ -57,28 +143,15 @@ class IndicatorCalculator:
             logger.warning("Insufficient data for indicator calculation")
             return df
 
-        df = df.copy()
+        columns = self.compute_columns(df)
 
-        # Moving Averages (SMA, EMA)
-        df = self._calculate_moving_averages(df)
+        for name, value in columns.items():
+            if isinstance(value, tuple):
+                codes, labels = value
+                columns[name] = _decode_labels(codes, labels, categorical)
 
-        # Trend Analysis (基于均线)
-        df = self._analyze_trend(df)
-
-        # ADX - 趋势强度指标
-        df = self._calculate_adx(df)
-
-        # RSI - 相对强弱指数
-        df = self._calculate_rsi(df)
-
-        # MACD - 动量指标
-        df = self._calculate_macd(df)
-
-        # Bollinger Bands - 布林带
-        df = self._calculate_bollinger_bands(df)
-
-        # ATR (Volatility)
-        df = self._calculate_atr(df)
+        indicators = pd.DataFrame(columns, index=df.index)
+        df = pd.concat([df.drop(columns=list(columns), errors="ignore"), indicators], axis=1)
 
         # Support/Resistance
         df = self._calculate_support_resistance(df)
@@ -88,39 +161,64 @@ class IndicatorCalculator:
 
         return df
 
-    def _calculate_moving_averages(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate moving averages - SMA and EMA"""
-        # SMA
-        if len(df) >= self.short_ma:
-            df[f"SMA_{self.short_ma}"] = ta.sma(df["close"], length=self.short_ma)
-        else:
-            df[f"SMA_{self.short_ma}"] = np.nan
+    def compute_columns(self, df: pd.DataFrame) -> dict[str, Any]:
+        """
+        Columnar kernel: per-bar indicators as NumPy arrays
 
-        if len(df) >= self.mid_ma:
-            df[f"SMA_{self.mid_ma}"] = ta.sma(df["close"], length=self.mid_ma)
-        else:
-            df[f"SMA_{self.mid_ma}"] = np.nan
+        Numeric indicators map to float64 arrays; state labels map to
+        ``(int8 codes, labels)`` pairs where ``labels[code]`` is the state
+        and -1 means missing.
+        """
+        high = np.ascontiguousarray(df["high"].to_numpy(dtype=np.float64))
+        low = np.ascontiguousarray(df["low"].to_numpy(dtype=np.float64))
+        close = np.ascontiguousarray(df["close"].to_numpy(dtype=np.float64))
 
-        # EMA for MACD calculation
-        if len(df) >= self.macd_fast:
-            df[f"EMA_{self.macd_fast}"] = ta.ema(df["close"], length=self.macd_fast)
-        else:
-            df[f"EMA_{self.macd_fast}"] = np.nan
+        columns: dict[str, Any] = {}
 
-        if len(df) >= self.macd_slow:
-            df[f"EMA_{self.macd_slow}"] = ta.ema(df["close"], length=self.macd_slow)
-        else:
-            df[f"EMA_{self.macd_slow}"] = np.nan
+        # Moving Averages (SMA, EMA)
+        columns.update(self._calculate_moving_averages(close))
 
-        # EMA short for general use
-        if len(df) >= self.short_ma:
-            df[f"EMA_{self.short_ma}"] = ta.ema(df["close"], length=self.short_ma)
-        else:
-            df[f"EMA_{self.short_ma}"] = np.nan
+        # Trend Analysis (基于均线)
+        columns.update(self._analyze_trend(columns[f"SMA_{self.short_ma}"], columns[f"SMA_{self.mid_ma}"]))
 
-        return df
+        # ADX - 趋势强度指标
+        columns.update(self._calculate_adx(high, low, close))
 
-    def _calculate_adx(self, df: pd.DataFrame) -> pd.DataFrame:
+        # RSI - 相对强弱指数
+        columns.update(self._calculate_rsi(close))
+
+        # MACD - 动量指标
+        columns.update(self._calculate_macd(close))
+
+        # Bollinger Bands - 布林带
+        columns.update(self._calculate_bollinger_bands(close))
+
+        # ATR (Volatility)
+        columns.update(self._calculate_atr(high, low, close))
+
+        return columns
+
+    def _calculate_moving_averages(self, close: np.ndarray) -> dict[str, np.ndarray]:
+        """Calculate moving averages - SMA and EMA"""
+        series = pd.Series(close, copy=False)
+
+        def moving_average(func, length: int) -> np.ndarray:
+            if len(close) >= length:
+                return func(series, length=length).to_numpy(dtype=np.float64)
+            return _nan_array(len(close))
+
+        return {
+            # SMA
+            f"SMA_{self.short_ma}": moving_average(ta.sma, self.short_ma),
+            f"SMA_{self.mid_ma}": moving_average(ta.sma, self.mid_ma),
+            # EMA for MACD calculation
+            f"EMA_{self.macd_fast}": moving_average(ta.ema, self.macd_fast),
+            f"EMA_{self.macd_slow}": moving_average(ta.ema, self.macd_slow),
+            # EMA short for general use
+            f"EMA_{self.short_ma}": moving_average(ta.ema, self.short_ma),
+        }
+
+    def _calculate_adx(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> dict[str, np.ndarray]:
         """
         Calculate ADX (Average Directional Index) - 趋势强度指标
         
@@ -134,31 +232,25 @@ class IndicatorCalculator:
         +DI > -DI: 上涨趋势
         +DI < -DI: 下跌趋势
         """
-        if len(df) < self.adx_period + 10:
-            df["ADX"] = np.nan
-            df["PLUS_DI"] = np.nan
-            df["MINUS_DI"] = np.nan
-            return df
+        n = len(close)
+        empty = {"ADX": _nan_array(n), "PLUS_DI": _nan_array(n), "MINUS_DI": _nan_array(n)}
+        if n < self.adx_period + 10:
+            return empty
 
         try:
-            adx_df = ta.adx(df["high"], df["low"], df["close"], length=self.adx_period)
+            adx_df = ta.adx(pd.Series(high), pd.Series(low), pd.Series(close), length=self.adx_period)
             if adx_df is not None and not adx_df.empty:
-                df["ADX"] = adx_df[f"ADX_{self.adx_period}"]
-                df["PLUS_DI"] = adx_df[f"DMP_{self.adx_period}"]
-                df["MINUS_DI"] = adx_df[f"DMN_{self.adx_period}"]
-            else:
-                df["ADX"] = np.nan
-                df["PLUS_DI"] = np.nan
-                df["MINUS_DI"] = np.nan
+                return {
+                    "ADX": adx_df[f"ADX_{self.adx_period}"].to_numpy(dtype=np.float64),
+                    "PLUS_DI": adx_df[f"DMP_{self.adx_period}"].to_numpy(dtype=np.float64),
+                    "MINUS_DI": adx_df[f"DMN_{self.adx_period}"].to_numpy(dtype=np.float64),
+                }
         except Exception as e:
             logger.warning(f"ADX calculation failed: {e}")
-            df["ADX"] = np.nan
-            df["PLUS_DI"] = np.nan
-            df["MINUS_DI"] = np.nan
 
-        return df
+        return empty
 
-    def _calculate_rsi(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_rsi(self, close: np.ndarray) -> dict[str, Any]:
         """
         Calculate RSI (Relative Strength Index) - 相对强弱指数
         
@@ -167,27 +259,19 @@ class IndicatorCalculator:
         - 30-70: 中性区域
         - 70-100: 超买区域，可能回调
         """
-        if len(df) < self.rsi_period + 1:
-            df["RSI"] = np.nan
-            df["RSI_state"] = "neutral"
-            return df
-
-        try:
-            df["RSI"] = ta.rsi(df["close"], length=self.rsi_period)
-            
-            # RSI 状态判断
-            df["RSI_state"] = "neutral"
-            valid_mask = df["RSI"].notna()
-            df.loc[valid_mask & (df["RSI"] < 30), "RSI_state"] = "oversold"
-            df.loc[valid_mask & (df["RSI"] > 70), "RSI_state"] = "overbought"
-        except Exception as e:
-            logger.warning(f"RSI calculation failed: {e}")
-            df["RSI"] = np.nan
-            df["RSI_state"] = "neutral"
-
-        return df
-
-    def _calculate_macd(self, df: pd.DataFrame) -> pd.DataFrame:
+        n = len(close)
+        rsi = _nan_array(n)
+        if n >= self.rsi_period + 1:
+            try:
+                rsi = ta.rsi(pd.Series(close), length=self.rsi_period).to_numpy(dtype=np.float64)
+            except Exception as e:
+                logger.warning(f"RSI calculation failed: {e}")
+
+        # RSI 状态判断 (NaN compares False -> neutral)
+        state = np.select([rsi < 30, rsi > 70], [1, 2], 0).astype(np.int8)
+        return {"RSI": rsi, "RSI_state": (state, RSI_STATE_LABELS)}
+
+    def _calculate_macd(self, close: np.ndarray) -> dict[str, Any]:
         """
         Calculate MACD (Moving Average Convergence Divergence) - 动量指标
         
@@ -196,56 +280,37 @@ class IndicatorCalculator:
         - MACD线下穿信号线: 死叉 (卖出信号)
         - 柱状图: 正值且增加 = 上涨动能增强
         """
-        if len(df) < self.macd_slow + self.macd_signal:
-            df["MACD"] = np.nan
-            df["MACD_signal"] = np.nan
-            df["MACD_hist"] = np.nan
-            df["MACD_cross"] = "none"
-            return df
-
-        try:
-            macd_df = ta.macd(
-                df["close"],
-                fast=self.macd_fast,
-                slow=self.macd_slow,
-                signal=self.macd_signal
-            )
-            if macd_df is not None and not macd_df.empty:
-                df["MACD"] = macd_df[f"MACD_{self.macd_fast}_{self.macd_slow}_{self.macd_signal}"]
-                df["MACD_signal"] = macd_df[f"MACDs_{self.macd_fast}_{self.macd_slow}_{self.macd_signal}"]
-                df["MACD_hist"] = macd_df[f"MACDh_{self.macd_fast}_{self.macd_slow}_{self.macd_signal}"]
-                
-                # 检测 MACD 交叉
-                df["MACD_cross"] = "none"
-                if len(df) >= 2:
-                    for i in range(1, len(df)):
-                        macd_curr = df["MACD"].iloc[i]
-                        macd_prev = df["MACD"].iloc[i-1]
-                        signal_curr = df["MACD_signal"].iloc[i]
-                        signal_prev = df["MACD_signal"].iloc[i-1]
-                        
-                        if pd.notna(macd_curr) and pd.notna(macd_prev) and pd.notna(signal_curr) and pd.notna(signal_prev):
-                            # 金叉：MACD从下方穿过信号线
-                            if macd_prev <= signal_prev and macd_curr > signal_curr:
-                                df.iloc[i, df.columns.get_loc("MACD_cross")] = "golden"
-                            # 死叉：MACD从上方穿过信号线
-                            elif macd_prev >= signal_prev and macd_curr < signal_curr:
-                                df.iloc[i, df.columns.get_loc("MACD_cross")] = "dead"
-            else:
-                df["MACD"] = np.nan
-                df["MACD_signal"] = np.nan
-                df["MACD_hist"] = np.nan
-                df["MACD_cross"] = "none"
-        except Exception as e:
-            logger.warning(f"MACD calculation failed: {e}")
-            df["MACD"] = np.nan
-            df["MACD_signal"] = np.nan
-            df["MACD_hist"] = np.nan
-            df["MACD_cross"] = "none"
-
-        return df
-
-    def _calculate_bollinger_bands(self, df: pd.DataFrame) -> pd.DataFrame:
+        n = len(close)
+        macd = signal = hist = _nan_array(n)
+
+        if n >= self.macd_slow + self.macd_signal:
+            try:
+                macd_df = ta.macd(
+                    pd.Series(close),
+                    fast=self.macd_fast,
+                    slow=self.macd_slow,
+                    signal=self.macd_signal
+                )
+                if macd_df is not None and not macd_df.empty:
+                    suffix = f"{self.macd_fast}_{self.macd_slow}_{self.macd_signal}"
+                    macd = macd_df[f"MACD_{suffix}"].to_numpy(dtype=np.float64)
+                    signal = macd_df[f"MACDs_{suffix}"].to_numpy(dtype=np.float64)
+                    hist = macd_df[f"MACDh_{suffix}"].to_numpy(dtype=np.float64)
+            except Exception as e:
+                logger.warning(f"MACD calculation failed: {e}")
+                macd = signal = hist = _nan_array(n)
+
+        # 检测 MACD 交叉 (金叉: MACD上穿信号线, 死叉: MACD下穿信号线)
+        crosses = detect_crosses(macd, signal)
+        codes = np.where(crosses == CROSS_DOWN, 2, crosses).astype(np.int8)
+        return {
+            "MACD": macd,
+            "MACD_signal": signal,
+            "MACD_hist": hist,
+            "MACD_cross": (codes, MACD_CROSS_LABELS),
+        }
+
+    def _calculate_bollinger_bands(self, close: np.ndarray) -> dict[str, Any]:
         """
         Calculate Bollinger Bands - 布林带
         
@@ -256,107 +321,94 @@ class IndicatorCalculator:
         - 带宽收窄: 波动性降低，可能即将突破
         - 带宽扩大: 波动性增加
         """
-        if len(df) < self.bb_period:
-            df["BB_upper"] = np.nan
-            df["BB_middle"] = np.nan
-            df["BB_lower"] = np.nan
-            df["BB_width"] = np.nan
-            df["BB_position"] = "middle"
-            return df
-
-        try:
-            bb_df = ta.bbands(df["close"], length=self.bb_period, std=2)
-            if bb_df is not None and not bb_df.empty:
-                # pandas_ta 列名可能因版本不同而不同，自动查找
-                bb_cols = bb_df.columns.tolist()
-                upper_col = next((c for c in bb_cols if c.startswith('BBU')), None)
-                middle_col = next((c for c in bb_cols if c.startswith('BBM')), None)
-                lower_col = next((c for c in bb_cols if c.startswith('BBL')), None)
-                
-                if upper_col and middle_col and lower_col:
-                    df["BB_upper"] = bb_df[upper_col]
-                    df["BB_middle"] = bb_df[middle_col]
-                    df["BB_lower"] = bb_df[lower_col]
-                else:
-                    raise ValueError(f"Bollinger Bands columns not found. Available: {bb_cols}")
-                
-                # 计算布林带宽度 (%)
-                df["BB_width"] = ((df["BB_upper"] - df["BB_lower"]) / df["BB_middle"]) * 100
-                
-                # 判断价格在布林带中的位置
-                df["BB_position"] = "middle"
-                valid_mask = df["BB_upper"].notna() & df["BB_lower"].notna()
-                
-                # 价格高于上轨
-                df.loc[valid_mask & (df["close"] > df["BB_upper"]), "BB_position"] = "above"
-                # 价格在上轨附近 (上半部分)
-                df.loc[valid_mask & (df["close"] <= df["BB_upper"]) & (df["close"] > df["BB_middle"]), "BB_position"] = "upper"
-                # 价格在下轨附近 (下半部分)
-                df.loc[valid_mask & (df["close"] <= df["BB_middle"]) & (df["close"] > df["BB_lower"]), "BB_position"] = "lower"
-                # 价格低于下轨
-                df.loc[valid_mask & (df["close"] < df["BB_lower"]), "BB_position"] = "below"
-            else:
-                df["BB_upper"] = np.nan
-                df["BB_middle"] = np.nan
-                df["BB_lower"] = np.nan
-                df["BB_width"] = np.nan
-                df["BB_position"] = "middle"
-        except Exception as e:
-            logger.warning(f"Bollinger Bands calculation failed: {e}")
-            df["BB_upper"] = np.nan
-            df["BB_middle"] = np.nan
-            df["BB_lower"] = np.nan
-            df["BB_width"] = np.nan
-            df["BB_position"] = "middle"
-
-        return df
-
-    def _analyze_trend(self, df: pd.DataFrame) -> pd.DataFrame:
+        n = len(close)
+        upper = middle = lower = width = _nan_array(n)
+
+        if n >= self.bb_period:
+            try:
+                bb_df = ta.bbands(pd.Series(close), length=self.bb_period, std=2)
+                if bb_df is not None and not bb_df.empty:
+                    # pandas_ta 列名可能因版本不同而不同，自动查找
+                    bb_cols = bb_df.columns.tolist()
+                    upper_col = next((c for c in bb_cols if c.startswith('BBU')), None)
+                    middle_col = next((c for c in bb_cols if c.startswith('BBM')), None)
+                    lower_col = next((c for c in bb_cols if c.startswith('BBL')), None)
+
+                    if not (upper_col and middle_col and lower_col):
+                        raise ValueError(f"Bollinger Bands columns not found. Available: {bb_cols}")
+
+                    upper = bb_df[upper_col].to_numpy(dtype=np.float64)
+                    middle = bb_df[middle_col].to_numpy(dtype=np.float64)
+                    lower = bb_df[lower_col].to_numpy(dtype=np.float64)
+                    # 计算布林带宽度 (%)
+                    width = (upper - lower) / middle * 100
+            except Exception as e:
+                logger.warning(f"Bollinger Bands calculation failed: {e}")
+                upper = middle = lower = width = _nan_array(n)
+
+        # 判断价格在布林带中的位置: above / upper (上半部分) / lower (下半部分) / below
+        valid = ~(np.isnan(upper) | np.isnan(lower))
+        position = np.select(
+            [
+                valid & (close > upper),
+                valid & (close > middle),
+                valid & (close > lower),
+                valid & (close < lower),
+            ],
+            [1, 2, 3, 4],
+            0,
+        ).astype(np.int8)
+
+        return {
+            "BB_upper": upper,
+            "BB_middle": middle,
+            "BB_lower": lower,
+            "BB_width": width,
+            "BB_position": (position, BB_POSITION_LABELS),
+        }
+
+    def _analyze_trend(self, sma_short: np.ndarray, sma_mid: np.ndarray) -> dict[str, Any]:
         """Analyze trend direction and strength"""
-        short_col = f"SMA_{self.short_ma}"
-        mid_col = f"SMA_{self.mid_ma}"
-
-        # Trend direction - handle NA safely
-        df["trend_dir"] = "neutral"
         # Only compare where both columns have valid values
-        valid_mask = df[short_col].notna() & df[mid_col].notna()
-        df.loc[valid_mask & (df[short_col] > df[mid_col]).fillna(False), "trend_dir"] = "up"
-        df.loc[valid_mask & (df[short_col] < df[mid_col]).fillna(False), "trend_dir"] = "down"
+        valid = ~(np.isnan(sma_short) | np.isnan(sma_mid))
+
+        # Trend direction
+        direction = np.select(
+            [valid & (sma_short > sma_mid), valid & (sma_short < sma_mid)], [1, 2], 0
+        ).astype(np.int8)
 
         # Trend strength (based on MA separation)
-        df["trend_strength"] = "weak"
-        if valid_mask.any():
-            ma_diff = (df[short_col] - df[mid_col]) / df[mid_col] * 100
-            df.loc[valid_mask & (ma_diff.abs() > 1).fillna(False), "trend_strength"] = "medium"
-            df.loc[valid_mask & (ma_diff.abs() > 2).fillna(False), "trend_strength"] = "strong"
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ma_diff = np.abs((sma_short - sma_mid) / sma_mid * 100)
+        strength = np.select([valid & (ma_diff > 2), valid & (ma_diff > 1)], [2, 1], 0).astype(np.int8)
 
-        return df
+        return {
+            "trend_dir": (direction, TREND_DIR_LABELS),
+            "trend_strength": (strength, TREND_STRENGTH_LABELS),
+        }
 
-    def _calculate_atr(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_atr(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> dict[str, Any]:
         """Calculate Average True Range"""
+        n = len(close)
         atr_col = f"ATR_{self.atr_period}"
-        if len(df) >= self.atr_period:
-            df[atr_col] = ta.atr(
-                high=df["high"], low=df["low"], close=df["close"], length=self.atr_period
+        atr = _nan_array(n)
+        if n >= self.atr_period:
+            result = ta.atr(
+                high=pd.Series(high), low=pd.Series(low), close=pd.Series(close), length=self.atr_period
             )
+            if result is not None:
+                atr = result.to_numpy(dtype=np.float64)
+
+        # Volatility state relative to the median ATR (all missing if no ATR)
+        if np.isnan(atr).all():
+            state = np.full(n, -1, dtype=np.int8)
         else:
-            df[atr_col] = np.nan
-
-        # Volatility state - handle NA safely
-        df["vol_state"] = "low"
-        if atr_col in df.columns:
-            atr_median = df[atr_col].median()
-            if pd.isna(atr_median):
-                df["vol_state"] = np.nan
-            else:
-                valid_mask = df[atr_col].notna()
-                df.loc[valid_mask & (df[atr_col] > atr_median * 1.5).fillna(False), "vol_state"] = "high"
-                df.loc[
-                    valid_mask & (df[atr_col] > atr_median * 0.8).fillna(False) & (df[atr_col] <= atr_median * 1.5).fillna(False),
-                    "vol_state",
-                ] = "medium"
+            atr_median = np.nanmedian(atr)
+            state = np.select(
+                [atr > atr_median * 1.5, atr > atr_median * 0.8], [2, 1], 0
+            ).astype(np.int8)
 
-        return df
+        return {atr_col: atr, "vol_state": (state, VOL_STATE_LABELS)}
 
     def _calculate_support_resistance(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -364,7 +416,7 @@ class IndicatorCalculator:
         Using local minima/maxima approach
         """
         # Lookback period for local extrema
-        lookback = 20
+        lookback = SR_LOOKBACK
 
         # Find local minima (support) - handle NA safely
         df["local_min"] = df["low"].rolling(window=lookback * 2 + 1, center=True).min()
@@ -376,32 +428,26 @@ class IndicatorCalculator:
         # Use fillna(False) to handle NA values in comparison results
         df["is_resistance"] = (df["local_max"].notna()) & (df["high"] == df["local_max"]).fillna(False)
 
-        # Get recent support and resistance levels
-        recent_data = df.tail(60)  # Look at last ~3 months
-
-        supports = recent_data[recent_data["is_support"] == True]["low"].tolist()
-        resistances = recent_data[recent_data["is_resistance"] == True]["high"].tolist()
+        # Nearest pivots in the recent bars (ranked full-history zones: services.levels)
+        recent_data = df.tail(SR_RECENT_BARS)  # Look at last ~3 months
+        supports = recent_data["low"].to_numpy(dtype=np.float64)[recent_data["is_support"].to_numpy(dtype=bool)]
+        resistances = recent_data["high"].to_numpy(dtype=np.float64)[recent_data["is_resistance"].to_numpy(dtype=bool)]
+        current_price = df["close"].iloc[-1]
 
-        # Cluster similar levels
-        current_price = df.iloc[-1]["close"]
+        # Find support below / resistance above current price
+        valid_supports = supports[supports < current_price]
+        if valid_supports.size:
+            df["support_level"] = valid_supports.max()
 
-        if supports:
-            # Find support below current price
-            valid_supports = [s for s in supports if s < current_price]
-            if valid_supports:
-                df["support_level"] = max(valid_supports)
-
-        if resistances:
-            # Find resistance above current price
-            valid_resistances = [r for r in resistances if r > current_price]
-            if valid_resistances:
-                df["resistance_level"] = min(valid_resistances)
+        valid_resistances = resistances[resistances > current_price]
+        if valid_resistances.size:
+            df["resistance_level"] = valid_resistances.min()
 
         return df
 
     def _detect_range(self, df: pd.DataFrame) -> pd.DataFrame:
         """Detect if price is in a range"""
-        lookback = 60  # ~3 months
+        lookback = RANGE_LOOKBACK
         recent = df.tail(lookback)
 
         if len(recent) < lookback:
@@ -419,12 +465,18 @@ class IndicatorCalculator:
 
         return df
 
-    def get_latest_indicators(self, df: pd.DataFrame) -> TechnicalIndicators:
+    def get_latest_indicators(
+        self,
+        df: pd.DataFrame,
+        zones: Optional[tuple[list[PriceZone], list[PriceZone]]] = None,
+    ) -> TechnicalIndicators:
         """
         Extract latest indicator values as schema object
 
         Args:
             df: DataFrame with calculated indicators
+            zones: Precomputed (support, resistance) zones; detected from
+                ``df``'s full history when omitted
 
         Returns:
             TechnicalIndicators object
@@ -433,6 +485,7 @@ class IndicatorCalculator:
             return TechnicalIndicators()
 
         latest = df.iloc[-1]
+        support_zones, resistance_zones = zones if zones is not None else zones_for(df)
 
         # Helper to safely get float values
         def safe_float(val):
@@ -483,6 +536,8 @@ class IndicatorCalculator:
             range_high=safe_float(latest.get("range_high")),
             range_low=safe_float(latest.get("range_low")),
             range_mid=safe_float(latest.get("range_mid")),
+            support_zones=support_zones,
+            resistance_zones=resistance_zones,
         )
 
 
@@ -0,0 +1,162 @@
+"""
+Support/resistance zones over the full price history
+
+``IndicatorCalculator`` keeps one nearest pivot below / above the price
+from the last ``SR_RECENT_BARS`` bars (``support_level`` /
+``resistance_level``), which streaming and the backtester replay bar by
+bar. This module ranks whole zones instead: confirmed swing highs and lows
+of the entire history are binned on a log-price histogram, smoothed with a
+triangular kernel, and each density peak becomes a zone weighted by its
+touches and their recency. Old resistance can therefore show up as support
+once price has moved above it.
+
+Cost: pivots O(n), ordering O(p log p), histogram O(p + bins), peak
+assignment O(p log k) and ranking O(k log k) for p pivots and k zones.
+``StreamingIndicatorEngine`` collects the same pivots incrementally and
+ranks them with the same ``rank_zones``.
+"""
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.schemas import PriceZone
+
+# 枢轴点：居中窗口半宽 (窗口内最高/最低点，右侧需 width 根K线确认)
+ZONE_PIVOT_WIDTH = 5
+# 直方图分箱宽度 (对数价格，约 0.25%)
+ZONE_BIN_PCT = 0.0025
+# 同一区域收纳峰值两侧的分箱数
+ZONE_RADIUS_BINS = 2
+# 近因权重半衰期 (K线数)：越近的触及权重越高
+ZONE_HALF_LIFE = 250
+# 每侧返回的区域数量
+ZONE_MAX = 5
+
+
+def _touch_time(value: Any) -> Optional[datetime]:
+    if value is None or pd.isna(value):
+        return None
+    return pd.Timestamp(value).to_pydatetime()
+
+
+def find_pivots(values: np.ndarray, width: int = ZONE_PIVOT_WIDTH, maximum: bool = True) -> np.ndarray:
+    """
+    Indices of confirmed swing highs (``maximum``) or lows
+
+    A bar is a pivot when it equals the extreme of the centered
+    ``2 * width + 1`` window, so the last ``width`` bars are never pivots.
+    """
+    rolling = pd.Series(values).rolling(window=2 * width + 1, center=True)
+    extreme = (rolling.max() if maximum else rolling.min()).to_numpy()
+    with np.errstate(invalid="ignore"):
+        return np.flatnonzero(values == extreme)
+
+
+def rank_zones(
+    index: np.ndarray,
+    price: np.ndarray,
+    n: int,
+    close: float,
+    date_of: Optional[Callable[[int], Any]] = None,
+    bin_pct: float = ZONE_BIN_PCT,
+    half_life: float = ZONE_HALF_LIFE,
+    max_zones: int = ZONE_MAX,
+) -> tuple[list[PriceZone], list[PriceZone]]:
+    """
+    Cluster pivots into ranked support and resistance zones
+
+    Args:
+        index / price: Bar index and price of every pivot (any order)
+        n: Number of bars the pivots were taken from
+        close: Price the zones are classified against
+        date_of: Bar index -> timestamp, to report each zone's last touch
+        bin_pct: Histogram bin width as a price fraction
+        half_life: Bars after which a touch counts half
+        max_zones: Zones returned per side
+
+    Returns:
+        (supports, resistances): zones below / above ``close`` by their
+        weighted level, each sorted by strength (strongest first)
+    """
+    index = np.asarray(index, dtype=np.int64)
+    price = np.asarray(price, dtype=np.float64)
+    # Chronological order keeps the float sums independent of how pivots were collected
+    order = np.argsort(index, kind="stable")
+    index, price = index[order], price[order]
+    valid = price > 0
+    index, price = index[valid], price[valid]
+    if price.size == 0:
+        return [], []
+
+    # 近因权重：每经过 half_life 根K线权重减半
+    weight = 0.5 ** ((n - 1 - index) / half_life)
+
+    # 对数价格直方图 (分箱以 0 为原点，与历史长短无关) + 三角核平滑 (分箱核密度估计)
+    absolute_bins = np.floor(np.log(price) / np.log1p(bin_pct)).astype(np.int64)
+    bins = absolute_bins - absolute_bins.min()
+    density = np.bincount(bins, weights=weight)
+    smooth = np.convolve(np.pad(density, 1), [0.25, 0.5, 0.25], mode="valid")
+
+    # 密度峰值 (平台取最右侧)
+    padded = np.pad(smooth, 1)
+    peaks = np.flatnonzero((smooth > 0) & (smooth >= padded[:-2]) & (smooth > padded[2:]))
+
+    # 每个枢轴点归入最近的峰值，超出 ZONE_RADIUS_BINS 的不计入任何区域
+    nearest = np.searchsorted((peaks[:-1] + peaks[1:]) / 2, bins, side="right")
+    member = np.abs(bins - peaks[nearest]) <= ZONE_RADIUS_BINS
+    zone, index, price, weight = nearest[member], index[member], price[member], weight[member]
+
+    k = len(peaks)
+    strength = np.bincount(zone, weights=weight, minlength=k)
+    touches = np.bincount(zone, minlength=k)
+    level = np.bincount(zone, weights=weight * price, minlength=k) / np.where(strength > 0, strength, 1)
+    zone_low = np.full(k, np.inf)
+    zone_high = np.full(k, -np.inf)
+    last_touch = np.full(k, -1, dtype=np.int64)
+    np.minimum.at(zone_low, zone, price)
+    np.maximum.at(zone_high, zone, price)
+    np.maximum.at(last_touch, zone, index)
+
+    def build(selected: np.ndarray) -> list[PriceZone]:
+        ranked = selected[np.argsort(-strength[selected], kind="stable")][:max_zones]
+        return [
+            PriceZone(
+                level=round(float(level[z]), 4),
+                low=float(zone_low[z]),
+                high=float(zone_high[z]),
+                touches=int(touches[z]),
+                strength=round(float(strength[z]), 4),
+                bars_since_touch=int(n - 1 - last_touch[z]),
+                last_touch=_touch_time(date_of(int(last_touch[z]))) if date_of else None,
+            )
+            for z in ranked
+        ]
+
+    populated = np.flatnonzero(touches > 0)
+    return build(populated[level[populated] < close]), build(populated[level[populated] > close])
+
+
+def zones_for(df: pd.DataFrame, width: int = ZONE_PIVOT_WIDTH, **kwargs) -> tuple[list[PriceZone], list[PriceZone]]:
+    """
+    Ranked zones of an OHLC frame, classified against its last close
+
+    Pivots come from ``width``-confirmed swing highs and lows of the whole
+    frame; ``kwargs`` are passed to ``rank_zones``.
+    """
+    if df.empty:
+        return [], []
+    high = df["high"].to_numpy(dtype=np.float64)
+    low = df["low"].to_numpy(dtype=np.float64)
+    highs = find_pivots(high, width, maximum=True)
+    lows = find_pivots(low, width, maximum=False)
+    dates = df["date"] if "date" in df.columns else None
+    return rank_zones(
+        np.concatenate([highs, lows]),
+        np.concatenate([high[highs], low[lows]]),
+        len(df),
+        float(df["close"].iloc[-1]),
+        date_of=(lambda i: dates.iloc[i]) if dates is not None else None,
+        **kwargs,
+    )
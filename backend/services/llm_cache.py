@@ -0,0 +1,156 @@
+"""
+Persistent LLM response cache
+
+Explanations and news sentiment are regenerated on every ``/analysis``
+hit even when their inputs have not changed. Responses are stored in a
+local SQLite database keyed by a SHA-256 of the normalized prompt inputs
+(content addressed), expire after a TTL and are evicted least recently
+used first, so they survive restarts without growing unbounded.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    call_type TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+"""
+
+
+def make_cache_key(call_type: str, inputs: dict[str, Any]) -> str:
+    """Content hash of normalized prompt inputs"""
+    canonical = json.dumps({"call_type": call_type, **inputs}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed TTL + LRU cache of LLM responses (thread-safe)
+
+    Values are stored as JSON, so both plain text and parsed dicts
+    round-trip. Hit/miss counters are kept per call type since start-up.
+    """
+
+    def __init__(self, path: Path, ttl: float, max_entries: int):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counters: dict[str, dict[str, int]] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _count(self, call_type: str, outcome: str):
+        counters = self._counters.setdefault(call_type, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def get(self, key: str, call_type: str) -> Optional[Any]:
+        """Cached value, or None on a miss (expired entries are dropped)"""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row is None:
+                    self._count(call_type, "misses")
+                    return None
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self._count(call_type, "hits")
+                return json.loads(row[0])
+            except (sqlite3.Error, json.JSONDecodeError) as e:
+                logger.error(f"LLM cache read failed: {e}")
+                self._count(call_type, "misses")
+                return None
+
+    def put(self, key: str, call_type: str, value: Any):
+        """Store a value and evict least recently used entries beyond max_entries"""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, call_type, value, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, call_type, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"LLM cache write failed: {e}")
+
+    def clear(self):
+        """Delete all cached responses"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"LLM cache clear failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> dict:
+        """Hit rates overall and per call type, plus the number of stored entries"""
+        with self._lock:
+            entries = 0
+            if self._conn is not None or self.path.exists():
+                try:
+                    entries = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            by_type = {}
+            total_hits = total_misses = 0
+            for call_type, counters in self._counters.items():
+                hits, misses = counters["hits"], counters["misses"]
+                total_hits += hits
+                total_misses += misses
+                by_type[call_type] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                }
+            lookups = total_hits + total_misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": total_hits,
+                "misses": total_misses,
+                "hit_rate": round(total_hits / lookups, 4) if lookups else 0.0,
+                "by_type": by_type,
+            }
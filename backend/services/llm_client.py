@@ -4,24 +4,31 @@ LLM Client Service - Provides optional LLM enhancement via LLM providers
 This service integrates with LLM providers (OpenRouter / Zhipu BigModel) to provide LLM capabilities for:
 - Enhanced explanation generation
 - News sentiment analysis
-- Chat-based Q&A
+- Chat-based Q&A (complete or streamed token by token)
 
 Key features:
 - Graceful fallback when LLM is unavailable
 - Timeout and retry logic
+- Pooled keep-alive HTTP client (HTTP/2 when available) with bounded concurrency
+- Persistent response cache for explanations and per-headline news sentiment
 - Rate limiting for cost control
 - Comprehensive logging
 """
+import asyncio
+import hashlib
+import importlib.util
 import json
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 import httpx
 
 from core.config import settings
+from services.llm_cache import LLMResponseCache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -33,12 +40,52 @@ class LLMCallType(Enum):
     CHAT = "chat"
 
 
+def _round_level(value: Optional[float]) -> Optional[int]:
+    """Round a price level for cache keys (None/NaN -> None)"""
+    if value is None or value != value:
+        return None
+    return round(value)
+
+
+def _news_item_key(item: dict) -> str:
+    """Stable identity of a news item: Finnhub id, else a hash of URL + headline"""
+    news_id = item.get("id")
+    if news_id:
+        return f"finnhub:{news_id}"
+    content = f"{item.get('url', '')}\n{item.get('headline', '')}"
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _match_batch_items(llm_items: list[dict], batch: list[dict]) -> dict[int, dict]:
+    """Map LLM result items to 0-based batch positions (by index, else by headline)"""
+    matched: dict[int, dict] = {}
+    for llm_item in llm_items:
+        try:
+            pos = int(llm_item.get("index", 0)) - 1  # LLM uses 1-based index
+        except (TypeError, ValueError):
+            pos = -1
+        if not 0 <= pos < len(batch):
+            headline = llm_item.get("headline", "")
+            pos = next(
+                (p for p, n in enumerate(batch) if n.get("headline", "").strip() == headline),
+                -1,
+            )
+            if pos < 0:
+                continue
+        verdict = {"relevant": True}
+        for field in ("relevance", "sentiment", "reason"):
+            if llm_item.get(field):
+                verdict[field] = llm_item[field]
+        matched[pos] = verdict
+    return matched
+
+
 class LLMClient:
     """
     Client for interacting with LLM APIs via providers (OpenRouter / Zhipu BigModel)
 
     Implements:
-    - HTTP client with timeout and retry
+    - Long-lived pooled HTTP client with timeout and retry
     - Rate limiting (soft limits)
     - Call logging for monitoring
     - Graceful error handling
@@ -66,6 +113,29 @@ class LLMClient:
         self._call_counts: dict[str, int] = {}  # date -> count
         self._chat_count: int = 0  # Chat calls don't count toward daily limit
 
+        # Shared HTTP client (opened in the app lifespan, or lazily on first call)
+        self._http: Optional[httpx.AsyncClient] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.http2 = settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._pool_stats = {
+            "requests": 0,
+            "connections_opened": 0,
+            "in_flight": 0,
+            "waiting": 0,
+            "http_versions": {},
+        }
+
+        # Persistent response cache (keyed by normalized prompt inputs)
+        self.cache: Optional[LLMResponseCache] = None
+        if settings.LLM_CACHE_ENABLED:
+            self.cache = LLMResponseCache(
+                settings.DATABASE_DIR / "llm_cache.sqlite3",
+                ttl=settings.LLM_CACHE_TTL,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            )
+
         # Setup logging
         self.log_file = settings.LOGS_DIR / "llm_calls.log"
         self._ensure_log_dir()
@@ -75,6 +145,100 @@ class LLMClient:
         else:
             logger.info(f"LLM client enabled (provider={self.provider}, model={self.model})")
 
+    async def open(self):
+        """Open the shared pooled HTTP client (called from the app lifespan)"""
+        if self._http is not None and not self._http.is_closed:
+            return
+        loop = asyncio.get_running_loop()
+        if loop is not self._http_loop:
+            # asyncio primitives bind to the first loop that waits on them
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._http_loop = loop
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+            ),
+        )
+        logger.info(
+            f"LLM HTTP client opened (http2={self.http2}, "
+            f"max_connections={settings.LLM_MAX_CONNECTIONS}, concurrency={self.max_concurrency})"
+        )
+
+    async def aclose(self):
+        """Close the shared HTTP client and its pooled connections"""
+        if self._http is not None:
+            http, self._http = self._http, None
+            if self._http_loop is asyncio.get_running_loop():
+                await http.aclose()
+            else:
+                await self._close_stale(http, self._http_loop)
+            logger.info("LLM HTTP client closed")
+
+    @staticmethod
+    async def _close_stale(http: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """Close a client opened on another loop: on that loop if it still runs, here otherwise"""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(http.aclose(), loop)
+            return
+        try:
+            await http.aclose()
+        except Exception as e:
+            # Transports of a closed loop cannot always be shut down cleanly
+            logger.debug(f"Closing stale LLM HTTP client failed: {e}")
+
+    async def _get_http(self) -> httpx.AsyncClient:
+        # Pooled connections belong to the loop that opened them; a client
+        # left over from another loop (e.g. a script run) is replaced
+        if self._http is not None and self._http_loop is not asyncio.get_running_loop():
+            stale, stale_loop, self._http = self._http, self._http_loop, None
+            await self._close_stale(stale, stale_loop)
+        if self._http is None or self._http.is_closed:
+            await self.open()
+        return self._http
+
+    async def _trace(self, event_name: str, info: dict):
+        """httpcore trace hook: counts new TCP connections (the rest reuse the pool)"""
+        if event_name == "connection.connect_tcp.complete":
+            self._pool_stats["connections_opened"] += 1
+
+    def get_pool_stats(self) -> dict:
+        """Connection pool and concurrency metrics of the shared HTTP client"""
+        stats = self._pool_stats
+        reused = max(0, stats["requests"] - stats["connections_opened"])
+        return {
+            "open": self._http is not None and not self._http.is_closed,
+            "http2_enabled": self.http2,
+            "max_connections": settings.LLM_MAX_CONNECTIONS,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": stats["in_flight"],
+            "waiting": stats["waiting"],
+            "requests": stats["requests"],
+            "connections_opened": stats["connections_opened"],
+            "connection_reuse_rate": round(reused / stats["requests"], 4) if stats["requests"] else 0.0,
+            "http_versions": dict(stats["http_versions"]),
+        }
+
+    def _cache_key(self, call_type: LLMCallType, inputs: dict[str, Any]) -> str:
+        """Cache key for a call; provider and model are part of the content"""
+        return make_cache_key(call_type.value, {"provider": self.provider, "model": self.model, **inputs})
+
+    def _cache_get(self, call_type: LLMCallType, key: str) -> Optional[Any]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key, call_type.value)
+        if cached is not None:
+            logger.info(f"LLM cache hit: {call_type.value}")
+        return cached
+
+    def _cache_put(self, call_type: LLMCallType, key: str, value: Any):
+        if self.cache is not None and value is not None:
+            self.cache.put(key, call_type.value, value)
+
     def _ensure_log_dir(self):
         """Ensure log directory exists"""
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
@@ -175,14 +339,7 @@ class LLMClient:
         self._increment_call_count(call_type)
 
         # Prepare request
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        if self.provider == "openrouter":
-            # OpenRouter recommended header
-            headers["HTTP-Referer"] = "http://localhost:8000"
-
+        headers = self._request_headers()
         payload = {
             "model": self.model,
             "messages": messages,
@@ -196,52 +353,47 @@ class LLMClient:
             try:
                 start_time = datetime.now()
 
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers=headers,
-                        json=payload,
+                response = await self._post_completion(headers, payload)
+
+                duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+
+                # Check response status
+                if response.status_code == 200:
+                    data = response.json()
+                    content = data["choices"][0]["message"]["content"]
+
+                    # Extract token usage
+                    usage = data.get("usage", {})
+                    prompt_tokens = usage.get("prompt_tokens", 0)
+                    completion_tokens = usage.get("completion_tokens", 0)
+                    total_tokens = usage.get("total_tokens", 0)
+
+                    # Log successful call
+                    self._log_call(
+                        call_type=call_type,
+                        prompt_tokens=prompt_tokens,
+                        completion_tokens=completion_tokens,
+                        total_tokens=total_tokens,
+                        duration_ms=duration_ms,
+                        success=True,
                     )
 
-                    duration_ms = (datetime.now() - start_time).total_seconds() * 1000
-
-                    # Check response status
-                    if response.status_code == 200:
-                        data = response.json()
-                        content = data["choices"][0]["message"]["content"]
-
-                        # Extract token usage
-                        usage = data.get("usage", {})
-                        prompt_tokens = usage.get("prompt_tokens", 0)
-                        completion_tokens = usage.get("completion_tokens", 0)
-                        total_tokens = usage.get("total_tokens", 0)
-
-                        # Log successful call
-                        self._log_call(
-                            call_type=call_type,
-                            prompt_tokens=prompt_tokens,
-                            completion_tokens=completion_tokens,
-                            total_tokens=total_tokens,
-                            duration_ms=duration_ms,
-                            success=True,
-                        )
-
-                        logger.info(
-                            f"LLM call succeeded: {call_type.value} "
-                            f"({total_tokens} tokens, {duration_ms:.0f}ms)"
-                        )
-
-                        return content
-
-                    else:
-                        # API returned error
-                        error_msg = f"API error {response.status_code}: {response.text}"
-                        logger.warning(f"LLM call failed (attempt {attempt + 1}): {error_msg}")
-                        last_error = error_msg
+                    logger.info(
+                        f"LLM call succeeded: {call_type.value} "
+                        f"({total_tokens} tokens, {duration_ms:.0f}ms)"
+                    )
 
-                        # Don't retry on client errors (4xx)
-                        if 400 <= response.status_code < 500:
-                            break
+                    return content
+
+                else:
+                    # API returned error
+                    error_msg = f"API error {response.status_code}: {response.text}"
+                    logger.warning(f"LLM call failed (attempt {attempt + 1}): {error_msg}")
+                    last_error = error_msg
+
+                    # Don't retry on client errors (4xx)
+                    if 400 <= response.status_code < 500:
+                        break
 
             except httpx.TimeoutException:
                 error_msg = f"Request timeout after {self.timeout}s"
@@ -272,6 +424,177 @@ class LLMClient:
         logger.error(f"LLM call failed after {self.max_retries + 1} attempts: {last_error}")
         return None
 
+    def _request_headers(self) -> dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        if self.provider == "openrouter":
+            # OpenRouter recommended header
+            headers["HTTP-Referer"] = "http://localhost:8000"
+        return headers
+
+    @asynccontextmanager
+    async def _request_slot(self) -> AsyncIterator[None]:
+        """Hold one of the bounded concurrency slots for an upstream request"""
+        stats = self._pool_stats
+        stats["waiting"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            stats["waiting"] -= 1
+        stats["in_flight"] += 1
+        stats["requests"] += 1
+        try:
+            yield
+        finally:
+            stats["in_flight"] -= 1
+            self._semaphore.release()
+
+    def _record_http_version(self, response: httpx.Response):
+        versions = self._pool_stats["http_versions"]
+        versions[response.http_version] = versions.get(response.http_version, 0) + 1
+
+    async def _post_completion(self, headers: dict[str, str], payload: dict) -> httpx.Response:
+        """POST to the chat completions endpoint over the pooled client, bounded by the semaphore"""
+        client = await self._get_http()
+        async with self._request_slot():
+            response = await client.post(
+                "/chat/completions",
+                headers=headers,
+                json=payload,
+                extensions={"trace": self._trace},
+            )
+            self._record_http_version(response)
+            return response
+
+    @asynccontextmanager
+    async def _stream_completion(self, headers: dict[str, str], payload: dict) -> AsyncIterator[httpx.Response]:
+        """Streaming variant of ``_post_completion``; the slot is held until the body is consumed"""
+        client = await self._get_http()
+        async with self._request_slot():
+            async with client.stream(
+                "POST",
+                "/chat/completions",
+                headers=headers,
+                json=payload,
+                extensions={"trace": self._trace},
+            ) as response:
+                self._record_http_version(response)
+                yield response
+
+    async def _stream_llm(
+        self,
+        messages: list[dict[str, str]],
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+        call_type: LLMCallType = LLMCallType.CHAT,
+    ) -> AsyncIterator[str]:
+        """
+        Call LLM API in streaming mode and yield content deltas as they arrive
+
+        Retries only until the first delta has been yielded; yields nothing
+        if all attempts fail before that.
+        """
+        if not self.enabled:
+            logger.debug(f"LLM stream skipped (disabled): {call_type.value}")
+            return
+
+        if not self._check_rate_limit(call_type):
+            logger.warning(f"LLM rate limit exceeded for {call_type.value}")
+            return
+
+        self._increment_call_count(call_type)
+
+        headers = self._request_headers()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+
+        last_error = None
+        started = False
+        for attempt in range(self.max_retries + 1):
+            try:
+                start_time = datetime.now()
+                first_token_ms = None
+                usage: dict = {}
+
+                async with self._stream_completion(headers, payload) as response:
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        last_error = f"API error {response.status_code}: {body}"
+                        logger.warning(f"LLM stream failed (attempt {attempt + 1}): {last_error}")
+                        # Don't retry on client errors (4xx)
+                        if 400 <= response.status_code < 500:
+                            break
+                        continue
+
+                    # Server-sent events: "data: {chunk}" lines, terminated by "data: [DONE]"
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data)
+                        except json.JSONDecodeError:
+                            continue
+                        usage = chunk.get("usage") or usage
+                        choices = chunk.get("choices") or []
+                        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                        if delta:
+                            if not started:
+                                started = True
+                                first_token_ms = (datetime.now() - start_time).total_seconds() * 1000
+                            yield delta
+
+                duration_ms = (datetime.now() - start_time).total_seconds() * 1000
+                self._log_call(
+                    call_type=call_type,
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0),
+                    total_tokens=usage.get("total_tokens", 0),
+                    duration_ms=duration_ms,
+                    success=True,
+                )
+                logger.info(
+                    f"LLM stream succeeded: {call_type.value} "
+                    f"(first token {first_token_ms or 0:.0f}ms, total {duration_ms:.0f}ms)"
+                )
+                return
+
+            except httpx.TimeoutException:
+                last_error = f"Request timeout after {self.timeout}s"
+                logger.warning(f"LLM stream failed (attempt {attempt + 1}): {last_error}")
+
+            except httpx.HTTPError as e:
+                last_error = f"HTTP error: {str(e)}"
+                logger.warning(f"LLM stream failed (attempt {attempt + 1}): {last_error}")
+
+            except Exception as e:
+                last_error = f"Unexpected error: {str(e)}"
+                logger.error(f"LLM stream failed (attempt {attempt + 1}): {last_error}")
+
+            if started:
+                # Part of the answer has been delivered; a retry would repeat it
+                break
+
+        self._log_call(
+            call_type=call_type,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            duration_ms=0,
+            success=False,
+            error=last_error,
+        )
+        logger.error(f"LLM stream failed after {attempt + 1} attempts: {last_error}")
+
     async def generate_explanation(
         self,
         market_state: str,
@@ -299,13 +622,32 @@ class LLMClient:
         Returns:
             Enhanced explanation text, or None if LLM unavailable
         """
+        if not self.enabled:
+            return None
+
         # Build context
         news_summary = ""
+        top_titles: list[str] = []
         if news_sentiment:
             top_titles = [n.get("headline", "") for n in news_sentiment[:3] if n.get("headline")]
             if top_titles:
                 news_summary = f"近期新闻: {', '.join(top_titles)}"
 
+        # Same state, signal, headlines and (rounded) levels -> same explanation
+        cache_key = self._cache_key(LLMCallType.EXPLANATION, {
+            "market_state": market_state,
+            "trend_dir": trend_dir,
+            "price": round(current_price),
+            "support": _round_level(support),
+            "resistance": _round_level(resistance),
+            "signal": signal,
+            "signal_reason": signal_reason,
+            "headlines": top_titles,
+        })
+        cached = self._cache_get(LLMCallType.EXPLANATION, cache_key)
+        if cached is not None:
+            return cached
+
         # Build prompt
         system_prompt = """你是一位黄金交易教学助手,面向刚入门的交易者。
 
@@ -347,12 +689,14 @@ class LLMClient:
             {"role": "user", "content": user_prompt},
         ]
 
-        return await self._call_llm(
+        explanation = await self._call_llm(
             messages=messages,
             max_tokens=500,
             temperature=0.7,
             call_type=LLMCallType.EXPLANATION,
         )
+        self._cache_put(LLMCallType.EXPLANATION, cache_key, explanation)
+        return explanation
 
     async def analyze_news_sentiment(
         self, news_list: list[dict]
@@ -365,25 +709,93 @@ class LLMClient:
         2. Analyze sentiment (bullish/bearish/neutral for gold)
         3. Explain the impact logic chain
 
+        Verdicts are stored per news item (keyed by Finnhub id, or a hash of
+        URL + headline), so only headlines not seen before are sent to the
+        LLM, in small concurrent batches, and merged with the stored ones.
+
         Args:
             news_list: List of news items with headline and summary
+                (optionally ``id`` and ``url`` for item identity)
 
         Returns:
-            Dict with analyzed news data, or None if LLM unavailable
+            Dict with analyzed news data (``index`` is 1-based into news_list;
+            items whose batch failed are marked ``pending``), or None if LLM
+            unavailable
         """
-        if not news_list:
+        if not news_list or not self.enabled:
+            return None
+
+        verdicts: dict[int, dict] = {}
+        pending: list[tuple[int, dict, str]] = []
+        for i, n in enumerate(news_list[:20], 1):  # Analyze more news for better filtering
+            if not n.get('headline', '').strip():
+                continue
+            cache_key = self._cache_key(LLMCallType.NEWS_SENTIMENT, {"item": _news_item_key(n)})
+            cached = self._cache_get(LLMCallType.NEWS_SENTIMENT, cache_key)
+            if cached is not None:
+                verdicts[i] = cached
+            else:
+                pending.append((i, n, cache_key))
+
+        batch_size = max(1, settings.LLM_NEWS_BATCH_SIZE)
+        batches = [pending[s:s + batch_size] for s in range(0, len(pending), batch_size)]
+        results = await asyncio.gather(
+            *(self._analyze_news_batch([n for _, n, _ in batch]) for batch in batches)
+        )
+
+        failed: list[int] = []
+        summaries: list[str] = []
+        key_factors: list[str] = []
+        for batch, result in zip(batches, results):
+            if result is None:
+                failed.extend(i for i, _, _ in batch)
+                continue
+            analyzed = _match_batch_items(result.get("items", []), [n for _, n, _ in batch])
+            for pos, (i, _, cache_key) in enumerate(batch):
+                # Headlines the LLM skipped are irrelevant; remember that too
+                verdict = analyzed.get(pos, {"relevant": False})
+                verdicts[i] = verdict
+                self._cache_put(LLMCallType.NEWS_SENTIMENT, cache_key, verdict)
+            if result.get("summary"):
+                summaries.append(result["summary"])
+            key_factors.extend(f for f in result.get("key_factors", []) if f not in key_factors)
+
+        if not verdicts:
             return None
 
+        logger.info(
+            f"LLM news sentiment: {len(verdicts) - len(pending) + len(failed)} cached, "
+            f"{len(pending)} new in {len(batches)} batches ({len(failed)} failed)"
+        )
+
+        items = []
+        for i in sorted(verdicts.keys() | set(failed)):
+            headline = news_list[i - 1].get('headline', '').strip()
+            if i in verdicts:
+                verdict = verdicts[i]
+                if verdict.get("relevant"):
+                    fields = {k: v for k, v in verdict.items() if k != "relevant"}
+                    items.append({"index": i, "headline": headline, **fields})
+            else:
+                items.append({"index": i, "headline": headline, "pending": True})
+
+        return {
+            "items": items,
+            "summary": "；".join(summaries),
+            "key_factors": key_factors,
+        }
+
+    async def _analyze_news_batch(self, news_list: list[dict]) -> Optional[dict]:
+        """One LLM call over a small batch of headlines (``index`` is 1-based into the batch)"""
         # Build news with headline AND content/summary for comprehensive analysis
         news_entries = []
-        for i, n in enumerate(news_list[:20], 1):  # Analyze more news for better filtering
+        for i, n in enumerate(news_list, 1):
             headline = n.get('headline', '').strip()
             summary = n.get('summary', '').strip()
-            if headline:
-                entry = f"【新闻{i}】\n标题: {headline}"
-                if summary:
-                    entry += f"\n摘要: {summary[:200]}"  # Limit summary length
-                news_entries.append(entry)
+            entry = f"【新闻{i}】\n标题: {headline}"
+            if summary:
+                entry += f"\n摘要: {summary[:200]}"  # Limit summary length
+            news_entries.append(entry)
 
         news_text = "\n\n".join(news_entries)
 
@@ -449,7 +861,7 @@ class LLMClient:
 
         response = await self._call_llm(
             messages=messages,
-            max_tokens=1200,  # More tokens for detailed analysis
+            max_tokens=min(1200, 200 + 150 * len(news_list)),  # Scales with batch size
             temperature=0.3,  # Lower temperature for more consistent output
             call_type=LLMCallType.NEWS_SENTIMENT,
         )
@@ -463,7 +875,7 @@ class LLMClient:
                 json_match = re.search(r"\{.*\}", response, re.DOTALL)
                 if json_match:
                     result = json.loads(json_match.group())
-                    logger.info(f"LLM analyzed news: {len(result.get('items', []))} relevant items found")
+                    logger.info(f"LLM analyzed news batch: {len(result.get('items', []))}/{len(news_list)} relevant")
                     return result
                 else:
                     logger.warning("LLM response did not contain valid JSON")
@@ -491,6 +903,39 @@ class LLMClient:
         Returns:
             Answer text, or None if LLM unavailable
         """
+        return await self._call_llm(
+            messages=self._build_chat_messages(question, current_analysis, news_items),
+            max_tokens=800,
+            temperature=0.7,
+            call_type=LLMCallType.CHAT,
+        )
+
+    async def stream_chat_answer(
+        self,
+        question: str,
+        current_analysis: dict,
+        news_items: list[dict] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming version of ``answer_chat_question``: yields answer text deltas
+
+        Yields nothing if the LLM is unavailable or fails before the first token.
+        """
+        async for delta in self._stream_llm(
+            messages=self._build_chat_messages(question, current_analysis, news_items),
+            max_tokens=800,
+            temperature=0.7,
+            call_type=LLMCallType.CHAT,
+        ):
+            yield delta
+
+    def _build_chat_messages(
+        self,
+        question: str,
+        current_analysis: dict,
+        news_items: list[dict] | None,
+    ) -> list[dict[str, str]]:
+        """System and user prompt for a chat question"""
         system_prompt = """你是一位专业的黄金市场分析师和交易教学助手，拥有丰富的宏观经济和地缘政治知识。
 
 ## 你的专业领域
@@ -529,6 +974,10 @@ class LLMClient:
             context_lines.append(f"- **支撑位**: ${support:.2f}")
         if resistance:
             context_lines.append(f"- **阻力位**: ${resistance:.2f}")
+        for name, key in (("支撑区", "support_zones"), ("阻力区", "resistance_zones")):
+            levels = current_analysis.get(key)
+            if levels:
+                context_lines.append(f"- **{name}** (按强度): " + ", ".join(f"${level:.2f}" for level in levels[:3]))
 
         context_lines.append(f"- **风险提示**: {current_analysis.get('risk_warning', '无')}")
         context_lines.append(f"- **仓位建议**: {current_analysis.get('position_level', '未知')}")
@@ -561,18 +1010,11 @@ class LLMClient:
 
 请基于你的专业知识和上述市场数据，给出深度分析和建议："""
 
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
 
-        return await self._call_llm(
-            messages=messages,
-            max_tokens=800,
-            temperature=0.7,
-            call_type=LLMCallType.CHAT,
-        )
-
     def get_stats(self) -> dict:
         """
         Get LLM usage statistics
@@ -592,6 +1034,8 @@ class LLMClient:
             "daily_limit": self.daily_limit,
             "chat_calls": self._chat_count,
             "remaining_calls": max(0, self.daily_limit - today_count),
+            "pool": self.get_pool_stats(),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
         }
 
     def reset_counters(self):
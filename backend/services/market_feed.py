@@ -0,0 +1,275 @@
+"""
+Market data sources for the WebSocket server
+
+A source is an async stream of ``MarketEvent``s (price, orderbook,
+market_depth, trade). The WebSocket server runs one pump over the
+configured source and fans every event out to the subscribed clients, so
+the number of upstream calls no longer grows with the number of clients.
+
+- ``ProviderPollingSource``: polls the DataProvider (gold prices, gold
+  futures quote, order book) on fixed intervals
+- ``ReplaySource``: replays events recorded in a JSON-lines file, for
+  offline development and load testing
+- ``RecordingSource``: tees the events of another source into such a file
+"""
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from services.data_provider import AsyncDataProvider
+
+logger = logging.getLogger(__name__)
+
+# Provider gold price keys -> WebSocket symbols
+GOLD_PRICE_SYMBOLS = {
+    "london_gold": "XAU/USD",
+    "au9999": "AU9999",
+}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+@dataclass(frozen=True)
+class MarketEvent:
+    """One market data update for a symbol"""
+    type: str  # price | orderbook | market_depth | trade
+    symbol: str
+    data: dict
+    timestamp: int  # Epoch milliseconds
+
+    def to_record(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_record(cls, record: dict) -> "MarketEvent":
+        return cls(
+            type=record["type"],
+            symbol=record["symbol"],
+            data=record["data"],
+            timestamp=int(record.get("timestamp") or _now_ms()),
+        )
+
+
+class MarketDataSource(ABC):
+    """Async stream of market events"""
+
+    name = "base"
+
+    @abstractmethod
+    def events(self) -> AsyncIterator[MarketEvent]:
+        """Yield events until cancelled (or the source is exhausted)"""
+
+
+class ProviderPollingSource(MarketDataSource):
+    """
+    Polls the DataProvider and emits the results as events
+
+    Gold prices (London gold, AU9999), the gold futures quote and the order
+    book are polled on their own intervals, once for all clients. Prices
+    that did not change since the last poll are not re-emitted.
+    """
+
+    name = "provider"
+
+    def __init__(
+        self,
+        provider: AsyncDataProvider,
+        quote_symbol: str,
+        depth_symbol: str,
+        depth_limit: int = 20,
+        price_interval: float = 10.0,
+        depth_interval: float = 3.0,
+    ):
+        self.provider = provider
+        self.quote_symbol = quote_symbol
+        self.depth_symbol = depth_symbol
+        self.depth_limit = depth_limit
+        self.price_interval = price_interval
+        self.depth_interval = depth_interval
+        self._last_prices: dict[str, tuple] = {}
+        self._last_depth_update_id: Optional[int] = None
+
+    async def events(self) -> AsyncIterator[MarketEvent]:
+        queue: asyncio.Queue[MarketEvent] = asyncio.Queue()
+        pollers = [
+            asyncio.create_task(self._poll(self._poll_prices, self.price_interval, queue)),
+            asyncio.create_task(self._poll(self._poll_depth, self.depth_interval, queue)),
+        ]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            for poller in pollers:
+                poller.cancel()
+            await asyncio.gather(*pollers, return_exceptions=True)
+
+    async def _poll(
+        self,
+        fetch: Callable[[], Awaitable[list[MarketEvent]]],
+        interval: float,
+        queue: asyncio.Queue,
+    ):
+        while True:
+            try:
+                for event in await fetch():
+                    queue.put_nowait(event)
+            except Exception as e:
+                logger.error(f"Market feed poll failed ({fetch.__name__}): {e}")
+            await asyncio.sleep(interval)
+
+    def _changed(self, symbol: str, *values) -> bool:
+        if self._last_prices.get(symbol) == values:
+            return False
+        self._last_prices[symbol] = values
+        return True
+
+    async def _poll_prices(self) -> list[MarketEvent]:
+        prices, quote = await asyncio.gather(
+            self.provider.get_gold_prices(),
+            self.provider.get_quote(self.quote_symbol),
+            return_exceptions=True,
+        )
+        now = _now_ms()
+        events = []
+
+        if isinstance(prices, dict):
+            for key, symbol in GOLD_PRICE_SYMBOLS.items():
+                item = prices.get(key) or {}
+                if not item.get("is_available") or not item.get("price"):
+                    continue
+                if not self._changed(symbol, item["price"], item.get("change")):
+                    continue
+                events.append(MarketEvent("price", symbol, {
+                    **item,
+                    "symbol": symbol,
+                    "changePercent": item.get("change_pct"),
+                    "timestamp": now,
+                }, now))
+        else:
+            logger.warning(f"Gold prices poll failed: {prices}")
+
+        if isinstance(quote, dict) and quote.get("last_price"):
+            price = float(quote["last_price"])
+            prev_close = float(quote["previous_close"]) if quote.get("previous_close") else price
+            change = price - prev_close
+            if self._changed(self.quote_symbol, price, prev_close):
+                events.append(MarketEvent("price", self.quote_symbol, {
+                    "symbol": self.quote_symbol,
+                    "price": price,
+                    "change": change,
+                    "changePercent": change / prev_close * 100 if prev_close else 0.0,
+                    "timestamp": now,
+                }, now))
+        elif isinstance(quote, BaseException):
+            logger.warning(f"Quote poll failed: {quote}")
+
+        return events
+
+    async def _poll_depth(self) -> list[MarketEvent]:
+        depth = await self.provider.get_market_depth(self.depth_symbol, self.depth_limit)
+        if depth.get("error") or not (depth["bids"] or depth["asks"]):
+            return []
+        # The provider serves a local order book; skip polls that found it unchanged
+        update_id = depth.get("last_update_id")
+        if update_id is not None:
+            if update_id == self._last_depth_update_id:
+                return []
+            self._last_depth_update_id = update_id
+
+        now = _now_ms()
+        symbol = self.depth_symbol
+        bids, asks = depth["bids"], depth["asks"]
+
+        def book_side(levels: list[dict]) -> list[dict]:
+            return [
+                {"price": level["price"], "amount": level["volume"], "total": level["total"]}
+                for level in levels
+            ]
+
+        orderbook = {"symbol": symbol, "bids": book_side(bids), "asks": book_side(asks), "timestamp": now}
+        market_depth = {
+            **{k: v for k, v in depth.items() if k not in ("bids", "asks")},
+            "symbol": symbol,
+            # Price ladder from the highest ask down to the lowest bid
+            "data": [
+                *({"price": a["price"], "bidVolume": 0, "askVolume": a["volume"]} for a in reversed(asks)),
+                *({"price": b["price"], "bidVolume": b["volume"], "askVolume": 0} for b in bids),
+            ],
+            "timestamp": now,
+        }
+        return [
+            MarketEvent("orderbook", symbol, orderbook, now),
+            MarketEvent("market_depth", symbol, market_depth, now),
+        ]
+
+
+class ReplaySource(MarketDataSource):
+    """
+    Replays events from a JSON-lines file (one ``MarketEvent`` record per line)
+
+    Inter-event gaps follow the recorded timestamps divided by ``speed``;
+    ``speed <= 0`` replays as fast as possible. With ``loop`` the file is
+    replayed indefinitely.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: Path | str, speed: float = 1.0, loop: bool = False):
+        self.path = Path(path)
+        self.speed = speed
+        self.loop = loop
+
+    def load(self) -> list[MarketEvent]:
+        events = []
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    events.append(MarketEvent.from_record(json.loads(line)))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    logger.warning(f"Skipping invalid replay record {self.path}:{line_no}: {e}")
+        return events
+
+    async def events(self) -> AsyncIterator[MarketEvent]:
+        events = self.load()
+        logger.info(f"Replaying {len(events)} market events from {self.path} (speed={self.speed})")
+        if not events:
+            return
+        while True:
+            previous_ts: Optional[int] = None
+            for event in events:
+                gap = 0.0
+                if previous_ts is not None and self.speed > 0:
+                    gap = max(0, event.timestamp - previous_ts) / 1000 / self.speed
+                # Always yield to the event loop, even when replaying at full speed
+                await asyncio.sleep(gap)
+                previous_ts = event.timestamp
+                yield event
+            if not self.loop:
+                return
+
+
+class RecordingSource(MarketDataSource):
+    """Passes through the events of another source, appending each to a JSON-lines file"""
+
+    def __init__(self, source: MarketDataSource, path: Path | str):
+        self.source = source
+        self.path = Path(path)
+        self.name = f"{source.name}+record"
+
+    async def events(self) -> AsyncIterator[MarketEvent]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            async for event in self.source.events():
+                f.write(json.dumps(event.to_record(), ensure_ascii=False) + "\n")
+                f.flush()
+                yield event
@@ -0,0 +1,867 @@
+"""
+Shared market snapshot
+
+``/analysis``, ``/chart``, ``/chat``, ``/price``, ``/gold-prices`` and the
+scheduler used to fetch and compute on every call, so request latency
+followed upstream latency and upstream call volume grew with the number
+of clients. ``MarketSnapshotService`` refreshes on a schedule in the
+background and publishes an immutable ``MarketSnapshot``; endpoints read
+the current snapshot in constant time. Every view records when it was
+built, so responses can report their staleness.
+
+- quote (gold futures) and gold prices (London gold, AU9999): every
+  ``SNAPSHOT_PRICE_INTERVAL`` seconds
+- analysis and chart views, keyed by (symbol, period, interval), and
+  multi-timeframe views, keyed by (symbol, base interval): every
+  ``SNAPSHOT_REFRESH_INTERVAL`` seconds.
+  The default analysis and the daily-bar analysis behind ``/chat`` and
+  the scheduler are always tracked; other views are tracked from
+  their first successful request until ``SNAPSHOT_VIEW_IDLE`` seconds without one
+- news, DXY and the real rate: fetched once per refresh cycle and shared
+  by all analysis views (of every symbol)
+- LLM stages (news filtering, gold explanations): never called by the
+  background cycle, which reuses their last results for up to
+  ``SNAPSHOT_LLM_INTERVAL`` seconds and falls back to the keyword /
+  rule-based output after that. A request that finds them missing or
+  older than that rebuilds them, so LLM calls follow client traffic
+
+A view that is missing or too old (e.g. the service is not running, or
+upstream keeps failing) is computed on demand; concurrent requests for
+the same view share one computation. ``get_analyses`` serves a batch of
+views at once: missing ones are fetched concurrently and their indicator
+stages run side by side on the pipeline's worker pool.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Hashable, Mapping, Optional
+
+import pandas as pd
+
+from core.config import settings
+from models.schemas import ConfluenceScore, MarketAnalysis, MarketState, PriceZone
+from services.data_provider import async_data_provider
+from services.indicator_cache import indicator_cache
+from services.indicators import indicator_calculator
+from services.levels import zones_for
+from services.llm_client import llm_client
+from services.pipeline import Pipeline, run_blocking
+from services.strategy import strategy_engine
+from services.streaming_indicators import indicator_streams
+from services.timeframes import resample_timeframes
+
+logger = logging.getLogger(__name__)
+
+# A view older than this many refresh intervals is recomputed on demand
+STALE_AFTER_INTERVALS = 3
+
+# Default bar interval per period (分 / 日 / 周 / 月 / 年)
+DEFAULT_INTERVALS = {
+    "1d": "1m",
+    "1mo": "1d",
+    "1y": "1wk",
+    "5y": "1mo",
+    "max": "1mo",
+}
+
+# /chat and the daily job analyse daily bars of DEFAULT_PERIOD
+CHAT_INTERVAL = "1d"
+
+# 为了计算 MA60，图表获取比展示更长的历史数据
+CHART_FETCH_PERIODS = {
+    "1d": "5d",      # 分钟图：获取5天数据
+    "1mo": "6mo",    # 日线图：获取6个月数据（约120天，够MA60）
+    "1y": "2y",      # 周线图：获取2年数据（约104周，够MA60）
+    "5y": "10y",     # 月线图：获取10年数据（约120月，够MA60）
+    "max": "max",    # 年线图：获取全部数据
+}
+
+# Upstream window of a multi-timeframe base series other than MTF_BASE_INTERVAL
+# (yfinance serves 1m bars for 7 days, other sub-hour bars for 60 days)
+MTF_BASE_PERIODS = {
+    "1m": "5d",
+    "2m": "1mo",
+    "5m": "1mo",
+    "15m": "1mo",
+    "30m": "1mo",
+    "90m": "1mo",
+    "60m": "2y",
+    "1h": "2y",
+    "1d": "10y",
+}
+
+# 图表展示的数据点数量（按用户请求的 period）
+CHART_TAIL_SIZES = {
+    "1d": 390,    # 分: 展示约一个交易日（6.5小时 * 60分钟）
+    "1mo": 22,    # 日: 展示约1个月（~22个交易日）
+    "1y": 52,     # 周: 展示约1年（52周）
+    "5y": 60,     # 月: 展示约5年（60个月）
+    "max": 300,   # 年: 展示全部（限制最大300个月）
+}
+
+# Snapshot field holding each tracked view kind
+VIEW_FIELDS = {
+    "analysis": "analyses",
+    "chart": "charts",
+    "timeframes": "timeframes",
+}
+
+STATE_NAMES_CN = {
+    MarketState.STRONG_BULL: "强势上涨",
+    MarketState.BULL_TREND: "上涨趋势",
+    MarketState.RANGE: "区间震荡",
+    MarketState.BEAR_TREND: "下跌趋势",
+    MarketState.STRONG_BEAR: "强势下跌",
+    MarketState.HIGH_VOLATILITY: "高波动",
+    MarketState.UNCLEAR: "不清晰",
+    MarketState.TREND: "趋势模式",  # 兼容旧代码
+}
+
+
+def default_interval(period: str) -> str:
+    """Bar interval used for ``period`` when the request does not name one"""
+    return DEFAULT_INTERVALS.get(period, "1d")
+
+
+def age_seconds(updated_at: datetime) -> float:
+    return max(0.0, (datetime.now() - updated_at).total_seconds())
+
+
+async def filter_news_with_llm(raw_news_items: list[dict]) -> list[dict]:
+    """
+    Use the LLM to keep only gold-relevant news and annotate sentiment
+
+    Falls back to the keyword-filtered items when the LLM is disabled,
+    returns nothing usable, or fails.
+    """
+    news_items = raw_news_items  # Default to keyword-filtered news
+    if not (llm_client.enabled and raw_news_items):
+        return news_items
+
+    try:
+        logger.info("Using LLM for intelligent news filtering and analysis...")
+        llm_payload = [
+            {
+                "id": item.get("id"),
+                "url": item.get("url", ""),
+                "headline": item.get("title", ""),
+                "summary": item.get("content", ""),
+            }
+            for item in raw_news_items
+        ]
+        llm_news_result = await llm_client.analyze_news_sentiment(llm_payload)
+
+        if llm_news_result and "items" in llm_news_result:
+            llm_items = llm_news_result["items"]
+            if llm_items:
+                # Rebuild news_items from LLM analysis (only relevant news)
+                filtered_news = []
+                for llm_item in llm_items:
+                    # Find original news by index or headline matching
+                    idx = llm_item.get("index", 0) - 1  # LLM uses 1-based index
+                    if 0 <= idx < len(raw_news_items):
+                        original = raw_news_items[idx].copy()
+                    else:
+                        # Fallback: match by headline
+                        headline = llm_item.get("headline", "")
+                        original = next(
+                            (n.copy() for n in raw_news_items if n.get("title", "") == headline),
+                            None
+                        )
+                        if not original:
+                            continue
+
+                    # Batch failed: keep the keyword-based annotation
+                    if llm_item.get("pending"):
+                        filtered_news.append(original)
+                        continue
+
+                    # Update with LLM analysis
+                    original["sentiment"] = llm_item.get("sentiment", "中性")
+                    original["relevance"] = llm_item.get("relevance", "中")
+                    llm_reason = llm_item.get("reason")
+                    if llm_reason and isinstance(llm_reason, str) and llm_reason.strip():
+                        original["reason"] = llm_reason.strip()
+                    filtered_news.append(original)
+
+                if filtered_news:
+                    news_items = filtered_news[:10]  # Keep top 10 relevant news
+                    logger.info(f"LLM filtered {len(raw_news_items)} → {len(news_items)} relevant news items")
+
+                    # Log key factors if available
+                    key_factors = llm_news_result.get("key_factors", [])
+                    if key_factors:
+                        logger.info(f"Key market factors: {', '.join(key_factors)}")
+    except Exception as e:
+        logger.warning(f"LLM news analysis failed: {e}. Using keyword-based filtering.")
+        news_items = raw_news_items[:10]  # Fallback to keyword-filtered news
+
+    return news_items
+
+
+def summarize_dxy(dxy_data: pd.DataFrame) -> tuple[float | None, float | None]:
+    """Extract latest DXY price and day-over-day change percentage"""
+    if dxy_data.empty or len(dxy_data) < 2:
+        return None, None
+    dxy_latest = dxy_data.iloc[-1]
+    dxy_previous = dxy_data.iloc[-2]
+    dxy_price = float(dxy_latest["close"])
+    dxy_change = dxy_price - float(dxy_previous["close"])
+    dxy_change_pct = (dxy_change / float(dxy_previous["close"])) * 100
+    return dxy_price, dxy_change_pct
+
+
+@dataclass(frozen=True)
+class DataView:
+    """Upstream payload (quote / gold prices) and when it was fetched"""
+    data: dict
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class MarketInputs:
+    """News, DXY and real rate shared by the analysis views of a refresh cycle"""
+    news_items: list[dict]
+    dxy: pd.DataFrame
+    real_rate: dict
+    updated_at: datetime
+    news_filtered_at: Optional[datetime] = None  # When the LLM last filtered the news (None: keyword-filtered)
+
+
+@dataclass(frozen=True)
+class AnalysisView:
+    """Market analysis for one (symbol, period, interval), plus the chat context derived from it"""
+    analysis: MarketAnalysis
+    llm_context: dict
+    news_items: list[dict]
+    updated_at: datetime
+    timings: str = ""  # Server-Timing of the computation that built the view
+    llm_explanation: Optional[str] = None
+    explained_at: Optional[datetime] = None  # When the LLM explanation was generated
+
+
+@dataclass(frozen=True)
+class ChartView:
+    """Displayed chart rows (with indicators) and key levels"""
+    symbol: str
+    period: str
+    interval: str
+    frame: pd.DataFrame
+    key_levels: dict
+    support_zones: list[PriceZone]
+    resistance_zones: list[PriceZone]
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class TimeframesView:
+    """Indicator frames of the timeframes resampled from one base series, and their confluence"""
+    symbol: str
+    base_interval: str
+    base_bars: int
+    frames: Mapping[str, pd.DataFrame]
+    confluence: ConfluenceScore
+    updated_at: datetime
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    Latest state published by ``MarketSnapshotService``
+
+    Replaced as a whole on every update, never modified in place; the
+    contained frames and models are shared and must be treated as read-only.
+    """
+    quote: Optional[DataView] = None
+    gold_prices: Optional[DataView] = None
+    inputs: Optional[MarketInputs] = None
+    analyses: Mapping[tuple[str, str, str], AnalysisView] = field(default_factory=lambda: MappingProxyType({}))
+    charts: Mapping[tuple[str, str, str], ChartView] = field(default_factory=lambda: MappingProxyType({}))
+    timeframes: Mapping[tuple[str, str], TimeframesView] = field(default_factory=lambda: MappingProxyType({}))
+
+
+class MarketSnapshotService:
+    """
+    Background refresher of the shared ``MarketSnapshot``
+
+    All state changes happen on the event loop, and readers only ever see
+    a complete snapshot.
+    """
+
+    def __init__(
+        self,
+        price_interval: float = 10.0,
+        refresh_interval: float = 60.0,
+        view_idle: float = 600.0,
+        max_views: int = 32,
+        llm_interval: float = 900.0,
+    ):
+        self.price_interval = price_interval
+        self.refresh_interval = refresh_interval
+        self.view_idle = view_idle
+        self.max_views = max_views
+        self.llm_interval = llm_interval
+        self._snapshot = MarketSnapshot()
+        # Tracked views: ("analysis" | "chart", symbol, period, interval) /
+        # ("timeframes", symbol, base_interval) -> last request
+        self._requested: dict[tuple, float] = {}
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        # Start time of the computation behind each published view / the inputs
+        self._published_start: dict[Hashable, float] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._errors: dict[str, str] = {}
+        self._cycles = 0
+        self._last_cycle: Optional[datetime] = None
+
+    @property
+    def snapshot(self) -> MarketSnapshot:
+        return self._snapshot
+
+    @property
+    def default_analysis_key(self) -> tuple:
+        return ("analysis", settings.GOLD_SYMBOL, settings.DEFAULT_PERIOD, default_interval(settings.DEFAULT_PERIOD))
+
+    @property
+    def chat_analysis_key(self) -> tuple:
+        return ("analysis", settings.GOLD_SYMBOL, settings.DEFAULT_PERIOD, CHAT_INTERVAL)
+
+    @property
+    def pinned_keys(self) -> tuple[tuple, ...]:
+        """Views refreshed every cycle whether or not they were requested"""
+        return self.default_analysis_key, self.chat_analysis_key
+
+    def _publish(self, **changes):
+        self._snapshot = replace(self._snapshot, **changes)
+
+    def _publish_newer(self, slot: Hashable, started: float, **changes):
+        """
+        Publish unless a computation started later already published ``slot``
+
+        A background rebuild (without the LLM) and a request-driven one
+        (with it) can overlap; the later-started one wins, so a slow
+        background run cannot drop a fresh LLM explanation or filtering.
+        """
+        if started < self._published_start.get(slot, float("-inf")):
+            return
+        self._published_start[slot] = started
+        self._publish(**changes)
+
+    async def _shared(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``factory`` once for all concurrent callers with the same key"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    # ==================== Prices ====================
+
+    async def refresh_quote(self) -> DataView:
+        async def compute() -> DataView:
+            view = DataView(await async_data_provider.get_quote(settings.GOLD_SYMBOL), datetime.now())
+            self._publish(quote=view)
+            return view
+
+        return await self._shared("quote", compute)
+
+    async def refresh_gold_prices(self) -> DataView:
+        async def compute() -> DataView:
+            view = DataView(await async_data_provider.get_gold_prices(), datetime.now())
+            self._publish(gold_prices=view)
+            return view
+
+        return await self._shared("gold_prices", compute)
+
+    def _price_stale(self, view: Optional[DataView]) -> bool:
+        return view is None or age_seconds(view.updated_at) > self.price_interval * STALE_AFTER_INTERVALS
+
+    async def get_quote(self) -> DataView:
+        """Gold futures quote (``get_quote`` payload)"""
+        view = self._snapshot.quote
+        return await self.refresh_quote() if self._price_stale(view) else view
+
+    async def get_gold_prices(self) -> DataView:
+        """London gold and AU9999 prices (``get_gold_prices`` payload)"""
+        view = self._snapshot.gold_prices
+        return await self.refresh_gold_prices() if self._price_stale(view) else view
+
+    # ==================== Analysis / chart views ====================
+
+    def _view_stale(self, updated_at: Optional[datetime]) -> bool:
+        return updated_at is None or age_seconds(updated_at) > self.refresh_interval * STALE_AFTER_INTERVALS
+
+    def _llm_stale(self, generated_at: Optional[datetime]) -> bool:
+        return llm_client.enabled and (generated_at is None or age_seconds(generated_at) > self.llm_interval)
+
+    async def refresh_inputs(self, llm: bool = True) -> MarketInputs:
+        """
+        Fetch news, DXY and the real rate
+
+        With ``llm`` the news is filtered by the LLM; without it (background
+        cycles) the last LLM-filtered news is kept while it is fresh, and
+        the keyword-filtered news is used after that.
+        """
+        if not llm and ("inputs", True) in self._inflight:
+            # A request is already refreshing them with the LLM
+            return await asyncio.shield(self._inflight[("inputs", True)])
+
+        async def compute() -> MarketInputs:
+            started = time.monotonic()
+            # Fetch more raw news for LLM filtering (or fewer if LLM is disabled)
+            raw_news_limit = 20 if llm_client.enabled else 10
+            raw_news, dxy, real_rate = await asyncio.gather(
+                async_data_provider.get_news_items(symbol=settings.GOLD_SYMBOL, limit=raw_news_limit),
+                async_data_provider.fetch_price_data(symbol=settings.DXY_SYMBOL, period="5d", interval="1d"),
+                async_data_provider.get_real_interest_rate(),
+            )
+            previous = self._snapshot.inputs
+            if llm and llm_client.enabled:
+                news_items, filtered_at = await filter_news_with_llm(raw_news), datetime.now()
+            elif previous is not None and not self._llm_stale(previous.news_filtered_at):
+                news_items, filtered_at = previous.news_items, previous.news_filtered_at
+            else:
+                news_items, filtered_at = raw_news[:10], None
+            inputs = MarketInputs(news_items, dxy, real_rate, datetime.now(), filtered_at)
+            self._publish_newer("inputs", started, inputs=inputs)
+            return inputs
+
+        return await self._shared(("inputs", llm), compute)
+
+    async def get_inputs(self) -> MarketInputs:
+        """Shared inputs for a request: refetched when old, re-filtered by the LLM when its filtering is stale"""
+        inputs = self._snapshot.inputs
+        if (
+            inputs is None
+            or age_seconds(inputs.updated_at) > self.refresh_interval
+            or self._llm_stale(inputs.news_filtered_at)
+        ):
+            inputs = await self.refresh_inputs()
+        return inputs
+
+    async def _cycle_inputs(self) -> MarketInputs:
+        """Shared inputs for a background cycle (already refreshed by it, without the LLM)"""
+        return self._snapshot.inputs or await self.refresh_inputs(llm=False)
+
+    def _explains(self, symbol: str) -> bool:
+        # The explanation prompt is written for gold; other symbols get the rule-based one
+        return llm_client.enabled and symbol == settings.GOLD_SYMBOL
+
+    async def _compute_analysis(
+        self, symbol: str, period: str, interval: str, use_cache: bool = True, llm: bool = True
+    ) -> AnalysisView:
+        async def fetch_ohlc() -> pd.DataFrame:
+            logger.info(f"Fetching {symbol} price data ({period}/{interval})...")
+            df = await async_data_provider.fetch_price_data(
+                symbol=symbol,
+                period=period,
+                interval=interval,
+                use_cache=use_cache,
+            )
+            if df.empty:
+                raise ValueError(f"No data available for {symbol}")
+            return df
+
+        def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
+            # The analysis reads the newest bar only: stream it while the window holds its start
+            frame = indicator_streams.latest_frame(df, (symbol, period, interval))
+            if frame is not None:
+                return frame
+            logger.info("Calculating indicators...")
+            return indicator_cache.calculate(df, symbol, interval, categorical=True)
+
+        def build_signal(df: pd.DataFrame, inputs: MarketInputs):
+            _, dxy_change_pct = summarize_dxy(inputs.dxy)
+            market_state = strategy_engine._determine_market_state(df)
+            # Generate trading signal for LLM context (with news for sentiment)
+            sentiment_score = strategy_engine._calculate_sentiment_score(inputs.news_items)
+            signal = strategy_engine._generate_signal(
+                df,
+                market_state,
+                news_items=inputs.news_items,
+                sentiment_score=sentiment_score,
+                dxy_change_pct=dxy_change_pct,
+                real_rate=inputs.real_rate.get("real_rate"),
+            )
+            return market_state, signal
+
+        async def generate_llm_explanation(df: pd.DataFrame, inputs: MarketInputs, state_and_signal):
+            if not self._explains(symbol):
+                return None, None
+            if not llm:
+                # Background cycles reuse the last explanation while it is fresh
+                previous = self._snapshot.analyses.get((symbol, period, interval))
+                if previous is not None and not self._llm_stale(previous.explained_at):
+                    return previous.llm_explanation, previous.explained_at
+                return None, None
+            market_state, signal = state_and_signal
+            latest = df.iloc[-1]
+            try:
+                logger.info("Generating LLM-enhanced explanation...")
+                sentiment_payload = [
+                    {"headline": item.get("title", ""), "sentiment": item.get("sentiment", "中性")}
+                    for item in inputs.news_items
+                ]
+                llm_explanation = await llm_client.generate_explanation(
+                    market_state=STATE_NAMES_CN.get(market_state, "未知"),
+                    trend_dir=latest.get("trend_dir", "neutral"),
+                    current_price=float(latest["close"]),
+                    support=latest.get("support_level"),
+                    resistance=latest.get("resistance_level"),
+                    signal=signal.signal_level.value,
+                    signal_reason=signal.signal_reason,
+                    news_sentiment=sentiment_payload,
+                )
+                if llm_explanation:
+                    logger.info("LLM explanation generated successfully")
+                else:
+                    logger.info("LLM explanation generation returned None (using rule-based)")
+                return llm_explanation, datetime.now()
+            except Exception as e:
+                logger.warning(f"LLM explanation generation failed: {e}. Using rule-based explanation.")
+                return None, datetime.now()
+
+        def build_analysis(df: pd.DataFrame, inputs: MarketInputs, explanation) -> MarketAnalysis:
+            logger.info("Running strategy analysis...")
+            dxy_price, dxy_change_pct = summarize_dxy(inputs.dxy)
+            analysis = strategy_engine.analyze(
+                df,
+                symbol,
+                news_items=inputs.news_items,
+                llm_explanation=explanation[0],
+                dxy_price=dxy_price,
+                dxy_change_pct=dxy_change_pct,
+                real_rate=inputs.real_rate.get("real_rate"),
+                nominal_rate=inputs.real_rate.get("nominal_rate"),
+                inflation_rate=inputs.real_rate.get("inflation_rate"),
+            )
+            # Add indicators to analysis (zones were already detected by analyze)
+            zones = (analysis.indicators.support_zones, analysis.indicators.resistance_zones)
+            analysis.indicators = indicator_calculator.get_latest_indicators(df, zones=zones)
+            return analysis
+
+        pipeline = (
+            Pipeline()
+            # OHLC and the shared inputs are fetched together
+            .add("ohlc", fetch_ohlc)
+            .add("inputs", self.get_inputs if llm else self._cycle_inputs)
+            # Dependent stages start as soon as their inputs are ready
+            .add("indicators", calculate_indicators, "ohlc")
+            .add("signal", build_signal, "indicators", "inputs")
+            .add("llm_explanation", generate_llm_explanation, "indicators", "inputs", "signal")
+            .add("analysis", build_analysis, "indicators", "inputs", "llm_explanation")
+        )
+        results = await pipeline.run()
+        analysis: MarketAnalysis = results["analysis"]
+
+        # Prompt context behind chat answers (including macro data and news)
+        latest = results["indicators"].iloc[-1]
+        llm_context = {
+            "market_state": analysis.market_state.value,
+            "trend_dir": latest.get("trend_dir", "neutral"),
+            "current_price": analysis.current_price,
+            "price_change_pct": analysis.price_change_pct,
+            "signal": analysis.signal.signal_level.value,
+            "signal_reason": analysis.signal.signal_reason,
+            "support": analysis.indicators.support_level,
+            "resistance": analysis.indicators.resistance_level,
+            "support_zones": [zone.level for zone in analysis.indicators.support_zones],
+            "resistance_zones": [zone.level for zone in analysis.indicators.resistance_zones],
+            "risk_warning": analysis.signal.risk_warning or "无",
+            "position_level": analysis.signal.position_level.value,
+            "dxy_price": analysis.dxy_price,
+            "dxy_change_pct": analysis.dxy_change_pct,
+            "real_rate": analysis.real_rate,
+            "nominal_rate": analysis.nominal_rate,
+            "inflation_rate": analysis.inflation_rate,
+        }
+        return AnalysisView(
+            analysis=analysis,
+            llm_context=llm_context,
+            news_items=results["inputs"].news_items,
+            updated_at=datetime.now(),
+            timings=pipeline.format_timings(),
+            llm_explanation=results["llm_explanation"][0],
+            explained_at=results["llm_explanation"][1],
+        )
+
+    async def _compute_chart(self, symbol: str, period: str, interval: str, use_cache: bool = True) -> ChartView:
+        # Fetch data with extended period for MA calculation
+        df = await async_data_provider.fetch_price_data(
+            symbol=symbol,
+            period=CHART_FETCH_PERIODS.get(period, period),
+            interval=interval,
+            use_cache=use_cache,
+        )
+        if df.empty:
+            raise ValueError("No data available")
+
+        df = await run_blocking(indicator_cache.calculate, df, symbol, interval, categorical=True)
+
+        # Extract key levels from latest data
+        latest = df.iloc[-1]
+        key_levels = {}
+        for name, column in (
+            ("support", "support_level"),
+            ("resistance", "resistance_level"),
+            ("range_high", "range_high"),
+            ("range_low", "range_low"),
+        ):
+            if column in latest and not pd.isna(latest[column]):
+                key_levels[name] = float(latest[column])
+
+        # Zones use the whole fetched history, not just the displayed bars
+        support_zones, resistance_zones = await run_blocking(zones_for, df)
+
+        # 只展示用户期望的时间范围（多获取的历史数据仅用于计算均线）
+        tail_size = CHART_TAIL_SIZES.get(period, 120)
+        return ChartView(
+            symbol=symbol,
+            period=period,
+            interval=interval,
+            frame=df.tail(tail_size) if len(df) > tail_size else df,
+            key_levels=key_levels,
+            support_zones=support_zones,
+            resistance_zones=resistance_zones,
+            updated_at=datetime.now(),
+        )
+
+    async def _compute_timeframes(self, symbol: str, base_interval: str, use_cache: bool = True) -> TimeframesView:
+        # One upstream series serves every timeframe
+        if base_interval == settings.MTF_BASE_INTERVAL:
+            period = settings.MTF_BASE_PERIOD
+        else:
+            period = MTF_BASE_PERIODS.get(base_interval, "1y")
+        base = await async_data_provider.fetch_price_history(
+            symbol=symbol,
+            period=period,
+            interval=base_interval,
+            use_cache=use_cache,
+        )
+        if base.empty:
+            raise ValueError(f"No data available for {symbol}")
+
+        bars = await run_blocking(resample_timeframes, base, base_interval)
+        frames = await asyncio.gather(*(
+            run_blocking(indicator_cache.calculate, df, symbol, timeframe, categorical=True)
+            for timeframe, df in bars.items()
+        ))
+        frames = dict(zip(bars, frames))
+        return TimeframesView(
+            symbol=symbol,
+            base_interval=base_interval,
+            base_bars=len(base),
+            frames=MappingProxyType(frames),
+            confluence=strategy_engine.confluence_score(frames),
+            updated_at=datetime.now(),
+        )
+
+    async def _refresh_view(self, key: tuple, use_cache: bool = True, llm: bool = True):
+        if not llm and (key, True) in self._inflight:
+            # A request is already rebuilding this view with the LLM
+            return await asyncio.shield(self._inflight[(key, True)])
+
+        async def compute():
+            started = time.monotonic()
+            kind = key[0]
+            options = {"use_cache": use_cache, "llm": llm} if kind == "analysis" else {"use_cache": use_cache}
+            view = await getattr(self, f"_compute_{kind}")(*key[1:], **options)
+            views = getattr(self._snapshot, VIEW_FIELDS[kind])
+            self._publish_newer(key, started, **{VIEW_FIELDS[kind]: MappingProxyType({**views, key[1:]: view})})
+            return view
+
+        return await self._shared((key, llm) if key[0] == "analysis" else key, compute)
+
+    def _track(self, key: tuple):
+        # Only views that were built successfully are refreshed in the background
+        self._requested[key] = time.monotonic()
+
+    async def get_analysis(
+        self,
+        period: Optional[str] = None,
+        interval: Optional[str] = None,
+        symbol: Optional[str] = None,
+    ) -> AnalysisView:
+        """Analysis view for (symbol, period, interval); defaults to the dashboard analysis"""
+        symbol = symbol or settings.GOLD_SYMBOL
+        period = period or settings.DEFAULT_PERIOD
+        interval = interval or default_interval(period)
+        key = ("analysis", symbol, period, interval)
+        view = self._snapshot.analyses.get(key[1:])
+        if (
+            view is None
+            or self._view_stale(view.updated_at)
+            or (self._explains(symbol) and self._llm_stale(view.explained_at))
+        ):
+            view = await self._refresh_view(key)
+        self._track(key)
+        return view
+
+    async def get_chat_analysis(self) -> AnalysisView:
+        """Daily-bar gold analysis behind ``/chat`` and the daily job"""
+        return await self.get_analysis(interval=CHAT_INTERVAL)
+
+    async def get_analyses(
+        self, targets: list[tuple[str, str, Optional[str]]]
+    ) -> list[AnalysisView | Exception]:
+        """
+        Analysis views for many (symbol, period, interval) targets at once
+
+        Fresh views come from the snapshot; the rest are computed
+        concurrently, sharing one fetch of the news and macro inputs and
+        one computation per distinct view. Results are in target order; a
+        target that fails yields its exception instead of failing the batch.
+        """
+        return await asyncio.gather(
+            *(self.get_analysis(period, interval, symbol) for symbol, period, interval in targets),
+            return_exceptions=True,
+        )
+
+    async def get_chart(self, symbol: str, period: str, interval: Optional[str] = None) -> ChartView:
+        """Chart view for (symbol, period, interval)"""
+        interval = interval or default_interval(period)
+        key = ("chart", symbol, period, interval)
+        view = self._snapshot.charts.get((symbol, period, interval))
+        if view is None or self._view_stale(view.updated_at):
+            view = await self._refresh_view(key)
+        self._track(key)
+        return view
+
+    async def get_timeframes(self, symbol: Optional[str] = None, base_interval: Optional[str] = None) -> TimeframesView:
+        """Multi-timeframe view for a symbol, resampled from its ``base_interval`` series"""
+        key = ("timeframes", symbol or settings.GOLD_SYMBOL, base_interval or settings.MTF_BASE_INTERVAL)
+        view = self._snapshot.timeframes.get(key[1:])
+        if view is None or self._view_stale(view.updated_at):
+            view = await self._refresh_view(key)
+        self._track(key)
+        return view
+
+    def _expire_views(self):
+        """Stop tracking views nobody asked for recently (and the oldest beyond max_views)"""
+        now = time.monotonic()
+        pinned = self.pinned_keys
+        expired = {key for key, requested in self._requested.items() if now - requested > self.view_idle}
+        live = sorted(
+            (key for key in self._requested if key not in expired),
+            key=self._requested.__getitem__,
+            reverse=True,
+        )
+        expired.update(live[self.max_views:])
+        expired.difference_update(pinned)
+        if not expired:
+            return
+        for key in expired:
+            self._requested.pop(key, None)
+        self._publish(**{
+            name: MappingProxyType({
+                k: v for k, v in getattr(self._snapshot, name).items() if (kind, *k) not in expired
+            })
+            for kind, name in VIEW_FIELDS.items()
+        })
+        logger.info(f"Snapshot stopped tracking {len(expired)} idle views")
+
+    async def refresh_views(self, use_cache: bool = True):
+        """Refresh the shared inputs, then every tracked view (without calling the LLM)"""
+        for key in self.pinned_keys:
+            self._requested.setdefault(key, time.monotonic())
+        self._expire_views()
+        await self._logged("inputs", self.refresh_inputs(llm=False))
+        keys = list(self._requested)
+        await asyncio.gather(*(
+            self._logged("/".join(key), self._refresh_view(key, use_cache, llm=False)) for key in keys
+        ))
+        self._cycles += 1
+        self._last_cycle = datetime.now()
+
+    def invalidate(self):
+        """Drop computed views (e.g. after a forced data refresh); they are rebuilt on the next read"""
+        self._publish(inputs=None, **{name: MappingProxyType({}) for name in VIEW_FIELDS.values()})
+
+    # ==================== Lifecycle ====================
+
+    async def _logged(self, name: str, refresh: Awaitable[Any]):
+        try:
+            await refresh
+            self._errors.pop(name, None)
+        except Exception as e:
+            self._errors[name] = str(e)
+            logger.warning(f"Snapshot refresh of {name} failed: {e}")
+
+    async def _price_loop(self):
+        while True:
+            await asyncio.gather(
+                self._logged("quote", self.refresh_quote()),
+                self._logged("gold_prices", self.refresh_gold_prices()),
+            )
+            await asyncio.sleep(self.price_interval)
+
+    async def _view_loop(self):
+        while True:
+            await self.refresh_views()
+            await asyncio.sleep(self.refresh_interval)
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Start the background refresh loops (idempotent)"""
+        if self.running:
+            return
+        self._tasks = [
+            asyncio.create_task(self._price_loop(), name="snapshot:prices"),
+            asyncio.create_task(self._view_loop(), name="snapshot:views"),
+        ]
+        logger.info(
+            f"Market snapshot service started (prices every {self.price_interval}s, "
+            f"views every {self.refresh_interval}s)"
+        )
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def clear(self):
+        """Forget the snapshot and all tracked views"""
+        self._snapshot = MarketSnapshot()
+        self._requested.clear()
+        self._published_start.clear()
+        self._errors.clear()
+
+    def get_status(self) -> dict:
+        """Per-view update times and ages, refresh cycles and the last errors"""
+        snapshot = self._snapshot
+        views = []
+        for name, view in (("quote", snapshot.quote), ("gold_prices", snapshot.gold_prices), ("inputs", snapshot.inputs)):
+            if view is not None:
+                views.append({"name": name, "updated_at": view.updated_at, "age_seconds": age_seconds(view.updated_at)})
+        for kind, name in VIEW_FIELDS.items():
+            for key, view in getattr(snapshot, name).items():
+                views.append({
+                    "name": "/".join((kind, *key)),
+                    "updated_at": view.updated_at,
+                    "age_seconds": age_seconds(view.updated_at),
+                })
+        return {
+            "running": self.running,
+            "cycles": self._cycles,
+            "last_refresh": self._last_cycle,
+            "tracked_views": len(self._requested),
+            "views": views,
+            "errors": dict(self._errors),
+        }
+
+
+# Singleton instance
+market_snapshot = MarketSnapshotService(
+    price_interval=settings.SNAPSHOT_PRICE_INTERVAL,
+    refresh_interval=settings.SNAPSHOT_REFRESH_INTERVAL,
+    view_idle=settings.SNAPSHOT_VIEW_IDLE,
+    max_views=settings.SNAPSHOT_MAX_VIEWS,
+    llm_interval=settings.SNAPSHOT_LLM_INTERVAL,
+)
@@ -0,0 +1,220 @@
+"""
+News keyword tables and the shared compiled matcher
+
+Relevance weights, bullish/bearish sentiment reasons and major-event
+keywords used by ``DataProvider.get_news_items`` and ``StrategyEngine``.
+All tables are compiled into one Aho-Corasick automaton at import, so a
+news text is scanned once for every keyword of every table.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.keyword_matcher import KeywordMatcher
+
+# Keywords for gold relevance filtering (with relevance scores)
+GOLD_RELEVANCE_WEIGHTS: dict[str, int] = {
+    # 直接相关 (高相关性)
+    "gold": 10, "黄金": 10, "precious metal": 10, "贵金属": 10,
+    "bullion": 10, "xau": 10, "comex": 10,
+    # 美联储和利率 (高相关性)
+    "fed": 8, "federal reserve": 8, "美联储": 8, "fomc": 8,
+    "interest rate": 8, "利率": 8, "rate cut": 9, "降息": 9,
+    "rate hike": 9, "加息": 9, "monetary policy": 8, "货币政策": 8,
+    "powell": 7, "鲍威尔": 7,
+    # 通胀和经济数据 (高相关性)
+    "inflation": 8, "通胀": 8, "cpi": 8, "pce": 8,
+    "treasury": 7, "国债": 7, "yield": 7, "收益率": 7,
+    "recession": 7, "衰退": 7, "employment": 6, "就业": 6,
+    "nonfarm": 7, "非农": 7, "gdp": 6,
+    # 美元 (高相关性)
+    "dollar": 7, "美元": 7, "dxy": 7, "usd": 6,
+    "currency": 5, "forex": 5,
+    # 地缘政治 (高相关性)
+    "geopolit": 8, "地缘": 8, "war": 8, "战争": 8,
+    "conflict": 7, "冲突": 7, "sanction": 7, "制裁": 7,
+    "iran": 7, "伊朗": 7, "russia": 7, "俄罗斯": 7,
+    "ukraine": 7, "乌克兰": 7, "middle east": 7, "中东": 7,
+    "israel": 7, "以色列": 7, "tension": 6, "紧张": 6,
+    "crisis": 7, "危机": 7,
+    # 央行和储备 (高相关性)
+    "central bank": 8, "央行": 8, "reserve": 6, "储备": 6,
+    "pboc": 7, "ecb": 6, "boj": 6,
+    # 避险情绪 (中等相关性)
+    "safe haven": 7, "避险": 7, "risk-off": 7, "risk off": 7,
+    "uncertainty": 5, "不确定性": 5, "volatility": 5, "波动": 5,
+    # 商品市场 (中等相关性)
+    "commodity": 5, "大宗商品": 5, "silver": 5, "白银": 5,
+    "oil": 4, "原油": 4, "copper": 4, "铜": 4,
+}
+
+# Relevance weight from which a keyword is reported as a news topic
+TOPIC_MIN_WEIGHT = 6
+
+# Sentiment keywords with detailed reasons
+BULLISH_REASONS: dict[str, str] = {
+    "rate cut": "降息预期利好黄金，降低持有黄金的机会成本",
+    "降息": "降息预期利好黄金，降低持有黄金的机会成本",
+    "inflation rise": "通胀上升增加黄金作为抗通胀资产的吸引力",
+    "inflation surge": "通胀飙升推动黄金避险需求大增",
+    "通胀上升": "通胀上升增加黄金作为抗通胀资产的吸引力",
+    "risk-off": "避险情绪升温，资金从风险资产流入黄金",
+    "risk off": "避险情绪升温，资金从风险资产流入黄金",
+    "避险": "避险需求增加，推动黄金价格上涨",
+    "safe haven": "黄金作为避风港资产受到追捧",
+    "gold rise": "黄金价格上涨趋势延续",
+    "gold surge": "黄金价格大幅上涨",
+    "黄金上涨": "市场看涨黄金，买盘活跃",
+    "金价上涨": "金价走高，多头占优",
+    "央行购金": "央行增持黄金储备，提振长期需求",
+    "central bank buy": "央行购金增加实物需求，支撑金价",
+    "地缘政治": "地缘政治风险上升，黄金避险价值凸显",
+    "geopolitical risk": "地缘政治风险推升避险情绪，利好黄金",
+    "war": "战争风险推动避险资金涌入黄金",
+    "战争": "战争风险推动避险资金涌入黄金",
+    "conflict": "冲突升级增加市场不确定性，利好黄金",
+    "冲突": "冲突升级增加市场不确定性，利好黄金",
+    "dollar weak": "美元走弱提升黄金吸引力",
+    "美元下跌": "美元走弱使黄金对国际买家更具吸引力",
+    "recession": "经济衰退担忧推动避险需求",
+    "衰退": "经济衰退担忧推动避险需求",
+    "crisis": "危机环境下黄金避险属性凸显",
+    "危机": "危机环境下黄金避险属性凸显",
+    "treasury buy": "美联储购买国债增加流动性，可能导致利率下降，利好黄金",
+    "quantitative": "量化宽松政策利好黄金",
+    "stimulus": "经济刺激政策可能引发通胀，利好黄金",
+}
+
+BEARISH_REASONS: dict[str, str] = {
+    "rate hike": "加息预期利空黄金，提高持有黄金的机会成本",
+    "加息": "加息预期利空黄金，提高持有黄金的机会成本",
+    "strong dollar": "美元走强对以美元计价的黄金形成压力",
+    "dollar rise": "美元上涨削弱黄金吸引力",
+    "美元上涨": "美元走强对黄金形成下行压力",
+    "美元走强": "美元走强对黄金形成下行压力",
+    "gold fall": "黄金价格下跌趋势延续",
+    "gold drop": "黄金价格下跌",
+    "黄金下跌": "市场看跌黄金，卖压较重",
+    "金价下跌": "金价走低，空头占优",
+    "hawkish": "美联储鹰派立场利空黄金",
+    "鹰派": "美联储鹰派立场利空黄金",
+    "yield rise": "债券收益率上升增加持有黄金的机会成本",
+    "收益率上升": "债券收益率上升增加持有黄金的机会成本",
+    "risk-on": "风险偏好上升，资金流出黄金",
+    "risk on": "风险偏好上升，资金流出黄金",
+    "inflation cool": "通胀降温削弱黄金抗通胀价值",
+    "通胀下降": "通胀降温削弱黄金抗通胀价值",
+}
+
+# Headline/content keywords marking a major (market-moving) news event
+MAJOR_NEWS_KEYWORDS: tuple[str, ...] = (
+    "fomc",
+    "fed",
+    "rate hike",
+    "rate cut",
+    "cpi",
+    "pce",
+    "nonfarm",
+    "nfp",
+    "geopolit",
+    "war",
+    "conflict",
+    "sanction",
+    "美联储",
+    "降息",
+    "加息",
+    "通胀",
+    "非农",
+    "地缘",
+    "战争",
+    "冲突",
+    "制裁",
+    "中东",
+    "乌克兰",
+)
+
+
+@dataclass(frozen=True)
+class KeywordHit:
+    """One matched keyword with its attributes across all tables"""
+    keyword: str
+    weight: int  # Relevance weight (0 if not a relevance keyword)
+    sentiment: Optional[str]  # 利多 / 利空, if a sentiment keyword
+    reason: Optional[str]  # Sentiment reason
+    major: bool  # Major news event keyword
+
+
+@dataclass(frozen=True)
+class NewsKeywordMatch:
+    """Keyword analysis of one news text"""
+    hits: tuple[KeywordHit, ...]  # In table order
+    relevance_score: int
+    matched_topics: list[str]  # Relevance keywords >= TOPIC_MIN_WEIGHT, in table order
+    sentiment: str  # 利多 / 利空 / 中性 (bullish keywords take precedence)
+    reason: str  # Reason of the first matched bullish (else bearish) keyword, or ""
+    is_major: bool
+
+
+def _lower_keys(table: dict) -> dict:
+    return {k.lower(): v for k, v in table.items()}
+
+
+_RELEVANCE = _lower_keys(GOLD_RELEVANCE_WEIGHTS)
+_BULLISH = _lower_keys(BULLISH_REASONS)
+_BEARISH = _lower_keys(BEARISH_REASONS)
+_MAJOR = frozenset(k.lower() for k in MAJOR_NEWS_KEYWORDS)
+
+# Position of each keyword in its table (earlier entries take precedence)
+_RELEVANCE_ORDER = {k: i for i, k in enumerate(_RELEVANCE)}
+_BULLISH_ORDER = {k: i for i, k in enumerate(_BULLISH)}
+_BEARISH_ORDER = {k: i for i, k in enumerate(_BEARISH)}
+
+
+def _keyword_hit(keyword: str) -> KeywordHit:
+    if keyword in _BULLISH:
+        sentiment, reason = "利多", _BULLISH[keyword]
+    elif keyword in _BEARISH:
+        sentiment, reason = "利空", _BEARISH[keyword]
+    else:
+        sentiment, reason = None, None
+    return KeywordHit(keyword, _RELEVANCE.get(keyword, 0), sentiment, reason, keyword in _MAJOR)
+
+
+_HITS: dict[str, KeywordHit] = {
+    k: _keyword_hit(k)
+    for k in [*_RELEVANCE, *_BULLISH, *_BEARISH, *(k.lower() for k in MAJOR_NEWS_KEYWORDS)]
+}
+
+_HIT_ORDER = {k: i for i, k in enumerate(_HITS)}
+
+# Compiled once at import; shared by every caller
+news_keyword_matcher = KeywordMatcher(_HITS)
+major_news_matcher = KeywordMatcher(_MAJOR)
+
+
+def match_news_keywords(text: str) -> NewsKeywordMatch:
+    """Every keyword in ``text`` with its weight and sentiment reason, in a single pass"""
+    found = news_keyword_matcher.find_all(text)
+    hits = tuple(_HITS[k] for k in sorted(found, key=_HIT_ORDER.__getitem__))
+
+    topics = sorted(
+        (k for k in found if _RELEVANCE.get(k, 0) >= TOPIC_MIN_WEIGHT),
+        key=_RELEVANCE_ORDER.__getitem__,
+    )
+
+    # Bullish keywords take precedence; within a table the first entry wins
+    sentiment, reason = "中性", ""
+    bullish = [k for k in found if k in _BULLISH]
+    bearish = [k for k in found if k in _BEARISH]
+    if bullish:
+        sentiment, reason = "利多", _BULLISH[min(bullish, key=_BULLISH_ORDER.__getitem__)]
+    elif bearish:
+        sentiment, reason = "利空", _BEARISH[min(bearish, key=_BEARISH_ORDER.__getitem__)]
+
+    return NewsKeywordMatch(
+        hits=hits,
+        relevance_score=sum(h.weight for h in hits),
+        matched_topics=topics,
+        sentiment=sentiment,
+        reason=reason,
+        is_major=any(h.major for h in hits),
+    )
@@ -0,0 +1,250 @@
+"""
+Incremental OHLC time-series store
+
+Keeps one history per (symbol, interval) instead of one file per
+(symbol, period, interval), stored as monthly parquet partitions.
+Refreshes only download the bars after the last stored timestamp and
+merge them in; only the partitions those bars fall into (usually the
+current month) are rewritten. Any ``period`` is served as a slice of the
+stored history.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Approximate span of each yfinance period ("max" is unbounded)
+PERIOD_SPANS: dict[str, pd.Timedelta | None] = {
+    "1d": pd.Timedelta(days=1),
+    "5d": pd.Timedelta(days=5),
+    "1mo": pd.Timedelta(days=31),
+    "3mo": pd.Timedelta(days=92),
+    "6mo": pd.Timedelta(days=183),
+    "ytd": pd.Timedelta(days=366),  # coverage only; slicing uses Jan 1st
+    "1y": pd.Timedelta(days=366),
+    "2y": pd.Timedelta(days=731),
+    "5y": pd.Timedelta(days=1827),
+    "10y": pd.Timedelta(days=3653),
+    "max": None,
+}
+
+# yfinance only serves recent history for intraday intervals; an
+# incremental fetch starting earlier than this is rejected upstream
+INTRADAY_LOOKBACK: dict[str, pd.Timedelta] = {
+    "1m": pd.Timedelta(days=7),
+    "2m": pd.Timedelta(days=60),
+    "5m": pd.Timedelta(days=60),
+    "15m": pd.Timedelta(days=60),
+    "30m": pd.Timedelta(days=60),
+    "90m": pd.Timedelta(days=60),
+    "60m": pd.Timedelta(days=730),
+    "1h": pd.Timedelta(days=730),
+}
+
+
+def period_span(period: str) -> pd.Timedelta | None:
+    """Span of a period; None means unbounded ("max")"""
+    if period not in PERIOD_SPANS:
+        raise ValueError(f"Unsupported period: {period}")
+    return PERIOD_SPANS[period]
+
+
+def period_covers(covered: str | None, requested: str) -> bool:
+    """Whether history fetched for ``covered`` also contains ``requested``"""
+    if covered is None:
+        return False
+    covered_span = period_span(covered)
+    requested_span = period_span(requested)
+    if covered_span is None:
+        return True
+    if requested_span is None:
+        return False
+    return covered_span >= requested_span
+
+
+def slice_period(df: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Slice stored history to a period, relative to the last stored bar
+
+    Anchoring on the last bar (rather than wall-clock now) keeps weekend
+    and holiday requests from returning empty frames.
+    """
+    if df.empty:
+        return df.copy()
+    span = period_span(period)
+    if span is None:
+        return df.reset_index(drop=True)
+    last_ts = df["date"].iloc[-1]
+    if period == "ytd":
+        cutoff = last_ts.normalize().replace(month=1, day=1)
+    else:
+        cutoff = last_ts - span
+    return df[df["date"] >= cutoff].reset_index(drop=True)
+
+
+class OHLCStore:
+    """
+    OHLC history per (symbol, interval), partitioned by month
+
+    Layout under ``root``:
+        {symbol}_{interval}/YYYY-MM.parquet   bars of one month, sorted by date, unique dates
+        {symbol}_{interval}.json              {"covered_period": "2y", "refreshed_at": epoch}
+
+    A merge rewrites only the months its bars fall into (a revised,
+    still-forming bar rewrites its own month). Single-file histories
+    (``{symbol}_{interval}.parquet``) from older versions are read and
+    split into partitions on their next write.
+
+    Frames are also kept in memory so reads do not hit parquet.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._frames: dict[tuple[str, str], pd.DataFrame] = {}
+        self._meta: dict[tuple[str, str], dict] = {}
+        self._unpartitioned: set[tuple[str, str]] = set()  # loaded from a legacy single file
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, symbol: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((symbol, interval), threading.Lock())
+
+    def _paths(self, symbol: str, interval: str) -> tuple[Path, Path, Path]:
+        """(partition directory, metadata file, legacy single-file history)"""
+        stem = f"{symbol}_{interval}"
+        return self.root / stem, self.root / f"{stem}.json", self.root / f"{stem}.parquet"
+
+    def load(self, symbol: str, interval: str) -> pd.DataFrame | None:
+        """Stored history, or None if nothing has been stored yet"""
+        key = (symbol, interval)
+        if key in self._frames:
+            return self._frames[key]
+
+        data_dir, meta_path, legacy_path = self._paths(symbol, interval)
+        partitions = sorted(data_dir.glob("*.parquet")) if data_dir.is_dir() else []
+        if not partitions and not legacy_path.exists():
+            return None
+        try:
+            if partitions:
+                df = pd.concat([pd.read_parquet(path) for path in partitions], ignore_index=True)
+            else:
+                df = pd.read_parquet(legacy_path)
+                self._unpartitioned.add(key)
+            meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        except Exception as e:
+            logger.error(f"Error reading OHLC store for {symbol} {interval}: {e}")
+            return None
+
+        self._frames[key] = df
+        self._meta[key] = meta
+        return df
+
+    def meta(self, symbol: str, interval: str) -> dict:
+        """Store metadata (covered_period, refreshed_at)"""
+        if self.load(symbol, interval) is None:
+            return {}
+        return self._meta.get((symbol, interval), {})
+
+    def covers(self, symbol: str, interval: str, period: str) -> bool:
+        """Whether the stored history contains the requested period"""
+        return period_covers(self.meta(symbol, interval).get("covered_period"), period)
+
+    def is_fresh(self, symbol: str, interval: str, ttl: float) -> bool:
+        """Whether the last refresh happened within ``ttl`` seconds"""
+        refreshed_at = self.meta(symbol, interval).get("refreshed_at")
+        return refreshed_at is not None and time.time() - refreshed_at <= ttl
+
+    def last_timestamp(self, symbol: str, interval: str) -> pd.Timestamp | None:
+        """Timestamp of the newest stored bar"""
+        df = self.load(symbol, interval)
+        if df is None or df.empty:
+            return None
+        return df["date"].iloc[-1]
+
+    def merge(
+        self,
+        symbol: str,
+        interval: str,
+        new_bars: pd.DataFrame,
+        covered_period: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        Merge new bars into the stored history and persist it
+
+        Bars with an existing timestamp replace the stored ones (the last
+        stored bar is often still forming). ``covered_period`` widens the
+        recorded coverage when a full-period download was merged.
+        """
+        key = (symbol, interval)
+        with self._lock(symbol, interval):
+            stored = self.load(symbol, interval)
+            meta = dict(self._meta.get(key, {}))
+
+            if stored is not None and not stored.empty and not new_bars.empty:
+                stored_tz = stored["date"].dt.tz
+                new_bars = new_bars.copy()
+                if new_bars["date"].dt.tz != stored_tz:
+                    if stored_tz is None:
+                        new_bars["date"] = new_bars["date"].dt.tz_localize(None)
+                    else:
+                        new_bars["date"] = new_bars["date"].dt.tz_convert(stored_tz)
+                merged = pd.concat([stored, new_bars], ignore_index=True)
+            elif stored is not None and new_bars.empty:
+                merged = stored
+            else:
+                merged = new_bars
+
+            merged = (
+                merged.drop_duplicates(subset="date", keep="last")
+                .sort_values("date")
+                .reset_index(drop=True)
+            )
+
+            if covered_period is not None and not period_covers(meta.get("covered_period"), covered_period):
+                meta["covered_period"] = covered_period
+            meta["refreshed_at"] = time.time()
+
+            added = len(merged) - (len(stored) if stored is not None else 0)
+            # Only the months the new bars fall into changed (all of them for a first write)
+            changed = new_bars if stored is not None and key not in self._unpartitioned else merged
+            self._write(symbol, interval, merged, meta, _months(changed))
+            logger.info(f"OHLC store {symbol} {interval}: {len(merged)} bars ({added:+d})")
+            return merged
+
+    def _write(self, symbol: str, interval: str, df: pd.DataFrame, meta: dict, months: list[str]):
+        """Persist the given monthly partitions and the metadata; keep memory in sync even if disk fails"""
+        key = (symbol, interval)
+        self._frames[key] = df
+        self._meta[key] = meta
+        data_dir, meta_path, legacy_path = self._paths(symbol, interval)
+        try:
+            data_dir.mkdir(parents=True, exist_ok=True)
+            dates = df["date"]
+            for month in months:
+                start = pd.Timestamp(f"{month}-01", tz=dates.dt.tz)
+                lo, hi = dates.searchsorted(start), dates.searchsorted(start + pd.offsets.MonthBegin(1))
+                path = data_dir / f"{month}.parquet"
+                tmp_path = path.with_suffix(".parquet.tmp")
+                df.iloc[lo:hi].to_parquet(tmp_path, index=False)
+                tmp_path.replace(path)
+            meta_path.write_text(json.dumps(meta), encoding="utf-8")
+            if key in self._unpartitioned:
+                legacy_path.unlink(missing_ok=True)
+                self._unpartitioned.discard(key)
+        except Exception as e:
+            logger.error(f"Error saving OHLC store for {symbol} {interval}: {e}")
+
+
+def _months(bars: pd.DataFrame) -> list[str]:
+    """Distinct ``YYYY-MM`` partitions of the bars' dates (in their own timezone)"""
+    if bars.empty or "date" not in bars:
+        return []
+    return sorted(bars["date"].dt.strftime("%Y-%m").unique())
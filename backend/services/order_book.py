@@ -0,0 +1,309 @@
+"""
+Local order book
+
+``get_market_depth`` used to rebuild lists of dicts from every Binance
+snapshot and re-sum the volumes. The book here is kept per symbol and
+updated in place:
+
+- from Binance diff events (``depthUpdate``: ``U``/``u`` update ids), with
+  gap detection so the caller knows when to fetch a new snapshot
+- from successive REST snapshots, by diffing each one against the book
+  so only the levels that changed are touched
+
+Each side is a sorted array of prices with a parallel array of volumes;
+levels are located by binary search (``bisect``) and the side's total
+volume is maintained incrementally. Top-N views, cumulative depth and the
+imbalance metrics read the arrays directly.
+
+``OrderBookReplay`` replays recorded snapshot / diff messages from a
+JSON-lines file, for offline use and tests.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+Level = tuple[float, float]  # (price, volume)
+
+
+def parse_levels(raw: Iterable) -> list[Level]:
+    """Binance ``[["price", "qty"], ...]`` -> ``[(price, volume), ...]``"""
+    return [(float(item[0]), float(item[1])) for item in raw]
+
+
+class BookSide:
+    """
+    One side of the book: price levels sorted best first
+
+    Prices are stored as sort keys (negated for bids) so both sides use an
+    ascending array and plain ``bisect``.
+    """
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self._keys: list[float] = []
+        self._volumes: list[float] = []
+        self.total_volume = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _key(self, price: float) -> float:
+        return -price if self.descending else price
+
+    def _price(self, key: float) -> float:
+        return -key if self.descending else key
+
+    def get(self, price: float) -> float:
+        """Volume at ``price`` (0 if the level does not exist)"""
+        key = self._key(price)
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self._volumes[i]
+        return 0.0
+
+    def set(self, price: float, volume: float) -> bool:
+        """Set a level's volume (``volume <= 0`` removes it); returns whether the book changed"""
+        key = self._key(price)
+        keys = self._keys
+        i = bisect_left(keys, key)
+        exists = i < len(keys) and keys[i] == key
+        if volume <= 0:
+            if not exists:
+                return False
+            self.total_volume -= self._volumes[i]
+            del keys[i]
+            del self._volumes[i]
+        elif exists:
+            if self._volumes[i] == volume:
+                return False
+            self.total_volume += volume - self._volumes[i]
+            self._volumes[i] = volume
+        else:
+            keys.insert(i, key)
+            self._volumes.insert(i, volume)
+            self.total_volume += volume
+        return True
+
+    def clear(self):
+        self._keys.clear()
+        self._volumes.clear()
+        self.total_volume = 0.0
+
+    def best(self) -> Optional[float]:
+        return self._price(self._keys[0]) if self._keys else None
+
+    def top(self, n: Optional[int] = None) -> list[Level]:
+        """Best ``n`` levels (all levels when ``n`` is None)"""
+        keys = self._keys if n is None else self._keys[:n]
+        return [(self._price(k), v) for k, v in zip(keys, self._volumes)]
+
+    def volume(self, n: Optional[int] = None) -> float:
+        """Total volume of the best ``n`` levels"""
+        if n is None or n >= len(self._volumes):
+            return self.total_volume
+        return sum(self._volumes[:n])
+
+    def cumulative(self, n: Optional[int] = None) -> list[float]:
+        """Running volume totals over the best ``n`` levels"""
+        return list(accumulate(self._volumes if n is None else self._volumes[:n]))
+
+    def diff(self, levels: list[Level]) -> list[Level]:
+        """Changes that turn this side into ``levels`` (volume 0 = removed)"""
+        target = dict(levels)
+        changes = [(price, volume) for price, volume in target.items() if self.get(price) != volume]
+        changes.extend((price, 0.0) for price, _ in self.top() if price not in target)
+        return changes
+
+
+class OrderBookGap(Exception):
+    """A diff event does not follow the book's last update id (a new snapshot is needed)"""
+
+
+class LocalOrderBook:
+    """
+    Price-level order book for one symbol (thread-safe)
+
+    ``last_update_id`` follows Binance's ``lastUpdateId`` / ``U``..``u``
+    sequence when it is available.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id: Optional[int] = None
+        self.updated_at: float = 0.0  # time.time() of the last snapshot / diff
+        self._lock = threading.RLock()
+
+    def _apply(self, bids: Iterable[Level], asks: Iterable[Level]) -> int:
+        changed = 0
+        for price, volume in bids:
+            changed += self.bids.set(price, volume)
+        for price, volume in asks:
+            changed += self.asks.set(price, volume)
+        return changed
+
+    def apply_snapshot(
+        self, bids: list[Level], asks: list[Level], last_update_id: Optional[int] = None
+    ) -> tuple[list[Level], list[Level]]:
+        """
+        Bring the book to a full snapshot by diffing it against the current
+        levels; returns the (bid, ask) changes that were applied
+        """
+        with self._lock:
+            changes = (self.bids.diff(bids), self.asks.diff(asks))
+            self._apply(*changes)
+            self.last_update_id = last_update_id
+            self.updated_at = time.time()
+            return changes
+
+    def apply_diff(
+        self,
+        bids: list[Level],
+        asks: list[Level],
+        first_update_id: Optional[int] = None,
+        final_update_id: Optional[int] = None,
+    ) -> int:
+        """
+        Apply an incremental update (absolute volumes per level, 0 = remove)
+
+        Events already covered by the book are ignored. Raises
+        ``OrderBookGap`` when updates were missed. Returns the number of
+        levels that changed.
+        """
+        with self._lock:
+            if final_update_id is not None and self.last_update_id is not None:
+                if final_update_id <= self.last_update_id:
+                    return 0
+                if first_update_id is not None and first_update_id > self.last_update_id + 1:
+                    raise OrderBookGap(
+                        f"{self.symbol}: expected update {self.last_update_id + 1}, got {first_update_id}"
+                    )
+            changed = self._apply(bids, asks)
+            if final_update_id is not None:
+                self.last_update_id = final_update_id
+            self.updated_at = time.time()
+            return changed
+
+    def clear(self):
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            self.last_update_id = None
+            self.updated_at = 0.0
+
+    def age(self) -> float:
+        """Seconds since the last update"""
+        return time.time() - self.updated_at if self.updated_at else float("inf")
+
+    def imbalance(self, n: Optional[int] = None) -> float:
+        """(bid - ask) / (bid + ask) volume over the best ``n`` levels, in [-1, 1]"""
+        with self._lock:
+            bid_volume, ask_volume = self.bids.volume(n), self.asks.volume(n)
+        total = bid_volume + ask_volume
+        return (bid_volume - ask_volume) / total if total else 0.0
+
+    def to_market_depth(self, limit: Optional[int] = None) -> dict:
+        """
+        Top-``limit`` view in the ``DataProvider.get_market_depth`` format;
+        levels also carry their cumulative ``total``
+        """
+        with self._lock:
+            bids, asks = self.bids.top(limit), self.asks.top(limit)
+            bid_totals, ask_totals = self.bids.cumulative(limit), self.asks.cumulative(limit)
+            last_update_id = self.last_update_id
+
+        best_bid = bids[0][0] if bids else 0
+        best_ask = asks[0][0] if asks else 0
+        total_bid_volume = bid_totals[-1] if bid_totals else 0.0
+        total_ask_volume = ask_totals[-1] if ask_totals else 0.0
+        volume = total_bid_volume + total_ask_volume
+        return {
+            "bids": [{"price": p, "volume": v, "total": t} for (p, v), t in zip(bids, bid_totals)],
+            "asks": [{"price": p, "volume": v, "total": t} for (p, v), t in zip(asks, ask_totals)],
+            "current_price": round((best_bid + best_ask) / 2, 2) if best_bid and best_ask else 0,
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+            "spread": round(best_ask - best_bid, 2) if best_bid and best_ask else 0,
+            "total_bid_volume": round(total_bid_volume, 4),
+            "total_ask_volume": round(total_ask_volume, 4),
+            "bid_ask_ratio": round(total_bid_volume / total_ask_volume, 4) if total_ask_volume > 0 else 0,
+            "imbalance": round((total_bid_volume - total_ask_volume) / volume, 4) if volume else 0.0,
+            "symbol": self.symbol,
+            "last_update_id": last_update_id,
+        }
+
+
+class OrderBookReplay:
+    """
+    Replays recorded Binance depth messages (JSON lines) into a ``LocalOrderBook``
+
+    Records are either REST snapshots (``lastUpdateId``, ``bids``, ``asks``)
+    or diff events (``U``, ``u``, ``b``, ``a``, as in the ``depthUpdate``
+    stream). Each ``step`` applies the next record; a diff that does not
+    follow the book is skipped with a warning (there is no snapshot to
+    fetch offline). With ``loop`` the file restarts from the top once
+    exhausted, starting over from an empty book.
+    """
+
+    def __init__(self, path: Path | str, symbol: str, loop: bool = True):
+        self.path = Path(path)
+        self.book = LocalOrderBook(symbol)
+        self.loop = loop
+        self._records = self._load()
+        self._position = 0
+
+    def _load(self) -> list[dict]:
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping invalid depth record {self.path}:{line_no}: {e}")
+        return records
+
+    def apply(self, record: dict):
+        """Apply one snapshot or diff record to the book"""
+        if "lastUpdateId" in record:
+            self.book.apply_snapshot(
+                parse_levels(record.get("bids", [])),
+                parse_levels(record.get("asks", [])),
+                record["lastUpdateId"],
+            )
+            return
+        try:
+            self.book.apply_diff(
+                parse_levels(record.get("b", [])),
+                parse_levels(record.get("a", [])),
+                record.get("U"),
+                record.get("u"),
+            )
+        except OrderBookGap as e:
+            logger.warning(f"Skipping depth update out of sequence: {e}")
+
+    def step(self) -> bool:
+        """Apply the next record; False once the file is exhausted (and not looping)"""
+        if self._position >= len(self._records):
+            if not self.loop or not self._records:
+                return False
+            self._position = 0
+            self.book.clear()
+        self.apply(self._records[self._position])
+        self._position += 1
+        return True
+
+    def __iter__(self) -> Iterator[LocalOrderBook]:
+        """Step through the file, yielding the book after every record"""
+        while self.step():
+            yield self.book
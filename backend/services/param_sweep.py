@@ -0,0 +1,407 @@
+"""
+Parallel parameter sweep over indicator periods and strategy weights
+
+Candidates combine ``IndicatorCalculator`` periods (``short_ma``,
+``mid_ma``, ``atr_period``, ...), ``StrategyEngine`` factor weights
+(``trend``, ``momentum``, ...) and ``max_drawdown``. Each candidate is
+backtested with ``Backtester`` and the results are ranked by a backtest
+metric.
+
+- The OHLC bars are copied once into a ``multiprocessing.shared_memory``
+  block; pool workers attach to it in their initializer, so tasks only
+  carry small parameter dicts (no DataFrame pickling per task).
+- Candidates sharing the same indicator periods are grouped into one task:
+  the point-in-time indicator columns are computed once per group and
+  every weight variant is scored against them.
+- Ranked results can be appended to a SQLite results table.
+
+Usage (from backend/):
+    python -m services.param_sweep --period 10y --grid short_ma=10,20,30 mid_ma=50,60 trend=0.2,0.3
+    python -m services.param_sweep --grid rsi_period=7,14,21 momentum=0.1,0.25,0.4 --random 20
+"""
+import argparse
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.config import settings
+from services.backtest import Backtester, point_in_time_columns
+from services.indicators import IndicatorCalculator
+from services.strategy import StrategyEngine
+
+logger = logging.getLogger(__name__)
+
+# Tunable parameters by owner
+CALCULATOR_PARAMS = (
+    "short_ma", "mid_ma", "atr_period", "rsi_period", "adx_period",
+    "bb_period", "macd_fast", "macd_slow", "macd_signal",
+)
+WEIGHT_PARAMS = tuple(StrategyEngine().weights)
+ENGINE_PARAMS = ("max_drawdown",)
+
+# Stats copied into the results table (exit_reasons is kept as JSON)
+METRICS = (
+    "total_return", "annual_return", "sharpe", "max_drawdown", "win_rate",
+    "profit_factor", "avg_trade_return", "avg_bars_held", "exposure", "trades",
+)
+# Metrics where lower is better
+ASCENDING_METRICS = {"max_drawdown"}
+
+_RESULTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweep_results (
+    run_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    label TEXT,
+    rank INTEGER,
+    params TEXT NOT NULL,
+    total_return REAL,
+    annual_return REAL,
+    sharpe REAL,
+    max_drawdown REAL,
+    win_rate REAL,
+    profit_factor REAL,
+    avg_trade_return REAL,
+    avg_bars_held REAL,
+    exposure REAL,
+    trades INTEGER,
+    exit_reasons TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_sweep_results_run ON sweep_results (run_id, rank);
+"""
+
+
+def is_valid(params: dict[str, Any]) -> bool:
+    """Reject period combinations the strategy cannot use (fast >= slow averages)"""
+    short_ma = params.get("short_ma", 20)
+    mid_ma = params.get("mid_ma", 60)
+    macd_fast = params.get("macd_fast", 12)
+    macd_slow = params.get("macd_slow", 26)
+    return short_ma < mid_ma and macd_fast < macd_slow
+
+
+def grid(space: dict[str, Iterable[Any]]) -> list[dict[str, Any]]:
+    """Every valid combination of the given parameter values"""
+    names = list(space)
+    combos = (dict(zip(names, values)) for values in itertools.product(*(list(space[n]) for n in names)))
+    return [combo for combo in combos if is_valid(combo)]
+
+
+def random_search(space: dict[str, Iterable[Any]], samples: int, seed: Optional[int] = None) -> list[dict[str, Any]]:
+    """Up to ``samples`` distinct valid combinations drawn uniformly from the grid"""
+    rng = random.Random(seed)
+    values = {name: list(options) for name, options in space.items()}
+    size = math.prod(len(options) for options in values.values())
+    seen: set[tuple] = set()
+    candidates = []
+    attempts = 0
+    while len(candidates) < samples and len(seen) < size and attempts < samples * 20:
+        attempts += 1
+        combo = {name: rng.choice(options) for name, options in values.items()}
+        key = tuple(combo.values())
+        if key in seen:
+            continue
+        seen.add(key)
+        if is_valid(combo):
+            candidates.append(combo)
+    return candidates
+
+
+class SharedBars:
+    """
+    OHLC bars in one shared memory block
+
+    Layout: ``open``, ``high``, ``low``, ``close`` as float64 rows followed
+    by the dates as int64 nanoseconds (UTC). ``spec`` is the small picklable
+    handle workers use to ``attach``.
+    """
+
+    FIELDS = ("open", "high", "low", "close")
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, (len(self.FIELDS) + 1) * n * 8))
+        block = np.ndarray((len(self.FIELDS) + 1, n), dtype=np.float64, buffer=self._shm.buf)
+        for row, field in enumerate(self.FIELDS):
+            block[row] = df[field].to_numpy(dtype=np.float64)
+        has_dates = "date" in df.columns
+        if has_dates:
+            block[-1].view(np.int64)[:] = df["date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        self.spec = (self._shm.name, n, has_dates)
+
+    @classmethod
+    def attach(cls, spec: tuple[str, int, bool]) -> tuple[shared_memory.SharedMemory, pd.DataFrame]:
+        """Map the block and wrap it as a DataFrame (keep the returned handle alive)"""
+        name, n, has_dates = spec
+        shm = shared_memory.SharedMemory(name=name)
+        block = np.ndarray((len(cls.FIELDS) + 1, n), dtype=np.float64, buffer=shm.buf)
+        columns: dict[str, Any] = {}
+        if has_dates:
+            columns["date"] = block[-1].view(np.int64).view("datetime64[ns]")
+        columns.update({field: block[row] for row, field in enumerate(cls.FIELDS)})
+        return shm, pd.DataFrame(columns, copy=False)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> "SharedBars":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass(frozen=True)
+class SweepOptions:
+    """Backtest settings shared by every candidate"""
+    sentiment_score: float = 0.0
+    allow_short: bool = True
+    fee_rate: float = 0.0
+    periods_per_year: Optional[float] = None
+
+
+# Per-process state set by _init_worker
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(spec: tuple[str, int, bool], options: SweepOptions):
+    shm, bars = SharedBars.attach(spec)
+    _worker.update(shm=shm, bars=bars, options=options)
+
+
+def _evaluate_group(calculator_params: dict[str, Any], variants: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Backtest every engine variant against one indicator pass"""
+    bars: pd.DataFrame = _worker["bars"]
+    options: SweepOptions = _worker["options"]
+    calculator = IndicatorCalculator(**calculator_params)
+    try:
+        columns = point_in_time_columns(bars, calculator)
+    except Exception as e:
+        logger.warning(f"Indicator pass failed for {calculator_params}: {e}")
+        return [{"params": {**calculator_params, **variant}, "error": str(e)} for variant in variants]
+
+    rows = []
+    for variant in variants:
+        params = {**calculator_params, **variant}
+        engine = StrategyEngine()
+        engine.weights.update({k: v for k, v in variant.items() if k in WEIGHT_PARAMS})
+        engine.max_drawdown = variant.get("max_drawdown", engine.max_drawdown)
+        backtester = Backtester(
+            engine=engine, calculator=calculator, allow_short=options.allow_short, fee_rate=options.fee_rate
+        )
+        try:
+            stats = backtester.run(
+                bars, options.sentiment_score, options.periods_per_year, columns=columns
+            ).stats
+        except Exception as e:
+            logger.warning(f"Backtest failed for {params}: {e}")
+            rows.append({"params": params, "error": str(e)})
+            continue
+        rows.append({"params": params, **{m: stats[m] for m in METRICS}, "exit_reasons": stats["exit_reasons"]})
+    return rows
+
+
+class ParameterSweep:
+    """
+    Backtest many parameter candidates over the same bars on a process pool
+
+    Example:
+        sweep = ParameterSweep(bars, max_workers=4)
+        results = sweep.run(grid({"short_ma": [10, 20], "trend": [0.2, 0.3]}))
+        sweep.save(results, settings.DATABASE_DIR / "sweeps.sqlite3")
+    """
+
+    def __init__(
+        self,
+        bars: pd.DataFrame,
+        options: SweepOptions = SweepOptions(),
+        max_workers: Optional[int] = None,
+    ):
+        if bars.empty:
+            raise ValueError("No data available for parameter sweep")
+        self.bars = bars
+        self.options = options
+        self.max_workers = max_workers or settings.SWEEP_MAX_WORKERS or os.cpu_count() or 1
+
+    @staticmethod
+    def _split(candidates: list[dict[str, Any]]) -> dict[tuple, list[dict[str, Any]]]:
+        """Group candidates by indicator periods -> engine-only variants"""
+        unknown = {k for c in candidates for k in c} - set(CALCULATOR_PARAMS + WEIGHT_PARAMS + ENGINE_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+        groups: dict[tuple, list[dict[str, Any]]] = {}
+        for candidate in candidates:
+            key = tuple(sorted((k, v) for k, v in candidate.items() if k in CALCULATOR_PARAMS))
+            groups.setdefault(key, []).append({k: v for k, v in candidate.items() if k not in CALCULATOR_PARAMS})
+        return groups
+
+    def _tasks(self, candidates: list[dict[str, Any]]) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+        # Split large groups so every worker gets a few tasks
+        chunk = max(1, math.ceil(len(candidates) / (self.max_workers * 4)))
+        tasks = []
+        for key, variants in self._split(candidates).items():
+            for start in range(0, len(variants), chunk):
+                tasks.append((dict(key), variants[start:start + chunk]))
+        return tasks
+
+    def run(
+        self,
+        candidates: Iterable[dict[str, Any]],
+        rank_by: str = "sharpe",
+        min_trades: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Backtest every candidate and rank the results
+
+        Candidates with fewer than ``min_trades`` trades (or that failed)
+        are ranked last. Returns one row per candidate: ``rank``, the
+        parameter columns, the metrics and ``error``.
+        """
+        candidates = list(candidates)
+        if rank_by not in METRICS:
+            raise ValueError(f"Unknown metric: {rank_by}")
+        tasks = self._tasks(candidates)
+        if not tasks:
+            return self._rank([], rank_by, min_trades)
+        started = time.perf_counter()
+
+        rows: list[dict[str, Any]] = []
+        with SharedBars(self.bars) as shared:
+            if self.max_workers == 1 or len(tasks) == 1:
+                _init_worker(shared.spec, self.options)
+                try:
+                    for calculator_params, variants in tasks:
+                        rows.extend(_evaluate_group(calculator_params, variants))
+                finally:
+                    _worker.pop("bars", None)
+                    _worker.pop("shm").close()
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(self.max_workers, len(tasks)),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(shared.spec, self.options),
+                ) as pool:
+                    for result in pool.map(_evaluate_group, *zip(*tasks)):
+                        rows.extend(result)
+
+        logger.info(
+            f"Parameter sweep: {len(candidates)} candidates in {len(tasks)} tasks, "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+        return self._rank(rows, rank_by, min_trades)
+
+    @staticmethod
+    def _rank(rows: list[dict[str, Any]], rank_by: str, min_trades: int) -> pd.DataFrame:
+        results = pd.DataFrame([{**row["params"], **{k: v for k, v in row.items() if k != "params"}} for row in rows])
+        results["params"] = [row["params"] for row in rows]
+        for column in METRICS + ("exit_reasons", "error"):
+            if column not in results:
+                results[column] = None
+        results[list(METRICS)] = results[list(METRICS)].astype(np.float64)
+
+        eligible = results["error"].isna() & (results["trades"] >= min_trades)
+        score = results[rank_by].where(eligible)
+        order = score.sort_values(ascending=rank_by in ASCENDING_METRICS, na_position="last", kind="stable").index
+        results = results.loc[order].reset_index(drop=True)
+        results.insert(0, "rank", np.arange(1, len(results) + 1))
+        return results
+
+    @staticmethod
+    def save(results: pd.DataFrame, path: Path, label: Optional[str] = None) -> str:
+        """Append ranked results to the ``sweep_results`` table; returns the run id"""
+        run_id = uuid.uuid4().hex[:12]
+        created_at = time.time()
+
+        def value(row, column):
+            v = row[column]
+            return None if v is None or (isinstance(v, float) and math.isnan(v)) else v
+
+        records = [
+            (
+                run_id, created_at, label, int(row["rank"]), json.dumps(row["params"], sort_keys=True),
+                *(value(row, m) for m in METRICS),
+                json.dumps(row["exit_reasons"]) if isinstance(row["exit_reasons"], dict) else None,
+                value(row, "error"),
+            )
+            for _, row in results.iterrows()
+        ]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.executescript(_RESULTS_SCHEMA)
+            placeholders = ", ".join("?" * (5 + len(METRICS) + 2))
+            conn.executemany(
+                f"INSERT INTO sweep_results (run_id, created_at, label, rank, params, {', '.join(METRICS)}, "
+                f"exit_reasons, error) VALUES ({placeholders})",
+                records,
+            )
+        conn.close()
+        return run_id
+
+
+def _parse_space(items: list[str]) -> dict[str, list[Any]]:
+    space: dict[str, list[Any]] = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        cast = int if name in CALCULATOR_PARAMS else float
+        space[name] = [cast(v) for v in values.split(",") if v]
+    return space
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbol", default=settings.GOLD_SYMBOL)
+    parser.add_argument("--period", default="10y")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--grid", nargs="+", required=True, metavar="NAME=V1,V2", help="parameter values to sweep")
+    parser.add_argument("--random", type=int, default=0, help="sample this many combinations instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rank-by", default="sharpe", choices=METRICS)
+    parser.add_argument("--min-trades", type=int, default=5)
+    parser.add_argument("--sentiment", type=float, default=0.0, help="constant news sentiment score")
+    parser.add_argument("--fee-rate", type=float, default=0.0)
+    parser.add_argument("--long-only", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--db", type=Path, default=settings.DATABASE_DIR / "sweeps.sqlite3")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from services.data_provider import data_provider
+
+    space = _parse_space(args.grid)
+    candidates = random_search(space, args.random, args.seed) if args.random else grid(space)
+    if not candidates:
+        print("No valid candidates: every combination has a fast period >= its slow one")
+        return
+
+    bars = data_provider.fetch_price_data(args.symbol, period=args.period, interval=args.interval)
+    options = SweepOptions(sentiment_score=args.sentiment, allow_short=not args.long_only, fee_rate=args.fee_rate)
+
+    results = ParameterSweep(bars, options, args.workers).run(candidates, args.rank_by, args.min_trades)
+    run_id = ParameterSweep.save(results, args.db, label=f"{args.symbol} {args.period} {args.interval}")
+
+    columns = ["rank", *space, *METRICS]
+    print(results[columns].head(args.top).to_string(index=False))
+    print(f"\n{len(results)} candidates on {len(bars)} bars -> {args.db} (run_id={run_id})")
+
+
+if __name__ == "__main__":
+    main()
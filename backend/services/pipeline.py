@@ -0,0 +1,117 @@
+"""
+Dependency-aware fan-out pipeline for request handlers
+
+Stages declare the stages they depend on; every stage whose dependencies
+are satisfied starts immediately, so independent upstream fetches run
+concurrently and the total latency tracks the slowest chain rather than
+the sum of all steps. Blocking callables run on a bounded thread pool so
+they never stall the event loop.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bounded executor shared by all pipelines (blocking I/O and pandas work)
+pipeline_executor = ThreadPoolExecutor(
+    max_workers=settings.PIPELINE_MAX_WORKERS,
+    thread_name_prefix="pipeline",
+)
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable (e.g. pandas indicator work) on the pipeline executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pipeline_executor, functools.partial(func, *args, **kwargs))
+
+
+@dataclass
+class Stage:
+    """A single pipeline step"""
+    name: str
+    func: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class Pipeline:
+    """
+    Run a DAG of stages concurrently
+
+    Each stage function receives the results of its dependencies as
+    positional arguments, in the order they were declared. Coroutine
+    functions are awaited on the event loop; plain callables are
+    dispatched to ``pipeline_executor``.
+
+    Example:
+        pipeline = Pipeline()
+        pipeline.add("ohlc", fetch_ohlc)
+        pipeline.add("news", fetch_news)
+        pipeline.add("indicators", calculate, "ohlc")
+        results = await pipeline.run()
+    """
+
+    executor: ThreadPoolExecutor = pipeline_executor
+    stages: dict[str, Stage] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)  # stage -> ms
+
+    def add(self, name: str, func: Callable[..., Any], *deps: str) -> "Pipeline":
+        """Register a stage; dependencies must already be registered"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {missing}")
+        self.stages[name] = Stage(name=name, func=func, deps=tuple(deps))
+        return self
+
+    async def run(self) -> dict[str, Any]:
+        """
+        Execute all stages and return their results keyed by stage name
+
+        The first failing stage cancels the remaining ones and its
+        exception is re-raised to the caller.
+        """
+        loop = asyncio.get_running_loop()
+        tasks: dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def run_stage(stage: Stage) -> Any:
+            args = [await tasks[dep] for dep in stage.deps]
+            stage_start = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(stage.func):
+                    return await stage.func(*args)
+                return await loop.run_in_executor(self.executor, stage.func, *args)
+            finally:
+                self.timings[stage.name] = (time.perf_counter() - stage_start) * 1000
+
+        # Stages are registered in dependency order, so every dependency
+        # task exists before its dependants are created
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.create_task(run_stage(stage), name=f"pipeline:{stage.name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.timings["total"] = (time.perf_counter() - started) * 1000
+            logger.debug(f"Pipeline timings: {self.format_timings()}")
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    def format_timings(self) -> str:
+        """Format timings as a ``Server-Timing`` header value"""
+        return ", ".join(f"{name};dur={ms:.1f}" for name, ms in self.timings.items())
@@ -7,9 +7,7 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from core.config import settings
-from services.data_provider import data_provider
-from services.indicators import indicator_calculator
-from services.strategy import strategy_engine
+from services.market_snapshot import market_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -20,26 +18,12 @@ scheduler = AsyncIOScheduler()
 async def daily_update_task():
     """
     Daily update task - runs at 14:00 every day
-    Fetches fresh data and updates analysis
+    Refreshes every market snapshot view from fresh (uncached) data
     """
     logger.info("Running daily update task...")
     try:
-        # Force refresh data without cache
-        df = data_provider.fetch_price_data(
-            symbol=settings.GOLD_SYMBOL,
-            period=settings.DEFAULT_PERIOD,
-            use_cache=False,
-        )
-
-        if df.empty:
-            logger.error("Daily update failed: No data received")
-            return
-
-        # Calculate indicators
-        df = indicator_calculator.calculate_all(df)
-
-        # Run analysis
-        analysis = strategy_engine.analyze(df, settings.GOLD_SYMBOL)
+        await market_snapshot.refresh_views(use_cache=False)
+        analysis = (await market_snapshot.get_chat_analysis()).analysis
 
         logger.info(
             f"Daily update completed: Signal={analysis.signal.signal_level.value}, "
@@ -8,22 +8,69 @@ Trading strategy engine - 增强版
 """
 import logging
 from datetime import datetime
-from typing import Optional
+from typing import Any, Mapping, Optional
 
+import numpy as np
 import pandas as pd
 
 from models.schemas import (
+    ConfluenceScore,
     MarketAnalysis,
     MarketState,
     PositionLevel,
+    PriceZone,
     SignalLevel,
     TechnicalIndicators,
+    TimeframeScore,
     TradingSignal,
 )
+from services.indicators import BB_POSITION_LABELS, MACD_CROSS_LABELS, VOL_STATE_LABELS
+from services.levels import zones_for
 from services.llm_client import llm_client
+from services.news_keywords import major_news_matcher
 
 logger = logging.getLogger(__name__)
 
+# 布林带位置得分
+BB_POSITION_SCORES = {
+    "above": -0.8,   # 突破上轨，可能超买
+    "upper": -0.3,   # 接近上轨
+    "middle": 0,     # 中轨附近
+    "lower": 0.3,    # 接近下轨
+    "below": 0.8,    # 突破下轨，可能超卖
+}
+
+# Signal level codes produced by StrategyEngine.score_bars (sign = direction)
+SIGNAL_CODES = {
+    SignalLevel.STRONG_BUY: 2,
+    SignalLevel.BUY: 1,
+    SignalLevel.HOLD: 0,
+    SignalLevel.SELL: -1,
+    SignalLevel.STRONG_SELL: -2,
+}
+
+# 多周期共振：各周期权重 (大周期权重更高)
+TIMEFRAME_WEIGHTS = {
+    "5m": 0.1,
+    "15m": 0.1,
+    "30m": 0.1,
+    "1h": 0.2,
+    "60m": 0.2,
+    "4h": 0.2,
+    "1d": 0.3,
+    "1wk": 0.4,
+}
+# 技术面得分超过该阈值才视为有方向
+CONFLUENCE_DIRECTION_THRESHOLD = 10
+# 少于该数量的K线不参与共振评分 (与市场状态判断的最少K线数一致)
+CONFLUENCE_MIN_BARS = 60
+
+
+def _filled(values: Any, default: float) -> np.ndarray:
+    """float64 array with NaN replaced by ``default``"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isnan(values), default, values)
+
 
 class StrategyEngine:
     """
@@ -109,6 +156,9 @@ class StrategyEngine:
             real_rate=real_rate,
         )
 
+        # Ranked support/resistance zones over the full history
+        support_zones, resistance_zones = zones_for(df)
+
         # Generate explanation with news context (rule-based)
         explanation = self._generate_explanation(
             df,
@@ -121,6 +171,7 @@ class StrategyEngine:
             real_rate,
             nominal_rate,
             inflation_rate,
+            zones=(support_zones, resistance_zones),
         )
 
         # Provide news items (use empty list if None)
@@ -132,7 +183,8 @@ class StrategyEngine:
             current_price=current_price,
             price_change=price_change,
             price_change_pct=price_change_pct,
-            indicators=TechnicalIndicators(),  # Default empty indicators, will be filled by API layer
+            # Latest indicator values are filled by the API layer (zones are reused)
+            indicators=TechnicalIndicators(support_zones=support_zones, resistance_zones=resistance_zones),
             signal=signal,
             explanation=explanation,
             news_items=news_items,
@@ -411,14 +463,7 @@ class StrategyEngine:
             bb_width = 3
         
         # 布林带位置得分
-        bb_scores = {
-            "above": -0.8,   # 突破上轨，可能超买
-            "upper": -0.3,   # 接近上轨
-            "middle": 0,     # 中轨附近
-            "lower": 0.3,    # 接近下轨
-            "below": 0.8,    # 突破下轨，可能超卖
-        }
-        bb_score = bb_scores.get(bb_position, 0)
+        bb_score = BB_POSITION_SCORES.get(bb_position, 0)
         
         # 波动状态调整
         # 高波动时降低信号强度 (因为不确定性高)
@@ -761,6 +806,7 @@ class StrategyEngine:
         real_rate: float | None = None,
         nominal_rate: float | None = None,
         inflation_rate: float | None = None,
+        zones: tuple[list[PriceZone], list[PriceZone]] | None = None,
     ) -> str:
         """Generate educational-style explanation"""
 
@@ -816,6 +862,13 @@ class StrategyEngine:
         if not pd.isna(resistance):
             lines.append(f"**阻力位**: {resistance:.2f}")
 
+        # 全历史支撑/阻力区 (按强度取前 3 个)
+        if zones:
+            for name, side in zip(("支撑区", "阻力区"), zones):
+                if side:
+                    ranges = "，".join(f"{z.low:.2f}-{z.high:.2f} (触及{z.touches}次)" for z in side[:3])
+                    lines.append(f"**{name}**: {ranges}")
+
         # 多因子评分
         if signal.composite_score is not None:
             score_emoji = "🟢" if signal.composite_score > 30 else "🔴" if signal.composite_score < -30 else "🟡"
@@ -879,36 +932,10 @@ class StrategyEngine:
         """Detect major news events from headlines/content (rule-based)"""
         if not news_items:
             return False
-        keywords = [
-            "fomc",
-            "fed",
-            "rate hike",
-            "rate cut",
-            "cpi",
-            "pce",
-            "nonfarm",
-            "nfp",
-            "geopolit",
-            "war",
-            "conflict",
-            "sanction",
-            "美联储",
-            "降息",
-            "加息",
-            "通胀",
-            "非农",
-            "地缘",
-            "战争",
-            "冲突",
-            "制裁",
-            "中东",
-            "乌克兰",
-        ]
         for item in news_items:
-            title = (item.get("title") or "").lower()
-            content = (item.get("content") or "").lower()
-            combined = f"{title} {content}"
-            if any(k in combined for k in keywords):
+            title = item.get("title") or ""
+            content = item.get("content") or ""
+            if major_news_matcher.search(f"{title} {content}"):
                 return True
         return False
 
@@ -953,6 +980,189 @@ class StrategyEngine:
 
         return entry_zone, stop_zone, adjusted
 
+    def score_bars(
+        self,
+        columns: Mapping[str, Any],
+        sentiment_score: Any = 0.0,
+        ma_short: str = "SMA_20",
+        ma_mid: str = "SMA_60",
+        atr: str = "ATR_14",
+    ) -> dict[str, np.ndarray]:
+        """
+        Vectorized multi-factor scoring for every bar at once
+
+        Array version of ``_generate_signal`` (without the macro adjustment):
+        the same factor rules, composite score, signal thresholds, ATR price
+        levels and max-drawdown clamp, evaluated on whole columns.
+
+        Args:
+            columns: Per-bar arrays keyed like ``calculate_all``'s columns
+                (``close``, ``ADX``, ``PLUS_DI``, ``MINUS_DI``, ``RSI``,
+                ``MACD_hist``, ``support_level``, ``resistance_level`` and the
+                three named below); ``MACD_cross``, ``BB_position`` and
+                ``vol_state`` as kernel codes (``compute_columns``)
+            sentiment_score: News sentiment (-100..100), scalar or per bar
+            ma_short / ma_mid / atr: Column names of the short/mid SMA and ATR
+
+        Returns:
+            Factor scores (``trend``, ``momentum``, ``volatility``,
+            ``support_resistance``), ``technical_score``, ``composite_score``,
+            ``signal`` (``SIGNAL_CODES``) and ``entry`` / ``stop`` / ``target``
+            (NaN on HOLD bars)
+        """
+        close = np.asarray(columns["close"], dtype=np.float64)
+        support = np.asarray(columns["support_level"], dtype=np.float64)
+        resistance = np.asarray(columns["resistance_level"], dtype=np.float64)
+        weights = self.weights
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 1. 趋势因子
+            adx = _filled(columns["ADX"], 0)
+            plus_di = _filled(columns["PLUS_DI"], 0)
+            minus_di = _filled(columns["MINUS_DI"], 0)
+            di_sum = plus_di + minus_di
+            direction = np.divide(plus_di - minus_di, di_sum, out=np.zeros_like(di_sum), where=di_sum > 0)
+            sma_short = np.asarray(columns[ma_short], dtype=np.float64)
+            sma_mid = np.asarray(columns[ma_mid], dtype=np.float64)
+            ma_bonus = np.select([sma_short > sma_mid, sma_short < sma_mid], [0.2, -0.2], 0)
+            trend = np.clip(direction * np.minimum(adx / 50, 1.0) + ma_bonus, -1, 1)
+
+            # 2. 动量因子
+            rsi = _filled(columns["RSI"], 50)
+            rsi_score = np.select([rsi < 30, rsi > 70], [(30 - rsi) / 30, -(rsi - 70) / 30], (rsi - 50) / 50 * 0.3)
+            macd_cross = np.asarray(columns["MACD_cross"])
+            macd_score = np.select(
+                [macd_cross == MACD_CROSS_LABELS.index("golden"), macd_cross == MACD_CROSS_LABELS.index("dead")],
+                [0.8, -0.8],
+                np.clip(_filled(columns["MACD_hist"], 0) / 10, -0.5, 0.5),
+            )
+            momentum = np.clip(rsi_score * 0.4 + macd_score * 0.6, -1, 1)
+
+            # 3. 波动因子 (missing codes read as "middle" / "low")
+            bb_scores = np.array([BB_POSITION_SCORES[label] for label in BB_POSITION_LABELS], dtype=np.float64)
+            bb_codes = np.asarray(columns["BB_position"])
+            volatility = bb_scores[np.where(bb_codes < 0, 0, bb_codes)]
+            high_vol = np.asarray(columns["vol_state"]) == VOL_STATE_LABELS.index("high")
+            volatility = np.where(high_vol, volatility * 0.5, volatility)
+
+            # 4. 支撑阻力因子
+            to_support = (close - support) / support
+            to_resistance = (resistance - close) / resistance
+            sr = np.select([support > 0], [np.select([to_support < 0.02, to_support < 0.05], [0.6, 0.3], 0)], 0)
+            sr = sr - np.select(
+                [resistance > 0], [np.select([to_resistance < 0.02, to_resistance < 0.05], [0.6, 0.3], 0)], 0
+            )
+            support_resistance = np.clip(sr, -1, 1)
+
+            technical_weights = (
+                weights["trend"] + weights["momentum"] + weights["volatility"] + weights["support_resistance"]
+            )
+            technical_score = (
+                trend * weights["trend"] +
+                momentum * weights["momentum"] +
+                volatility * weights["volatility"] +
+                support_resistance * weights["support_resistance"]
+            ) / technical_weights * 100
+
+            sentiment = np.broadcast_to(np.asarray(sentiment_score, dtype=np.float64), close.shape)
+            composite_score = np.clip(
+                technical_score * (1 - weights["sentiment"]) + sentiment * weights["sentiment"], -100, 100
+            )
+
+            signal = np.select(
+                [composite_score >= 60, composite_score >= 30, composite_score <= -60, composite_score <= -30],
+                [2, 1, -2, -1],
+                0,
+            ).astype(np.int8)
+
+            # 入场、止损 (2 ATR)、目标 (阻力/支撑 或 3 ATR)
+            atr_values = _filled(columns[atr], 0)
+            atr_values = np.where(atr_values == 0, close * 0.01, atr_values)
+            side = np.sign(signal)
+            entry = np.where(side != 0, close, np.nan)
+            stop = entry - side * atr_values * 2
+            level = np.where(side > 0, resistance, support)
+            target = np.where(np.isnan(level), entry + side * atr_values * 3, level)
+            target = np.where(side != 0, target, np.nan)
+
+            # 最大回撤约束
+            loss_pct = side * (entry - stop) / entry
+            stop = np.where(loss_pct > self.max_drawdown, entry * (1 - side * self.max_drawdown), stop)
+
+        return {
+            "trend": trend,
+            "momentum": momentum,
+            "volatility": volatility,
+            "support_resistance": support_resistance,
+            "technical_score": technical_score,
+            "composite_score": composite_score,
+            "signal": signal,
+            "entry": entry,
+            "stop": stop,
+            "target": target,
+        }
+
+    def confluence_score(
+        self,
+        frames: Mapping[str, pd.DataFrame],
+        weights: Optional[Mapping[str, float]] = None,
+    ) -> ConfluenceScore:
+        """
+        Multi-timeframe confluence of the technical score
+
+        Each timeframe is scored like ``_calculate_technical_score`` on its
+        latest bar; the confluence score is the weighted mean over the
+        timeframes with at least ``CONFLUENCE_MIN_BARS`` bars, and the
+        agreement is the weight share pointing the same way. Timeframes
+        without a weight are reported but not weighted.
+
+        Args:
+            frames: Indicator frames (``calculate_all`` output) by timeframe
+            weights: Relative timeframe weights (default ``TIMEFRAME_WEIGHTS``)
+        """
+        weights = TIMEFRAME_WEIGHTS if weights is None else weights
+        threshold = CONFLUENCE_DIRECTION_THRESHOLD
+
+        def direction(score: float) -> str:
+            if score >= threshold:
+                return "bullish"
+            if score <= -threshold:
+                return "bearish"
+            return "neutral"
+
+        readings = []
+        for timeframe, df in frames.items():
+            if df.empty:
+                continue
+            market_state = self._determine_market_state(df)
+            technical_score, factor_details = self._calculate_technical_score(df, market_state)
+            readings.append({
+                "timeframe": timeframe,
+                "bars": len(df),
+                "market_state": market_state,
+                "trend_score": round(factor_details["trend"]["score"], 3),
+                "technical_score": round(technical_score, 1),
+                "direction": direction(technical_score),
+                "weight": weights.get(timeframe, 0.0) if len(df) >= CONFLUENCE_MIN_BARS else 0.0,
+            })
+
+        total_weight = sum(reading["weight"] for reading in readings)
+        if total_weight > 0:
+            for reading in readings:
+                reading["weight"] = round(reading["weight"] / total_weight, 4)
+            score = sum(reading["technical_score"] * reading["weight"] for reading in readings)
+        else:
+            score = 0.0
+
+        overall = direction(score)
+        agreement = sum(reading["weight"] for reading in readings if reading["direction"] == overall)
+        return ConfluenceScore(
+            score=round(score, 1),
+            direction=overall,
+            agreement=round(agreement, 4) if total_weight > 0 else 0.0,
+            timeframes=[TimeframeScore(**reading) for reading in readings],
+        )
+
 
 # Singleton instance
 strategy_engine = StrategyEngine()
@@ -0,0 +1,666 @@
+"""
+Streaming (incremental) technical indicators
+
+``IndicatorCalculator.calculate_all`` recomputes every indicator over the
+full history. ``StreamingIndicatorEngine`` keeps the running state of each
+indicator instead (EMA seeds, Wilder smoothing accumulators, rolling-window
+ring buffers, monotonic deques) so appending a bar costs O(1) regardless of
+history length. The exceptions are full-history statistics: the ATR median
+behind ``vol_state``, kept in two heaps (O(log n)), and the support /
+resistance zones of ``latest_indicators``, whose pivots are collected per
+bar and ranked on request (``services.levels``).
+
+Values reproduce pandas_ta's seeding rules (SMA-seeded EMA/ATR, Wilder RMA
+seeded by the first observation) and ``calculate_all``'s minimum-length
+gates, so ``snapshot()`` matches the last row of ``calculate_all`` on the
+same bars within floating point tolerance.
+
+``IndicatorStreams`` keeps one engine per analysis view so refreshes that
+only revise the forming bar or append bars to the same window cost O(1)
+instead of a full ``calculate_all``.
+"""
+import copy
+import heapq
+import logging
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Hashable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.schemas import PriceZone, TechnicalIndicators
+from services.indicators import (
+    RANGE_LOOKBACK,
+    SR_LOOKBACK,
+    SR_RECENT_BARS,
+    IndicatorCalculator,
+    indicator_calculator,
+)
+from services.levels import ZONE_PIVOT_WIDTH, rank_zones
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+
+def _valid(*values: float) -> bool:
+    return all(not math.isnan(v) for v in values)
+
+
+class _RollingWindow:
+    """Fixed-size ring buffer with running mean and variance (sliding Welford)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque[float] = deque(maxlen=size)
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, x: float):
+        if len(self.values) < self.size:
+            self.values.append(x)
+            delta = x - self._mean
+            self._mean += delta / len(self.values)
+            self._m2 += delta * (x - self._mean)
+            return
+        old = self.values[0]
+        self.values.append(x)
+        old_mean = self._mean
+        self._mean += (x - old) / self.size
+        self._m2 += (x - old) * (x - self._mean + old - old_mean)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def mean(self) -> float:
+        return self._mean if self.full else NAN
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1) over a full window"""
+        if not self.full or self.size < 2:
+            return NAN
+        return math.sqrt(max(self._m2, 0.0) / (self.size - 1))
+
+
+class _Ema:
+    """EMA seeded with the SMA of the first ``length`` values (pandas_ta presma)"""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self._seed_sum = 0.0
+        self.value = NAN
+
+    def push(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self._seed_sum += x
+        elif self.count == self.length:
+            self.value = (self._seed_sum + x) / self.length
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class _Rma:
+    """Wilder smoothing seeded by the first observation (ewm(alpha=1/n, adjust=False))"""
+
+    def __init__(self, length: int):
+        self.alpha = 1.0 / length
+        self.value = NAN
+
+    def push(self, x: float) -> float:
+        if math.isnan(x):
+            return self.value
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class _Atr:
+    """
+    Average True Range with pandas_ta's SMA seed
+
+    With ``prenan`` the first bar's true range is dropped from the seed
+    (as ``ta.adx`` does for its internal ATR).
+    """
+
+    def __init__(self, length: int, prenan: bool = False):
+        self.length = length
+        self.prenan = prenan
+        self.count = 0
+        self._seed_sum = 0.0
+        self._rma = _Rma(length)
+        self.value = NAN
+
+    def push(self, tr: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            if not (self.prenan and self.count == 1):
+                self._seed_sum += tr
+        elif self.count == self.length:
+            seed_count = self.length - 1 if self.prenan else self.length
+            self.value = self._rma.push((self._seed_sum + tr) / seed_count)
+        else:
+            self.value = self._rma.push(tr)
+        return self.value
+
+
+class _MonotonicWindow:
+    """Sliding max (or min) over the last ``size`` values in amortized O(1)"""
+
+    def __init__(self, size: int, maximum: bool):
+        self.size = size
+        self.maximum = maximum
+        self.count = 0
+        self._deque: deque[tuple[int, float]] = deque()
+
+    def push(self, x: float) -> float:
+        idx = self.count
+        self.count += 1
+        if self.maximum:
+            while self._deque and self._deque[-1][1] <= x:
+                self._deque.pop()
+        else:
+            while self._deque and self._deque[-1][1] >= x:
+                self._deque.pop()
+        self._deque.append((idx, x))
+        if self._deque[0][0] <= idx - self.size:
+            self._deque.popleft()
+        return self._deque[0][1]
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.size
+
+    def value(self) -> float:
+        return self._deque[0][1] if self._deque else NAN
+
+
+class _RunningMedian:
+    """Median of every value pushed so far (two heaps, O(log n) per push)"""
+
+    def __init__(self):
+        self._low: list[float] = []   # max-heap (negated)
+        self._high: list[float] = []  # min-heap
+
+    def push(self, x: float):
+        if self._low and x > -self._low[0]:
+            heapq.heappush(self._high, x)
+        else:
+            heapq.heappush(self._low, -x)
+        if len(self._low) > len(self._high) + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+        elif len(self._high) > len(self._low):
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+
+    def median(self) -> float:
+        if not self._low:
+            return NAN
+        if len(self._low) > len(self._high):
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+
+class _PivotTracker:
+    """
+    Confirmed local extrema for support/resistance
+
+    A bar is a pivot when it equals the extreme of the centered window of
+    ``2 * lookback + 1`` bars, so it is confirmed ``lookback`` bars later.
+    Only pivots within the last ``recent`` bars are kept (all if None).
+    """
+
+    def __init__(self, lookback: int, recent: Optional[int], maximum: bool):
+        self.lookback = lookback
+        self.recent = recent
+        self._window = _MonotonicWindow(2 * lookback + 1, maximum)
+        self._values: deque[float] = deque(maxlen=2 * lookback + 1)
+        self.pivots: deque[tuple[int, float]] = deque()
+
+    def push(self, x: float) -> bool:
+        """Add a bar; True when it confirmed a new pivot"""
+        extreme = self._window.push(x)
+        self._values.append(x)
+        count = self._window.count
+        confirmed = False
+        if self._window.full:
+            center = count - 1 - self.lookback
+            center_value = self._values[self.lookback]
+            if center_value == extreme:
+                self.pivots.append((center, center_value))
+                confirmed = True
+        while self.recent is not None and self.pivots and self.pivots[0][0] < count - self.recent:
+            self.pivots.popleft()
+        return confirmed
+
+
+class StreamingIndicatorEngine:
+    """
+    Stateful indicator engine fed one bar at a time
+
+    Uses the periods of the given ``IndicatorCalculator`` and produces the
+    same columns as ``calculate_all`` (except the per-bar centered extrema
+    helpers ``local_min``/``local_max``/``is_support``/``is_resistance``).
+
+    Example:
+        engine = StreamingIndicatorEngine().warm_up(history_df)
+        latest = engine.update({"date": ts, "open": o, "high": h, "low": l, "close": c})
+    """
+
+    def __init__(self, calculator: IndicatorCalculator = indicator_calculator):
+        self.calculator = calculator
+        c = calculator
+        self.count = 0
+        self.last_bar: Optional[dict[str, Any]] = None
+        self._prev_close = NAN
+        self._prev_high = NAN
+        self._prev_low = NAN
+
+        # Moving averages
+        self._sma_short = _RollingWindow(c.short_ma)
+        self._sma_mid = _RollingWindow(c.mid_ma)
+        self._ema_fast = _Ema(c.macd_fast)
+        self._ema_slow = _Ema(c.macd_slow)
+        self._ema_short = _Ema(c.short_ma)
+
+        # ADX (+DM/-DM and DX smoothed with Wilder's RMA)
+        self._adx_atr = _Atr(c.adx_period, prenan=True)
+        self._plus_dm = _Rma(c.adx_period)
+        self._minus_dm = _Rma(c.adx_period)
+        self._adx = _Rma(c.adx_period)
+
+        # RSI
+        self._rsi_gain = _Rma(c.rsi_period)
+        self._rsi_loss = _Rma(c.rsi_period)
+
+        # MACD (signal EMA starts at the first valid MACD value)
+        self._macd_signal = _Ema(c.macd_signal)
+        self._prev_macd = NAN
+        self._prev_macd_signal = NAN
+
+        # Bollinger Bands
+        self._bb = _RollingWindow(c.bb_period)
+
+        # ATR and the full-history median behind vol_state
+        self._atr = _Atr(c.atr_period)
+        self._atr_median = _RunningMedian()
+
+        # Support/resistance pivots and range extremes
+        self._supports = _PivotTracker(SR_LOOKBACK, SR_RECENT_BARS, maximum=False)
+        self._resistances = _PivotTracker(SR_LOOKBACK, SR_RECENT_BARS, maximum=True)
+        self._range_high = _MonotonicWindow(RANGE_LOOKBACK, maximum=True)
+        self._range_low = _MonotonicWindow(RANGE_LOOKBACK, maximum=False)
+
+        # Full-history swing pivots behind the support/resistance zones
+        self._zone_highs = _PivotTracker(ZONE_PIVOT_WIDTH, None, maximum=True)
+        self._zone_lows = _PivotTracker(ZONE_PIVOT_WIDTH, None, maximum=False)
+        self._recent_dates: deque[Any] = deque(maxlen=2 * ZONE_PIVOT_WIDTH + 1)
+        self._pivot_dates: dict[int, Any] = {}
+
+        self._snapshot: dict[str, Any] = {}
+
+    def warm_up(self, df: pd.DataFrame) -> "StreamingIndicatorEngine":
+        """Feed historical bars (oldest first); returns self"""
+        for bar in df.to_dict("records"):
+            self.update(bar)
+        return self
+
+    def update(self, bar: Mapping[str, Any]) -> dict[str, Any]:
+        """Append one bar (keys: date, open, high, low, close[, volume]) and return the snapshot"""
+        c = self.calculator
+        high = float(bar["high"])
+        low = float(bar["low"])
+        close = float(bar["close"])
+        self.count += 1
+        first = self.count == 1
+
+        # Moving averages
+        self._sma_short.push(close)
+        self._sma_mid.push(close)
+        ema_fast = self._ema_fast.push(close)
+        ema_slow = self._ema_slow.push(close)
+        ema_short = self._ema_short.push(close)
+
+        # True range (the first bar has no previous close)
+        hl = high - low
+        tr = hl if first else max(hl, abs(high - self._prev_close), abs(self._prev_close - low))
+        atr = self._atr.push(tr)
+        adx_atr = self._adx_atr.push(tr)
+
+        # ADX
+        if not first:
+            up = high - self._prev_high
+            down = self._prev_low - low
+            self._plus_dm.push(up if up > down and up > 0 else 0.0)
+            self._minus_dm.push(down if down > up and down > 0 else 0.0)
+        plus_di = minus_di = adx = NAN
+        if _valid(adx_atr, self._plus_dm.value, self._minus_dm.value):
+            k = 100.0 / adx_atr
+            plus_di = k * self._plus_dm.value
+            minus_di = k * self._minus_dm.value
+            di_sum = plus_di + minus_di
+            dx = 100.0 * abs(plus_di - minus_di) / di_sum if di_sum else NAN
+            adx = self._adx.push(dx)
+
+        # RSI
+        if not first:
+            change = close - self._prev_close
+            self._rsi_gain.push(max(change, 0.0))
+            self._rsi_loss.push(min(change, 0.0))
+        rsi = NAN
+        if _valid(self._rsi_gain.value, self._rsi_loss.value):
+            denominator = self._rsi_gain.value + abs(self._rsi_loss.value)
+            rsi = 100.0 * self._rsi_gain.value / denominator if denominator else NAN
+
+        # MACD
+        macd = ema_fast - ema_slow if _valid(ema_fast, ema_slow) else NAN
+        macd_signal = self._macd_signal.push(macd) if _valid(macd) else NAN
+        macd_cross = "none"
+        if _valid(macd, macd_signal, self._prev_macd, self._prev_macd_signal):
+            if self._prev_macd <= self._prev_macd_signal and macd > macd_signal:
+                macd_cross = "golden"
+            elif self._prev_macd >= self._prev_macd_signal and macd < macd_signal:
+                macd_cross = "dead"
+        self._prev_macd = macd
+        self._prev_macd_signal = macd_signal
+
+        # Bollinger Bands
+        self._bb.push(close)
+        bb_middle = self._bb.mean()
+        bb_std = self._bb.std()
+        bb_upper = bb_middle + 2 * bb_std
+        bb_lower = bb_middle - 2 * bb_std
+
+        # ATR median over the whole history
+        if _valid(atr):
+            self._atr_median.push(atr)
+
+        # Support/resistance and range
+        self._supports.push(low)
+        self._resistances.push(high)
+        self._range_high.push(high)
+        self._range_low.push(low)
+        self._recent_dates.append(bar.get("date"))
+        new_high_pivot = self._zone_highs.push(high)
+        new_low_pivot = self._zone_lows.push(low)
+        if new_high_pivot or new_low_pivot:
+            self._pivot_dates[self.count - 1 - ZONE_PIVOT_WIDTH] = self._recent_dates[ZONE_PIVOT_WIDTH]
+
+        self._prev_close = close
+        self._prev_high = high
+        self._prev_low = low
+
+        # Apply calculate_all's minimum-length gates
+        n = self.count
+        if n < c.adx_period + 10:
+            adx = plus_di = minus_di = NAN
+        if n < c.rsi_period + 1:
+            rsi = NAN
+        if n < c.macd_slow + c.macd_signal:
+            macd = macd_signal = NAN
+            macd_cross = "none"
+        if n < c.bb_period:
+            bb_upper = bb_middle = bb_lower = NAN
+        # ta.atr needs length + 1 bars before it returns anything
+        atr_ready = n > c.atr_period
+        if not atr_ready:
+            atr = NAN
+
+        snapshot: dict[str, Any] = dict(bar)
+        snapshot.update({
+            f"SMA_{c.short_ma}": self._sma_short.mean(),
+            f"SMA_{c.mid_ma}": self._sma_mid.mean(),
+            f"EMA_{c.macd_fast}": ema_fast,
+            f"EMA_{c.macd_slow}": ema_slow,
+            f"EMA_{c.short_ma}": ema_short,
+            "ADX": adx,
+            "PLUS_DI": plus_di,
+            "MINUS_DI": minus_di,
+            "RSI": rsi,
+            "RSI_state": self._rsi_state(rsi),
+            "MACD": macd,
+            "MACD_signal": macd_signal,
+            "MACD_hist": macd - macd_signal,
+            "MACD_cross": macd_cross,
+            "BB_upper": bb_upper,
+            "BB_middle": bb_middle,
+            "BB_lower": bb_lower,
+            "BB_width": (bb_upper - bb_lower) / bb_middle * 100 if _valid(bb_middle) else NAN,
+            "BB_position": self._bb_position(close, bb_upper, bb_middle, bb_lower),
+            f"ATR_{c.atr_period}": atr,
+            "vol_state": self._vol_state(atr) if atr_ready else NAN,
+            "support_level": self._level(self._supports, close, below=True),
+            "resistance_level": self._level(self._resistances, close, below=False),
+        })
+        snapshot.update(self._trend(snapshot[f"SMA_{c.short_ma}"], snapshot[f"SMA_{c.mid_ma}"]))
+        if self._range_high.full:
+            range_high = self._range_high.value()
+            range_low = self._range_low.value()
+            snapshot.update({
+                "range_high": range_high,
+                "range_low": range_low,
+                "range_mid": (range_high + range_low) / 2,
+            })
+
+        self.last_bar = dict(bar)
+        self._snapshot = snapshot
+        return snapshot
+
+    def copy(self) -> "StreamingIndicatorEngine":
+        """Independent engine with the same state (to preview a bar without committing it)"""
+        return _clone(self)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Indicator values for the newest bar (same keys as calculate_all's columns)"""
+        return dict(self._snapshot)
+
+    def zones(self) -> tuple[list[PriceZone], list[PriceZone]]:
+        """Ranked (support, resistance) zones of all bars so far (``services.levels``)"""
+        if not self._snapshot:
+            return [], []
+        pivots = list(self._zone_highs.pivots) + list(self._zone_lows.pivots)
+        return rank_zones(
+            [index for index, _ in pivots],
+            [value for _, value in pivots],
+            self.count,
+            self._snapshot["close"],
+            date_of=self._pivot_dates.get,
+        )
+
+    def latest_indicators(self) -> TechnicalIndicators:
+        """Newest values as the schema object used by the API"""
+        if not self._snapshot:
+            return TechnicalIndicators()
+        return self.calculator.get_latest_indicators(pd.DataFrame([self._snapshot]), zones=self.zones())
+
+    @staticmethod
+    def _trend(sma_short: float, sma_mid: float) -> dict[str, str]:
+        if not _valid(sma_short, sma_mid):
+            return {"trend_dir": "neutral", "trend_strength": "weak"}
+        trend_dir = "up" if sma_short > sma_mid else "down" if sma_short < sma_mid else "neutral"
+        ma_diff = abs((sma_short - sma_mid) / sma_mid * 100)
+        trend_strength = "strong" if ma_diff > 2 else "medium" if ma_diff > 1 else "weak"
+        return {"trend_dir": trend_dir, "trend_strength": trend_strength}
+
+    @staticmethod
+    def _rsi_state(rsi: float) -> str:
+        if math.isnan(rsi):
+            return "neutral"
+        if rsi < 30:
+            return "oversold"
+        if rsi > 70:
+            return "overbought"
+        return "neutral"
+
+    @staticmethod
+    def _bb_position(close: float, upper: float, middle: float, lower: float) -> str:
+        # Same precedence as calculate_all (close == lower stays "middle")
+        if not _valid(upper, lower):
+            return "middle"
+        if close < lower:
+            return "below"
+        if close > upper:
+            return "above"
+        if close > middle:
+            return "upper"
+        if close > lower:
+            return "lower"
+        return "middle"
+
+    def _vol_state(self, atr: float) -> Any:
+        median = self._atr_median.median()
+        if math.isnan(median):
+            return NAN
+        if _valid(atr) and atr > median * 1.5:
+            return "high"
+        if _valid(atr) and atr > median * 0.8:
+            return "medium"
+        return "low"
+
+    @staticmethod
+    def _level(tracker: _PivotTracker, close: float, below: bool) -> float:
+        if below:
+            levels = [v for _, v in tracker.pivots if v < close]
+            return max(levels) if levels else NAN
+        levels = [v for _, v in tracker.pivots if v > close]
+        return min(levels) if levels else NAN
+
+
+def _clone(value: Any) -> Any:
+    """Copy of an engine or one of its accumulators; the calculator and bar values are shared"""
+    if isinstance(value, (deque, list, dict)):
+        return value.copy()
+    if isinstance(value, _STATEFUL):
+        clone = copy.copy(value)
+        clone.__dict__.update({name: _clone(item) for name, item in vars(value).items()})
+        return clone
+    return value
+
+
+_STATEFUL = (
+    StreamingIndicatorEngine, _RollingWindow, _Ema, _Rma, _Atr,
+    _MonotonicWindow, _RunningMedian, _PivotTracker,
+)
+
+
+class _Stream:
+    """Engine holding the closed bars of one view's window (all but the newest bar)"""
+
+    COLUMNS = ("date", "high", "low", "close")
+
+    def __init__(self, df: pd.DataFrame, calculator: IndicatorCalculator):
+        self.first_date = df["date"].iloc[0]
+        self.engine = StreamingIndicatorEngine(calculator).warm_up(df.iloc[:-1])
+        self.committed = self._closed(df)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def _closed(cls, df: pd.DataFrame) -> dict[str, np.ndarray]:
+        return {col: df[col].to_numpy()[:-1] for col in cls.COLUMNS}
+
+    def extends(self, df: pd.DataFrame) -> bool:
+        """True when ``df`` starts with every committed bar, unchanged, and adds at least one"""
+        count = self.engine.count
+        return len(df) > count and all(
+            np.array_equal(df[col].to_numpy()[:count], values) for col, values in self.committed.items()
+        )
+
+    def latest(self, df: pd.DataFrame) -> dict[str, Any]:
+        """Commit the newly closed bars of ``df`` and preview its newest (forming) bar"""
+        if len(df) - 1 > self.engine.count:
+            for bar in df.iloc[self.engine.count:-1].to_dict("records"):
+                self.engine.update(bar)
+            self.committed = self._closed(df)
+        return self.engine.copy().update({col: df[col].iat[-1] for col in df.columns})
+
+
+class IndicatorStreams:
+    """
+    Streaming engines behind the newest-bar views (thread-safe)
+
+    ``/analysis`` and ``/chat`` only read the newest row of the indicator
+    frame. Each view key gets an engine anchored on its window's first bar:
+    refreshes that revise the forming bar or append bars to the same window
+    cost O(1) per bar, and the values match ``calculate_all`` on the same
+    bars (within floating point tolerance). Period windows are anchored on the last bar, so a new bar usually
+    moves the start too; the engine is then rebuilt once the window holds
+    still for two refreshes, and ``latest_frame`` returns None meanwhile
+    (callers fall back to ``calculate_all``).
+    """
+
+    def __init__(self, calculator: IndicatorCalculator = indicator_calculator, max_streams: int = 32):
+        self.calculator = calculator
+        self.max_streams = max_streams
+        self._streams: OrderedDict[Hashable, _Stream] = OrderedDict()
+        self._anchors: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def latest_frame(self, df: pd.DataFrame, key: Hashable) -> Optional[pd.DataFrame]:
+        """
+        ``df`` with the newest bar's indicator columns, or None to fall back
+
+        Only the last row carries indicator values (earlier rows are NaN);
+        the OHLC columns are complete, so zones and price changes can still
+        be derived from the frame.
+        """
+        if df.empty or "date" not in df.columns:
+            return None
+        stream = self._stream(df, key)
+        if stream is None:
+            return None
+        with stream.lock:
+            if not stream.extends(df):
+                with self._lock:
+                    if self._streams.get(key) is stream:
+                        del self._streams[key]
+                return None
+            latest = stream.latest(df)
+        columns = {}
+        for col, value in latest.items():
+            if col in df.columns:
+                continue
+            column = np.full(len(df), NAN, dtype=object if isinstance(value, str) else np.float64)
+            column[-1] = value
+            columns[col] = column
+        return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+    def _stream(self, df: pd.DataFrame, key: Hashable) -> Optional[_Stream]:
+        first_date = df["date"].iloc[0]
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None and stream.first_date == first_date:
+                self._streams.move_to_end(key)
+                return stream
+            self._streams.pop(key, None)
+            # Build only for a window that kept its start since the last call
+            stable = self._anchors.get(key) == first_date
+            self._anchors[key] = first_date
+            self._anchors.move_to_end(key)
+            while len(self._anchors) > self.max_streams:
+                self._anchors.popitem(last=False)
+        if not stable:
+            return None
+
+        stream = _Stream(df, self.calculator)
+        with self._lock:
+            self._streams[key] = stream
+            while len(self._streams) > self.max_streams:
+                self._streams.popitem(last=False)
+        return stream
+
+    def clear(self):
+        """Drop every engine"""
+        with self._lock:
+            self._streams.clear()
+            self._anchors.clear()
+
+
+# Singleton instance
+indicator_streams = IndicatorStreams()
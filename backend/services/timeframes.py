@@ -0,0 +1,136 @@
+"""
+Multi-timeframe bars derived from one base series
+
+Comparing the daily and weekly picture used to take one upstream fetch
+and one indicator run per ``interval``. Here a single fine-grained series
+(e.g. hourly bars from the OHLC store) is aggregated into every coarser
+timeframe with NumPy: bars are bucketed by integer timestamp keys and
+reduced with ``ufunc.reduceat``, so each timeframe costs one pass over the
+base series.
+
+Intraday buckets are aligned in UTC (like upstream intraday bars); daily
+and weekly buckets follow calendar days / Monday-based weeks in the
+series' own timezone.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Timeframes served by the multi-timeframe view (fine to coarse)
+MULTI_TIMEFRAMES: tuple[str, ...] = ("1h", "4h", "1d", "1wk")
+
+_MINUTE_NS = 60 * 1_000_000_000
+_DAY_NS = 24 * 60 * _MINUTE_NS
+
+# Bucket width of each supported timeframe, in nanoseconds
+TIMEFRAME_NS: dict[str, int] = {
+    "1m": _MINUTE_NS,
+    "2m": 2 * _MINUTE_NS,
+    "5m": 5 * _MINUTE_NS,
+    "15m": 15 * _MINUTE_NS,
+    "30m": 30 * _MINUTE_NS,
+    "60m": 60 * _MINUTE_NS,
+    "90m": 90 * _MINUTE_NS,
+    "1h": 60 * _MINUTE_NS,
+    "4h": 240 * _MINUTE_NS,
+    "1d": _DAY_NS,
+    "1wk": 7 * _DAY_NS,
+}
+
+
+def can_resample(base_interval: str, timeframe: str) -> bool:
+    """Whether bars of ``timeframe`` are whole multiples of ``base_interval`` bars"""
+    if base_interval not in TIMEFRAME_NS or timeframe not in TIMEFRAME_NS:
+        return False
+    base_ns, target_ns = TIMEFRAME_NS[base_interval], TIMEFRAME_NS[timeframe]
+    return target_ns >= base_ns and target_ns % base_ns == 0
+
+
+def _bucket_keys(dates: pd.Series, timeframe: str) -> tuple[np.ndarray, pd.DatetimeIndex]:
+    """Per-bar bucket key (int64) and the label of every distinct key"""
+    tz = dates.dt.tz
+    width = TIMEFRAME_NS[timeframe]
+
+    if width < _DAY_NS:
+        utc = dates.dt.tz_convert("UTC").dt.tz_localize(None) if tz is not None else dates
+        ns = utc.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        keys = ns // width * width
+        labels = pd.DatetimeIndex(np.unique(keys).view("datetime64[ns]"))
+        return keys, labels.tz_localize("UTC").tz_convert(tz) if tz is not None else labels
+
+    # 日线 / 周线按本地日历对齐 (1970-01-01 是周四，+3 后周一余数为 0)
+    wall = dates.dt.tz_localize(None) if tz is not None else dates
+    days = wall.to_numpy(dtype="datetime64[ns]").view(np.int64) // _DAY_NS
+    if timeframe == "1wk":
+        days = days - (days + 3) % 7
+    labels = pd.DatetimeIndex(np.unique(days * _DAY_NS).view("datetime64[ns]"))
+    return days, labels.tz_localize(tz, nonexistent="shift_forward") if tz is not None else labels
+
+
+def resample_ohlc(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate OHLC(V) bars into ``timeframe`` bars
+
+    Open is the first bar's open, close the last bar's close, high / low
+    the max / min (NaN-tolerant) and volume the sum of each bucket. Buckets
+    without bars (weekends, halts) produce no row; the newest bucket may
+    still be forming, like the live bar upstream.
+
+    Args:
+        df: Bars with ``date``, ``open``, ``high``, ``low``, ``close`` and
+            optionally ``volume`` columns
+        timeframe: Target timeframe (a ``TIMEFRAME_NS`` key)
+
+    Returns:
+        DataFrame with the same columns, one row per bucket, labelled with
+        the bucket start
+    """
+    if timeframe not in TIMEFRAME_NS:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    columns = ["date", "open", "high", "low", "close"] + (["volume"] if "volume" in df.columns else [])
+    if df.empty:
+        return df[columns].copy()
+    if not df["date"].is_monotonic_increasing:
+        df = df.sort_values("date", kind="stable")
+
+    keys, labels = _bucket_keys(df["date"], timeframe)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    result = {
+        "date": labels,
+        "open": df["open"].to_numpy(dtype=np.float64)[starts],
+        "high": np.fmax.reduceat(df["high"].to_numpy(dtype=np.float64), starts),
+        "low": np.fmin.reduceat(df["low"].to_numpy(dtype=np.float64), starts),
+        "close": df["close"].to_numpy(dtype=np.float64)[ends],
+    }
+    if "volume" in df.columns:
+        result["volume"] = np.add.reduceat(np.nan_to_num(df["volume"].to_numpy(dtype=np.float64)), starts)
+    return pd.DataFrame(result)
+
+
+def resample_timeframes(
+    base: pd.DataFrame,
+    base_interval: str,
+    timeframes: tuple[str, ...] = MULTI_TIMEFRAMES,
+) -> dict[str, pd.DataFrame]:
+    """
+    Bars for every timeframe derivable from ``base``
+
+    The base timeframe itself is passed through; timeframes finer than (or
+    not a multiple of) ``base_interval`` are skipped with a warning.
+    """
+    frames = {}
+    for timeframe in timeframes:
+        if timeframe == base_interval:
+            frames[timeframe] = base.reset_index(drop=True)
+        elif can_resample(base_interval, timeframe):
+            frames[timeframe] = resample_ohlc(base, timeframe)
+        else:
+            logger.warning(f"Cannot derive {timeframe} bars from {base_interval} bars; skipped")
+    return frames
@@ -1,10 +1,13 @@
 """
 Tests for API routes
 """
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
 from main import app
+from services.market_snapshot import market_snapshot
 
 
 @pytest.fixture
@@ -13,6 +16,14 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def fresh_snapshot():
+    """Each test starts without snapshot views built by other tests"""
+    market_snapshot.clear()
+    yield
+    market_snapshot.clear()
+
+
 def test_root_endpoint(client):
     """Test root endpoint"""
     response = client.get("/")
@@ -59,3 +70,85 @@ def test_chart_endpoint(client):
     response = client.get("/api/v1/chart", params={"symbol": "GC=F", "period": "1y"})
     # May fail if data not available, but endpoint should exist
     assert response.status_code in [200, 404, 500]
+
+
+@pytest.fixture
+def chart_bars(monkeypatch):
+    """Serve synthetic daily bars to the chart endpoint"""
+    import numpy as np
+    import pandas as pd
+
+    from api import routes
+
+    close = 2000 + np.arange(130, dtype=float)
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=130, freq="D", tz="America/New_York"),
+        "open": close,
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": 1.0,
+    })
+
+    async def fake_fetch(symbol, period="1y", interval="1d", use_cache=True):
+        return df
+
+    monkeypatch.setattr(routes.async_data_provider, "fetch_price_data", fake_fetch)
+    return df
+
+
+def test_chart_columnar_and_points_shapes(client, chart_bars):
+    """Columnar arrays by default; the legacy point list behind format=points"""
+    columnar = client.get("/api/v1/chart", params={"period": "3mo", "interval": "1d"}).json()
+    points = client.get("/api/v1/chart", params={"period": "3mo", "interval": "1d", "format": "points"}).json()
+
+    assert len(columnar["timestamps"]) == len(columnar["close"]) == len(columnar["ma_mid"]) == 120
+    assert columnar["ma_mid"][0] is None  # NaN -> null
+    assert columnar["ma_mid"][-1] is not None
+    assert columnar["timestamps"][0] == int(chart_bars["date"].iloc[10].timestamp() * 1000)
+
+    assert [p["price"] for p in points["data"]] == columnar["close"]
+    assert [p["ma_short"] for p in points["data"]] == columnar["ma_short"]
+    assert [p["ma_mid"] for p in points["data"]] == columnar["ma_mid"]
+    assert points["key_levels"] == columnar["key_levels"]
+    assert points["support_zones"] == columnar["support_zones"] == []  # no swings in a straight line
+
+
+def test_chat_stream_rule_based(client, chart_bars, monkeypatch):
+    """Rule-based answers stream as SSE token events; the context snapshot is reused"""
+    from api import routes
+
+    calls = []
+
+    async def fake_news(symbol="GC=F", limit=10):
+        calls.append(symbol)
+        return []
+
+    async def fake_real_rate():
+        return {}
+
+    monkeypatch.setattr(routes.async_data_provider, "get_news_items", fake_news)
+    monkeypatch.setattr(routes.async_data_provider, "get_real_interest_rate", fake_real_rate)
+    monkeypatch.setattr(routes.llm_client, "enabled", False)
+
+    with client.stream("POST", "/api/v1/chat/stream", json={"question": "当前关键位是什么？"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    events = [block.split("\n", 1) for block in body.strip().split("\n\n")]
+    tokens = [json.loads(data[len("data: "):])["text"] for event, data in events if event == "event: token"]
+    assert events[-1] == ["event: done", 'data: {"source": "rules"}']
+    assert "".join(tokens) == client.post("/api/v1/chat", json={"question": "当前关键位是什么？"}).json()["answer"]
+    assert len(tokens) > 1
+    assert len(calls) == 1
+
+
+def test_websocket_stats_endpoint(client):
+    """Test WebSocket fan-out stats endpoint"""
+    response = client.get("/api/v1/ws/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["connections"] == 0
+    assert data["queue_limit"] > 0
+    assert {"queued", "conflated", "dropped", "slow_disconnects"} <= data.keys()
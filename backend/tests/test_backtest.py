@@ -0,0 +1,115 @@
+"""
+Tests for the vectorized backtester
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.schemas import SignalLevel
+from services.backtest import Backtester
+from services.indicators import indicator_calculator
+from services.strategy import SIGNAL_CODES, StrategyEngine
+
+
+def _bars(n: int = 220, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    steps = np.arange(n)
+    close = 2000 + np.cumsum(rng.normal(0, 12, n)) + 60 * np.sin(steps / 9) * steps / 40
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=n, freq="D"),
+        "open": close + rng.normal(0, 3, n),
+        "high": close + np.abs(rng.normal(0, 8, n)),
+        "low": close - np.abs(rng.normal(0, 8, n)),
+        "close": close,
+        "volume": 1.0,
+    })
+
+
+def test_every_bar_matches_analyze_on_its_prefix():
+    df = _bars()
+    engine = StrategyEngine()
+    news = [{"title": "Gold demand rises", "sentiment": "利多", "relevance": "高", "news_time": "2020-01-01"}]
+    frame = Backtester(engine=engine).run(df, sentiment_score=100).frame
+
+    assert (frame["signal"] != 0).sum() > 10
+    for t in range(1, len(df)):
+        signal = engine.analyze(indicator_calculator.calculate_all(df.iloc[:t + 1].copy()), news_items=news).signal
+        row = frame.iloc[t]
+        assert SIGNAL_CODES[signal.signal_level] == row["signal"], t
+        assert signal.composite_score == round(row["composite_score"], 1), t
+        if signal.stop_zone is None:
+            assert np.isnan(row["stop"]) and np.isnan(row["target"])
+        else:
+            assert (signal.stop_zone, signal.target_zone) == pytest.approx((row["stop"], row["target"])), t
+
+
+def test_stops_targets_and_reversals_are_filled_in_order():
+    backtester = Backtester(fee_rate=0.001)
+    nan = np.nan
+    open_ = np.array([100.0, 101.0, 96.0, 100.0, 102.0, 104.0, 99.0, 98.0])
+    high = np.array([101.0, 102.0, 97.0, 101.0, 103.0, 106.0, 100.0, 99.0])
+    low = np.array([99.0, 100.0, 94.0, 99.0, 101.0, 103.0, 97.0, 97.0])
+    close = np.array([100.0, 101.0, 96.0, 100.0, 102.0, 105.0, 98.0, 98.0])
+    scores = {
+        "signal": np.array([2, 0, 0, 1, 0, -1, 0, 0], dtype=np.int8),
+        "stop": np.array([97.0, nan, nan, 96.0, nan, 108.0, nan, nan]),
+        "target": np.array([110.0, nan, nan, 110.0, nan, 98.5, nan, nan]),
+    }
+
+    equity, position, trades = backtester._simulate(open_, high, low, close, scores)
+
+    # Long at 100 gaps through the stop (open 96 < 97); long at 100 exits at
+    # the sell signal's close and reverses short; the short reaches its target
+    assert [(t[0], t[1], t[2], t[6], t[10]) for t in trades] == [
+        (0, 2, 1, 96.0, "stop"),
+        (3, 5, 1, 105.0, "signal"),
+        (5, 6, -1, 98.5, "target"),
+    ]
+    assert [t[4] for t in trades] == [1.0, 0.5, 0.5]
+    assert list(position) == [1, 1, 0, 1, 1, -1, 0, 0]
+    # Fees on both sides: entry notional 1.0, exit notional 0.96
+    first_return = (96.0 - 100.0) / 100.0 - 0.001 - 0.001 * 0.96
+    assert trades[0][9] == pytest.approx(first_return)
+    assert equity[2] == pytest.approx(1 + first_return)
+    assert equity[-1] == equity[6]
+
+
+def test_stop_loss_is_clamped_to_max_drawdown():
+    engine = StrategyEngine()
+    nan = np.array([np.nan])
+    columns = {
+        "close": np.array([100.0]),
+        "ADX": np.array([45.0]),
+        "PLUS_DI": np.array([40.0]),
+        "MINUS_DI": np.array([5.0]),
+        "SMA_20": np.array([105.0]),
+        "SMA_60": np.array([100.0]),
+        "RSI": np.array([25.0]),
+        "MACD_hist": np.array([1.0]),
+        "MACD_cross": np.array([1], dtype=np.int8),
+        "BB_position": np.array([4], dtype=np.int8),
+        "vol_state": np.array([0], dtype=np.int8),
+        "support_level": np.array([99.0]),
+        "resistance_level": nan,
+        "ATR_14": np.array([20.0]),  # 2 ATR = 40% below entry
+    }
+
+    scores = engine.score_bars(columns, sentiment_score=100)
+
+    assert scores["signal"][0] == SIGNAL_CODES[SignalLevel.STRONG_BUY]
+    assert scores["stop"][0] == pytest.approx(85.0)
+    assert scores["target"][0] == pytest.approx(160.0)
+    _, stop, adjusted = engine._apply_max_drawdown(SignalLevel.STRONG_BUY, 100.0, 60.0)
+    assert adjusted and stop == pytest.approx(scores["stop"][0])
+
+
+def test_statistics_summarize_the_equity_curve():
+    result = Backtester().run(_bars(400, seed=5), sentiment_score=-100)
+    stats = result.stats
+
+    assert stats["bars"] == 400 and stats["trades"] == len(result.trades) > 0
+    assert stats["total_return"] == pytest.approx(result.frame["equity"].iloc[-1] - 1)
+    assert stats["max_drawdown"] == pytest.approx(-result.frame["drawdown"].min())
+    assert (result.trades["side"] == -1).any()
+    assert sum(stats["exit_reasons"].values()) == stats["trades"]
+    assert 0 < stats["exposure"] < 1
@@ -0,0 +1,274 @@
+"""
+Tests for data provider service
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from services import data_provider as data_provider_module
+from services.data_provider import AsyncDataProvider, DataProvider
+from services.ohlc_store import OHLCStore
+from utils.singleflight import SingleFlight
+
+
+@pytest.fixture
+def provider():
+    """Fresh provider without cached prices"""
+    return DataProvider()
+
+
+def test_async_fetch_does_not_block_event_loop(provider, monkeypatch):
+    """Blocking upstream calls run off the event loop"""
+
+    def slow_fetch(symbol, period="1y", interval="1d", use_cache=True):
+        time.sleep(0.2)
+        return pd.DataFrame({"close": [1.0]})
+
+    monkeypatch.setattr(provider, "fetch_price_data", slow_fetch)
+    async_provider = AsyncDataProvider(provider, max_workers=2)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick_task = asyncio.create_task(ticker())
+        df = await async_provider.fetch_price_data("GC=F")
+        tick_task.cancel()
+        return df, ticks
+
+    df, ticks = asyncio.run(main())
+    assert not df.empty
+    assert ticks >= 10
+
+
+def test_async_au9999_falls_back_with_asyncio_backoff(provider, monkeypatch):
+    """AU9999 walks the source chain, retrying with non-blocking sleeps"""
+    calls = []
+
+    def flaky():
+        calls.append("realtime")
+        raise ValueError("SGE down")
+
+    def hist():
+        calls.append("hist")
+        return {"price": 600.0, "is_available": True}
+
+    monkeypatch.setattr(
+        provider,
+        "_au9999_fetch_plan",
+        lambda: [("realtime", flaky, (0, 0.01)), ("hist", hist, (0,))],
+    )
+    monkeypatch.setattr(data_provider_module, "AU9999_FALLBACK_DELAY", 0)
+    monkeypatch.setattr(
+        data_provider_module.time,
+        "sleep",
+        lambda *_: pytest.fail("time.sleep must not be used in the async path"),
+    )
+
+    result = asyncio.run(AsyncDataProvider(provider, max_workers=2).get_au9999_price())
+
+    assert result["price"] == 600.0
+    assert calls == ["realtime", "realtime", "hist"]
+    # Successful result is cached for subsequent callers
+    assert provider._get_fresh_au9999_cache() == result
+
+
+def test_au9999_unavailable_returns_stale_cache(provider):
+    """When every source fails, stale cached data is returned and marked"""
+    provider._au9999_cache = {"price": 610.0, "is_available": True, "data_source": "x"}
+    result = provider._au9999_unavailable(ValueError("boom"))
+    assert result["price"] == 610.0
+    assert result["data_source"] == "上海黄金交易所 (缓存)"
+
+
+def test_concurrent_cache_misses_share_one_download(provider, monkeypatch, tmp_path):
+    """Identical concurrent fetches coalesce into one upstream request"""
+    downloads = []
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, interval, period=None, start=None):
+            downloads.append((self.symbol, period, interval))
+            time.sleep(0.2)
+            index = pd.date_range("2024-01-01", periods=3, freq="D", name="Date")
+            return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+
+    monkeypatch.setattr(data_provider_module.yf, "Ticker", FakeTicker)
+    provider.ohlc_store = OHLCStore(tmp_path)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        frames = list(pool.map(lambda _: provider.fetch_price_data("GC=F", "1y", "1d"), range(10)))
+
+    assert downloads == [("GC=F", "1y", "1d")]
+    assert all(len(frame) == 3 for frame in frames)
+    stats = provider.get_coalescing_stats()
+    assert stats["upstream_calls"] == 1
+    assert stats["coalesced_calls"] == 9
+
+
+def test_singleflight_propagates_errors_to_followers():
+    """Followers receive the leader's exception"""
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except ValueError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(call)
+        started.wait()
+        followers = [pool.submit(call) for _ in range(2)]
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert results == ["upstream down"] * 3
+    assert flight.get_stats()["upstream_calls"] == 1
+    assert flight.in_flight() == 0
+
+
+def _daily_bars(start: str, periods: int, first_close: float = 1.0) -> pd.DataFrame:
+    """yfinance-style frame (DatetimeIndex, capitalized columns)"""
+    index = pd.date_range(start, periods=periods, freq="D", tz="America/New_York", name="Date")
+    closes = [first_close + i for i in range(periods)]
+    return pd.DataFrame(
+        {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [1.0] * periods},
+        index=index,
+    )
+
+
+def test_refresh_downloads_only_new_bars(provider, monkeypatch, tmp_path):
+    """Expired cache triggers an incremental fetch that is merged into the store"""
+    requests_made = []
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            pass
+
+        def history(self, interval, period=None, start=None):
+            requests_made.append({"period": period, "start": start})
+            if start is None:
+                return _daily_bars("2024-01-01", 400)
+            # Last stored bar is re-sent (revised) together with two new bars
+            return _daily_bars(start.strftime("%Y-%m-%d"), 3, first_close=1000.0)
+
+    monkeypatch.setattr(data_provider_module.yf, "Ticker", FakeTicker)
+    provider.ohlc_store = OHLCStore(tmp_path)
+
+    full = provider.fetch_price_data("GC=F", "1y", "1d")
+    assert requests_made == [{"period": "1y", "start": None}]
+    last_ts = full["date"].iloc[-1]
+
+    # Shorter period is a slice of the stored history, no upstream call
+    month = provider.fetch_price_data("GC=F", "1mo", "1d")
+    assert len(requests_made) == 1
+    assert month["date"].iloc[0] >= last_ts - pd.Timedelta(days=31)
+
+    # Force refresh: only bars since the last stored timestamp are requested
+    refreshed = provider.fetch_price_data("GC=F", "1y", "1d", use_cache=False)
+    assert requests_made[-1]["start"] == last_ts
+    stored = provider.ohlc_store.load("GC=F", "1d")
+    assert len(stored) == 402
+    assert stored["date"].is_unique
+    assert stored.loc[stored["date"] == last_ts, "close"].item() == 1000.0
+    assert refreshed["date"].iloc[-1] == stored["date"].iloc[-1]
+
+    # Store survives a restart (new instance reads parquet + metadata)
+    reopened = OHLCStore(tmp_path)
+    assert len(reopened.load("GC=F", "1d")) == 402
+    assert reopened.covers("GC=F", "1d", "6mo")
+    assert not reopened.covers("GC=F", "1d", "max")
+
+
+def test_price_history_returns_everything_stored(provider, monkeypatch, tmp_path):
+    class FakeTicker:
+        def __init__(self, symbol):
+            pass
+
+        def history(self, interval, period=None, start=None):
+            return _daily_bars("2024-01-01", 400)
+
+    monkeypatch.setattr(data_provider_module.yf, "Ticker", FakeTicker)
+    provider.ohlc_store = OHLCStore(tmp_path)
+
+    assert len(provider.fetch_price_history("GC=F", "1mo", "1d")) == 400
+    assert len(provider.fetch_price_data("GC=F", "1mo", "1d")) < 40
+
+
+def test_merge_rewrites_only_the_months_it_touches(tmp_path):
+    store = OHLCStore(tmp_path)
+    bars = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=120, freq="D", tz="America/New_York"),
+        "close": [float(i) for i in range(120)],
+    })
+    store.merge("GC=F", "1d", bars, covered_period="6mo")
+    partitions = tmp_path / "GC=F_1d"
+    assert sorted(path.stem for path in partitions.glob("*.parquet")) == ["2024-01", "2024-02", "2024-03", "2024-04"]
+    written = {path.name: path.stat().st_mtime_ns for path in partitions.glob("*.parquet")}
+
+    # The still-forming last bar is revised and one new bar appended
+    time.sleep(0.01)
+    revised = pd.DataFrame({"date": bars["date"].iloc[-1:], "close": [500.0]})
+    new = pd.DataFrame({"date": [bars["date"].iloc[-1] + pd.Timedelta(days=1)], "close": [501.0]})
+    store.merge("GC=F", "1d", pd.concat([revised, new], ignore_index=True))
+
+    rewritten = {path.name for path in partitions.glob("*.parquet") if path.stat().st_mtime_ns != written.get(path.name)}
+    assert rewritten == {"2024-04.parquet"}
+    reopened = OHLCStore(tmp_path).load("GC=F", "1d")
+    assert len(reopened) == 121 and reopened["close"].iloc[-2:].tolist() == [500.0, 501.0]
+    assert reopened["date"].is_monotonic_increasing and reopened["date"].is_unique
+
+
+def test_single_file_history_is_split_into_partitions(tmp_path):
+    bars = pd.DataFrame({"date": pd.date_range("2024-01-30", periods=5, freq="D"), "close": [1.0] * 5})
+    bars.to_parquet(tmp_path / "GC=F_1d.parquet", index=False)
+
+    store = OHLCStore(tmp_path)
+    assert len(store.load("GC=F", "1d")) == 5
+    store.merge("GC=F", "1d", bars.tail(1))
+
+    assert not (tmp_path / "GC=F_1d.parquet").exists()
+    assert sorted(path.stem for path in (tmp_path / "GC=F_1d").glob("*.parquet")) == ["2024-01", "2024-02"]
+    assert len(OHLCStore(tmp_path).load("GC=F", "1d")) == 5
+
+
+def test_incremental_refreshes_share_one_download_across_periods(provider, monkeypatch, tmp_path):
+    downloads = []
+
+    class FakeTicker:
+        def __init__(self, symbol):
+            pass
+
+        def history(self, interval, period=None, start=None):
+            downloads.append(period or "since-last")
+            time.sleep(0.2)
+            return _daily_bars("2024-01-01" if start is None else start.strftime("%Y-%m-%d"), 800 if start is None else 2)
+
+    monkeypatch.setattr(data_provider_module.yf, "Ticker", FakeTicker)
+    provider.ohlc_store = OHLCStore(tmp_path)
+    provider.fetch_price_data("GC=F", "2y", "1d")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        frames = list(pool.map(
+            lambda period: provider.fetch_price_data("GC=F", period, "1d", use_cache=False), ["1y", "2y", "1y", "2y"]
+        ))
+
+    assert downloads == ["2y", "since-last"]
+    assert len(frames[1]) > len(frames[0])
@@ -0,0 +1,81 @@
+"""
+Tests for the shared indicator result cache
+"""
+import numpy as np
+import pandas as pd
+
+from services.indicator_cache import IndicatorCache
+from services.indicators import IndicatorCalculator
+
+
+def _bars(periods: int = 120) -> pd.DataFrame:
+    close = 2000 + np.arange(periods, dtype=float)
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=periods, freq="D"),
+        "open": close,
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": 1.0,
+    })
+
+
+class CountingCalculator(IndicatorCalculator):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def calculate_all(self, df, categorical=False):
+        self.calls += 1
+        return super().calculate_all(df, categorical=categorical)
+
+
+def test_identical_frames_hit_cache():
+    """Same data (even a fresh copy) is computed once"""
+    calculator = CountingCalculator()
+    cache = IndicatorCache(calculator, max_entries=4)
+    df = _bars()
+
+    first = cache.calculate(df, "GC=F", "1d")
+    second = cache.calculate(df.copy(), "GC=F", "1d")
+
+    assert second is first
+    assert calculator.calls == 1
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_changed_data_or_parameters_miss():
+    """A revised last bar, another interval or other parameters recompute"""
+    calculator = CountingCalculator()
+    cache = IndicatorCache(calculator, max_entries=4)
+    df = _bars()
+    cache.calculate(df, "GC=F", "1d")
+
+    revised = df.copy()
+    revised.loc[revised.index[-1], "close"] += 1.5
+    cache.calculate(revised, "GC=F", "1d")
+    cache.calculate(df, "GC=F", "1wk")
+    cache.calculate(df, "GC=F", "1d", categorical=True)
+    assert calculator.calls == 4
+
+    other_params = IndicatorCache(CountingCalculator(short_ma=10), max_entries=4)
+    assert other_params.fingerprint(df, "GC=F", "1d", False) != cache.fingerprint(df, "GC=F", "1d", False)
+
+
+def test_lru_eviction():
+    """The least recently used frame is evicted beyond max_entries"""
+    calculator = CountingCalculator()
+    cache = IndicatorCache(calculator, max_entries=2)
+    a, b, c = _bars(100), _bars(110), _bars(120)
+
+    cache.calculate(a, "GC=F", "1d")
+    cache.calculate(b, "GC=F", "1d")
+    cache.calculate(a, "GC=F", "1d")  # a becomes most recent
+    cache.calculate(c, "GC=F", "1d")  # evicts b
+    cache.calculate(a, "GC=F", "1d")
+    cache.calculate(b, "GC=F", "1d")
+
+    assert calculator.calls == 4
+    assert cache.get_stats()["size"] == 2
@@ -0,0 +1,73 @@
+"""
+Tests for indicator calculation helpers
+"""
+import numpy as np
+import pandas as pd
+
+from services.indicators import (
+    CROSS_DOWN,
+    CROSS_NONE,
+    CROSS_UP,
+    cross_labels,
+    detect_crosses,
+    indicator_calculator,
+)
+
+
+def test_detect_crosses_matches_row_loop():
+    """Vectorized detector agrees with the per-row definition, including NaN gaps"""
+    rng = np.random.default_rng(1)
+    a = np.cumsum(rng.normal(0, 1, 500))
+    b = pd.Series(a).ewm(span=9, adjust=False).mean().to_numpy(copy=True)
+    a[:30] = np.nan
+    b[100:103] = np.nan
+    a[250:260] = b[250:260]  # touching without crossing
+
+    expected = np.zeros(len(a), dtype=np.int8)
+    for i in range(1, len(a)):
+        values = (a[i], a[i - 1], b[i], b[i - 1])
+        if any(np.isnan(v) for v in values):
+            continue
+        if a[i - 1] <= b[i - 1] and a[i] > b[i]:
+            expected[i] = CROSS_UP
+        elif a[i - 1] >= b[i - 1] and a[i] < b[i]:
+            expected[i] = CROSS_DOWN
+
+    codes = detect_crosses(a, b)
+    np.testing.assert_array_equal(codes, expected)
+    assert (codes != CROSS_NONE).sum() > 10
+
+
+def test_detect_crosses_against_scalar_level():
+    """A scalar level works for price-vs-band style signals"""
+    codes = detect_crosses([1.0, 3.0, 2.0, 1.0, np.nan, 3.0], 2.0)
+    assert codes.tolist() == [0, CROSS_UP, 0, CROSS_DOWN, 0, 0]
+    assert cross_labels(codes).tolist() == ["none", "golden", "none", "dead", "none", "none"]
+    assert detect_crosses([], 0.0).size == 0
+
+
+def test_categorical_labels_match_object_labels():
+    """Categorical mode stores int8 codes but reads back the same labels"""
+    rng = np.random.default_rng(2)
+    close = 2000 + np.cumsum(rng.normal(0, 8, 400))
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=400, freq="D"),
+        "open": close,
+        "high": close + rng.uniform(0, 6, 400),
+        "low": close - rng.uniform(0, 6, 400),
+        "close": close,
+        "volume": 1000.0,
+    })
+
+    plain = indicator_calculator.calculate_all(df)
+    compact = indicator_calculator.calculate_all(df, categorical=True)
+
+    for column in ["trend_dir", "trend_strength", "RSI_state", "MACD_cross", "BB_position", "vol_state"]:
+        assert isinstance(compact[column].dtype, pd.CategoricalDtype), column
+        assert compact[column].cat.codes.dtype == np.int8, column
+        assert compact[column].tolist() == plain[column].tolist(), column
+        assert compact[column].memory_usage(deep=True) < plain[column].memory_usage(deep=True)
+    pd.testing.assert_frame_equal(
+        compact.select_dtypes("number"), plain.select_dtypes("number")
+    )
+    assert indicator_calculator.get_latest_indicators(compact) == indicator_calculator.get_latest_indicators(plain)
@@ -0,0 +1,65 @@
+"""
+Tests for full-history support/resistance zones
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.levels import find_pivots, rank_zones, zones_for
+from services.streaming_indicators import StreamingIndicatorEngine
+
+
+def _swings(lows: list[float], highs: list[float], cycle: int = 20) -> pd.DataFrame:
+    """One cosine swing per (low, high) pair, oldest first"""
+    phase = (1 - np.cos(np.linspace(0, 2 * np.pi, cycle, endpoint=False))) / 2
+    close = np.concatenate([low + (high - low) * phase for low, high in zip(lows, highs)])
+    n = len(close)
+    return pd.DataFrame({
+        "date": pd.date_range("2023-01-02", periods=n, freq="D"),
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+    })
+
+
+def test_pivots_are_confirmed_window_extremes():
+    values = np.array([1.0, 3, 2, 5, 4, 4, 6, 1, 2])
+    assert list(find_pivots(values, width=1, maximum=True)) == [1, 3, 6]
+    assert list(find_pivots(values, width=1, maximum=False)) == [2, 4, 5, 7]  # both bars of a flat bottom
+    assert list(find_pivots(values, width=2, maximum=True)) == [3, 6]
+
+
+def test_repeated_swings_become_ranked_zones():
+    # Ten swings between ~1950 and ~2050, stopping halfway up the last one (close ~2000)
+    df = _swings([1950, 1952, 1949, 1951, 1950, 1948, 1950, 1951, 1950, 1949], [2050] * 10).iloc[:-14]
+    supports, resistances = zones_for(df)
+
+    assert supports[0].low <= 1948 and supports[0].high >= 1950 and supports[0].touches == 9
+    assert resistances[0].level == pytest.approx(2051) and resistances[0].touches == 9
+    assert all(zone.level < 2000 for zone in supports) and all(zone.level > 2000 for zone in resistances)
+    assert supports[0].last_touch == df["date"].iloc[180].to_pydatetime()
+    assert supports[0].bars_since_touch == 5
+
+
+def test_old_resistance_turns_support_and_recent_touches_rank_first():
+    # Resistance at ~2000 is broken; price now trades above it
+    df = _swings([1900, 1900, 1900, 2040, 2040], [2000, 2000, 2000, 2150, 2150]).iloc[:-10]
+    assert df["close"].iloc[-1] > 2100
+
+    supports, resistances = zones_for(df)
+    assert {round(zone.level, -1) for zone in supports} == {1900, 2000, 2040}
+    assert [(zone.level, zone.touches) for zone in resistances] == [(2151, 1)]  # the swing still above
+
+    # Same touches, different age: the recent zone is stronger
+    recent, old = np.array([90, 95]), np.array([5, 10])
+    supports, _ = rank_zones(np.r_[old, recent], [1800.0, 1800.5, 1700.0, 1700.5], 100, 2000.0)
+    assert [round(zone.level) for zone in supports] == [1700, 1800]
+    assert supports[0].strength > supports[1].strength
+
+
+def test_streaming_zones_match_batch():
+    df = _swings([1900, 1950, 1920, 1980], [2000, 2040, 2010, 2060])
+    engine = StreamingIndicatorEngine().warm_up(df)
+    assert engine.zones() == zones_for(df)
+    assert rank_zones([], [], 10, 1.0) == ([], [])
@@ -0,0 +1,85 @@
+"""
+Tests for the persistent LLM response cache
+"""
+import asyncio
+
+import pytest
+
+from services import llm_cache as llm_cache_module
+from services.llm_cache import LLMResponseCache, make_cache_key
+from services.llm_client import LLMClient
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm_cache.sqlite3", ttl=60, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_round_trip_and_persistence(cache, tmp_path):
+    """Values survive a new cache instance on the same file"""
+    key = make_cache_key("news_sentiment", {"news": "headline"})
+    assert cache.get(key, "news_sentiment") is None
+    cache.put(key, "news_sentiment", {"items": [{"sentiment": "利多"}]})
+
+    reopened = LLMResponseCache(cache.path, ttl=60, max_entries=2)
+    assert reopened.get(key, "news_sentiment") == {"items": [{"sentiment": "利多"}]}
+    reopened.close()
+
+    assert cache.get(key, "news_sentiment") is not None
+    stats = cache.get_stats()
+    assert stats["by_type"]["news_sentiment"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    """Entries older than the TTL are misses and get deleted"""
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: now[0])
+    cache.put("k", "explanation", "text")
+    now[0] += 61
+    assert cache.get("k", "explanation") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_lru_eviction(cache, monkeypatch):
+    """The least recently accessed entry is evicted beyond max_entries"""
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache_module.time, "time", lambda: now[0])
+    for key in ("a", "b"):
+        cache.put(key, "explanation", key)
+        now[0] += 1
+    cache.get("a", "explanation")  # a is now more recent than b
+    now[0] += 1
+    cache.put("c", "explanation", "c")
+
+    assert cache.get("b", "explanation") is None
+    assert cache.get("a", "explanation") == "a"
+    assert cache.get("c", "explanation") == "c"
+
+
+def test_explanation_reuses_cached_response(cache, monkeypatch):
+    """Unchanged inputs (price within rounding) skip the LLM call"""
+    client = LLMClient()
+    client.enabled = True
+    client.cache = cache
+    calls = []
+
+    async def fake_call_llm(messages, max_tokens=1000, temperature=0.7, call_type=None):
+        calls.append(messages)
+        return f"explanation {len(calls)}"
+
+    monkeypatch.setattr(client, "_call_llm", fake_call_llm)
+
+    def explain(price, signal="buy"):
+        return asyncio.run(client.generate_explanation(
+            market_state="上涨趋势", trend_dir="up", current_price=price,
+            support=2300.0, resistance=float("nan"), signal=signal,
+            signal_reason="综合评分 40", news_sentiment=[{"headline": "Fed holds rates"}],
+        ))
+
+    assert explain(2350.1) == "explanation 1"
+    assert explain(2350.3) == "explanation 1"
+    assert explain(2350.3, signal="hold") == "explanation 2"
+    assert len(calls) == 2
+    assert client.get_stats()["cache"]["by_type"]["explanation"]["hits"] == 1
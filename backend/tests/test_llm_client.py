@@ -0,0 +1,246 @@
+"""
+Tests for the pooled LLM HTTP client and incremental news sentiment
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.llm_cache import LLMResponseCache
+from services.llm_client import LLMCallType, LLMClient
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(0.05)
+        body = json.dumps({
+            "choices": [{"message": {"content": "ok"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with cls.lock:
+            cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class _NewsHandler(BaseHTTPRequestHandler):
+    """Marks headlines mentioning gold as relevant and records every batch"""
+    protocol_version = "HTTP/1.1"
+    batches: list[list[str]] = []
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        headlines = re.findall(r"标题: (.*)", payload["messages"][-1]["content"])
+        type(self).batches.append(headlines)
+        items = [
+            {"index": i, "headline": h, "relevance": "高", "sentiment": "利多", "reason": "r"}
+            for i, h in enumerate(headlines, 1)
+            if "gold" in h
+        ]
+        content = json.dumps({"items": items, "summary": "s", "key_factors": ["k"]})
+        body = json.dumps({
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    """Streams the completion as SSE chunks, one word per event"""
+    protocol_version = "HTTP/1.1"
+    requests: list[dict] = []
+
+    def do_POST(self):
+        type(self).requests.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in ["Gold ", "looks ", "firm"]:
+            chunk = {"choices": [{"delta": {"content": word}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        usage = {"choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 3, "total_tokens": 6}}
+        self.wfile.write(f"data: {json.dumps(usage)}\n\ndata: [DONE]\n\n".encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+
+@pytest.fixture
+def llm_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+    _CompletionHandler.max_active = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+    server.shutdown()
+
+
+@pytest.fixture
+def client(llm_server, tmp_path):
+    llm = LLMClient()
+    llm.enabled = True
+    llm.api_key = "test-key"
+    llm.base_url = llm_server
+    llm.max_retries = 0
+    llm.log_file = tmp_path / "llm_calls.log"
+    llm.cache = None
+    return llm
+
+
+def test_sequential_calls_reuse_one_connection(client):
+    """Keep-alive pool: one TCP connection serves every request"""
+
+    async def main():
+        await client.open()
+        try:
+            return [
+                await client._call_llm([{"role": "user", "content": "hi"}], call_type=LLMCallType.CHAT)
+                for _ in range(5)
+            ]
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == ["ok"] * 5
+    pool = client.get_pool_stats()
+    assert pool["requests"] == 5
+    assert pool["connections_opened"] == 1
+    assert pool["connection_reuse_rate"] == 0.8
+    assert pool["http_versions"] == {"HTTP/1.1": 5}
+    assert not pool["open"]
+
+
+def test_client_from_another_loop_is_closed_before_reopening(client):
+    client.max_concurrency = 1
+    client._semaphore = asyncio.Semaphore(1)
+
+    async def call():
+        # Two calls contend for the single slot, so the semaphore waits on this loop
+        return await asyncio.gather(*[
+            client._call_llm([{"role": "user", "content": str(i)}], call_type=LLMCallType.CHAT) for i in range(2)
+        ])
+
+    assert asyncio.run(call()) == ["ok"] * 2
+    stale = client._http
+    try:
+        assert asyncio.run(call()) == ["ok"] * 2
+        assert stale.is_closed and client._http is not stale
+    finally:
+        asyncio.run(client.aclose())
+
+
+def test_concurrency_is_bounded(client):
+    """No more than max_concurrency requests are in flight at once"""
+    client.max_concurrency = 2
+    client._semaphore = asyncio.Semaphore(2)
+
+    async def main():
+        try:
+            return await asyncio.gather(*[
+                client._call_llm([{"role": "user", "content": str(i)}], call_type=LLMCallType.CHAT)
+                for i in range(8)
+            ])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(main()) == ["ok"] * 8
+    assert _CompletionHandler.max_active == 2
+    assert client.get_pool_stats()["connections_opened"] == 2
+
+
+def test_news_sentiment_only_sends_new_headlines(tmp_path):
+    """Stored per-item verdicts are reused; new headlines go out in small batches"""
+    server, url = _serve(_NewsHandler)
+    _NewsHandler.batches = []
+    llm = LLMClient()
+    llm.enabled = True
+    llm.api_key = "test-key"
+    llm.base_url = url
+    llm.max_retries = 0
+    llm.log_file = tmp_path / "llm_calls.log"
+    llm.cache = LLMResponseCache(tmp_path / "cache.sqlite3", ttl=3600, max_entries=100)
+
+    first = [{"id": i, "headline": f"gold {i}" if i % 2 else f"tech {i}"} for i in range(1, 7)]
+    second = first[2:] + [{"url": "u", "headline": "gold new"}, {"url": "u", "headline": "tech new"}]
+
+    async def main():
+        try:
+            return (
+                await llm.analyze_news_sentiment(first),
+                await llm.analyze_news_sentiment(second),
+            )
+        finally:
+            await llm.aclose()
+            server.shutdown()
+
+    result1, result2 = asyncio.run(main())
+
+    assert sorted(len(b) for b in _NewsHandler.batches[:2]) == [1, 5]
+    assert _NewsHandler.batches[2:] == [["gold new", "tech new"]]
+    assert [(item["index"], item["headline"]) for item in result1["items"]] == [
+        (1, "gold 1"), (3, "gold 3"), (5, "gold 5"),
+    ]
+    assert [(item["index"], item["headline"]) for item in result2["items"]] == [
+        (1, "gold 3"), (3, "gold 5"), (5, "gold new"),
+    ]
+    assert result2["items"][0]["sentiment"] == "利多"
+    assert llm.cache.get_stats()["by_type"]["news_sentiment"]["hits"] == 4
+
+
+def test_stream_chat_answer_yields_deltas(client, tmp_path):
+    """Streaming mode forwards content deltas and logs the reported usage"""
+    server, url = _serve(_StreamHandler)
+    _StreamHandler.requests = []
+    client.base_url = url
+
+    async def main():
+        try:
+            return [
+                delta
+                async for delta in client.stream_chat_answer("走势如何？", {"current_price": 2000.0})
+            ]
+        finally:
+            await client.aclose()
+            server.shutdown()
+
+    assert asyncio.run(main()) == ["Gold ", "looks ", "firm"]
+    assert _StreamHandler.requests[0]["stream"] is True
+    log_entry = json.loads(client.log_file.read_text().splitlines()[-1])
+    assert log_entry["status"] == "success"
+    assert log_entry["total_tokens"] == 6
+    assert client.get_pool_stats()["in_flight"] == 0
@@ -0,0 +1,247 @@
+"""
+Tests for the WebSocket market data sources
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.market_feed import MarketEvent, ProviderPollingSource, RecordingSource, ReplaySource
+from websocket_server import ConnectionManager, router as ws_router, start_background_tasks, stop_background_tasks
+
+
+def _write_events(path, events):
+    path.write_text("\n".join(json.dumps(e.to_record()) for e in events) + "\n", encoding="utf-8")
+
+
+async def _take(source, n):
+    events = []
+    async for event in source.events():
+        events.append(event)
+        if len(events) == n:
+            break
+    return events
+
+
+class _FakeProvider:
+    def __init__(self):
+        self.calls = {"prices": 0, "quote": 0, "depth": 0}
+
+    async def get_gold_prices(self):
+        self.calls["prices"] += 1
+        return {
+            "london_gold": {"price": 2350.0, "change": 5.0, "change_pct": 0.2, "is_available": True},
+            "au9999": {"price": None, "is_available": False},
+        }
+
+    async def get_quote(self, symbol):
+        self.calls["quote"] += 1
+        return {"last_price": 2360.0, "previous_close": 2340.0}
+
+    async def get_market_depth(self, symbol, limit):
+        self.calls["depth"] += 1
+        return {
+            "bids": [{"price": 2349.5, "volume": 1.0, "total": 1.0}, {"price": 2349.0, "volume": 2.0, "total": 3.0}],
+            "asks": [{"price": 2350.5, "volume": 3.0, "total": 3.0}],
+            "last_update_id": self.calls["depth"],
+            "best_bid": 2349.5,
+            "best_ask": 2350.5,
+            "symbol": symbol,
+        }
+
+
+class _FakeWebSocket:
+    def __init__(self, hang=False):
+        self.hang = hang
+        self.gate = None  # asyncio.Event that sends wait for, when set
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.hang:
+            await asyncio.sleep(3600)
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+def test_broadcast_uses_symbol_index_and_drops_stuck_clients():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=0.05)
+        gold, silver, stuck = _FakeWebSocket(), _FakeWebSocket(), _FakeWebSocket(hang=True)
+        await manager.connect(gold, ["XAU/USD"])
+        await manager.connect(silver, ["XAG/USD"])
+        await manager.connect(stuck, ["XAU/USD", "XAG/USD"])
+
+        await manager.broadcast({"type": "price", "data": {"symbol": "XAU/USD", "name": "伦敦金"}}, "XAU/USD")
+        await asyncio.sleep(0.1)  # stuck send times out, then the background close runs
+        assert [m["data"]["name"] for m in gold.sent] == ["伦敦金"]
+        assert silver.sent == []
+        assert stuck.closed and stuck not in manager.active_connections
+        assert manager.symbol_index == {"XAU/USD": {gold}, "XAG/USD": {silver}}
+
+        manager.update_subscriptions(silver, ["XAU/USD"])
+        await manager.broadcast({"type": "heartbeat"})
+        await asyncio.sleep(0.01)
+        assert (len(gold.sent), len(silver.sent)) == (2, 1)
+        assert manager.symbol_index == {"XAU/USD": {gold, silver}}
+
+        manager.disconnect(gold)
+        manager.disconnect(gold)
+        assert manager.symbol_index == {"XAU/USD": {silver}}
+        assert manager.get_stats()["send_failures"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_slow_client_gets_conflated_prices_and_capped_trades():
+    async def scenario():
+        manager = ConnectionManager(send_timeout=5, max_queue=3, slow_timeout=0.05)
+        slow = _FakeWebSocket()
+        slow.gate = asyncio.Event()
+        await manager.connect(slow, ["XAU/USD"])
+
+        for i in range(4):
+            await manager.broadcast({"type": "price", "data": {"price": i}}, "XAU/USD")
+            await asyncio.sleep(0)  # the writer takes price 0 and blocks on the send
+        for i in range(5):
+            await manager.broadcast({"type": "trade", "data": {"id": i}}, "XAU/USD")
+
+        stats = manager.get_stats()
+        assert (stats["queued"], stats["conflated"], stats["dropped"]) == (4, 2, 2)
+
+        slow.gate.set()
+        await asyncio.sleep(0.01)
+        assert [m["data"]["price"] for m in slow.sent if m["type"] == "price"] == [0, 3]
+        assert [m["data"]["id"] for m in slow.sent if m["type"] == "trade"] == [2, 3, 4]
+        assert manager.get_stats()["queued"] == 0
+
+        # A queue that stays backed up for longer than slow_timeout gets the client dropped
+        slow.gate.clear()
+        await manager.broadcast({"type": "trade", "data": {"id": 5}}, "XAU/USD")
+        await manager.broadcast({"type": "trade", "data": {"id": 6}}, "XAU/USD")
+        await asyncio.sleep(0.1)
+        await manager.broadcast({"type": "trade", "data": {"id": 7}}, "XAU/USD")
+        assert slow not in manager.active_connections
+        assert manager.get_stats()["slow_disconnects"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_replay_preserves_order_and_recording_round_trips(tmp_path):
+    events = [
+        MarketEvent("price", "XAU/USD", {"price": 2350.0 + i}, 1_000 + i * 10)
+        for i in range(5)
+    ]
+    replay_file = tmp_path / "ticks.jsonl"
+    record_file = tmp_path / "recorded.jsonl"
+    _write_events(replay_file, events)
+
+    recorded = asyncio.run(_take(RecordingSource(ReplaySource(replay_file, speed=0), record_file), 5))
+    assert recorded == events
+    assert asyncio.run(_take(ReplaySource(record_file, speed=0), 10)) == events
+
+    looped = asyncio.run(_take(ReplaySource(replay_file, speed=0, loop=True), 12))
+    assert [e.data["price"] for e in looped] == [2350.0 + i % 5 for i in range(12)]
+
+
+def test_provider_polling_fans_out_and_skips_unchanged_prices():
+    provider = _FakeProvider()
+    source = ProviderPollingSource(
+        provider, quote_symbol="GC=F", depth_symbol="PAXGUSDT", price_interval=0.01, depth_interval=0.01
+    )
+    events = asyncio.run(_take(source, 8))
+
+    prices = [e for e in events if e.type == "price"]
+    assert sorted(e.symbol for e in prices) == ["GC=F", "XAU/USD"]  # unchanged prices are not repeated
+    quote = next(e for e in prices if e.symbol == "GC=F")
+    assert round(quote.data["changePercent"], 4) == round(20 / 2340 * 100, 4)
+
+    orderbook = next(e for e in events if e.type == "orderbook")
+    assert [level["total"] for level in orderbook.data["bids"]] == [1.0, 3.0]
+    depth = next(e for e in events if e.type == "market_depth")
+    assert [level["price"] for level in depth.data["data"]] == [2350.5, 2349.5, 2349.0]
+    assert provider.calls["depth"] >= 3
+
+
+def test_websocket_pushes_feed_to_subscribers(tmp_path):
+    events = [
+        MarketEvent("price", symbol, {"symbol": symbol, "price": 1.0}, i * 100)
+        for i, symbol in enumerate(["XAU/USD", "AU9999"] * 5)
+    ]
+    replay_file = tmp_path / "ticks.jsonl"
+    _write_events(replay_file, events)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        tasks = start_background_tasks(ReplaySource(replay_file, speed=100, loop=True))
+        yield
+        await stop_background_tasks(tasks)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(ws_router)
+
+    with TestClient(app) as client, client.websocket_connect("/ws") as ws:
+        ws.send_json({"type": "subscribe", "data": {"symbols": ["XAU/USD"]}})
+        while ws.receive_json()["data"].get("title") != "订阅成功":
+            pass
+        received = [ws.receive_json() for _ in range(4)]
+
+    assert {(m["type"], m["data"]["symbol"]) for m in received} == {("price", "XAU/USD")}
+
+
+def _orderbook(bids, asks):
+    side = lambda levels: [{"price": p, "amount": a, "total": 0} for p, a in levels]
+    return {"type": "orderbook", "data": {"symbol": "PAXGUSDT", "bids": side(bids), "asks": side(asks)}, "timestamp": 1}
+
+
+def test_compact_encoding_sends_book_snapshot_then_changed_levels():
+    async def scenario():
+        manager = ConnectionManager()
+        plain, compact = _FakeWebSocket(), _FakeWebSocket()
+        await manager.connect(plain, ["PAXGUSDT"])
+        await manager.connect(compact, ["PAXGUSDT"], encoding="compact")
+
+        await manager.broadcast(_orderbook([(10.0, 1), (9.5, 2)], [(10.5, 3)]), "PAXGUSDT")
+        await manager.broadcast({"type": "market_depth", "data": {"symbol": "PAXGUSDT"}}, "PAXGUSDT")
+        await asyncio.sleep(0)
+        await manager.broadcast(_orderbook([(10.0, 1), (9.5, 4)], [(11.0, 1)]), "PAXGUSDT")
+        await asyncio.sleep(0.01)
+
+        assert [m["type"] for m in plain.sent] == ["orderbook", "market_depth", "orderbook"]
+        snapshot, delta = compact.sent
+        assert snapshot["data"] == {
+            "symbol": "PAXGUSDT", "seq": 1, "snapshot": True,
+            "bids": [[10.0, 1], [9.5, 2]], "asks": [[10.5, 3]],
+        }
+        assert (delta["data"]["seq"], delta["data"]["snapshot"]) == (2, False)
+        assert delta["data"]["bids"] == [[9.5, 4]]
+        assert delta["data"]["asks"] == [[11.0, 1], [10.5, 0]]
+
+        # Behind (frame still pending) or after a resync request: the next frame is a full snapshot
+        compact.gate = asyncio.Event()
+        await manager.broadcast(_orderbook([(10.0, 2)], [(11.0, 1)]), "PAXGUSDT")
+        await asyncio.sleep(0)
+        await manager.broadcast(_orderbook([(10.0, 3)], [(11.0, 1)]), "PAXGUSDT")
+        await manager.broadcast(_orderbook([(10.0, 4)], [(11.0, 1)]), "PAXGUSDT")
+        compact.gate.set()
+        await asyncio.sleep(0.01)
+        manager.resync(compact, ["PAXGUSDT"])
+        await manager.broadcast(_orderbook([(10.0, 5)], [(11.0, 1)]), "PAXGUSDT")
+        await asyncio.sleep(0.01)
+        frames = [(m["data"]["seq"], m["data"]["snapshot"], m["data"]["bids"]) for m in compact.sent[2:]]
+        assert frames == [
+            (3, False, [[10.0, 2], [9.5, 0]]),
+            (5, True, [[10.0, 4]]),
+            (6, True, [[10.0, 5]]),
+        ]
+
+    asyncio.run(scenario())
@@ -0,0 +1,263 @@
+"""
+Tests for the shared market snapshot service
+"""
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from services.data_provider import async_data_provider
+from services.llm_client import llm_client
+from services.market_snapshot import MarketSnapshotService, market_snapshot
+from services.strategy import strategy_engine
+from services.streaming_indicators import indicator_streams
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Count upstream calls served by fake provider methods"""
+    calls = {"ohlc": 0, "news": 0, "real_rate": 0, "quote": 0}
+    close = 2000 + np.arange(130, dtype=float)
+    bars = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=130, freq="D"),
+        "open": close,
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": 1.0,
+    })
+
+    async def fetch_price_data(symbol, period="1y", interval="1d", use_cache=True):
+        calls["ohlc"] += 1
+        await asyncio.sleep(0.01)
+        return bars
+
+    async def get_news_items(symbol="GC=F", limit=10):
+        calls["news"] += 1
+        return [{"title": "Fed signals rate cut", "sentiment": "利多", "news_time": "2024-05-09 08:00"}]
+
+    async def get_real_interest_rate():
+        calls["real_rate"] += 1
+        return {"real_rate": 1.5}
+
+    async def get_quote(symbol):
+        calls["quote"] += 1
+        return {"last_price": 2400.0, "previous_close": 2380.0}
+
+    monkeypatch.setattr(async_data_provider, "fetch_price_data", fetch_price_data)
+    monkeypatch.setattr(async_data_provider, "get_news_items", get_news_items)
+    monkeypatch.setattr(async_data_provider, "get_real_interest_rate", get_real_interest_rate)
+    monkeypatch.setattr(async_data_provider, "get_quote", get_quote)
+    monkeypatch.setattr(llm_client, "enabled", False)
+    return calls
+
+
+def test_views_are_shared_and_served_from_the_snapshot(upstream):
+    async def scenario():
+        service = MarketSnapshotService()
+        first, second = await asyncio.gather(service.get_analysis("1y", "1d"), service.get_analysis("1y", "1d"))
+        assert first is second
+        other = await service.get_analysis("1mo", "1d")
+
+        # One computation per view; news / macro inputs fetched once for both
+        assert upstream["news"] == upstream["real_rate"] == 1
+        assert other.news_items == first.news_items
+        assert first.analysis.real_rate == 1.5
+        assert first.llm_context["signal"] == first.analysis.signal.signal_level.value
+
+        calls_before = dict(upstream)
+        assert await service.get_analysis("1y", "1d") is first
+        assert (await service.get_quote()).data["last_price"] == 2400.0
+        assert (await service.get_quote()).data["last_price"] == 2400.0
+        assert upstream == {**calls_before, "quote": 1}
+
+    asyncio.run(scenario())
+
+
+def test_refresh_cycle_rebuilds_tracked_views_and_expires_idle_ones(upstream):
+    async def scenario():
+        service = MarketSnapshotService(view_idle=3600)
+        chart = await service.get_chart("GC=F", "1mo", "1d")
+        assert len(chart.frame) == 22 and chart.key_levels["range_high"] == 2131.0
+
+        await service.refresh_views()
+        assert service.snapshot.charts[("GC=F", "1mo", "1d")] is not chart
+        assert set(service.snapshot.analyses) == {key[1:] for key in service.pinned_keys}  # always tracked
+        assert upstream["news"] == 1
+
+        service.view_idle = 0
+        await asyncio.sleep(0.01)
+        await service.refresh_views()
+        assert dict(service.snapshot.charts) == {}
+        assert set(service.snapshot.analyses) == {key[1:] for key in service.pinned_keys}
+        assert service.get_status()["cycles"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_refreshed_analysis_streams_the_newest_bar(upstream, monkeypatch):
+    served = []
+    latest_frame = indicator_streams.latest_frame
+
+    def record(df, key):
+        frame = latest_frame(df, ("test",) + key)
+        served.append((key, frame is not None))
+        return frame
+
+    monkeypatch.setattr(indicator_streams, "latest_frame", record)
+
+    async def scenario():
+        service = MarketSnapshotService()
+        first = await service.get_analysis("1y", "1d")
+        for _ in range(2):
+            await service.refresh_views()
+        return first, service.snapshot.analyses[("GC=F", "1y", "1d")]
+
+    first, refreshed = asyncio.run(scenario())
+    # Computed once, then streamed while the window keeps its start
+    assert [hit for key, hit in served if key == ("GC=F", "1y", "1d")] == [False, True, True]
+    assert refreshed is not first
+    expected = first.analysis.indicators.model_dump()
+    for name, value in refreshed.analysis.indicators.model_dump().items():
+        assert value == (pytest.approx(expected[name]) if isinstance(value, float) else expected[name]), name
+    assert refreshed.analysis.market_state == first.analysis.market_state
+    for name in ("signal_level", "signal_reason", "position_level", "composite_score"):
+        assert getattr(refreshed.analysis.signal, name) == getattr(first.analysis.signal, name), name
+
+
+def test_background_cycles_never_call_the_llm(upstream, monkeypatch):
+    llm_calls = {"news": 0, "explanation": 0}
+
+    async def analyze_news_sentiment(items):
+        llm_calls["news"] += 1
+        return {"items": [{"index": 1, "sentiment": "利多", "relevance": "高"}]}
+
+    async def generate_explanation(**kwargs):
+        llm_calls["explanation"] += 1
+        return "LLM explanation"
+
+    monkeypatch.setattr(llm_client, "enabled", True)
+    monkeypatch.setattr(llm_client, "analyze_news_sentiment", analyze_news_sentiment)
+    monkeypatch.setattr(llm_client, "generate_explanation", generate_explanation)
+
+    async def scenario():
+        service = MarketSnapshotService()
+        await service.refresh_views()
+        await service.refresh_views()
+        assert llm_calls == {"news": 0, "explanation": 0}
+        assert (await service.get_analysis()).analysis.llm_explanation == "LLM explanation"
+
+        # The request found no explanation and built it on demand
+        assert llm_calls == {"news": 1, "explanation": 1}
+        await service.refresh_views()
+        assert (await service.get_analysis()).analysis.llm_explanation == "LLM explanation"
+        assert llm_calls == {"news": 1, "explanation": 1}
+
+        # Once stale, the background drops back to the rule-based explanation
+        service.llm_interval = 0
+        await asyncio.sleep(0.01)
+        await service.refresh_views()
+        assert service.snapshot.analyses[service.default_analysis_key[1:]].analysis.llm_explanation is None
+        assert service.snapshot.inputs.news_filtered_at is None
+        assert llm_calls == {"news": 1, "explanation": 1}
+
+    asyncio.run(scenario())
+
+
+def test_background_rebuild_does_not_drop_a_fresh_llm_explanation(upstream, monkeypatch):
+    async def analyze_news_sentiment(items):
+        await asyncio.sleep(0.02)
+        return {"items": [{"index": 1, "sentiment": "利多", "relevance": "高"}]}
+
+    async def generate_explanation(**kwargs):
+        await asyncio.sleep(0.05)
+        return "LLM explanation"
+
+    monkeypatch.setattr(llm_client, "enabled", True)
+    monkeypatch.setattr(llm_client, "analyze_news_sentiment", analyze_news_sentiment)
+    monkeypatch.setattr(llm_client, "generate_explanation", generate_explanation)
+
+    # Rule-based analyses (background rebuilds) finish late
+    analyze = strategy_engine.analyze
+
+    def slow_analyze(df, *args, **kwargs):
+        if kwargs.get("llm_explanation") is None:
+            time.sleep(0.15)
+        return analyze(df, *args, **kwargs)
+
+    monkeypatch.setattr(strategy_engine, "analyze", slow_analyze)
+
+    async def scenario(request_first: bool):
+        service = MarketSnapshotService()
+        if request_first:
+            request = asyncio.ensure_future(service.get_analysis())
+            await asyncio.sleep(0)
+            await asyncio.gather(request, service.refresh_views())
+        else:
+            cycle = asyncio.ensure_future(service.refresh_views())
+            await asyncio.sleep(0)
+            await asyncio.gather(cycle, service.get_analysis())
+        view = service.snapshot.analyses[service.default_analysis_key[1:]]
+        assert view.analysis.llm_explanation == "LLM explanation"
+        assert service.snapshot.inputs.news_filtered_at is not None
+
+    asyncio.run(scenario(request_first=True))
+    asyncio.run(scenario(request_first=False))
+
+
+def test_price_endpoint_reports_snapshot_age(upstream):
+    market_snapshot.clear()
+    try:
+        client = TestClient(app)
+        first = client.get("/api/v1/price")
+        second = client.get("/api/v1/price")
+    finally:
+        market_snapshot.clear()
+
+    assert first.status_code == 200 and first.json()["current_price"] == 2400.0
+    assert second.headers["Age"] == "0"
+    assert second.json()["price_refresh_time"] == first.json()["price_refresh_time"]
+    assert upstream["quote"] == 1
+
+
+def test_batch_analysis_shares_inputs_and_reports_per_target_errors(upstream, monkeypatch):
+    fetch = async_data_provider.fetch_price_data
+    fetched = []
+
+    async def fetch_price_data(symbol, period="1y", interval="1d", use_cache=True):
+        fetched.append((symbol, period, interval))
+        if symbol == "BAD":
+            return pd.DataFrame()
+        return await fetch(symbol, period, interval, use_cache)
+
+    monkeypatch.setattr(async_data_provider, "fetch_price_data", fetch_price_data)
+    targets = [
+        {"symbol": symbol, "period": period, "interval": interval}
+        for symbol in ("GC=F", "SI=F", "PAXG-USD")
+        for period, interval in (("1mo", "1d"), ("1y", "1wk"))
+    ]
+    market_snapshot.clear()
+    try:
+        client = TestClient(app)
+        response = client.post("/api/v1/analysis/batch", json={"targets": [*targets, {"symbol": "BAD"}, targets[0]]})
+        too_many = client.post("/api/v1/analysis/batch", json={"targets": [{}] * 100})
+        tracked = set(market_snapshot._requested)
+    finally:
+        market_snapshot.clear()
+
+    assert response.status_code == 200 and too_many.status_code == 422
+    assert ("analysis", "SI=F", "1y", "1wk") in tracked
+    assert not any("BAD" in key for key in tracked)  # failed targets are not refreshed in the background
+    results = response.json()["results"]
+    assert [(r["symbol"], r["period"], r["interval"]) for r in results[:6]] == [tuple(t.values()) for t in targets]
+    assert all(r["analysis"]["current_price"] == 2129.0 and r["error"] is None for r in results[:6])
+    assert results[6]["analysis"] is None and "BAD" in results[6]["error"]
+    assert results[6]["period"] == "1y" and results[6]["interval"] == "1wk"
+    assert results[7]["analysis"] == results[0]["analysis"]
+    # One fetch per distinct target (the duplicate shares it) and one news / macro fetch for all
+    assert sorted(fetched) == sorted({tuple(t.values()) for t in targets} | {("BAD", "1y", "1wk"), ("DX-Y.NYB", "5d", "1d")})
+    assert upstream["news"] == upstream["real_rate"] == 1
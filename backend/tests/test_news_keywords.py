@@ -0,0 +1,83 @@
+"""
+Tests for the compiled keyword matcher and the news keyword tables
+"""
+import random
+
+import pytest
+
+from services.news_keywords import (
+    BEARISH_REASONS,
+    BULLISH_REASONS,
+    GOLD_RELEVANCE_WEIGHTS,
+    MAJOR_NEWS_KEYWORDS,
+    match_news_keywords,
+)
+from services.strategy import StrategyEngine
+from utils.keyword_matcher import KeywordMatcher
+
+
+def _naive_match(text: str) -> tuple:
+    """Previous per-keyword ``in`` scans of get_news_items"""
+    text = text.lower()
+    score, topics = 0, []
+    for keyword, weight in GOLD_RELEVANCE_WEIGHTS.items():
+        if keyword.lower() in text:
+            score += weight
+            if weight >= 6:
+                topics.append(keyword)
+    sentiment, reason = "中性", ""
+    for keyword, keyword_reason in BULLISH_REASONS.items():
+        if keyword.lower() in text:
+            sentiment, reason = "利多", keyword_reason
+            break
+    if sentiment == "中性":
+        for keyword, keyword_reason in BEARISH_REASONS.items():
+            if keyword.lower() in text:
+                sentiment, reason = "利空", keyword_reason
+                break
+    major = any(k in text for k in MAJOR_NEWS_KEYWORDS)
+    return score, topics, sentiment, reason, major
+
+
+def test_matcher_finds_overlapping_keywords():
+    matcher = KeywordMatcher(["fed", "Federal Reserve", "he", "she", "hers", "rate cut", "cut"])
+    assert matcher.find_all("The FEDERAL RESERVE ushers a rate cut") == {
+        "fed", "federal reserve", "he", "she", "hers", "rate cut", "cut",
+    }
+    assert matcher.find_all("no match at all") == set()
+    assert matcher.search("a rate cutter")
+    assert not matcher.search("")
+
+
+def test_matcher_equals_substring_scan():
+    rng = random.Random(3)
+    keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(60)]
+    matcher = KeywordMatcher(keywords)
+    for _ in range(500):
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+        assert matcher.find_all(text) == {k for k in keywords if k in text}
+
+
+@pytest.mark.parametrize("text", [
+    "Gold rises as Fed signals rate cut amid Middle East tension",
+    "Strong dollar and hawkish FOMC minutes weigh on bullion; yield rise continues",
+    "美联储加息预期升温，美元走强，金价下跌",
+    "Tech earnings beat expectations",
+    "Software award: central bank buy program; war in headlines; risk-on rally",
+    "",
+])
+def test_news_match_equals_previous_scans(text):
+    match = match_news_keywords(text)
+    assert (
+        match.relevance_score, match.matched_topics, match.sentiment, match.reason, match.is_major
+    ) == _naive_match(text)
+    assert {h.keyword for h in match.hits if h.weight} == {
+        k for k in GOLD_RELEVANCE_WEIGHTS if k in text.lower()
+    }
+
+
+def test_has_major_news():
+    engine = StrategyEngine()
+    assert engine._has_major_news([{"title": "Quiet session", "content": None}, {"title": "FOMC holds rates"}])
+    assert not engine._has_major_news([{"title": "Tech earnings beat", "content": "Quiet session"}])
+    assert not engine._has_major_news(None)
@@ -0,0 +1,107 @@
+"""
+Tests for the local order book
+"""
+import json
+
+import pytest
+import requests
+
+from core.config import settings
+from services import data_provider as data_provider_module
+from services.data_provider import DataProvider
+from services.order_book import LocalOrderBook, OrderBookGap, OrderBookReplay
+
+
+def _write_records(path, records):
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n", encoding="utf-8")
+
+
+def test_sides_stay_sorted_and_totals_follow_updates():
+    book = LocalOrderBook("PAXGUSDT")
+    book.apply_snapshot([(10.0, 1.0), (9.0, 2.0), (9.5, 4.0)], [(11.0, 1.0), (10.5, 3.0)])
+
+    assert book.bids.top() == [(10.0, 1.0), (9.5, 4.0), (9.0, 2.0)]
+    assert book.asks.top(1) == [(10.5, 3.0)]
+    assert book.bids.cumulative(2) == [1.0, 5.0]
+
+    assert book.bids.set(9.5, 0) and not book.bids.set(9.5, 0)
+    assert not book.asks.set(11.0, 1.0)  # unchanged
+    assert book.bids.total_volume == 3.0
+    assert book.imbalance() == pytest.approx((3.0 - 4.0) / 7.0)
+
+    depth = book.to_market_depth(limit=1)
+    assert depth["bids"] == [{"price": 10.0, "volume": 1.0, "total": 1.0}]
+    assert (depth["best_bid"], depth["best_ask"], depth["spread"]) == (10.0, 10.5, 0.5)
+    assert depth["bid_ask_ratio"] == round(1.0 / 3.0, 4)
+    assert depth["imbalance"] == -0.5
+
+
+def test_snapshot_diffing_only_touches_changed_levels():
+    book = LocalOrderBook("PAXGUSDT")
+    book.apply_snapshot([(10.0, 1.0), (9.5, 2.0)], [(10.5, 3.0)], last_update_id=1)
+    bid_changes, ask_changes = book.apply_snapshot([(10.0, 1.0), (9.0, 5.0)], [(10.5, 3.0)], last_update_id=2)
+
+    assert sorted(bid_changes) == [(9.0, 5.0), (9.5, 0.0)]
+    assert ask_changes == []
+    assert book.bids.top() == [(10.0, 1.0), (9.0, 5.0)]
+    assert book.last_update_id == 2
+
+
+def test_diff_events_are_sequenced():
+    book = LocalOrderBook("PAXGUSDT")
+    book.apply_snapshot([(10.0, 1.0)], [(10.5, 1.0)], last_update_id=100)
+
+    assert book.apply_diff([(10.0, 9.0)], [], first_update_id=90, final_update_id=100) == 0  # already applied
+    assert book.apply_diff([(10.0, 2.0)], [(10.5, 0)], first_update_id=95, final_update_id=105) == 2
+    assert book.last_update_id == 105 and len(book.asks) == 0
+    with pytest.raises(OrderBookGap):
+        book.apply_diff([(9.0, 1.0)], [], first_update_id=110, final_update_id=112)
+
+
+def test_replay_file_drives_market_depth_offline(tmp_path, monkeypatch):
+    replay_file = tmp_path / "depth.jsonl"
+    _write_records(replay_file, [
+        {"lastUpdateId": 10, "bids": [["2349.5", "1.0"], ["2349.0", "2.0"]], "asks": [["2350.5", "3.0"]]},
+        {"e": "depthUpdate", "U": 11, "u": 12, "b": [["2349.5", "0"]], "a": [["2351.0", "1.0"]]},
+        {"e": "depthUpdate", "U": 20, "u": 21, "b": [["2348.0", "9.0"]], "a": []},  # gap: skipped
+        {"e": "depthUpdate", "U": 13, "u": 13, "b": [["2349.0", "4.0"]], "a": []},
+    ])
+
+    replay = OrderBookReplay(replay_file, "PAXGUSDT", loop=False)
+    update_ids = [book.last_update_id for book in replay]
+    assert update_ids == [10, 12, 12, 13]
+    assert replay.book.bids.top() == [(2349.0, 4.0)]
+
+    monkeypatch.setattr(settings, "ORDER_BOOK_REPLAY_PATH", str(replay_file))
+    provider = DataProvider()
+    first = provider.get_market_depth("PAXGUSDT", limit=5)
+    second = provider.get_market_depth("PAXGUSDT", limit=5)
+
+    assert first["last_update_id"] == 10 and first["total_bid_volume"] == 3.0
+    assert [a["total"] for a in second["asks"]] == [3.0, 4.0]
+    assert second["bids"] == [{"price": 2349.0, "volume": 2.0, "total": 2.0}]
+    assert second["data_source"] == "Replay (depth.jsonl)"
+
+
+def test_books_are_kept_only_for_symbols_binance_serves(monkeypatch):
+    class Response:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def raise_for_status(self):
+            if self.symbol.startswith("BAD"):
+                raise requests.HTTPError("400 Invalid symbol")
+
+        def json(self):
+            return {"lastUpdateId": 1, "bids": [["10.0", "1.0"]], "asks": [["11.0", "1.0"]]}
+
+    monkeypatch.setattr(data_provider_module.requests, "get", lambda url, params, timeout: Response(params["symbol"]))
+    monkeypatch.setattr(settings, "ORDER_BOOK_MAX_SYMBOLS", 2)
+    provider = DataProvider()
+
+    assert provider.get_market_depth("BADUSDT")["is_simulated"]
+    assert not provider.get_market_depth("PAXGUSDT")["is_simulated"]
+    for symbol in ("BTCUSDT", "ETHUSDT"):
+        provider.get_market_depth(symbol)
+
+    assert list(provider._order_books) == ["BTCUSDT", "ETHUSDT"]
@@ -0,0 +1,90 @@
+"""
+Tests for the parallel parameter sweep
+"""
+import json
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.backtest import Backtester
+from services.indicators import IndicatorCalculator
+from services.param_sweep import ParameterSweep, SharedBars, SweepOptions, grid, random_search
+from services.strategy import StrategyEngine
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(7)
+    n = 400
+    close = 2000 + np.cumsum(rng.normal(0, 12, n)) + 80 * np.sin(np.arange(n) / 11)
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=n, freq="D", tz="UTC"),
+        "open": close + rng.normal(0, 3, n),
+        "high": close + np.abs(rng.normal(0, 8, n)),
+        "low": close - np.abs(rng.normal(0, 8, n)),
+        "close": close,
+    })
+
+
+def test_candidates_skip_invalid_periods():
+    space = {"short_ma": [20, 60], "mid_ma": [50, 60], "trend": [0.2, 0.3]}
+    assert grid(space) == [
+        {"short_ma": 20, "mid_ma": 50, "trend": 0.2},
+        {"short_ma": 20, "mid_ma": 50, "trend": 0.3},
+        {"short_ma": 20, "mid_ma": 60, "trend": 0.2},
+        {"short_ma": 20, "mid_ma": 60, "trend": 0.3},
+    ]
+
+    sampled = random_search({"rsi_period": [7, 14, 21], "momentum": [0.1, 0.25]}, 4, seed=1)
+    assert len(sampled) == 4 and len({tuple(c.values()) for c in sampled}) == 4
+    assert sampled == random_search({"rsi_period": [7, 14, 21], "momentum": [0.1, 0.25]}, 4, seed=1)
+
+    with pytest.raises(ValueError):
+        ParameterSweep(pd.DataFrame({"close": [1.0]})).run([{"lookback": 5}])
+
+    empty = ParameterSweep(pd.DataFrame({"close": [1.0]}), max_workers=4).run(grid({"short_ma": [60], "mid_ma": [50]}))
+    assert empty.empty and {"rank", "sharpe", "error"} <= set(empty.columns)
+
+
+def test_shared_bars_round_trip(bars):
+    with SharedBars(bars) as shared:
+        shm, attached = SharedBars.attach(shared.spec)
+        try:
+            assert np.array_equal(attached["close"].to_numpy(), bars["close"].to_numpy())
+            assert (attached["date"].dt.tz_localize("UTC") == bars["date"]).all()
+        finally:
+            del attached
+            shm.close()
+
+
+def test_pool_results_are_ranked_and_saved(bars, tmp_path):
+    options = SweepOptions(sentiment_score=60)
+    candidates = grid({"rsi_period": [7, 14], "trend": [0.15, 0.35], "momentum": [0.25, 0.4]})
+
+    results = ParameterSweep(bars, options, max_workers=2).run(candidates, rank_by="sharpe", min_trades=1)
+    serial = ParameterSweep(bars, options, max_workers=1).run(candidates, rank_by="sharpe", min_trades=1)
+
+    assert len(results) == 8 and list(results["rank"]) == list(range(1, 9))
+    pd.testing.assert_frame_equal(results, serial)
+    ranked = results["sharpe"].dropna()
+    assert list(ranked) == sorted(ranked, reverse=True)
+
+    best = results.iloc[0]
+    engine = StrategyEngine()
+    engine.weights.update(trend=best["trend"], momentum=best["momentum"])
+    direct = Backtester(engine=engine, calculator=IndicatorCalculator(rsi_period=int(best["rsi_period"])))
+    stats = direct.run(bars, options.sentiment_score).stats
+    assert best["sharpe"] == pytest.approx(stats["sharpe"])
+    assert best["trades"] == stats["trades"]
+
+    db = tmp_path / "sweeps.sqlite3"
+    run_id = ParameterSweep.save(results, db, label="test")
+    with sqlite3.connect(db) as conn:
+        rows = conn.execute(
+            "SELECT rank, params, sharpe FROM sweep_results WHERE run_id = ? ORDER BY rank", (run_id,)
+        ).fetchall()
+    conn.close()
+    assert len(rows) == 8
+    assert json.loads(rows[0][1]) == best["params"]
@@ -0,0 +1,53 @@
+"""
+Tests for the fan-out request pipeline
+"""
+import asyncio
+import time
+
+import pytest
+
+from services.pipeline import Pipeline
+
+
+def test_independent_stages_run_concurrently():
+    """Independent blocking stages overlap instead of running back to back"""
+
+    def slow(value):
+        def fetch():
+            time.sleep(0.2)
+            return value
+        return fetch
+
+    async def combine(a, b):
+        return a + b
+
+    pipeline = Pipeline()
+    pipeline.add("a", slow(1))
+    pipeline.add("b", slow(2))
+    pipeline.add("sum", combine, "a", "b")
+
+    start = time.perf_counter()
+    results = asyncio.run(pipeline.run())
+    elapsed = time.perf_counter() - start
+
+    assert results == {"a": 1, "b": 2, "sum": 3}
+    assert elapsed < 0.35
+    assert set(pipeline.timings) == {"a", "b", "sum", "total"}
+    assert "sum;dur=" in pipeline.format_timings()
+
+
+def test_failing_stage_propagates():
+    """The first stage failure is raised to the caller"""
+    pipeline = Pipeline()
+    pipeline.add("bad", lambda: 1 / 0)
+    pipeline.add("after", lambda value: value, "bad")
+
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(pipeline.run())
+
+
+def test_unknown_dependency_rejected():
+    """Stages must be registered after their dependencies"""
+    pipeline = Pipeline()
+    with pytest.raises(ValueError):
+        pipeline.add("indicators", lambda df: df, "ohlc")
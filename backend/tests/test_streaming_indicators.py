@@ -0,0 +1,151 @@
+"""
+Parity tests: streaming indicator engine vs. IndicatorCalculator.calculate_all
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.indicators import indicator_calculator
+from services.streaming_indicators import IndicatorStreams, StreamingIndicatorEngine
+
+NUMERIC_COLUMNS = [
+    "SMA_20", "SMA_60", "EMA_12", "EMA_26", "EMA_20",
+    "ADX", "PLUS_DI", "MINUS_DI", "RSI",
+    "MACD", "MACD_signal", "MACD_hist",
+    "BB_upper", "BB_middle", "BB_lower", "BB_width", "ATR_14",
+]
+LABEL_COLUMNS = ["trend_dir", "trend_strength", "RSI_state", "MACD_cross", "BB_position"]
+# calculate_all labels every bar from full-history statistics or windows
+# that only exist for the newest bar; compare those on snapshots only
+LATEST_ONLY_COLUMNS = [
+    "vol_state", "support_level", "resistance_level", "range_high", "range_low", "range_mid",
+]
+
+
+@pytest.fixture(scope="module")
+def ohlc():
+    """Random-walk OHLC bars"""
+    rng = np.random.default_rng(7)
+    n = 300
+    close = 2000 + np.cumsum(rng.normal(0, 8, n))
+    open_ = close + rng.normal(0, 3, n)
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=n, freq="D"),
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.uniform(0, 6, n),
+        "low": np.minimum(open_, close) - rng.uniform(0, 6, n),
+        "close": close,
+        "volume": 1000.0,
+    })
+
+
+def _normalize(value):
+    if isinstance(value, list):
+        return value
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value
+
+
+def _assert_same(actual, expected, column):
+    actual, expected = _normalize(actual), _normalize(expected)
+    if isinstance(actual, float) and expected is not None:
+        assert math.isclose(actual, float(expected), rel_tol=1e-9, abs_tol=1e-9), column
+    else:
+        assert actual == expected, column
+
+
+def test_per_bar_values_match_full_history(ohlc):
+    """Every bar's streamed values equal calculate_all's row once warmed up"""
+    engine = StreamingIndicatorEngine()
+    streamed = pd.DataFrame([engine.update(bar) for bar in ohlc.to_dict("records")])
+    expected = indicator_calculator.calculate_all(ohlc)
+
+    warm = 35  # MACD signal needs slow + signal bars
+    for column in NUMERIC_COLUMNS:
+        np.testing.assert_allclose(
+            streamed[column].to_numpy()[warm:],
+            expected[column].to_numpy()[warm:],
+            rtol=1e-9,
+            err_msg=column,
+        )
+    for column in LABEL_COLUMNS:
+        assert streamed[column].tolist()[warm:] == expected[column].tolist()[warm:], column
+
+
+@pytest.mark.parametrize("length", [1, 10, 14, 15, 24, 34, 35, 41, 60, 61, 100, 300])
+def test_snapshot_matches_last_row(ohlc, length):
+    """The snapshot after n bars equals the last row of calculate_all on those n bars"""
+    engine = StreamingIndicatorEngine().warm_up(ohlc.iloc[:length])
+    snapshot = engine.snapshot()
+    expected = indicator_calculator.calculate_all(ohlc.iloc[:length]).iloc[-1]
+
+    for column in NUMERIC_COLUMNS + LABEL_COLUMNS + LATEST_ONLY_COLUMNS:
+        _assert_same(snapshot.get(column), expected.get(column), column)
+
+
+def test_latest_indicators_match_schema(ohlc):
+    """The API schema built from the engine equals the batch one"""
+    engine = StreamingIndicatorEngine().warm_up(ohlc.iloc[:200])
+    for bar in ohlc.iloc[200:].to_dict("records"):
+        engine.update(bar)
+
+    streamed = engine.latest_indicators().model_dump()
+    expected = indicator_calculator.get_latest_indicators(
+        indicator_calculator.calculate_all(ohlc)
+    ).model_dump()
+
+    assert engine.count == len(ohlc)
+    assert expected["support_level"] is not None or expected["resistance_level"] is not None
+    assert expected["support_zones"] and expected["resistance_zones"]
+    for field, value in expected.items():
+        _assert_same(streamed[field], value, field)
+
+
+def _assert_latest_row(frame, bars):
+    expected = indicator_calculator.calculate_all(bars).iloc[-1]
+    latest = frame.iloc[-1]
+    for column in NUMERIC_COLUMNS + LABEL_COLUMNS + LATEST_ONLY_COLUMNS:
+        _assert_same(latest.get(column), expected.get(column), column)
+
+
+def test_streams_follow_a_window_with_a_forming_bar(ohlc):
+    """Revised and appended bars of a fixed-start window match calculate_all"""
+    streams = IndicatorStreams()
+    key = ("GC=F", "ytd", "1d")
+    window = ohlc.iloc[:200]
+
+    # Built once the window start is seen twice
+    assert streams.latest_frame(window, key) is None
+    frame = streams.latest_frame(window, key)
+    assert frame is not None
+    assert frame[["date", "close"]].equals(window[["date", "close"]])
+    _assert_latest_row(frame, window)
+
+    # The forming bar is revised, then closes as new bars arrive
+    revised = window.copy()
+    revised.loc[199, ["high", "close"]] = [revised.loc[199, "high"] + 25, revised.loc[199, "high"] + 20]
+    _assert_latest_row(streams.latest_frame(revised, key), revised)
+    for end in (201, 205, 240):
+        _assert_latest_row(streams.latest_frame(ohlc.iloc[:end], key), ohlc.iloc[:end])
+
+
+def test_streams_fall_back_when_the_window_moves(ohlc):
+    """A new window start or a changed closed bar is not served from the old engine"""
+    streams = IndicatorStreams()
+    key = ("GC=F", "1y", "1d")
+    streams.latest_frame(ohlc.iloc[:200], key)
+    assert streams.latest_frame(ohlc.iloc[:200], key) is not None
+
+    # Sliding window: one fallback, then a new engine for the new start
+    moved = ohlc.iloc[1:201].reset_index(drop=True)
+    assert streams.latest_frame(moved, key) is None
+    _assert_latest_row(streams.latest_frame(moved, key), moved)
+
+    # A closed bar rewritten upstream invalidates the engine
+    rewritten = moved.copy()
+    rewritten.loc[150, "close"] += 5
+    assert streams.latest_frame(rewritten, key) is None
+    _assert_latest_row(streams.latest_frame(rewritten, key), rewritten)
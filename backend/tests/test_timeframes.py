@@ -0,0 +1,122 @@
+"""
+Tests for multi-timeframe resampling and confluence
+"""
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data_provider import async_data_provider
+from services.indicators import indicator_calculator
+from services.market_snapshot import MarketSnapshotService
+from services.strategy import StrategyEngine
+from services.timeframes import can_resample, resample_ohlc, resample_timeframes
+
+
+@pytest.fixture
+def five_minute_bars():
+    # Spans the US DST switch (2024-03-10) in the exchange timezone
+    rng = np.random.default_rng(1)
+    n = 6000
+    close = 2000 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        "date": pd.date_range("2024-03-06 09:00", periods=n, freq="5min", tz="America/New_York"),
+        "open": close + rng.normal(0, 0.3, n),
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": rng.integers(1, 50, n).astype(float),
+    })
+
+
+@pytest.mark.parametrize("timeframe, rule, closed", [
+    ("1h", "1h", "left"),
+    ("1d", "1D", "left"),
+    ("1wk", "W-MON", "left"),
+])
+def test_resample_matches_pandas(five_minute_bars, timeframe, rule, closed):
+    # Drop a weekend-sized gap so empty buckets must not produce rows
+    bars = five_minute_bars.drop(index=range(1000, 1600)).reset_index(drop=True)
+    expected = (
+        bars.set_index("date")
+        .resample(rule, closed=closed, label="left")
+        .agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        .dropna()
+        .reset_index()
+    )
+
+    result = resample_ohlc(bars, timeframe)
+
+    pd.testing.assert_frame_equal(result, expected, check_freq=False, check_dtype=False)
+
+
+def test_only_coarser_multiples_are_derived(five_minute_bars):
+    assert can_resample("5m", "1h") and can_resample("1h", "1wk")
+    assert not can_resample("1h", "5m") and not can_resample("1d", "4h") and not can_resample("5m", "1mo")
+
+    frames = resample_timeframes(five_minute_bars.tail(50), "1h", ("5m", "1h", "1d"))
+    assert list(frames) == ["1h", "1d"]
+    assert frames["1h"].equals(five_minute_bars.tail(50).reset_index(drop=True))
+
+
+def test_confluence_weights_timeframes_with_enough_history():
+    engine = StrategyEngine()
+    close = 2000 + np.arange(200, dtype=float) * 2
+    rising = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=200, freq="D"),
+        "open": close - 1,
+        "high": close + 3,
+        "low": close - 3,
+        "close": close,
+        "volume": 1.0,
+    })
+    frames = {
+        "1h": indicator_calculator.calculate_all(rising.copy()),
+        "1d": indicator_calculator.calculate_all(rising.copy()),
+        "1wk": indicator_calculator.calculate_all(rising.tail(30).copy()),
+        "90m": indicator_calculator.calculate_all(rising.copy()),  # no weight configured
+    }
+
+    confluence = engine.confluence_score(frames)
+
+    by_timeframe = {reading.timeframe: reading for reading in confluence.timeframes}
+    assert by_timeframe["1wk"].weight == 0  # fewer than 60 bars
+    assert by_timeframe["90m"].weight == 0
+    assert by_timeframe["1h"].weight == pytest.approx(0.4) and by_timeframe["1d"].weight == pytest.approx(0.6)
+    assert confluence.score == pytest.approx(
+        0.4 * by_timeframe["1h"].technical_score + 0.6 * by_timeframe["1d"].technical_score, abs=0.1
+    )
+    assert by_timeframe["1d"].trend_score > 0
+    assert confluence.direction == "bullish" and confluence.agreement == 1.0
+
+    empty = engine.confluence_score({"1d": indicator_calculator.calculate_all(rising.head(10).copy())})
+    assert empty.score == 0 and empty.agreement == 0 and empty.timeframes[0].weight == 0
+
+
+def test_one_upstream_fetch_serves_every_timeframe(five_minute_bars, monkeypatch):
+    calls = []
+
+    async def fetch_price_history(symbol, period="1mo", interval="5m", use_cache=True):
+        calls.append((symbol, period, interval))
+        return five_minute_bars
+
+    monkeypatch.setattr(async_data_provider, "fetch_price_history", fetch_price_history)
+
+    async def scenario():
+        service = MarketSnapshotService()
+        first, second = await asyncio.gather(
+            service.get_timeframes("GC=F", "5m"), service.get_timeframes("GC=F", "5m")
+        )
+        assert first is second
+        assert service.get_status()["views"][-1]["name"] == "timeframes/GC=F/5m"
+        return first
+
+    view = asyncio.run(scenario())
+
+    assert calls == [("GC=F", "1mo", "5m")]
+    assert list(view.frames) == ["1h", "4h", "1d", "1wk"]
+    assert len(view.frames["1h"]) == len(resample_ohlc(five_minute_bars, "1h"))
+    assert "RSI" in view.frames["1d"].columns
+    assert [reading.timeframe for reading in view.confluence.timeframes] == ["1h", "4h", "1d", "1wk"]
+    assert view.confluence.timeframes[-1].weight == 0  # 4 weekly bars
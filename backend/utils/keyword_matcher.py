@@ -0,0 +1,77 @@
+"""
+Multi-pattern keyword matching (Aho-Corasick)
+
+Scanning a text for N keywords with N separate ``in`` tests costs
+O(N * len(text)). The automaton is compiled once from the keyword list
+and finds every keyword occurrence, overlapping ones included, in a
+single pass over the text: O(len(text) + matches), independent of the
+number of keywords.
+"""
+from collections import deque
+from typing import Iterable
+
+
+class KeywordMatcher:
+    """
+    Case-insensitive substring matcher over a fixed keyword list
+
+    Matches have the same semantics as ``keyword.lower() in text.lower()``
+    for every keyword. Immutable after construction, so one instance can be
+    shared between threads.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: tuple[str, ...] = tuple(dict.fromkeys(k.lower() for k in keywords if k))
+
+        # Trie of the keywords
+        goto: list[dict[str, int]] = [{}]
+        outputs: list[set[str]] = [set()]
+        for keyword in self.keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(keyword)
+
+        # Breadth-first: resolve failure links into full transition tables
+        # (missing characters lead back to the root) and merge the outputs
+        # of every state's suffixes into its own
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in range(len(goto) - 1)]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state] |= outputs[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0)
+                queue.append(child)
+
+        self._delta = delta
+        self._outputs: list[frozenset[str]] = [frozenset(out) for out in outputs]
+
+    def find_all(self, text: str) -> set[str]:
+        """Every keyword occurring in ``text`` (one pass)"""
+        found: set[str] = set()
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        for ch in text.lower():
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+    def search(self, text: str) -> bool:
+        """Whether any keyword occurs in ``text`` (stops at the first match)"""
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        for ch in text.lower():
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                return True
+        return False
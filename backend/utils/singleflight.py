@@ -0,0 +1,80 @@
+"""
+Request coalescing (single-flight) for blocking upstream calls
+
+Concurrent callers asking for the same key share one in-flight call: the
+first caller (leader) runs the function, later callers block until it
+finishes and receive the same result or exception. Once the call
+completes the key is released, so the next caller triggers a fresh call.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+
+@dataclass
+class _Call:
+    """State of one in-flight call"""
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: BaseException | None = None
+    followers: int = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls by key (thread-safe)
+
+    Results are shared between callers as-is, so callers must treat them
+    as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._leader_count = 0
+        self._shared_count = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Run ``func`` once for all concurrent callers with the same ``key``"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._leader_count += 1
+                is_leader = True
+            else:
+                call.followers += 1
+                self._shared_count += 1
+                is_leader = False
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        """Number of keys with a call currently running"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> dict[str, int]:
+        """Upstream calls made vs. callers served from a shared call"""
+        with self._lock:
+            return {
+                "upstream_calls": self._leader_count,
+                "coalesced_calls": self._shared_count,
+                "in_flight": len(self._calls),
+            }
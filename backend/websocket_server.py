@@ -8,67 +8,330 @@ WebSocket 服务器
 - 市场深度推送
 - 成交记录推送
 - 心跳保持连接
+
+数据来自可插拔的行情源 (services.market_feed): 一个后台任务消费行情源,
+每个事件只拉取一次再广播给所有订阅者。每个连接有独立的有界发送队列和发送任务,
+慢客户端只会积压 (并合并) 自己的消息。
+
+客户端可通过 /ws?encoding=compact 协商紧凑编码: 订单簿以带序号的增量帧推送
+(见 CompactBookStream)。帧压缩由 permessage-deflate 完成 (WS_PER_MESSAGE_DEFLATE)。
 """
 
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter
-from typing import List, Dict, Set
+from typing import AsyncIterator, List, Dict, Optional, Set
+from collections import Counter, OrderedDict, deque
 import json
 import asyncio
+import time
 from datetime import datetime
 import random
 
+from core.config import settings
+from services.data_provider import async_data_provider
+from services.market_feed import (
+    MarketDataSource,
+    MarketEvent,
+    ProviderPollingSource,
+    RecordingSource,
+    ReplaySource,
+)
+from utils.fast_json import dumps
+
 router = APIRouter()
 
+# 默认订阅的符号
+DEFAULT_SYMBOLS = ['AU9999', 'XAU/USD', settings.GOLD_SYMBOL, settings.WS_DEPTH_SYMBOL]
+
+# 只需最新值的消息类型: 客户端积压时按 (类型, 符号) 合并
+CONFLATED_TYPES = frozenset({'price', 'orderbook', 'market_depth'})
+
+# 连接时通过 /ws?encoding=... 协商的消息编码
+# json: 原始 JSON 消息; compact: 订单簿以定长数组 [价格, 数量] 的增量帧 (type=book) 推送,
+# market_depth 由客户端从订单簿推导, 不再单独推送
+ENCODINGS = ('json', 'compact')
+
+
+def encode_message(message: dict) -> str:
+    """将消息序列化为 JSON 文本帧 (每条广播消息只序列化一次)"""
+    # fast_json 输出 UTF-8 字节; 解码一次得到文本帧内容 (ASGI 中 bytes 会作为二进制帧发送)
+    return dumps(message).decode('utf-8')
+
+
+class CompactBookStream:
+    """
+    单个符号的紧凑订单簿流 (encoding=compact)
+
+    每个档位编码为定长数组 [价格, 数量], 每帧带递增序号 seq。快照帧包含全部档位;
+    增量帧只包含与上一帧相比变化的档位, 数量为 0 表示该档位已移除。
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.seq = 0
+        self.bids: Dict[float, float] = {}
+        self.asks: Dict[float, float] = {}
+
+    @staticmethod
+    def _diff(old: Dict[float, float], new: Dict[float, float]) -> List[list]:
+        changed = [[price, amount] for price, amount in new.items() if old.get(price) != amount]
+        changed.extend([price, 0] for price in old if price not in new)
+        return changed
+
+    def update(self, orderbook: dict) -> tuple:
+        """应用一次 orderbook 推送, 返回 (买盘变化, 卖盘变化)"""
+        bids = {level['price']: level['amount'] for level in orderbook.get('bids', [])}
+        asks = {level['price']: level['amount'] for level in orderbook.get('asks', [])}
+        changes = (self._diff(self.bids, bids), self._diff(self.asks, asks))
+        self.bids, self.asks = bids, asks
+        self.seq += 1
+        return changes
+
+    def frame(self, timestamp: int, changes: Optional[tuple] = None) -> dict:
+        """快照帧 (changes 为空) 或增量帧"""
+        if changes is None:
+            bids = [[price, self.bids[price]] for price in sorted(self.bids, reverse=True)]
+            asks = [[price, self.asks[price]] for price in sorted(self.asks)]
+        else:
+            bids, asks = changes
+        return {
+            'type': 'book',
+            'data': {
+                'symbol': self.symbol,
+                'seq': self.seq,
+                'snapshot': changes is None,
+                'bids': bids,
+                'asks': asks,
+            },
+            'timestamp': timestamp,
+        }
+
+
+class ClientChannel:
+    """
+    单个连接的有界发送队列
+
+    price / orderbook / market_depth 按 (类型, 符号) 合并, 客户端跟不上时只保留最新值;
+    成交等其他消息按顺序排队, 超过上限时丢弃最旧的一条。
+    """
+
+    def __init__(self, max_queue: int, totals: Counter, encoding: str = 'json'):
+        self.max_queue = max_queue
+        self.encoding = encoding
+        # compact 编码下已发送过快照的订单簿 key (之后可以只发增量)
+        self.synced: Set[tuple] = set()
+        # 可合并消息: (类型, 符号) -> 最新的已序列化消息
+        self._latest: OrderedDict[tuple, str] = OrderedDict()
+        # 顺序消息 (成交/心跳/通知)
+        self._ordered: deque = deque()
+        self._ready = asyncio.Event()
+        self._prefer_latest = True
+        # 队列开始积压的时间 (队列清空时重置)
+        self.behind_since: Optional[float] = None
+        self._totals = totals
+
+    def __len__(self) -> int:
+        return len(self._latest) + len(self._ordered)
+
+    def put(self, text: str, key: Optional[tuple] = None):
+        """入队 (不阻塞); key 非空时与同 key 的未发送消息合并"""
+        if key is not None:
+            if key in self._latest:
+                self._totals['conflated'] += 1
+            self._latest[key] = text
+        else:
+            if len(self._ordered) >= self.max_queue:
+                self._ordered.popleft()
+                self._totals['dropped'] += 1
+            self._ordered.append(text)
+        if self.behind_since is None:
+            self.behind_since = time.monotonic()
+        self._ready.set()
+
+    def put_book(self, key: tuple, snapshot: str, delta: str):
+        """
+        入队一帧紧凑订单簿: 已同步且没有待发送帧时发增量; 否则发快照
+        (积压时用最新快照替换待发送的帧, 客户端不会漏掉增量)
+        """
+        if key in self.synced and key not in self._latest:
+            self.put(delta, key)
+        else:
+            self.put(snapshot, key)
+            self.synced.add(key)
+
+    def lagging_for(self, now: float) -> float:
+        """队列持续非空的秒数"""
+        return now - self.behind_since if self.behind_since is not None else 0.0
+
+    async def get(self) -> str:
+        """取下一条待发送消息 (两类消息交替发送)"""
+        while not self:
+            # 上一条已发送完且队列为空: 客户端已跟上
+            self.behind_since = None
+            self._ready.clear()
+            await self._ready.wait()
+        self._prefer_latest = not self._prefer_latest
+        if self._latest and (self._prefer_latest or not self._ordered):
+            return self._latest.popitem(last=False)[1]
+        return self._ordered.popleft()
 
-class ConnectionManager:
-    """WebSocket 连接管理器"""
 
-    def __init__(self):
+class ConnectionManager:
+    """
+    WebSocket 连接管理器
+
+    每个连接有一个有界发送队列 (ClientChannel) 和独立的发送任务。广播时消息只
+    序列化一次, 放入订阅者的队列后立即返回, 慢客户端不会阻塞行情推送和其他客户端;
+    单次发送超时、或队列积压超过 WS_SLOW_CLIENT_TIMEOUT 的连接会被断开。
+    """
+
+    def __init__(
+        self,
+        send_timeout: float = settings.WS_SEND_TIMEOUT,
+        max_queue: int = settings.WS_CLIENT_QUEUE_SIZE,
+        slow_timeout: float = settings.WS_SLOW_CLIENT_TIMEOUT,
+    ):
         # 存储所有活跃的 WebSocket 连接
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Set[WebSocket] = set()
         # 存储订阅的符号
         self.subscriptions: Dict[WebSocket, Set[str]] = {}
-
-    async def connect(self, websocket: WebSocket, symbols: List[str] = None):
+        # 订阅索引: 符号 -> 订阅了该符号的连接 (广播时无需遍历所有连接)
+        self.symbol_index: Dict[str, Set[WebSocket]] = {}
+        # 每个连接的发送队列和发送任务
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
+        self.send_timeout = send_timeout
+        self.max_queue = max_queue
+        self.slow_timeout = slow_timeout
+        # compact 编码的订单簿流 (按符号)
+        self.books: Dict[str, CompactBookStream] = {}
+        # 累计计数: sent / conflated / dropped / send_failures / slow_disconnects
+        self._totals: Counter = Counter()
+        # 正在关闭的连接任务 (保留引用, 避免任务被回收)
+        self._closing: Set[asyncio.Task] = set()
+
+    async def connect(self, websocket: WebSocket, symbols: List[str] = None, encoding: str = 'json'):
         """接受新的 WebSocket 连接"""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        self.subscriptions[websocket] = set(symbols or ['AU9999', 'XAU/USD'])
+        self.active_connections.add(websocket)
+        self._set_subscriptions(websocket, set(symbols or DEFAULT_SYMBOLS))
+        channel = ClientChannel(self.max_queue, self._totals, encoding if encoding in ENCODINGS else 'json')
+        self.channels[websocket] = channel
+        self._writers[websocket] = asyncio.create_task(self._writer(websocket, channel))
         print(f"[WebSocket] 新连接建立. 当前连接数: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         """断开连接"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if websocket in self.subscriptions:
-            del self.subscriptions[websocket]
+        if websocket not in self.active_connections:
+            return
+        self.active_connections.discard(websocket)
+        self._set_subscriptions(websocket, set())
+        del self.subscriptions[websocket]
+        self.channels.pop(websocket, None)
+        writer = self._writers.pop(websocket, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
         print(f"[WebSocket] 连接断开. 当前连接数: {len(self.active_connections)}")
 
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """发送消息给特定连接"""
+    def _set_subscriptions(self, websocket: WebSocket, symbols: Set[str]):
+        """更新连接的订阅集合, 同步维护订阅索引"""
+        previous = self.subscriptions.get(websocket, set())
+        for symbol in previous - symbols:
+            subscribers = self.symbol_index.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self.symbol_index[symbol]
+        for symbol in symbols - previous:
+            self.symbol_index.setdefault(symbol, set()).add(websocket)
+        self.subscriptions[websocket] = symbols
+
+    async def _writer(self, websocket: WebSocket, channel: ClientChannel):
+        """发送任务: 按顺序发送队列中的消息, 发送失败或超时则断开连接"""
+        while True:
+            text = await channel.get()
+            if not await self._send(websocket, text):
+                self._totals['send_failures'] += 1
+                self._drop(websocket)
+                return
+            self._totals['sent'] += 1
+
+    async def _send(self, websocket: WebSocket, text: str) -> bool:
+        """发送已序列化的消息 (带超时), 返回是否成功"""
         try:
-            await websocket.send_text(json.dumps(message, ensure_ascii=False))
+            await asyncio.wait_for(websocket.send_text(text), timeout=self.send_timeout)
+            return True
+        except asyncio.TimeoutError:
+            print(f"[WebSocket] 发送超时 ({self.send_timeout}s), 断开慢连接")
         except Exception as e:
             print(f"[WebSocket] 发送消息失败: {e}")
-            self.disconnect(websocket)
+        return False
+
+    def _drop(self, websocket: WebSocket):
+        """移除连接, 并在后台关闭它"""
+        if websocket not in self.active_connections:
+            return
+        self.disconnect(websocket)
+        task = asyncio.create_task(self._close(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1011), timeout=self.send_timeout)
+        except Exception:
+            pass
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        """发送消息给特定连接 (经由该连接的发送队列, 与广播消息保持顺序)"""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.put(encode_message(message))
 
     async def broadcast(self, message: dict, symbol: str = None):
-        """广播消息给所有订阅了该符号的连接"""
-        disconnected = []
-        for connection in self.active_connections:
-            # 检查是否订阅了该符号
-            if symbol and symbol not in self.subscriptions.get(connection, set()):
+        """广播消息给所有订阅了该符号的连接 (symbol 为空时发给所有连接)"""
+        msg_type = message.get('type')
+        changes = None
+        if msg_type == 'orderbook' and symbol:
+            # 无论是否有 compact 客户端都更新订单簿流, 新订阅者的快照总是最新的
+            book = self.books.setdefault(symbol, CompactBookStream(symbol))
+            changes = book.update(message.get('data') or {})
+
+        targets = self.symbol_index.get(symbol) if symbol else self.active_connections
+        if not targets:
+            return
+
+        # 每种编码只序列化一次
+        text = None
+        book_frames = None
+        key = (msg_type, symbol) if symbol and msg_type in CONFLATED_TYPES else None
+        now = time.monotonic()
+        slow = []
+        for conn in targets:
+            channel = self.channels.get(conn)
+            if channel is None:
                 continue
-
-            try:
-                await connection.send_text(json.dumps(message, ensure_ascii=False))
-            except Exception as e:
-                print(f"[WebSocket] 广播消息失败: {e}")
-                disconnected.append(connection)
-
-        # 清理断开的连接
-        for conn in disconnected:
-            self.disconnect(conn)
+            if channel.encoding == 'compact' and msg_type == 'market_depth':
+                continue
+            if channel.encoding == 'compact' and changes is not None:
+                if book_frames is None:
+                    timestamp = message.get('timestamp') or _now_ms()
+                    book_frames = (
+                        encode_message(book.frame(timestamp)),
+                        encode_message(book.frame(timestamp, changes)),
+                    )
+                channel.put_book(key, *book_frames)
+            else:
+                if text is None:
+                    text = encode_message(message)
+                channel.put(text, key)
+            if channel.lagging_for(now) > self.slow_timeout:
+                slow.append(conn)
+
+        # 断开长时间跟不上的连接
+        for conn in slow:
+            print(f"[WebSocket] 客户端积压超过 {self.slow_timeout}s, 断开连接")
+            self._totals['slow_disconnects'] += 1
+            self._drop(conn)
 
     def get_subscriptions(self, websocket: WebSocket) -> Set[str]:
         """获取连接的订阅列表"""
@@ -76,9 +339,35 @@ class ConnectionManager:
 
     def update_subscriptions(self, websocket: WebSocket, symbols: List[str]):
         """更新连接的订阅"""
-        self.subscriptions[websocket] = set(symbols)
+        if websocket not in self.active_connections:
+            return
+        self._set_subscriptions(websocket, set(symbols))
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            # 取消订阅的符号重新订阅时需要先收到快照
+            channel.synced = {key for key in channel.synced if key[1] in symbols}
         print(f"[WebSocket] 更新订阅: {symbols}")
 
+    def resync(self, websocket: WebSocket, symbols: List[str]):
+        """客户端检测到 seq 不连续时请求重新同步: 下一帧订单簿发送快照"""
+        channel = self.channels.get(websocket)
+        if channel is not None:
+            channel.synced = {key for key in channel.synced if key[1] not in symbols}
+
+    def get_stats(self) -> dict:
+        """连接数、各符号订阅数、发送队列深度和累计计数"""
+        depths = [len(channel) for channel in self.channels.values()]
+        return {
+            'connections': len(self.active_connections),
+            'subscribers': {symbol: len(conns) for symbol, conns in self.symbol_index.items()},
+            'queued': sum(depths),
+            'max_queue_depth': max(depths, default=0),
+            'queue_limit': self.max_queue,
+            **{name: self._totals[name] for name in (
+                'sent', 'conflated', 'dropped', 'send_failures', 'slow_disconnects'
+            )},
+        }
+
 
 # 全局连接管理器
 manager = ConnectionManager()
@@ -177,60 +466,91 @@ async def generate_trade_data(symbol: str) -> dict:
     }
 
 
-async def price_update_task():
-    """价格更新任务 - 每2秒推送一次"""
-    while True:
-        for symbol in ['AU9999', 'XAU/USD']:
-            price_data = await generate_price_data(symbol)
-            message = {
-                'type': 'price',
-                'data': price_data,
-                'timestamp': int(datetime.now().timestamp() * 1000)
-            }
-            await manager.broadcast(message, symbol)
-        await asyncio.sleep(2)
-
-
-async def orderbook_update_task():
-    """订单簿更新任务 - 每5秒推送一次"""
-    while True:
-        for symbol in ['AU9999', 'XAU/USD']:
-            orderbook_data = await generate_orderbook_data(symbol)
-            message = {
-                'type': 'orderbook',
-                'data': orderbook_data,
-                'timestamp': int(datetime.now().timestamp() * 1000)
-            }
-            await manager.broadcast(message, symbol)
-        await asyncio.sleep(5)
-
-
-async def market_depth_update_task():
-    """市场深度更新任务 - 每10秒推送一次"""
-    while True:
-        for symbol in ['AU9999', 'XAU/USD']:
-            depth_data = await generate_market_depth_data(symbol)
-            message = {
-                'type': 'market_depth',
-                'data': depth_data,
-                'timestamp': int(datetime.now().timestamp() * 1000)
-            }
-            await manager.broadcast(message, symbol)
-        await asyncio.sleep(10)
-
-
-async def trade_update_task():
-    """成交记录更新任务 - 随机推送"""
+class SimulatedSource(MarketDataSource):
+    """模拟行情源 (随机数据, 用于演示)"""
+
+    name = "simulated"
+    symbols = ['AU9999', 'XAU/USD']
+
+    async def events(self) -> AsyncIterator[MarketEvent]:
+        queue: asyncio.Queue[MarketEvent] = asyncio.Queue()
+
+        async def periodic(event_type: str, generate, interval: float):
+            while True:
+                for symbol in self.symbols:
+                    queue.put_nowait(MarketEvent(event_type, symbol, await generate(symbol), _now_ms()))
+                await asyncio.sleep(interval)
+
+        async def trades():
+            while True:
+                symbol = random.choice(self.symbols)
+                queue.put_nowait(MarketEvent('trade', symbol, await generate_trade_data(symbol), _now_ms()))
+                await asyncio.sleep(random.uniform(1, 3))
+
+        generators = [
+            asyncio.create_task(periodic('price', generate_price_data, 2)),  # 每2秒
+            asyncio.create_task(periodic('orderbook', generate_orderbook_data, 5)),  # 每5秒
+            asyncio.create_task(periodic('market_depth', generate_market_depth_data, 10)),  # 每10秒
+            asyncio.create_task(trades()),  # 随机间隔
+        ]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            for task in generators:
+                task.cancel()
+            await asyncio.gather(*generators, return_exceptions=True)
+
+
+def _now_ms() -> int:
+    return int(datetime.now().timestamp() * 1000)
+
+
+def create_market_source(name: Optional[str] = None) -> MarketDataSource:
+    """根据配置创建行情源: provider (轮询数据源) / replay (文件回放) / simulated (模拟)"""
+    name = (name or settings.WS_FEED_SOURCE).strip().lower()
+    if name == 'replay':
+        if not settings.WS_REPLAY_PATH:
+            raise ValueError("WS_FEED_SOURCE=replay requires WS_REPLAY_PATH")
+        source: MarketDataSource = ReplaySource(
+            settings.WS_REPLAY_PATH,
+            speed=settings.WS_REPLAY_SPEED,
+            loop=settings.WS_REPLAY_LOOP,
+        )
+    elif name == 'simulated':
+        source = SimulatedSource()
+    else:
+        source = ProviderPollingSource(
+            async_data_provider,
+            quote_symbol=settings.GOLD_SYMBOL,
+            depth_symbol=settings.WS_DEPTH_SYMBOL,
+            depth_limit=settings.WS_DEPTH_LIMIT,
+            price_interval=settings.WS_PRICE_POLL_INTERVAL,
+            depth_interval=settings.WS_DEPTH_POLL_INTERVAL,
+        )
+    if settings.WS_RECORD_PATH:
+        source = RecordingSource(source, settings.WS_RECORD_PATH)
+    return source
+
+
+async def market_feed_task(source: MarketDataSource):
+    """行情推送任务 - 消费行情源并广播给订阅者 (行情源异常时5秒后重启)"""
     while True:
-        symbol = random.choice(['AU9999', 'XAU/USD'])
-        trade_data = await generate_trade_data(symbol)
-        message = {
-            'type': 'trade',
-            'data': trade_data,
-            'timestamp': int(datetime.now().timestamp() * 1000)
-        }
-        await manager.broadcast(message, symbol)
-        await asyncio.sleep(random.uniform(1, 3))
+        try:
+            async for event in source.events():
+                message = {
+                    'type': event.type,
+                    'data': event.data,
+                    'timestamp': _now_ms()
+                }
+                await manager.broadcast(message, event.symbol)
+            print(f"[WebSocket] 行情源 {source.name} 已结束")
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[WebSocket] 行情源 {source.name} 错误: {e}, 5秒后重启")
+            await asyncio.sleep(5)
 
 
 async def heartbeat_task():
@@ -246,11 +566,11 @@ async def heartbeat_task():
 
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket 端点"""
+async def websocket_endpoint(websocket: WebSocket, encoding: str = 'json'):
+    """WebSocket 端点 (encoding: json / compact, 见 ENCODINGS)"""
     # 等待客户端发送订阅请求
     try:
-        await manager.connect(websocket)
+        await manager.connect(websocket, encoding=encoding)
 
         # 发送欢迎消息
         welcome_message = {
@@ -303,6 +623,10 @@ async def websocket_endpoint(websocket: WebSocket):
                 }
                 await manager.send_personal_message(confirm_message, websocket)
 
+            elif message.get('type') == 'resync':
+                # 重新同步订单簿 (compact 编码)
+                manager.resync(websocket, message.get('data', {}).get('symbols', []))
+
             elif message.get('type') == 'ping':
                 # 响应心跳
                 pong_message = {
@@ -320,37 +644,18 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-# 启动后台任务的函数
-def start_background_tasks():
-    """启动所有后台推送任务"""
-    import asyncio
+def start_background_tasks(source: Optional[MarketDataSource] = None) -> List[asyncio.Task]:
+    """启动后台推送任务 (行情推送 + 心跳), 在应用 lifespan 中调用"""
+    source = source or create_market_source()
+    print(f"[WebSocket] 行情源: {source.name}")
+    return [
+        asyncio.create_task(market_feed_task(source)),
+        asyncio.create_task(heartbeat_task()),
+    ]
 
-    async def run_tasks():
-        await asyncio.gather(
-            price_update_task(),
-            orderbook_update_task(),
-            market_depth_update_task(),
-            trade_update_task(),
-            heartbeat_task()
-        )
 
-    # 在应用启动时调用
-    return run_tasks
-
-
-# 使用示例:
-# 在 main.py 中:
-#
-# from websocket_server import router, start_background_tasks
-# from fastapi import FastAPI
-# import asyncio
-#
-# app = FastAPI()
-#
-# # 注册 WebSocket 路由
-# app.include_router(router)
-#
-# # 启动后台任务
-# @app.on_event("startup")
-# async def startup_event():
-#     asyncio.create_task(start_background_tasks())
+async def stop_background_tasks(tasks: List[asyncio.Task]):
+    """停止后台推送任务"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -135,16 +135,47 @@ export interface ChartDataPoint {
   resistance?: number
 }
 
+// Support/resistance zone clustered from swing highs and lows
+export interface PriceZone {
+  level: number
+  low: number
+  high: number
+  touches: number
+  strength: number  // 近因加权的触及次数
+  bars_since_touch: number
+  last_touch?: string | null
+}
+
+// Legacy point-list shape (GET /chart?format=points)
 export interface ChartData {
   symbol: string
   period: string
   data: ChartDataPoint[]
   key_levels: Record<string, number>
+  support_zones?: PriceZone[]
+  resistance_zones?: PriceZone[]
+}
+
+// Columnar chart data: parallel arrays, one entry per bar
+export type ChatStreamSource = 'llm' | 'rules' | 'error'
+
+export interface ChartSeries {
+  symbol: string
+  period: string
+  interval: string
+  timestamps: number[]  // epoch milliseconds (UTC)
+  close: number[]
+  ma_short: (number | null)[]
+  ma_mid: (number | null)[]
+  key_levels: Record<string, number>
+  support_zones?: PriceZone[]  // 按强度排序
+  resistance_zones?: PriceZone[]
 }
 
 export interface OrderLevel {
   price: number
   volume: number
+  total?: number  // 累计量
 }
 
 export interface MarketDepthResponse {
@@ -157,6 +188,7 @@ export interface MarketDepthResponse {
   total_bid_volume: number
   total_ask_volume: number
   bid_ask_ratio: number
+  imbalance: number  // (买量-卖量)/(买量+卖量)
   data_source: string
   symbol: string
   is_simulated: boolean
@@ -205,8 +237,8 @@ export const apiAnalysis = {
     symbol = 'GC=F',
     period = '1y',
     interval = '1d'
-  ): Promise<ChartData> => {
-    const response = await api.get<ChartData>('/chart', {
+  ): Promise<ChartSeries> => {
+    const response = await api.get<ChartSeries>('/chart', {
       params: { symbol, period, interval },
     })
     return response.data
@@ -218,6 +250,40 @@ export const apiAnalysis = {
     return response.data
   },
 
+  // Streaming chat query (Server-Sent Events); onToken receives each text chunk
+  streamQuery: async (question: string, onToken: (text: string) => void): Promise<ChatStreamSource> => {
+    const response = await fetch(`${api.defaults.baseURL}/chat/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+      body: JSON.stringify({ question }),
+    })
+    if (!response.ok || !response.body) {
+      throw new Error(`Chat stream failed: ${response.status}`)
+    }
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let source: ChatStreamSource = 'error'
+    for (;;) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      let boundary
+      while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+        const block = buffer.slice(0, boundary)
+        buffer = buffer.slice(boundary + 2)
+        const event = block.match(/^event: (.*)$/m)?.[1]
+        const data = block.match(/^data: (.*)$/m)?.[1]
+        if (!data) continue
+        const payload = JSON.parse(data)
+        if (event === 'token') onToken(payload.text)
+        else if (event === 'done') source = payload.source
+      }
+    }
+    return source
+  },
+
   // Get market depth (order book) data
   getMarketDepth: async (symbol = 'PAXGUSDT', limit = 10): Promise<MarketDepthResponse> => {
     const response = await api.get<MarketDepthResponse>('/market-depth', {
@@ -10,20 +10,29 @@ export type ConnectionState = 'connecting' | 'connected' | 'disconnected' | 'err
 
 // WebSocket 消息类型
 export interface WSMessage {
-  type: 'price' | 'orderbook' | 'market_depth' | 'trade' | 'news' | 'heartbeat'
+  type: 'price' | 'orderbook' | 'market_depth' | 'book' | 'trade' | 'news' | 'heartbeat'
   data: any
   timestamp: number
 }
 
-// 价格推送数据
+// 价格推送数据 (XAU/USD、AU9999 额外携带 /gold-prices 的字段)
 export interface WSPriceData {
   symbol: string
   price: number
   change: number
   changePercent: number
   volume?: number
+  timestamp?: number
+  change_pct?: number
+  update_time?: string
+  data_source?: string
+  is_available?: boolean
+  unit?: string
 }
 
+// 默认订阅: 伦敦金、AU9999、黄金期货、PAXG 订单簿
+export const DEFAULT_WS_SYMBOLS = ['AU9999', 'XAU/USD', 'GC=F', 'PAXGUSDT']
+
 // 订单簿推送数据
 export interface WSOrderBookData {
   symbol: string
@@ -37,6 +46,25 @@ export interface WSMarketDepthData {
   data: { price: number; bidVolume: number; askVolume: number }[]
 }
 
+// 消息编码 (连接时通过 ?encoding= 协商)
+// compact: 订单簿以带序号的增量帧 (book) 推送, 订单簿和市场深度在本地重建
+export type WSEncoding = 'json' | 'compact'
+
+// 紧凑订单簿帧: 档位为 [价格, 数量], 增量帧中数量为 0 表示移除该档位
+export interface WSBookData {
+  symbol: string
+  seq: number
+  snapshot: boolean
+  bids: [number, number][]
+  asks: [number, number][]
+}
+
+interface LocalBook {
+  seq: number
+  bids: Map<number, number>
+  asks: Map<number, number>
+}
+
 // 成交推送数据
 export interface WSTradeData {
   symbol: string
@@ -49,6 +77,8 @@ export interface WSTradeData {
 class WebSocketService {
   private ws: WebSocket | null = null
   private url: string
+  private encoding: WSEncoding
+  private books = new Map<string, LocalBook>()
   private reconnectAttempts = 0
   private maxReconnectAttempts = 5
   private reconnectDelay = 3000
@@ -67,8 +97,9 @@ class WebSocketService {
   private onNewsCallback: ((data: any) => void) | null = null
   private onStateChangeCallback: ((state: ConnectionState) => void) | null = null
 
-  constructor(url: string) {
+  constructor(url: string, encoding: WSEncoding = 'compact') {
     this.url = url
+    this.encoding = encoding
   }
 
   // 连接 WebSocket
@@ -81,7 +112,8 @@ class WebSocketService {
     this.notifyStateChange()
 
     try {
-      this.ws = new WebSocket(this.url)
+      const separator = this.url.includes('?') ? '&' : '?'
+      this.ws = new WebSocket(`${this.url}${separator}encoding=${this.encoding}`)
 
       this.ws.onopen = this.handleOpen.bind(this)
       this.ws.onmessage = this.handleMessage.bind(this)
@@ -99,6 +131,8 @@ class WebSocketService {
     this.stopHeartbeat()
 
     if (this.ws) {
+      // 主动断开时不触发自动重连
+      this.ws.onclose = null
       this.ws.close()
       this.ws = null
     }
@@ -168,13 +202,14 @@ class WebSocketService {
     console.log('[WebSocket] 连接成功')
     this.connectionState.value = 'connected'
     this.reconnectAttempts = 0
+    this.books.clear()
     this.notifyStateChange()
 
     // 启动心跳
     this.startHeartbeat()
 
     // 订阅初始数据
-    this.send('subscribe', { symbols: ['AU9999', 'XAU/USD'] })
+    this.send('subscribe', { symbols: DEFAULT_WS_SYMBOLS })
   }
 
   // 处理接收消息
@@ -195,6 +230,9 @@ class WebSocketService {
         case 'market_depth':
           this.onMarketDepthCallback?.(message.data as WSMarketDepthData)
           break
+        case 'book':
+          this.handleBook(message.data as WSBookData)
+          break
         case 'trade':
           this.onTradeCallback?.(message.data as WSTradeData)
           break
@@ -212,6 +250,45 @@ class WebSocketService {
     }
   }
 
+  // 应用紧凑订单簿帧, 重建订单簿和市场深度
+  private handleBook(data: WSBookData): void {
+    let book = this.books.get(data.symbol)
+    if (data.snapshot) {
+      book = { seq: data.seq, bids: new Map(data.bids), asks: new Map(data.asks) }
+      this.books.set(data.symbol, book)
+    } else if (!book || data.seq !== book.seq + 1) {
+      // 序号不连续: 丢弃本地订单簿, 请求服务端重新发送快照
+      this.books.delete(data.symbol)
+      this.send('resync', { symbols: [data.symbol] })
+      return
+    } else {
+      for (const [side, levels] of [[book.bids, data.bids], [book.asks, data.asks]] as const) {
+        for (const [price, amount] of levels) {
+          if (amount) side.set(price, amount)
+          else side.delete(price)
+        }
+      }
+      book.seq = data.seq
+    }
+
+    const bids = [...book.bids].sort((a, b) => b[0] - a[0])
+    const asks = [...book.asks].sort((a, b) => a[0] - b[0])
+    const withTotals = (levels: [number, number][]) => {
+      let total = 0
+      return levels.map(([price, amount]) => ({ price, amount, total: (total += amount) }))
+    }
+
+    this.onOrderBookCallback?.({ symbol: data.symbol, bids: withTotals(bids), asks: withTotals(asks) })
+    this.onMarketDepthCallback?.({
+      symbol: data.symbol,
+      // 价格阶梯: 从最高卖价到最低买价
+      data: [
+        ...asks.reverse().map(([price, amount]) => ({ price, bidVolume: 0, askVolume: amount })),
+        ...bids.map(([price, amount]) => ({ price, bidVolume: amount, askVolume: 0 })),
+      ],
+    })
+  }
+
   // 处理错误
   private handleError(error: Event): void {
     console.error('[WebSocket] 错误:', error)
@@ -279,9 +356,9 @@ class WebSocketService {
 // 导出单例
 let wsService: WebSocketService | null = null
 
-export function createWebSocketService(url: string): WebSocketService {
+export function createWebSocketService(url: string, encoding: WSEncoding = 'compact'): WebSocketService {
   if (!wsService) {
-    wsService = new WebSocketService(url)
+    wsService = new WebSocketService(url, encoding)
   }
   return wsService
 }
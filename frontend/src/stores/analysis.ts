@@ -67,16 +67,26 @@ export const useAnalysisStore = defineStore('analysis', () => {
     }
   }
 
+  // 更新当前价格 (REST 轮询或 WebSocket 推送)
+  function applyPrice(price: number, change: number, changePct: number, refreshTime: Date) {
+    if (!analysis.value) return
+    analysis.value.current_price = price
+    analysis.value.price_change = change
+    analysis.value.price_change_pct = changePct
+    // 更新金价刷新时间(来自后端)
+    priceRefreshTime.value = refreshTime
+  }
+
   async function fetchPriceOnly() {
     try {
       const priceData = await apiAnalysis.getPrice()
-      if (priceData.success && analysis.value) {
-        // 更新当前价格
-        analysis.value.current_price = priceData.current_price
-        analysis.value.price_change = priceData.price_change
-        analysis.value.price_change_pct = priceData.price_change_pct
-        // 更新金价刷新时间(来自后端)
-        priceRefreshTime.value = new Date(priceData.price_refresh_time)
+      if (priceData.success) {
+        applyPrice(
+          priceData.current_price,
+          priceData.price_change,
+          priceData.price_change_pct,
+          new Date(priceData.price_refresh_time),
+        )
       }
     } catch (e) {
       console.error('Error fetching price:', e)
@@ -125,6 +135,7 @@ export const useAnalysisStore = defineStore('analysis', () => {
     // Actions
     fetchAnalysis,
     refreshData,
+    applyPrice,
     fetchPriceOnly,
     startPriceAutoRefresh,
     stopPriceAutoRefresh,
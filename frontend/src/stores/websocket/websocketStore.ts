@@ -29,6 +29,9 @@ export const useWebSocketStore = defineStore('websocket', () => {
   // 实时价格数据
   const realtimePrices = ref<Map<string, WSPriceData>>(new Map())
 
+  // 价格推送监听器
+  const priceListeners = new Set<(data: WSPriceData) => void>()
+
   // 是否自动重连
   const autoReconnect = ref(true)
 
@@ -79,6 +82,15 @@ export const useWebSocketStore = defineStore('websocket', () => {
     realtimePrices.value.set(data.symbol, data)
     lastMessageTime.value = Date.now()
     messageCount.value++
+    priceListeners.forEach((listener) => listener(data))
+  }
+
+  // 注册价格推送监听, 返回取消函数
+  const onPrice = (listener: (data: WSPriceData) => void) => {
+    priceListeners.add(listener)
+    return () => {
+      priceListeners.delete(listener)
+    }
   }
 
   // 处理订单簿数据
@@ -149,6 +161,7 @@ export const useWebSocketStore = defineStore('websocket', () => {
 
     // Methods
     getRealtimePrice,
+    onPrice,
     send,
     subscribe,
     unsubscribe,